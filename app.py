@@ -1,14 +1,34 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, send_from_directory
 import json
+import mimetypes
 import os
 import uuid
-import random
 import time
 import threading
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
+from hand_evaluator import (cards_to_ints, score_to_strength, evaluate_card_hands, get_tables,
+                            VARIANTS, DEFAULT_VARIANT, evaluate_players, evaluate_player_hand)
+from preflop_equity import get_preflop_equity, canonical_index, hand_label, load_table
+from draw_analysis import ANALYSIS_STREETS, analyze_draws, analyze_own_draws
+from scheduler import Scheduler
+from tournament import Tournament, TournamentError, DEFAULT_BLIND_LEVELS
+from singleflight import SingleFlight
+from player_stats import PlayerStats
+from hand_history import HandHistory, build_record, MAX_PAGE_SIZE
+from settlement import build_settlement, ledger_csv
+from workers import cpu_pool, io_pool, WorkerBusy
+from concurrent.futures import TimeoutError as FuturesTimeout
+from persistence import atomic_write_json, load_json
+from startup import Startup
+from wire import WireEncoder, parse_since
+from shuffle_service import ShuffleService, commitment, replay_deal
+import assets
+import bots
 
-app = Flask(__name__)
+# 静态文件由下面的 static 路由提供（带指纹缓存和预压缩）
+app = Flask(__name__, static_folder=None)
 app.secret_key = 'texas_poker_secret_key'
 
 # 用户认证配置
@@ -37,17 +57,44 @@ DEFAULT_USERS = {
 # 游戏配置文件路径
 CONFIG_FILE = 'game_config.json'
 GAME_DATA_FILE = 'game_data.json'
+TOURNAMENT_FILE = 'tournament.json'
+PLAYER_STATS_FILE = 'player_stats.json'
+HAND_HISTORY_FILE = 'hand_history.jsonl'
+SETTLEMENT_LEDGER_FILE = 'settlement_ledger.json'
+
+# 当前牌桌的后台任务 key：同一张牌桌的存盘任务按提交顺序执行
+TABLE_JOB_KEY = 'table'
+
+# 请求线程等待进程池计算结果的最长时间（秒）
+CPU_JOB_TIMEOUT = 30
+
+# 启动完成前到达的请求最多等待多久（秒），超过返回 503
+STARTUP_WAIT_SECONDS = 10
+
+# 可以提前选择的行动：弃牌、过牌、过牌/弃牌、跟注（当前金额）、跟注任意金额
+PRE_ACTIONS = ('fold', 'check', 'check_fold', 'call', 'call_any')
 
 # 默认游戏配置
 DEFAULT_CONFIG = {
     'small_blind': 10,
     'big_blind': 20,
     'buy_in_amount': 1000,
-    'action_timeout': 30,  # 玩家行动超时时间（秒）
+    'action_timeout': 30,  # 玩家每次行动的基础时间（秒）
+    'time_bank_seconds': 60,  # 时间银行上限（秒），基础时间用完后继续消耗
+    'time_bank_refill_seconds': 10,  # 每手牌开始时补充的时间银行（秒）
     'ready_timeout': 60,   # 准备超时时间（秒）
-    'default_add_chips': 1000  # 默认添加筹码金额
+    'default_add_chips': 1000,  # 默认添加筹码金额
+    'game_variant': DEFAULT_VARIANT,  # 玩法：holdem, shortdeck, plo4, plo5
+    'auto_deal': False,  # 自动发牌：结算展示结束后自动开始下一手，不需要确认和准备
+    'result_display_seconds': 5,  # 自动发牌时结算结果的展示时间（秒）
+    'away_grace_seconds': 10,  # 超过这么久没有心跳/轮询就标记为离线（秒）
+    'bot_fill_to': 0,  # 能发牌的玩家不足这个人数时用机器人补上（0 表示不用机器人）
+    'bot_think_seconds': 1  # 机器人行动前停顿的时间（秒），决策本身不到 10 毫秒
 }
 
+# 牌桌座位数
+SEAT_COUNT = 8
+
 # 默认游戏数据
 DEFAULT_GAME_DATA = {
     'players': {},
@@ -66,27 +113,97 @@ DEFAULT_GAME_DATA = {
     'timers': {}  # 存储各种计时器
 }
 
+# 批量评估单次请求允许的最大手牌数
+MAX_BATCH_HANDS = 200000
+
+# 结算结果缓存的手牌数（按 hand_id 的 LRU）
+HAND_RESULTS_CACHE_SIZE = 64
+
+# 最近手牌的结算结果缓存
+hand_results_cache = OrderedDict()
+hand_results_lock = threading.Lock()
+
+# 摊牌时展示所有人手牌的时间（秒）
+SHOWDOWN_DISPLAY_SECONDS = 5
+
+# 全局定时任务调度器（盲注升级、自动发牌等）
+scheduler = Scheduler()
+
+# 幂等请求去重：每个会话保留最近若干个请求ID对应的响应，重试时直接返回原响应
+REQUEST_DEDUP_CACHE_SIZE = 128
+# 同一个请求ID正在处理时，重复请求最多等待的时间（秒）
+REQUEST_DEDUP_WAIT_SECONDS = 10
+request_dedup_cache = {}
+request_dedup_lock = threading.Lock()
+
+# 在线状态：玩家最后一次心跳或轮询的时间，以及已被标记为离线的玩家（只在内存中）
+player_last_seen = {}
+away_players = set()
+presence_lock = threading.Lock()
+
+# 牌桌公共状态的并发轮询合并，结果缓存很短的时间
+GAME_STATE_CACHE_TTL = 0.5
+game_state_flight = SingleFlight(ttl=GAME_STATE_CACHE_TTL)
+
+# 二进制协议编码器（保留最近的公共状态用于增量帧）
+wire_encoder = WireEncoder()
+
+# 牌桌数据的读-改-写都在这把锁里完成，避免调度器线程和请求线程互相覆盖
+game_lock = threading.RLock()
+
+# 当前锦标赛（没有则为 None）
+tournament_lock = threading.RLock()
+current_tournament = None
+
+# 玩家统计（VPIP、PFR 等），引擎事件增量累加，启动时从文件加载
+player_stats = PlayerStats()
+
+# 手牌历史（只追加的 JSONL 文件，内存里只有索引），启动任务里加载；
+# 启动任务完成前就有手牌结束（定时任务触发的超时、自动发牌）时，由写入方先加载
+hand_history = None
+hand_history_lock = threading.Lock()
+
+# 启动恢复和预热（完成前其他请求等待）
+startup = Startup()
+
+# 可验证洗牌：后台预先洗好的牌池，开局时只取一副
+shuffle_service = ShuffleService()
+
 # 扑克牌定义
 SUITS = ['♠', '♥', '♦', '♣']
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 
-def create_deck():
-    """创建一副新牌"""
-    deck = []
-    for suit in SUITS:
-        for rank in RANKS:
-            deck.append({'suit': suit, 'rank': rank})
-    random.shuffle(deck)
-    return deck
+def base_deck(variant=DEFAULT_VARIANT):
+    """按固定顺序排列的一副牌（短牌去掉2~5），洗牌的排列作用在这个顺序上"""
+    min_rank = VARIANTS[variant]['min_rank']
+    return [{'suit': suit, 'rank': rank} for suit in SUITS for rank in RANKS[min_rank:]]
+
+def create_deck(variant=DEFAULT_VARIANT):
+    """从洗牌池取一副洗好的牌，返回 (牌堆, 洗牌记录 {seed, commitment})"""
+    cards = base_deck(variant)
+    shuffle = shuffle_service.take(len(cards))
+    deck = [cards[i] for i in shuffle['order']]
+    return deck, {'seed': shuffle['seed'], 'commitment': shuffle['commitment']}
+
+def is_dealt_in(player):
+    """玩家下一手是否发牌：有座位、有筹码、没有暂离也没有离线"""
+    return (player.get('position') is not None and player.get('chips', 0) > 0 and 
+            not player.get('sitting_out', False) and not player.get('away', False))
 
 def deal_hole_cards(game_data):
     """发底牌给每个玩家"""
-    active_players = [p for p in game_data['players'].values() if p.get('position') is not None and p.get('chips', 0) > 0]
+    active_players = [p for p in game_data['players'].values() if is_dealt_in(p)]
     
-    # 每个玩家发2张牌
+    # 暂离或没有筹码的玩家本手不参与，按已弃牌处理，行动顺序会跳过他们
+    for player in game_data['players'].values():
+        if player.get('position') is not None and not is_dealt_in(player):
+            player['folded'] = True
+    
+    # 每个玩家按玩法发底牌（德州2张，奥马哈4/5张）
+    hole_card_count = VARIANTS[game_data.get('variant', DEFAULT_VARIANT)]['hole_cards']
     for player in active_players:
         player['hole_cards'] = []
-        for _ in range(2):
+        for _ in range(hole_card_count):
             if game_data['deck']:
                 card = game_data['deck'].pop()
                 player['hole_cards'].append(card)
@@ -96,10 +213,11 @@ def deal_hole_cards(game_data):
         player['total_invested_this_hand'] = 0  # 初始化累积投入
 
 def get_next_player_position(game_data, current_pos):
-    """获取下一个玩家位置（包括所有有座位的玩家）"""
-    # 获取所有有座位的玩家
+    """获取下一个玩家位置（有座位的玩家，跳过本手不在牌局中的离线玩家）"""
+    # 获取所有有座位的玩家；离线玩家只有本手还没弃牌时才保留（轮到时会被自动处理）
     seated_players = [p for p in game_data['players'].values() 
-                     if p.get('position') is not None]
+                     if p.get('position') is not None and 
+                     (not p.get('away') or (p.get('hole_cards') and not p.get('folded')) or p.get('position') == current_pos)]
     
     if not seated_players:
         return None
@@ -115,8 +233,7 @@ def get_next_player_position(game_data, current_pos):
 
 def post_blinds(game_data, config):
     """下盲注"""
-    active_players = [p for p in game_data['players'].values() 
-                     if p.get('position') is not None and p.get('chips', 0) > 0]
+    active_players = [p for p in game_data['players'].values() if is_dealt_in(p)]
     
     if len(active_players) < 2:
         return
@@ -131,6 +248,17 @@ def post_blinds(game_data, config):
         dealer_index = 0
         game_data['dealer_position'] = positions[0]
     
+    # 下前注（死注，不计入本轮下注额）
+    ante = config.get('ante', 0)
+    if ante > 0:
+        for player in active_players:
+            ante_amount = min(ante, player['chips'])
+            player['chips'] -= ante_amount
+            game_data['current_pot'] += ante_amount
+            player['total_invested_this_hand'] = player.get('total_invested_this_hand', 0) + ante_amount
+            if player['chips'] == 0:
+                player['all_in'] = True
+    
     # 小盲位置（庄家下一位）
     small_blind_pos = positions[(dealer_index + 1) % len(positions)]
     # 大盲位置（小盲下一位）
@@ -172,48 +300,268 @@ def post_blinds(game_data, config):
     
     # 设置最小下注额和当前玩家
     game_data['min_bet'] = config['big_blind']
-    # 第一个行动的玩家是大盲的下一位
-    game_data['current_player'] = get_next_player_position(game_data, big_blind_pos)
+    # 第一个行动的玩家是大盲之后第一个能行动的玩家（跳过本手不参与的座位和被盲注打成全押的玩家）
+    advance_to_next_player(game_data, big_blind_pos)
 
 def load_config():
     """加载游戏配置"""
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return DEFAULT_CONFIG.copy()
+    return load_json(CONFIG_FILE, DEFAULT_CONFIG.copy)
 
 def save_config(config):
     """保存游戏配置"""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    atomic_write_json(CONFIG_FILE, config)
+    game_state_flight.invalidate()
 
 def load_game_data():
-    """加载游戏数据"""
-    if os.path.exists(GAME_DATA_FILE):
-        with open(GAME_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    else:
-        # 文件不存在时，创建默认的游戏数据文件
-        default_data = DEFAULT_GAME_DATA.copy()
-        save_game_data(default_data)
-        return default_data
+    """加载游戏数据（文件损坏时从备份恢复）"""
+    data = load_json(GAME_DATA_FILE)
+    if data is None:
+        # 文件不存在（或损坏且没有备份）时，创建默认的游戏数据文件
+        data = DEFAULT_GAME_DATA.copy()
+        save_game_data(data)
+    return data
 
 def save_game_data(data):
-    """保存游戏数据"""
-    with open(GAME_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """保存游戏数据（每次保存牌桌版本号加1）"""
+    data['version'] = data.get('version', 0) + 1
+    atomic_write_json(GAME_DATA_FILE, data)
+    # 文件时间戳的精度有限，本进程写入时直接让缓存的公共状态失效
+    game_state_flight.invalidate()
+
+def load_tournament():
+    """加载锦标赛数据"""
+    data = load_json(TOURNAMENT_FILE)
+    return Tournament.from_dict(data) if data is not None else None
+
+def save_tournament(tournament):
+    """保存锦标赛数据"""
+    atomic_write_json(TOURNAMENT_FILE, tournament.to_dict())
+
+def load_player_stats():
+    """加载玩家统计"""
+    data = load_json(PLAYER_STATS_FILE)
+    return PlayerStats.from_dict(data) if data is not None else PlayerStats()
+
+def write_player_stats(data):
+    """把玩家统计快照写入文件"""
+    atomic_write_json(PLAYER_STATS_FILE, data)
+
+def save_player_stats():
+    """保存玩家统计（调用时取快照，写盘交给 I/O 线程池）"""
+    io_pool.submit(write_player_stats, player_stats.to_dict(), key=TABLE_JOB_KEY)
+
+def load_settlement_ledger():
+    """加载已保存的结算快照（按时间先后）"""
+    return load_json(SETTLEMENT_LEDGER_FILE, list)
+
+def save_settlement_ledger(ledger):
+    """保存结算快照"""
+    atomic_write_json(SETTLEMENT_LEDGER_FILE, ledger)
+
+def append_settlement_ledger(settlement):
+    """把一次结算追加到账本"""
+    ledger = load_settlement_ledger()
+    ledger.append(settlement)
+    save_settlement_ledger(ledger)
+
+def open_hand_history():
+    """手牌历史存储，还没加载时先加载（只加载一次）"""
+    global hand_history
+    with hand_history_lock:
+        if hand_history is None:
+            hand_history = HandHistory(HAND_HISTORY_FILE)
+        return hand_history
+
+def append_hand_history(record):
+    """写入一手牌（I/O 线程里执行，执行时才取存储，启动任务还没加载完也不会丢）"""
+    open_hand_history().append(record)
+
+def record_hand_history(game_data, results):
+    """把刚结算的一手牌写入手牌历史（记录在调用时生成，写盘交给 I/O 线程池）"""
+    if game_data.get('hand_id'):
+        io_pool.submit(append_hand_history, build_record(game_data, results), key=TABLE_JOB_KEY)
+
+def run_cpu_job(fn, *args):
+    """在进程池里执行 CPU 密集任务并等待结果（不要在持有 game_lock 时调用）
+
+    队列已满或超时抛出 WorkerBusy
+    """
+    future = cpu_pool.submit(fn, *args, block=False)
+    try:
+        return future.result(CPU_JOB_TIMEOUT)
+    except FuturesTimeout:
+        future.cancel()
+        raise WorkerBusy('计算超时')
+
+def schedule_tournament_level(tournament):
+    """为下一次盲注升级安排定时任务"""
+    next_level_at = tournament.next_level_at()
+    if next_level_at is None:
+        scheduler.cancel('tournament_level')
+    else:
+        scheduler.schedule_at(next_level_at, advance_tournament_level, key='tournament_level')
+
+def advance_tournament_level():
+    """定时任务：升一级盲注"""
+    with tournament_lock:
+        tournament = current_tournament
+        if tournament is None or not tournament.advance_level():
+            return
+        level = tournament.current_level()
+        print(f"锦标赛升到第 {tournament.level_index + 1} 级: {level['small_blind']}/{level['big_blind']} 前注 {level['ante']}")
+        save_tournament(tournament)
+        schedule_tournament_level(tournament)
+
+def restore_tournament():
+    """启动时恢复锦标赛并补齐停机期间错过的升级"""
+    global current_tournament
+    with tournament_lock:
+        current_tournament = load_tournament()
+        if current_tournament is not None and current_tournament.status == 'running':
+            if current_tournament.catch_up_levels():
+                save_tournament(current_tournament)
+            schedule_tournament_level(current_tournament)
+
+def get_effective_config(config):
+    """锦标赛进行中时，用当前级别的盲注和前注覆盖配置"""
+    with tournament_lock:
+        tournament = current_tournament
+        if tournament is None or tournament.status != 'running':
+            return config
+        level = tournament.current_level()
+        effective = dict(config)
+        effective['small_blind'] = level['small_blind']
+        effective['big_blind'] = level['big_blind']
+        effective['ante'] = level.get('ante', 0)
+        return effective
+
+def is_tournament_table(game_data):
+    """牌桌是否正在进行锦标赛（开始时现金局的筹码和座位保存在 tournament_table 里）"""
+    return 'tournament_table' in game_data
+
+def seat_tournament(game_data, tournament):
+    """锦标赛开始：保存现金局的筹码、借码次数和座位，选手换成起始筹码并坐到分配的座位
+
+    锦标赛只使用这一张牌桌（选手不超过 SEAT_COUNT 人），其他玩家离座，机器人离场。
+    """
+    players = game_data['players']
+    cash = {pid: {'chips': p.get('chips', 0), 'borrow_count': p.get('borrow_count', 1), 'position': p.get('position')}
+            for pid, p in players.items() if not p.get('bot')}
+    for player_id in [pid for pid, p in players.items() if p.get('bot')]:
+        del players[player_id]
+    for player in players.values():
+        player['position'] = None
+    
+    for player_id, entrant in tournament.players.items():
+        player = players.setdefault(player_id, {
+            'id': player_id,
+            'borrow_count': 1,
+            'joined_at': datetime.now().isoformat()
+        })
+        player['chips'] = tournament.starting_chips
+        player['position'] = entrant['seat']
+        player.pop('sitting_out', None)
+    
+    game_data['tournament_table'] = {'cash': cash, 'entrants': list(tournament.players)}
+    game_data['game_state'] = 'waiting'
+    game_data['dealer_position'] = 0
+    game_data['ready_players'] = []
+    game_data.pop('ready_start_time', None)
+
+def restore_cash_table(game_data):
+    """锦标赛结束（或中止）后恢复现金局的筹码、借码次数和座位，为锦标赛才加入的选手离开牌桌"""
+    table = game_data.pop('tournament_table', None)
+    if table is None:
+        return
+    players = game_data['players']
+    for player_id in table['entrants']:
+        if player_id not in table['cash']:
+            players.pop(player_id, None)
+    for player_id, saved in table['cash'].items():
+        if player_id in players:
+            players[player_id].update(saved)
+    game_data['dealer_position'] = 0
+    print("锦标赛牌桌已恢复为现金局")
+
+def sync_tournament_chips(game_data):
+    """一手牌结束后把选手的筹码同步到锦标赛，被淘汰的选手离座；锦标赛结束后恢复现金局"""
+    if not is_tournament_table(game_data):
+        return
+    with tournament_lock:
+        tournament = current_tournament
+        if tournament is not None and tournament.status == 'running':
+            # 输光的选手在重置时已经离座，所以按选手名单上报（被删除的用户按0筹码计）
+            chips_by_player = {pid: game_data['players'].get(pid, {}).get('chips', 0)
+                               for pid in tournament.active_players()}
+            eliminated = tournament.report_chips(chips_by_player)
+            for player_id in eliminated:
+                print(f"锦标赛选手 {player_id} 被淘汰，名次 {tournament.players[player_id]['place']}")
+                if player_id in game_data['players']:
+                    game_data['players'][player_id]['position'] = None
+            save_tournament(tournament)
+            if tournament.status == 'running':
+                return
+            scheduler.cancel('tournament_level')
+            print(f"锦标赛结束，冠军: {tournament.standings()[0]['id']}")
+    restore_cash_table(game_data)
+
+def touch_presence(player_id, config):
+    """记录玩家在线，并安排宽限期后的离线检测（同一玩家只保留一个检测任务）"""
+    now = time.time()
+    with presence_lock:
+        player_last_seen[player_id] = now
+    scheduler.schedule_at(now + config.get('away_grace_seconds', 10), check_presence, player_id,
+                          key=f'presence:{player_id}')
+
+def check_presence(player_id):
+    """调度器回调：宽限期内没有心跳的玩家标记为离线"""
+    config = load_config()
+    with presence_lock:
+        last_seen = player_last_seen.get(player_id, 0)
+    if time.time() - last_seen < config.get('away_grace_seconds', 10):
+        return
+    with game_lock:
+        mark_player_away(load_game_data(), player_id, config)
+
+def mark_player_away(game_data, player_id, config):
+    """把玩家标记为离线：轮到他时立即自动过牌或弃牌，之后的手牌不再发牌
+
+    返回 True 表示状态有变化（已保存）。
+    """
+    player = game_data['players'].get(player_id)
+    if not player or player.get('position') is None or player.get('away'):
+        return False
+    player['away'] = True
+    print(f"玩家 {player_id} 已离线")
+    with presence_lock:
+        away_players.add(player_id)
+    if player_id in game_data.get('ready_players', []):
+        game_data['ready_players'].remove(player_id)
+    
+    # 正好轮到他时不用等行动超时
+    if game_data['game_state'] == 'playing':
+        process_pre_actions(game_data, get_effective_config(config))
+    save_game_data(game_data)
+    return True
+
+def mark_player_back(game_data, player_id):
+    """玩家重新连上，清除离线标记，返回是否有变化"""
+    with presence_lock:
+        away_players.discard(player_id)
+    player = game_data['players'].get(player_id)
+    if not player or not player.get('away'):
+        return False
+    player.pop('away', None)
+    print(f"玩家 {player_id} 重新上线")
+    return True
 
 def load_users():
     """加载用户数据"""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return DEFAULT_USERS.copy()
+    return load_json(USERS_FILE, DEFAULT_USERS.copy)
 
 def save_users(users):
     """保存用户数据"""
-    with open(USERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    atomic_write_json(USERS_FILE, users)
 
 def login_required(f):
     """登录验证装饰器"""
@@ -237,6 +585,135 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def idempotent(f):
+    """幂等请求装饰器
+
+    客户端在 X-Request-Id 头（或 JSON 的 client_request_id）里带上请求ID，
+    同一会话重复提交同一个ID时不再执行，直接返回第一次的响应，客户端可以放心重试。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        request_id = request.headers.get('X-Request-Id') or (request.get_json(silent=True) or {}).get('client_request_id')
+        if not request_id:
+            return f(*args, **kwargs)
+        
+        with request_dedup_lock:
+            cache = request_dedup_cache.setdefault(session.get('username'), OrderedDict())
+            entry = cache.get(request_id)
+            is_replay = entry is not None
+            if not is_replay:
+                entry = {'done': threading.Event(), 'response': None}
+                cache[request_id] = entry
+                while len(cache) > REQUEST_DEDUP_CACHE_SIZE:
+                    cache.popitem(last=False)
+        
+        if is_replay:
+            # 第一次请求可能还在处理，等它完成后返回同样的结果
+            entry['done'].wait(REQUEST_DEDUP_WAIT_SECONDS)
+            if entry['response'] is None:
+                return jsonify({'success': False, 'message': '请求正在处理中，请稍后重试'})
+            body, status = entry['response']
+            response = app.response_class(body, status=status, mimetype='application/json')
+            response.headers['X-Idempotent-Replay'] = '1'
+            return response
+        
+        try:
+            response = app.make_response(f(*args, **kwargs))
+            entry['response'] = (response.get_data(), response.status_code)
+            return response
+        except Exception:
+            # 执行失败的请求允许用同一个ID重试
+            with request_dedup_lock:
+                request_dedup_cache.get(session.get('username'), {}).pop(request_id, None)
+            raise
+        finally:
+            entry['done'].set()
+    return decorated_function
+
+def check_table_version(game_data, data):
+    """客户端带了 table_version 且牌桌已经变化时返回错误响应，否则返回 None"""
+    table_version = data.get('table_version', request.headers.get('X-Table-Version'))
+    if table_version is None or str(table_version) == str(game_data.get('version', 0)):
+        return None
+    return jsonify({
+        'success': False,
+        'stale': True,
+        'message': '牌桌状态已变化，请确认后重新操作',
+        'version': game_data.get('version', 0)
+    })
+
+def with_game_lock(f):
+    """牌桌数据读写加锁装饰器"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with game_lock:
+            return f(*args, **kwargs)
+    return decorated_function
+
+@app.context_processor
+def inject_asset_url():
+    """模板里用 asset_url() 生成带内容指纹的静态资源地址"""
+    def asset_url(filename):
+        return url_for('static', filename=filename, v=assets.asset_version(filename))
+    return {'asset_url': asset_url}
+
+@app.route('/static/<path:filename>')
+def static(filename):
+    """静态资源：指纹匹配时长期缓存，并优先返回预压缩版本"""
+    served, encoding = assets.choose_encoding(filename, request.headers.get('Accept-Encoding'))
+    response = send_from_directory(assets.STATIC_DIR, served, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response.vary.add('Accept-Encoding')
+    version = assets.asset_version(filename)
+    if version and request.args.get('v') == version:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = assets.IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+@app.after_request
+def finalize_json_response(response):
+    """JSON 接口加 ETag（内容没变返回 304）并按需 gzip 压缩
+
+    带 server_time 这类每次都变的字段的响应设置了 no_store，ETag 永远不会命中，不加
+    """
+    if response.mimetype != 'application/json':
+        return response
+    if request.method == 'GET' and response.status_code == 200 and not response.cache_control.no_store:
+        response.add_etag(weak=True)
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return assets.compress_json_response(response, request.headers.get('Accept-Encoding'))
+
+@app.before_request
+def wait_for_startup():
+    """启动恢复和预热完成之前，请求先等待（就绪检查和静态文件除外）"""
+    if startup.ready:
+        return None
+    start_app()
+    if request.endpoint in ('readiness', 'static'):
+        return None
+    if not startup.wait(STARTUP_WAIT_SECONDS):
+        return jsonify({'success': False, 'message': '服务器启动中，请稍后重试'}), 503
+    return None
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """就绪检查：启动恢复和预热完成后返回 200，之前返回 503（给部署脚本和负载均衡用）"""
+    status = startup.status()
+    return jsonify(dict(status, success=status['ready'])), 200 if status['ready'] else 503
+
+@app.errorhandler(WorkerBusy)
+def handle_worker_busy(error):
+    """后台任务池满了：让客户端稍后重试"""
+    print(f"后台任务繁忙: {error}")
+    return jsonify({'success': False, 'busy': True, 'message': '服务器繁忙，请稍后重试'})
+
 @app.route('/')
 def index():
     """主游戏页面"""
@@ -294,10 +771,12 @@ def admin():
         return redirect(url_for('index'))
     
     config = load_config()
-    return render_template('admin.html', config=config)
+    return render_template('admin.html', config=config, variants=VARIANTS)
 
 @app.route('/api/join_game', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def join_game():
     """玩家加入游戏"""
     player_id = session.get('username')
@@ -333,6 +812,8 @@ def join_game():
 
 @app.route('/api/change_position', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def change_position():
     """切换玩家位置"""
     data = request.get_json()
@@ -347,20 +828,30 @@ def change_position():
     if player_id not in game_data['players']:
         return jsonify({'success': False, 'message': '玩家不存在'})
     
-    # 检查位置是否被占用
-    for pid, player in game_data['players'].items():
+    if is_tournament_table(game_data):
+        return jsonify({'success': False, 'message': '锦标赛进行中，座位由系统分配'})
+    
+    # 检查位置是否被占用（两手牌之间机器人给玩家让座）
+    for pid, player in list(game_data['players'].items()):
         if pid != player_id and player.get('position') == new_position:
+            if player.get('bot') and game_data['game_state'] not in ('playing', 'showdown'):
+                del game_data['players'][pid]
+                continue
             return jsonify({'success': False, 'message': '该位置已被占用'})
     
     game_data['players'][player_id]['position'] = new_position
+    sync_bots(game_data, load_config())
     save_game_data(game_data)
     
     return jsonify({'success': True, 'message': '位置切换成功'})
 
 @app.route('/api/add_chips', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def add_chips():
     """添加筹码"""
+    data = request.get_json(silent=True) or {}
     player_id = session.get('player_id')
     
     if not player_id:
@@ -369,12 +860,20 @@ def add_chips():
     game_data = load_game_data()
     config = load_config()
     
+    # 基于旧状态的补码（例如页面还没显示上一次补码的结果）不执行
+    stale = check_table_version(game_data, data)
+    if stale:
+        return stale
+    
     # 使用配置中的默认添加筹码金额
     amount = config.get('default_add_chips', 1000)
     
     if player_id not in game_data['players']:
         return jsonify({'success': False, 'message': '玩家不存在'})
     
+    if is_tournament_table(game_data):
+        return jsonify({'success': False, 'message': '锦标赛进行中，不能补充筹码'})
+    
     player = game_data['players'][player_id]
     player['chips'] += amount
     player['borrow_count'] += 1  # 添加筹码会增加借码次数
@@ -401,13 +900,20 @@ def check_timeouts(game_data, config):
         ready_players = game_data.get('ready_players', set())
         if isinstance(ready_players, list):
             ready_players = set(ready_players)
+        ready_or_bot = ready_player_ids(game_data)
             
         for player_id, player in game_data['players'].items():
-            if (player.get('position') is not None and 
-                player_id not in ready_players):
+            if (player.get('position') is not None and not player.get('sitting_out', False) and 
+                not player.get('away', False) and 
+                player_id not in ready_or_bot):
                 players_to_remove.append(player_id)
         
         for player_id in players_to_remove:
+            if is_tournament_table(game_data):
+                # 锦标赛选手不踢出（筹码不是买入的），改为暂离，回来后可以继续比赛
+                print(f"锦标赛选手 {player_id} 准备超时，改为暂离")
+                game_data['players'][player_id]['sitting_out'] = True
+                continue
             print(f"玩家 {player_id} 准备超时，被踢出游戏")
             game_data['players'][player_id]['position'] = None
             game_data['players'][player_id]['chips'] = 0
@@ -416,8 +922,8 @@ def check_timeouts(game_data, config):
         game_data['ready_players'] = ready_players - set(players_to_remove)
         
         # 重新检查是否可以开始游戏
-        remaining_players = [p for p in game_data['players'].values() if p.get('position') is not None]
-        if len(remaining_players) >= 2 and len(game_data['ready_players']) == len(remaining_players):
+        remaining_players = [pid for pid, p in game_data['players'].items() if is_dealt_in(p)]
+        if len(remaining_players) >= 2 and set(remaining_players) <= ready_player_ids(game_data):
             start_game_internal(game_data, config)
         else:
             # 重置到等待状态
@@ -427,94 +933,282 @@ def check_timeouts(game_data, config):
             
         save_game_data(game_data)
     
-    # 检查行动超时
+    # 检查行动超时（正常由调度器在截止时间处理，这里兜底，例如服务重启后）
     elif (game_data['game_state'] == 'playing' and 
-          game_data.get('action_start_time') and 
-          current_time - game_data['action_start_time'] > config['action_timeout']):
+          game_data.get('time_bank_deadline') and 
+          current_time > game_data['time_bank_deadline']):
+        handle_action_timeout(game_data, config)
+
+def handle_action_timeout(game_data, config):
+    """当前玩家的基础时间和时间银行都用完：能过牌就过牌，否则弃牌"""
+    # 找到当前行动的玩家
+    current_player_pos = game_data.get('current_player')
+    current_player = None
+    current_player_id = None
+    
+    if current_player_pos:
+        for player_id, player in game_data['players'].items():
+            if player.get('position') == current_player_pos:
+                current_player = player
+                current_player_id = player_id
+                break
+    
+    if current_player and not current_player.get('folded') and not current_player.get('all_in'):
+        # 自动过牌或弃牌
+        max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values() if p.get('position') is not None], default=0)
+        if current_player.get('current_bet', 0) == max_bet:
+            print(f"玩家 {current_player_id} 行动超时，自动过牌")
+            apply_player_action(game_data, config, current_player_id, 'check')
+        else:
+            # 需要跟注，自动弃牌
+            print(f"玩家 {current_player_id} 行动超时，自动弃牌")
+            apply_player_action(game_data, config, current_player_id, 'fold')
         
-        # 找到当前行动的玩家
-        current_player_pos = game_data.get('current_player')
-        current_player = None
-        current_player_id = None
+        # 接下来的玩家如果有预选行动，继续执行
+        process_pre_actions(game_data, config)
         
-        if current_player_pos:
-            for player_id, player in game_data['players'].items():
-                if player.get('position') == current_player_pos:
-                    current_player = player
-                    current_player_id = player_id
-                    break
+        save_game_data(game_data)
+
+def start_action_clock(game_data):
+    """轮到新的玩家时计算他的合法行动并启动行动计时
+
+    先用基础时间，用完后消耗他的时间银行；截止时间交给调度器处理，不依赖轮询。
+    """
+    config = get_effective_config(load_config())
+    now = time.time()
+    _, player = get_player_at_position(game_data, game_data.get('current_player'))
+    game_data['legal_actions'] = compute_legal_actions(game_data, player, config) if player else None
+    game_data['action_start_time'] = now
+    game_data['action_deadline'] = now + config['action_timeout']
+    game_data['time_bank_deadline'] = game_data['action_deadline'] + (player.get('time_bank', 0) if player else 0)
+    scheduler.schedule_at(game_data['time_bank_deadline'], action_clock_expired, game_data.get('hand_id'),
+                          game_data.get('current_player'), game_data['time_bank_deadline'], key='action_clock')
+    if player and player.get('bot'):
+        scheduler.schedule_at(now + config.get('bot_think_seconds', 1), bot_turn, game_data.get('hand_id'),
+                              game_data.get('current_player'), game_data['time_bank_deadline'], key='bot_turn')
+
+def action_clock_expired(hand_id, position, deadline):
+    """调度器回调：行动截止时间到了，玩家仍未行动"""
+    with game_lock:
+        game_data = load_game_data()
+        if (game_data.get('game_state') != 'playing' or game_data.get('hand_id') != hand_id or 
+                game_data.get('current_player') != position or game_data.get('time_bank_deadline') != deadline):
+            return
+        handle_action_timeout(game_data, get_effective_config(load_config()))
+
+def bot_turn(hand_id, position, deadline):
+    """调度器回调：轮到机器人行动，和玩家一样通过 apply_player_action 行动"""
+    with game_lock:
+        game_data = load_game_data()
+        if (game_data.get('game_state') != 'playing' or game_data.get('hand_id') != hand_id or 
+                game_data.get('current_player') != position or game_data.get('time_bank_deadline') != deadline):
+            return
+        player_id, player = get_player_at_position(game_data, position)
+        if not player or not player.get('bot') or player.get('folded') or player.get('all_in'):
+            return
         
-        if current_player and not current_player.get('folded') and not current_player.get('all_in'):
-            # 自动过牌或弃牌
-            max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values() if p.get('position') is not None], default=0)
-            if current_player.get('current_bet', 0) == max_bet:
-                # 可以过牌，不需要额外操作
-                print(f"玩家 {current_player_id} 行动超时，自动过牌")
-            else:
-                # 需要跟注，自动弃牌
-                current_player['folded'] = True
-                print(f"玩家 {current_player_id} 行动超时，自动弃牌")
-            
-            # 移动到下一个玩家
-            game_data['current_player'] = get_next_player_position(game_data, current_player_pos)
-            game_data['action_start_time'] = time.time()
-            
-            # 检查是否需要进入下一轮或结束游戏
-            check_betting_round_end(game_data)
-            
-            save_game_data(game_data)
+        config = get_effective_config(load_config())
+        legal = get_legal_actions(game_data, player, config)
+        opponents = sum(1 for pid, p in game_data['players'].items() 
+                        if pid != player_id and p.get('hole_cards') and not p.get('folded'))
+        action, amount = bots.decide(player['hole_cards'], game_data.get('community_cards', []),
+                                     game_data.get('variant', DEFAULT_VARIANT), opponents,
+                                     game_data.get('current_pot', 0), legal, config['big_blind'])
+        success, message = apply_player_action(game_data, config, player_id, action, amount)
+        if not success:
+            print(f"机器人 {player_id} 行动失败（{message}），改为过牌或弃牌")
+            apply_player_action(game_data, config, player_id, 'check' if legal['can_check'] else 'fold')
+        
+        process_pre_actions(game_data, config)
+        save_game_data(game_data)
+
+def sync_bots(game_data, config):
+    """两手牌之间按配置调整机器人，返回是否有变化
+
+    能发牌的玩家不足 bot_fill_to 人时机器人坐到空座位上补足，人多了机器人离开；
+    输光的机器人离开，需要时换一个带满筹码的新机器人。
+    """
+    # 锦标赛只有报名的选手入座
+    if game_data['game_state'] in ('playing', 'showdown') or is_tournament_table(game_data):
+        return False
+    players = game_data['players']
+    changed = False
+    
+    for player_id in [pid for pid, p in players.items() 
+                      if p.get('bot') and (p.get('position') is None or p.get('chips', 0) <= 0)]:
+        del players[player_id]
+        changed = True
+    
+    target = min(config.get('bot_fill_to', 0), SEAT_COUNT)
+    humans = sum(1 for p in players.values() if not p.get('bot') and is_dealt_in(p))
+    bot_ids = [pid for pid, p in players.items() if p.get('bot')]
+    while bot_ids and humans + len(bot_ids) > target:
+        del players[bot_ids.pop()]
+        changed = True
+    
+    taken_seats = {p.get('position') for p in players.values()}
+    free_seats = [seat for seat in range(SEAT_COUNT, 0, -1) if seat not in taken_seats]
+    if humans + len(bot_ids) < target and free_seats:
+        taken_ids = set(players) | set(load_users())
+        while humans + len(bot_ids) < target and free_seats:
+            bot_id = bots.new_bot_id(taken_ids)
+            taken_ids.add(bot_id)
+            players[bot_id] = {
+                'id': bot_id,
+                'chips': config['buy_in_amount'],
+                'borrow_count': 1,
+                'position': free_seats.pop(0),
+                'joined_at': datetime.now().isoformat(),
+                'bot': True
+            }
+            bot_ids.append(bot_id)
+            changed = True
+    
+    if changed:
+        print(f"机器人: {', '.join(bot_ids) or '无'}")
+    return changed
+
+def ready_player_ids(game_data):
+    """已准备的玩家（机器人总是准备好的）"""
+    ready = set(game_data.get('ready_players', []))
+    ready.update(pid for pid, p in game_data['players'].items() if p.get('bot'))
+    return ready
+
+def consume_time_bank(game_data, player):
+    """玩家行动后，超出基础时间的部分从他的时间银行扣除"""
+    deadline = game_data.get('action_deadline')
+    if deadline and 'time_bank' in player:
+        overtime = time.time() - deadline
+        if overtime > 0:
+            player['time_bank'] = max(0, round(player['time_bank'] - overtime, 1))
+
+def refill_time_banks(game_data, config):
+    """每手开始时给发到牌的玩家补充时间银行，第一次发牌时直接充满"""
+    max_bank = config.get('time_bank_seconds', 60)
+    refill = config.get('time_bank_refill_seconds', 10)
+    for player in game_data['players'].values():
+        if player.get('hole_cards'):
+            player['time_bank'] = min(max_bank, player['time_bank'] + refill) if 'time_bank' in player else max_bank
+
+def get_my_legal_actions(game_data, player_id, config):
+    """轮到该玩家行动时返回他的合法行动，否则返回 None（不修改 game_data）"""
+    if game_data['game_state'] != 'playing' or player_id not in game_data['players']:
+        return None
+    player = game_data['players'][player_id]
+    if player.get('position') != game_data.get('current_player') or player.get('folded') or player.get('all_in'):
+        return None
+    return get_legal_actions(game_data, player, config, cache=False)
 
 @app.route('/api/get_game_state')
 @login_required
 def get_game_state():
-    """获取游戏状态"""
-    game_data = load_game_data()
-    config = load_config()
-    player_id = session.get('player_id')
-    
-    # 检查超时
-    check_timeouts(game_data, config)
+    """获取游戏状态
     
-    # 检查showdown状态
-    if game_data.get('game_state') == 'showdown':
-        # 在showdown状态下计算hand_results用于显示
-        if 'hand_results' not in game_data:
-            active_players = [(pid, p) for pid, p in game_data['players'].items() 
-                             if p.get('position') is not None and not p.get('folded', False)]
-            total_invested = {}
-            for pid, player in game_data['players'].items():
-                if player.get('position') is not None:
-                    total_invested[pid] = player.get('current_bet', 0)
-            
-            results = calculate_hand_results(game_data, active_players, total_invested)
-            game_data['hand_results'] = results
-            save_game_data(game_data)
-        
-        if time.time() - game_data.get('showdown_start_time', 0) >= 5:
-            # 5秒后进入结算
-            game_data['game_state'] = 'hand_ended'
-            game_data['hand_end_time'] = time.time()
-            distribute_winnings(game_data, game_data['hand_results'])
-            save_game_data(game_data)
+    公共部分（超时检查、摊牌结算、序列化）按牌桌版本经 single-flight 合并，
+    同一时刻的并发轮询只计算一次；这里只补上当前玩家自己的信息。
+    format=bin 时返回二进制帧（见 wire.py），带 since 时只返回变化的部分。
+    """
+    player_id = session.get('player_id')
+    game_data, config, public_json, public_state = game_state_flight.do(get_table_state_key(), build_public_state)
+    
+    # 轮询也算心跳；离线后重新出现的玩家恢复在线
+    if player_id:
+        touch_presence(player_id, config)
+        if game_data['players'].get(player_id, {}).get('away'):
+            with game_lock:
+                latest = load_game_data()
+                if mark_player_back(latest, player_id):
+                    try_auto_start(latest, config)
+                    save_game_data(latest)
+            game_data, config, public_json, public_state = game_state_flight.do(get_table_state_key(), build_public_state)
     
     # 为当前玩家提供手牌信息
     current_player_cards = None
     if player_id and player_id in game_data['players']:
         current_player_cards = game_data['players'][player_id].get('hole_cards', [])
     
-    # 计算剩余时间
-    remaining_time = None
+    # 翻牌前查表给出起手牌胜率（按本手发到牌的人数）
+    my_preflop_equity = None
+    my_hand_label = None
+    if (current_player_cards and game_data['game_state'] == 'playing' and 
+        game_data.get('betting_round') == 'preflop' and 
+        game_data.get('variant', DEFAULT_VARIANT) == 'holdem'):
+        dealt_count = sum(1 for p in game_data['players'].values() if p.get('hole_cards'))
+        my_preflop_equity = get_preflop_equity(current_player_cards, dealt_count)
+        my_hand_label = hand_label(canonical_index(current_player_cards))
+    
+    private_state = {
+        'my_cards': current_player_cards,
+        'my_preflop_equity': my_preflop_equity,
+        'my_hand_label': my_hand_label,
+        'my_pre_action': (game_data.get('pre_actions') or {}).get(player_id),
+        'my_legal_actions': get_my_legal_actions(game_data, player_id, config),
+        'my_sitting_out': bool(game_data['players'].get(player_id, {}).get('sitting_out')),
+        'server_time': time.time()
+    }
+    
+    if request.args.get('format') == 'bin':
+        body = wire_encoder.encode(public_state, private_state, parse_since(request.args.get('since')))
+        response = app.response_class(body, mimetype='application/octet-stream')
+        response.cache_control.no_cache = True
+        return response
+    
+    # 公共部分已经序列化好，直接拼上当前玩家的字段
+    body = public_json[:-1] + ',' + app.json.dumps(private_state)[1:]
+    response = app.response_class(body, mimetype='application/json')
+    # server_time 每次都不同，缓存的旧响应会让客户端倒计时校准出错
+    response.cache_control.no_store = True
+    return response
+
+def get_table_state_key():
+    """牌桌状态的版本 key：游戏数据或配置文件变化时随之变化，只需要 stat 不用读文件"""
+    key = []
+    for path in (GAME_DATA_FILE, CONFIG_FILE):
+        try:
+            key.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+def build_public_state():
+    """加载牌桌、处理超时和摊牌结算，生成所有人看到的公共状态
+
+    返回 (game_data, config, 公共状态 JSON, 公共状态)；game_data 和公共状态会被并发请求共享，只读。
+    """
+    with game_lock:
+        game_data = load_game_data()
+        config = get_effective_config(load_config())
+        
+        # 检查超时
+        check_timeouts(game_data, config)
+        
+        # 检查showdown状态
+        if game_data.get('game_state') == 'showdown':
+            # 在showdown状态下计算hand_results用于显示（同一手牌只计算和保存一次）
+            if settle_hand_results(game_data):
+                save_game_data(game_data)
+            
+            if time.time() - game_data.get('showdown_start_time', 0) >= SHOWDOWN_DISPLAY_SECONDS:
+                # 展示结束后进入结算
+                finish_showdown(game_data)
+                save_game_data(game_data)
+                schedule_auto_deal(game_data, config)
+    
+    # 当前阶段的截止时间（绝对时间），客户端用 server_time 校准后自己倒计时
+    deadline = None
+    action_deadline = None
     if game_data['game_state'] == 'ready_phase' and game_data.get('ready_start_time'):
-        elapsed = time.time() - game_data['ready_start_time']
-        remaining_time = max(0, config['ready_timeout'] - elapsed)
-    elif game_data['game_state'] == 'playing' and game_data.get('action_start_time'):
-        elapsed = time.time() - game_data['action_start_time']
-        remaining_time = max(0, config['action_timeout'] - elapsed)
+        deadline = game_data['ready_start_time'] + config['ready_timeout']
+    elif game_data['game_state'] == 'playing' and game_data.get('time_bank_deadline'):
+        action_deadline = game_data.get('action_deadline')
+        deadline = game_data['time_bank_deadline']
     elif game_data['game_state'] == 'showdown' and game_data.get('showdown_start_time'):
-        elapsed = time.time() - game_data['showdown_start_time']
-        remaining_time = max(0, 5 - elapsed)
+        deadline = game_data['showdown_start_time'] + SHOWDOWN_DISPLAY_SECONDS
+    elif game_data['game_state'] == 'hand_ended' and config.get('auto_deal') and game_data.get('hand_end_time'):
+        # 自动发牌模式下下一手开始的时间
+        deadline = game_data['hand_end_time'] + config.get('result_display_seconds', 5)
     
-    response_data = {
+    public_state = {
         'players': game_data['players'],
         'config': config,
         'game_state': game_data['game_state'],
@@ -524,23 +1218,33 @@ def get_game_state():
         'betting_round': game_data.get('betting_round', 'preflop'),
         'min_bet': game_data.get('min_bet', 0),
         'dealer_position': game_data.get('dealer_position', 0),
-        'my_cards': current_player_cards,
+        'auto_deal': bool(config.get('auto_deal')),
         'ready_players': list(game_data.get('ready_players', set())),
-        'remaining_time': remaining_time,
-        'hand_id': game_data.get('hand_id')
+        'deadline': deadline,
+        'action_deadline': action_deadline,
+        'hand_id': game_data.get('hand_id'),
+        'version': game_data.get('version', 0),
+        'variant': game_data.get('variant', config.get('game_variant', DEFAULT_VARIANT)),
+        'variants': {key: v['name'] for key, v in VARIANTS.items()}
     }
     
+    # 洗牌承诺开局时公布，种子等这手牌结束（不再发牌）后才公布
+    shuffle = game_data.get('shuffle') or {}
+    public_state['deck_commitment'] = shuffle.get('commitment')
+    public_state['deck_seed'] = (shuffle.get('seed')
+                                 if game_data['game_state'] not in ('playing', 'showdown') else None)
+    
     # 添加结算信息
     if game_data.get('hand_results'):
         # 转换hand_results格式，添加玩家统计信息
         hand_results = []
         results = game_data['hand_results']
         
-        # 获取所有参与的玩家
+        # 获取所有参与的玩家（暂离没有发牌的玩家不显示）
         participating_players = set()
-        for player_id, player in game_data['players'].items():
-            if player.get('position') is not None:
-                participating_players.add(player_id)
+        for pid, player in game_data['players'].items():
+            if player.get('position') is not None and pid in results.get('total_invested', {}):
+                participating_players.add(pid)
         
         # 获取获胜者ID列表
         winner_ids = set()
@@ -567,7 +1271,7 @@ def get_game_state():
                         break
             else:
                 # 失败者的净收益是负的投入金额
-                net_gain = -player.get('current_bet', 0)
+                net_gain = -results.get('total_invested', {}).get(player_id, player.get('current_bet', 0))
             
             # 获取手牌强度描述
             hand_strength_text = get_hand_strength_description(hand_strength) if hand_strength else "未知"
@@ -583,40 +1287,118 @@ def get_game_state():
                 'losses': player.get('losses', 0)
             })
         
-        response_data['hand_results'] = hand_results
+        public_state['hand_results'] = hand_results
     
-    return jsonify(response_data)
+    return game_data, config, app.json.dumps(public_state), public_state
 
 @app.route('/api/player_action', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def player_action():
     """玩家行动"""
     data = request.get_json()
     player_id = session.get('player_id')
-    action = data.get('action')  # 'call', 'raise', 'fold', 'check'
+    action = data.get('action')  # 'call', 'raise', 'fold', 'check', 'allin'
     amount = data.get('amount', 0)
     
     if not player_id:
         return jsonify({'success': False, 'message': '请先加入游戏'})
     
     game_data = load_game_data()
-    config = load_config()
+    config = get_effective_config(load_config())
+    
+    # 基于旧状态做出的行动（例如别人刚加注）不执行
+    stale = check_table_version(game_data, data)
+    if stale:
+        return stale
+    
+    success, message = apply_player_action(game_data, config, player_id, action, amount)
+    if not success:
+        return jsonify({'success': False, 'message': message})
+    
+    # 接下来轮到的玩家如果已经预选了行动，立即依次执行
+    auto_actions = process_pre_actions(game_data, config)
+    
+    save_game_data(game_data)
+    
+    return jsonify({'success': True, 'message': message, 'auto_actions': auto_actions, 'version': game_data['version']})
+
+@app.route('/api/pre_action', methods=['POST'])
+@login_required
+@idempotent
+@with_game_lock
+def pre_action():
+    """提前选择行动，轮到自己时由服务器立即执行（action 为空表示取消）"""
+    data = request.get_json() or {}
+    player_id = session.get('player_id')
+    action = data.get('action')
+    
+    if not player_id:
+        return jsonify({'success': False, 'message': '请先加入游戏'})
+    
+    game_data = load_game_data()
+    config = get_effective_config(load_config())
     
     if game_data['game_state'] != 'playing':
         return jsonify({'success': False, 'message': '游戏未开始'})
     
+    player = game_data['players'].get(player_id)
+    if not player or not player.get('hole_cards') or player.get('folded') or player.get('all_in'):
+        return jsonify({'success': False, 'message': '您已无法继续行动'})
+    
+    pre_actions = game_data.setdefault('pre_actions', {})
+    if not action:
+        pre_actions.pop(player_id, None)
+        save_game_data(game_data)
+        return jsonify({'success': True, 'message': '已取消预选行动', 'pre_action': None})
+    
+    if action not in PRE_ACTIONS:
+        return jsonify({'success': False, 'message': '无效的预选行动'})
+    
+    pre_actions[player_id] = {
+        'action': action,
+        'max_bet': max([p.get('current_bet', 0) for p in game_data['players'].values()]),
+        'betting_round': game_data.get('betting_round')
+    }
+    
+    # 已经轮到自己时直接执行
+    auto_actions = []
+    if game_data.get('current_player') == player.get('position'):
+        auto_actions = process_pre_actions(game_data, config)
+    
+    save_game_data(game_data)
+    
+    return jsonify({
+        'success': True,
+        'message': '已设置预选行动',
+        'pre_action': (game_data.get('pre_actions') or {}).get(player_id),
+        'auto_actions': auto_actions
+    })
+
+def apply_player_action(game_data, config, player_id, action, amount=0):
+    """执行玩家行动并轮到下一个玩家，返回 (是否成功, 消息)
+    
+    玩家手动行动、预选行动和超时自动行动都走这里，调用方负责保存游戏数据。
+    """
+    if game_data['game_state'] != 'playing':
+        return False, '游戏未开始'
+    
     if player_id not in game_data['players']:
-        return jsonify({'success': False, 'message': '玩家不存在'})
+        return False, '玩家不存在'
     
     player = game_data['players'][player_id]
     
     # 检查是否轮到该玩家
     if game_data.get('current_player') != player.get('position'):
-        return jsonify({'success': False, 'message': '还没轮到您行动'})
+        return False, '还没轮到您行动'
     
     # 检查玩家是否已弃牌或全押
     if player.get('folded') or player.get('all_in'):
-        return jsonify({'success': False, 'message': '您已无法继续行动'})
+        return False, '您已无法继续行动'
+    
+    legal = get_legal_actions(game_data, player, config)
+    max_bet_before = legal['max_bet']
     
     # 处理不同行动
     if action == 'fold':
@@ -625,19 +1407,13 @@ def player_action():
     
     elif action == 'check':
         # 只有在没有人加注时才能过牌
-        max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values()])
-        if player.get('current_bet', 0) < max_bet:
-            return jsonify({'success': False, 'message': '有人加注，您不能过牌'})
+        if not legal['can_check']:
+            return False, '有人加注，您不能过牌'
         message = f'{player_id} 过牌'
     
     elif action == 'call':
-        max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values()])
-        call_amount = max_bet - player.get('current_bet', 0)
-        
-        if call_amount > player['chips']:
-            # 全押
-            call_amount = player['chips']
-            player['all_in'] = True
+        # 筹码不够时跟注金额就是全部筹码（全押）
+        call_amount = legal['call_amount']
         
         player['chips'] -= call_amount
         player['current_bet'] += call_amount
@@ -655,21 +1431,24 @@ def player_action():
             message = f'{player_id} 跟注 {call_amount}'
     
     elif action == 'raise':
-        max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values()])
-        current_player_bet = player.get('current_bet', 0)
+        max_bet = legal['max_bet']
         
         # amount 是玩家想要加注到的总金额
         if amount <= max_bet:
-            return jsonify({'success': False, 'message': f'加注金额必须大于当前最大下注 {max_bet}'})
+            return False, f'加注金额必须大于当前最大下注 {max_bet}'
         
         # 计算需要投入的筹码数量
-        additional_bet = amount - current_player_bet
+        additional_bet = amount - legal['current_bet']
         
         if additional_bet > player['chips']:
-            return jsonify({'success': False, 'message': '筹码不足'})
+            return False, '筹码不足'
+        
+        if amount < legal['min_raise']:
+            return False, f'加注金额至少为 {legal["min_raise"]}'
         
-        if amount < max_bet + game_data.get('min_bet', config['big_blind']):
-            return jsonify({'success': False, 'message': f'加注金额至少为 {max_bet + game_data.get("min_bet", config["big_blind"])}'})
+        # 底池限注玩法（奥马哈）不能超过底池
+        if amount > legal['max_raise']:
+            return False, f'底池限注，最多加注到 {legal["max_raise"]}'
         
         player['chips'] -= additional_bet
         player['current_bet'] = amount
@@ -680,8 +1459,9 @@ def player_action():
             player['total_invested_this_hand'] = 0
         player['total_invested_this_hand'] += additional_bet
         
-        # 记录最后一次加注的玩家位置
+        # 记录最后一次加注的玩家位置和加注幅度（再加注至少要加这么多）
         game_data['last_raiser_position'] = player['position']
+        game_data['last_raise_size'] = amount - max_bet
         # 清空之前的加注后行动记录，因为有新的加注
         game_data['players_acted_after_raise'] = []
         
@@ -695,13 +1475,21 @@ def player_action():
         # All In - 投入所有筹码
         all_in_amount = player['chips']
         if all_in_amount <= 0:
-            return jsonify({'success': False, 'message': '没有筹码可以全押'})
+            return False, '没有筹码可以全押'
+        
+        # 底池限注玩法只有在不超过底池时才能全押
+        if not legal['can_all_in']:
+            return False, f'底池限注，最多加注到 {legal["max_raise"]}'
         
         player['chips'] = 0
         player['current_bet'] += all_in_amount
         player['all_in'] = True
         game_data['current_pot'] += all_in_amount
         
+        # 全押够一次完整的加注时，之后的再加注以它的幅度为准
+        if player['current_bet'] >= legal['min_raise']:
+            game_data['last_raise_size'] = player['current_bet'] - legal['max_bet']
+        
         # 累积记录玩家在这手牌中的总投入
         if 'total_invested_this_hand' not in player:
             player['total_invested_this_hand'] = 0
@@ -710,7 +1498,7 @@ def player_action():
         message = f'{player_id} 全押 {all_in_amount}'
     
     else:
-        return jsonify({'success': False, 'message': '无效的行动'})
+        return False, '无效的行动'
     
     # 记录玩家已经行动过
     if 'players_acted_this_round' not in game_data:
@@ -726,8 +1514,33 @@ def player_action():
         if player['position'] not in game_data['players_acted_after_raise']:
             game_data['players_acted_after_raise'].append(player['position'])
     
+    consume_time_bank(game_data, player)
+    
+    # 统计：跟注、加注、全押按实际效果记为跟注/加注/过牌
+    stats_action = action
+    if action in ('call', 'raise', 'allin'):
+        if player.get('current_bet', 0) > max_bet_before:
+            stats_action = 'raise'
+        else:
+            stats_action = 'call' if legal['call_amount'] > 0 else 'check'
+    player_stats.record_action(game_data.get('hand_id'), player_id, stats_action, game_data.get('betting_round'))
+    
+    # 玩家自己行动后，清除他的预选行动；有人加注时其他人的“过牌/跟注”预选行动失效
+    game_data.get('pre_actions', {}).pop(player_id, None)
+    if player.get('current_bet', 0) > max_bet_before:
+        invalidate_pre_actions(game_data)
+    
     # 移动到下一个可以行动的玩家（跳过全押和弃牌玩家）
-    next_player_pos = get_next_player_position(game_data, player['position'])
+    advance_to_next_player(game_data, player['position'])
+    
+    # 检查是否需要进入下一轮或结束游戏
+    check_betting_round_end(game_data)
+    
+    return True, message
+
+def advance_to_next_player(game_data, from_position):
+    """把行动权交给 from_position 之后第一个可以行动的玩家"""
+    next_player_pos = get_next_player_position(game_data, from_position)
     
     # 找到下一个可以行动的玩家
     attempts = 0
@@ -749,14 +1562,129 @@ def player_action():
         attempts += 1
     
     game_data['current_player'] = next_player_pos
-    game_data['action_start_time'] = time.time()  # 重置行动计时
+    start_action_clock(game_data)  # 重置行动计时
     
-    # 检查是否需要进入下一轮或结束游戏
-    check_betting_round_end(game_data)
+
+def get_player_at_position(game_data, position):
+    """返回座位上的 (玩家ID, 玩家)，没有人返回 (None, None)"""
+    if position is None:
+        return None, None
+    for player_id, player in game_data['players'].items():
+        if player.get('position') == position:
+            return player_id, player
+    return None, None
+
+def invalidate_pre_actions(game_data):
+    """有人加注后，依赖下注额的预选行动（过牌、跟注固定金额）失效"""
+    pre_actions = game_data.get('pre_actions') or {}
+    for player_id in [pid for pid, entry in pre_actions.items() if entry['action'] in ('check', 'call')]:
+        del pre_actions[player_id]
+
+def resolve_pre_action(game_data, player, entry):
+    """把预选行动换算成当前可执行的行动，失效时返回 None"""
+    if entry.get('betting_round') != game_data.get('betting_round'):
+        return None
     
-    save_game_data(game_data)
+    max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values()])
+    to_call = max_bet - player.get('current_bet', 0)
+    kind = entry['action']
+    
+    if kind == 'fold':
+        return 'fold'
+    if kind == 'check_fold':
+        return 'check' if to_call == 0 else 'fold'
+    if kind == 'check':
+        return 'check' if to_call == 0 else None
+    if kind == 'call':
+        # 只跟预选时看到的下注额，之后有人加注就失效
+        if max_bet != entry.get('max_bet'):
+            return None
+        return 'check' if to_call == 0 else 'call'
+    if kind == 'call_any':
+        return 'check' if to_call == 0 else 'call'
+    return None
+
+def process_pre_actions(game_data, config):
+    """轮到的玩家有预选行动时立即执行，直到遇到需要玩家自己决定的人，返回执行记录"""
+    messages = []
+    acted = set()
+    while game_data['game_state'] == 'playing':
+        player_id, player = get_player_at_position(game_data, game_data.get('current_player'))
+        if player_id is None:
+            break
+        # 预选行动不会加注，同一轮里又轮到同一个人说明下注轮没有推进，停下来避免死循环
+        turn = (player_id, game_data.get('betting_round'))
+        if turn in acted:
+            break
+        acted.add(turn)
+        entry = (game_data.get('pre_actions') or {}).pop(player_id, None)
+        if entry is None and player.get('away'):
+            # 已离线的玩家轮到时立即自动过牌或弃牌
+            entry = {'action': 'check_fold', 'betting_round': game_data.get('betting_round')}
+        if entry is None:
+            break
+        
+        action = resolve_pre_action(game_data, player, entry)
+        if action is None:
+            break
+        
+        success, message = apply_player_action(game_data, config, player_id, action)
+        if not success:
+            break
+        messages.append(f'{message}（预选）')
+    
+    return messages
+
+def is_pot_limit(game_data):
+    """本手牌是否为底池限注玩法"""
+    return VARIANTS[game_data.get('variant', DEFAULT_VARIANT)]['pot_limit']
+
+def get_pot_limit_max_raise(game_data, player, max_bet):
+    """底池限注时最多可以加注到的金额：当前最大下注 + 跟注后的底池"""
+    call_amount = max_bet - player.get('current_bet', 0)
+    return max_bet + game_data.get('current_pot', 0) + call_amount
+
+def compute_legal_actions(game_data, player, config):
+    """计算玩家当前可以做的行动：过牌/跟注金额、加注范围和全押
+
+    加注金额都是加注到的总下注额；轮到该玩家时算一次，存在 game_data['legal_actions']。
+    """
+    max_bet = max([p.get('current_bet', 0) for p in game_data['players'].values()])
+    current_bet = player.get('current_bet', 0)
+    chips = player.get('chips', 0)
+    to_call = max_bet - current_bet
+    all_in_to = current_bet + chips
+    
+    # 最小加注幅度是大盲，本轮已经有人加注时不小于上一次的加注幅度
+    min_raise = max_bet + max(game_data.get('min_bet', config['big_blind']), game_data.get('last_raise_size', 0))
+    max_raise = all_in_to
+    if is_pot_limit(game_data):
+        max_raise = min(max_raise, get_pot_limit_max_raise(game_data, player, max_bet))
     
-    return jsonify({'success': True, 'message': message})
+    return {
+        'position': player.get('position'),
+        'max_bet': max_bet,
+        'current_bet': current_bet,
+        'chips': chips,
+        'can_check': to_call <= 0,
+        'call_amount': min(max(to_call, 0), chips),
+        'can_raise': max_raise >= min_raise and max_raise > max_bet,
+        'min_raise': min_raise,
+        'max_raise': max_raise,
+        'all_in_amount': chips,
+        'can_all_in': chips > 0 and (not is_pot_limit(game_data) or all_in_to <= max_raise),
+        'pot_limit': is_pot_limit(game_data)
+    }
+
+def get_legal_actions(game_data, player, config, cache=True):
+    """取缓存的合法行动；玩家筹码或下注在这期间变过（例如补了筹码）就重新计算"""
+    legal = game_data.get('legal_actions')
+    if (not legal or legal.get('position') != player.get('position') or 
+            legal.get('chips') != player.get('chips', 0) or legal.get('current_bet') != player.get('current_bet', 0)):
+        legal = compute_legal_actions(game_data, player, config)
+        if cache:
+            game_data['legal_actions'] = legal
+    return legal
 
 def check_betting_round_end(game_data):
     """检查下注轮是否结束"""
@@ -776,25 +1704,27 @@ def check_betting_round_end(game_data):
         next_betting_round(game_data)
         return
     
+    # 只剩一个能行动的玩家且他已经跟上最高下注时，没有人可以和他对抗了
+    max_bet = max([p.get('current_bet', 0) for p in active_players])
+    if len(can_act_players) == 1 and can_act_players[0].get('current_bet', 0) >= max_bet:
+        next_betting_round(game_data)
+        return
+    
     # 检查所有活跃玩家是否都已经行动过
     players_acted = game_data.get('players_acted_this_round', [])
     all_players_acted = True
     
-    for player in active_players:
-        # 如果玩家还有筹码可以行动，或者已经全押但还没在这轮行动过
-        if (player.get('chips', 0) > 0 or 
-            (player.get('all_in', False) and 
-             player['position'] not in players_acted)):
-            if player['position'] not in players_acted:
-                all_players_acted = False
-                break
+    for player in can_act_players:
+        # 全押的玩家（包括之前几轮全押的）不需要再行动
+        if player['position'] not in players_acted:
+            all_players_acted = False
+            break
     
     # 如果还有玩家没有行动，继续当前轮
     if not all_players_acted:
         return
     
     # 所有玩家都已经行动过，检查投注是否相等
-    max_bet = max([p.get('current_bet', 0) for p in active_players])
     all_bets_equal = True
     
     for player in active_players:
@@ -808,6 +1738,7 @@ def check_betting_round_end(game_data):
         game_data.pop('players_acted_this_round', None)
         game_data.pop('players_acted_after_raise', None)
         game_data.pop('last_raiser_position', None)
+        game_data.pop('last_raise_size', None)
         next_betting_round(game_data)
 
 def next_betting_round(game_data):
@@ -818,18 +1749,20 @@ def next_betting_round(game_data):
     for player in game_data['players'].values():
         player['current_bet'] = 0
     
-    # 清除已行动玩家记录，为新一轮做准备
+    # 清除已行动玩家记录和预选行动，为新一轮做准备
     game_data.pop('players_acted_this_round', None)
+    game_data.pop('pre_actions', None)
     game_data.pop('players_acted_after_raise', None)
     game_data.pop('last_raiser_position', None)
+    game_data.pop('last_raise_size', None)
     
     # 检查是否还有可以继续行动的玩家
     active_players = [p for p in game_data['players'].values() 
                      if p.get('position') is not None and not p.get('folded', False)]
     can_act_players = [p for p in active_players if not p.get('all_in', False) and p.get('chips', 0) > 0]
     
-    # 如果没有玩家可以继续行动，直接进入摊牌
-    if len(can_act_players) == 0:
+    # 最多只剩一个能行动的玩家时没人可以再下注，直接发完公共牌进入摊牌
+    if len(can_act_players) <= 1:
         # 发完所有剩余的公共牌
         while len(game_data.get('community_cards', [])) < 5 and game_data.get('deck'):
             game_data['community_cards'].append(game_data['deck'].pop())
@@ -876,24 +1809,11 @@ def next_betting_round(game_data):
             next_pos = positions[0]
         
         game_data['current_player'] = next_pos
-        game_data['action_start_time'] = time.time()  # 重置行动计时
+        start_action_clock(game_data)  # 重置行动计时
     else:
         # 所有人都全押了，直接到摊牌
         end_hand(game_data)
 
-def card_rank_value(rank):
-    """获取牌面值的数值"""
-    if rank == 'A':
-        return 14
-    elif rank == 'K':
-        return 13
-    elif rank == 'Q':
-        return 12
-    elif rank == 'J':
-        return 11
-    else:
-        return int(rank)
-
 def get_hand_strength_description(hand_strength):
     """将手牌强度转换为可读描述"""
     if not hand_strength:
@@ -924,173 +1844,41 @@ def get_hand_strength_description(hand_strength):
     else:
         return "未知牌型"
 
-def evaluate_hand(hole_cards, community_cards):
-    """评估手牌强度"""
-    all_cards = hole_cards + community_cards
-    
-    # 按花色分组
-    suits = {}
-    for card in all_cards:
-        suit = card['suit']
-        if suit not in suits:
-            suits[suit] = []
-        suits[suit].append(card_rank_value(card['rank']))
-    
-    # 按点数分组
-    ranks = {}
-    for card in all_cards:
-        rank = card_rank_value(card['rank'])
-        if rank not in ranks:
-            ranks[rank] = 0
-        ranks[rank] += 1
-    
-    # 检查同花
-    flush_suit = None
-    for suit, cards in suits.items():
-        if len(cards) >= 5:
-            flush_suit = suit
-            break
-    
-    # 检查顺子
-    sorted_ranks = sorted(ranks.keys(), reverse=True)
-    straight_high = None
-    
-    # 检查A-2-3-4-5的特殊顺子
-    if set([14, 2, 3, 4, 5]).issubset(set(sorted_ranks)):
-        straight_high = 5
-    else:
-        # 检查普通顺子
-        consecutive = 1
-        for i in range(1, len(sorted_ranks)):
-            if sorted_ranks[i-1] - sorted_ranks[i] == 1:
-                consecutive += 1
-                if consecutive >= 5:
-                    straight_high = sorted_ranks[i-4]
-                    break
-            else:
-                consecutive = 1
-    
-    # 检查同花顺
-    if flush_suit and straight_high:
-        flush_cards = sorted([card_rank_value(card['rank']) for card in all_cards if card['suit'] == flush_suit], reverse=True)
-        # 检查是否有同花顺
-        consecutive = 1
-        straight_flush_high = None
-        for i in range(1, len(flush_cards)):
-            if flush_cards[i-1] - flush_cards[i] == 1:
-                consecutive += 1
-                if consecutive >= 5:
-                    straight_flush_high = flush_cards[i-4]
-                    break
-            else:
-                consecutive = 1
-        
-        # 检查A-2-3-4-5同花顺
-        if set([14, 2, 3, 4, 5]).issubset(set(flush_cards)):
-            straight_flush_high = 5
-        
-        if straight_flush_high:
-            if straight_flush_high == 14:
-                return (9, [14])  # 皇家同花顺
-            else:
-                return (8, [straight_flush_high])  # 同花顺
-    
-    # 检查四条
-    four_kind = None
-    three_kind = None
-    pairs = []
-    
-    for rank, count in ranks.items():
-        if count == 4:
-            four_kind = rank
-        elif count == 3:
-            three_kind = rank
-        elif count == 2:
-            pairs.append(rank)
-    
-    if four_kind:
-        kicker = max([r for r in ranks.keys() if r != four_kind])
-        return (7, [four_kind, kicker])  # 四条
-    
-    # 检查葫芦
-    if three_kind and pairs:
-        return (6, [three_kind, max(pairs)])  # 葫芦
-    
-    # 检查同花
-    if flush_suit:
-        flush_cards = sorted([card_rank_value(card['rank']) for card in all_cards if card['suit'] == flush_suit], reverse=True)[:5]
-        return (5, flush_cards)  # 同花
-    
-    # 检查顺子
-    if straight_high:
-        return (4, [straight_high])  # 顺子
-    
-    # 检查三条
-    if three_kind:
-        kickers = sorted([r for r in ranks.keys() if r != three_kind], reverse=True)[:2]
-        return (3, [three_kind] + kickers)  # 三条
-    
-    # 检查两对
-    if len(pairs) >= 2:
-        pairs.sort(reverse=True)
-        kicker = max([r for r in ranks.keys() if r not in pairs[:2]])
-        return (2, pairs[:2] + [kicker])  # 两对
-    
-    # 检查一对
-    if pairs:
-        pair = pairs[0]
-        kickers = sorted([r for r in ranks.keys() if r != pair], reverse=True)[:3]
-        return (1, [pair] + kickers)  # 一对
-    
-    # 高牌
-    high_cards = sorted(ranks.keys(), reverse=True)[:5]
-    return (0, high_cards)  # 高牌
-
-def compare_hands(hand1, hand2):
-    """比较两手牌的大小，返回1表示hand1赢，-1表示hand2赢，0表示平局"""
-    rank1, values1 = hand1
-    rank2, values2 = hand2
-    
-    if rank1 > rank2:
-        return 1
-    elif rank1 < rank2:
-        return -1
-    else:
-        # 同样的牌型，比较具体数值
-        for v1, v2 in zip(values1, values2):
-            if v1 > v2:
-                return 1
-            elif v1 < v2:
-                return -1
-        return 0
+def evaluate_hand(hole_cards, community_cards, variant=DEFAULT_VARIANT):
+    """评估手牌强度（按玩法规则，奥马哈必须用两张底牌加三张公共牌）"""
+    score = evaluate_player_hand(cards_to_ints(hole_cards), cards_to_ints(community_cards), variant)
+    return score_to_strength(score, variant)
 
 def calculate_side_pots(game_data):
-    """计算边池"""
+    """计算边池
+    
+    每一层的金额包括所有发到牌的玩家（含已弃牌的）在这一层的投入，
+    只有没弃牌且投入达到这一层的玩家才能赢这个池。
+    """
     active_players = [(pid, p) for pid, p in game_data['players'].items() 
                      if p.get('position') is not None and not p.get('folded', False)]
     
     if len(active_players) <= 1:
         return []
     
-    # 计算每个玩家的总投入（包括之前轮次的投入）
-    players_by_investment = []
-    for pid, player in active_players:
-        # 使用累积投入来计算边池
-        investment = player.get('total_invested_this_hand', player.get('current_bet', 0))
-        players_by_investment.append((investment, pid, player))
+    # 所有玩家的总投入（包括之前轮次的投入，弃牌玩家的投入也留在底池里）
+    contributions = list(collect_total_invested(game_data).values())
     
-    # 按投入金额排序
-    players_by_investment.sort()
+    # 在场玩家按投入金额排序
+    players_by_investment = sorted(
+        (player.get('total_invested_this_hand', player.get('current_bet', 0)), pid)
+        for pid, player in active_players
+    )
     
     side_pots = []
     prev_investment = 0
     
-    for i, (investment, _, _) in enumerate(players_by_investment):
+    for i, (investment, _) in enumerate(players_by_investment):
         if investment > prev_investment:
-            # 计算这个边池的金额：(当前投入 - 上一个投入) * 参与这个边池的玩家数
-            pot_amount = (investment - prev_investment) * (len(players_by_investment) - i)
-            # 只有投入达到这个水平的玩家才能参与这个边池
-            eligible_players = [pid for _, pid, _ in players_by_investment[i:]]
+            # 这一层的金额：每个玩家在 (上一层, 这一层] 之间的投入之和
+            pot_amount = sum(min(c, investment) - min(c, prev_investment) for c in contributions)
+            # 只有投入达到这个水平的在场玩家才能参与这个边池
+            eligible_players = [pid for _, pid in players_by_investment[i:]]
             
             if pot_amount > 0:
                 side_pots.append({
@@ -1100,21 +1888,28 @@ def calculate_side_pots(game_data):
                 })
             prev_investment = investment
     
+    # 弃牌玩家超过最高在场投入的部分没有人跟得上，并入最后一个边池
+    excess = sum(max(0, c - prev_investment) for c in contributions)
+    if excess and side_pots:
+        side_pots[-1]['amount'] += excess
+    
     return side_pots
 
+def split_pot(game_data, amount, winner_ids):
+    """平分一个底池，除不尽的零头从庄家左手边第一个赢家开始每人多分1个筹码"""
+    share, remainder = divmod(amount, len(winner_ids))
+    dealer_pos = game_data.get('dealer_position') or 0
+    positions = {pid: game_data['players'][pid].get('position') or 0 for pid in winner_ids}
+    # 庄家之后的座位排在前面，庄家本人最后
+    order = sorted(winner_ids, key=lambda pid: (positions[pid] <= dealer_pos, positions[pid]))
+    return {pid: share + (1 if i < remainder else 0) for i, pid in enumerate(order)}
+
 def end_hand(game_data):
     """结束当前手牌"""
     # 获取未弃牌的玩家
     active_players = [(pid, p) for pid, p in game_data['players'].items() 
                      if p.get('position') is not None and not p.get('folded', False)]
     
-    # 记录每个玩家在这手牌中的总投入（累积所有轮次）
-    total_invested = {}
-    for player_id, player in game_data['players'].items():
-        if player.get('position') is not None:
-            # 使用累积投入，如果没有则使用当前下注
-            total_invested[player_id] = player.get('total_invested_this_hand', player.get('current_bet', 0))
-    
     # 检查是否有多个玩家all in
     all_in_count = sum(1 for _, p in active_players if p.get('all_in', False))
     
@@ -1127,13 +1922,12 @@ def end_hand(game_data):
         game_data['game_state'] = 'showdown'
         game_data['showdown_start_time'] = time.time()
         save_game_data(game_data)
+        schedule_auto_deal(game_data, load_config())
         return
     
-    # 计算结果
-    results = calculate_hand_results(game_data, active_players, total_invested)
-    
-    # 设置结算信息
-    game_data['hand_results'] = results
+    # 计算结果并设置结算信息
+    settle_hand_results(game_data)
+    results = game_data['hand_results']
     game_data['game_state'] = 'hand_ended'
     game_data['hand_end_time'] = time.time()
     
@@ -1141,6 +1935,108 @@ def end_hand(game_data):
     distribute_winnings(game_data, results)
     
     save_game_data(game_data)
+    schedule_auto_deal(game_data, load_config())
+
+def finish_showdown(game_data):
+    """摊牌展示结束，进入结算并分配奖金"""
+    settle_hand_results(game_data)
+    game_data['game_state'] = 'hand_ended'
+    game_data['hand_end_time'] = time.time()
+    distribute_winnings(game_data, game_data['hand_results'])
+
+def schedule_auto_deal(game_data, config):
+    """自动发牌模式下，安排摊牌/结算展示结束后自动进入下一步"""
+    if not config.get('auto_deal'):
+        return
+    if game_data.get('game_state') == 'showdown':
+        run_at = game_data.get('showdown_start_time', time.time()) + SHOWDOWN_DISPLAY_SECONDS
+    elif game_data.get('game_state') == 'hand_ended':
+        run_at = game_data.get('hand_end_time', time.time()) + config.get('result_display_seconds', 5)
+    else:
+        return
+    scheduler.schedule_at(run_at, auto_deal_next_hand, game_data.get('hand_id'), key='auto_deal')
+
+def auto_deal_next_hand(hand_id):
+    """调度器回调：结束摊牌展示，或清理上一手并直接发下一手"""
+    with game_lock:
+        game_data = load_game_data()
+        config = load_config()
+        if game_data.get('hand_id') != hand_id or not config.get('auto_deal'):
+            return
+        
+        if game_data['game_state'] == 'showdown':
+            finish_showdown(game_data)
+            save_game_data(game_data)
+            schedule_auto_deal(game_data, config)
+            return
+        
+        if game_data['game_state'] != 'hand_ended':
+            return
+        
+        prepare_next_hand(game_data)
+        if start_game_internal(game_data, config):
+            print(f"自动发牌：开始新的一手 {game_data['hand_id']}")
+        save_game_data(game_data)
+
+def prepare_next_hand(game_data):
+    """清除上一手的结算结果，回到等待状态"""
+    game_data['game_state'] = 'waiting'
+    game_data.pop('hand_results', None)
+    game_data.pop('confirmed_players', None)
+    game_data.pop('hand_end_time', None)
+    
+    # 重置玩家状态，准备下一局
+    reset_players_for_next_hand(game_data)
+    sync_bots(game_data, load_config())
+
+def try_auto_start(game_data, config):
+    """自动发牌模式下，牌桌空闲且人数够时直接开始，返回是否开始"""
+    if not config.get('auto_deal') or game_data['game_state'] not in ('waiting', 'ready_phase'):
+        return False
+    return start_game_internal(game_data, config)
+
+def collect_total_invested(game_data):
+    """统计本手发到牌的玩家在这手牌中的总投入（累积所有轮次）"""
+    total_invested = {}
+    for player_id, player in game_data['players'].items():
+        if player.get('position') is not None and player.get('hole_cards'):
+            # 使用累积投入，如果没有则使用当前下注
+            total_invested[player_id] = player.get('total_invested_this_hand', player.get('current_bet', 0))
+    return total_invested
+
+def settle_hand_results(game_data):
+    """计算本手牌的结算结果并写入 game_data['hand_results']
+    
+    结果按 hand_id 缓存在内存中（最近 HAND_RESULTS_CACHE_SIZE 手），
+    同一手牌无论从哪里调用都只计算一次。返回 True 表示 game_data 有变化需要保存。
+    """
+    hand_id = game_data.get('hand_id')
+    
+    results = None
+    if hand_id:
+        with hand_results_lock:
+            results = hand_results_cache.get(hand_id)
+            if results is not None:
+                hand_results_cache.move_to_end(hand_id)
+    
+    if results is None:
+        # 已经保存过的结果（例如服务重启后）直接复用
+        results = game_data.get('hand_results')
+        if results is None:
+            active_players = [(pid, p) for pid, p in game_data['players'].items() 
+                             if p.get('position') is not None and not p.get('folded', False)]
+            results = calculate_hand_results(game_data, active_players, collect_total_invested(game_data))
+        
+        if hand_id:
+            with hand_results_lock:
+                hand_results_cache[hand_id] = results
+                while len(hand_results_cache) > HAND_RESULTS_CACHE_SIZE:
+                    hand_results_cache.popitem(last=False)
+    
+    if 'hand_results' in game_data:
+        return False
+    game_data['hand_results'] = results
+    return True
 
 def calculate_hand_results(game_data, active_players, total_invested):
     """计算手牌结果"""
@@ -1157,26 +2053,29 @@ def calculate_hand_results(game_data, active_players, total_invested):
                 'pot_won': pot_won,
                 'net_gain': net_gain,
                 'hand_strength': None
-            }]
+            }],
+            'total_invested': total_invested
         }
     
     # 多个玩家，需要比较牌力
     community_cards = game_data.get('community_cards', [])
+    variant = game_data.get('variant', DEFAULT_VARIANT)
     
     # 计算边池
     side_pots = calculate_side_pots(game_data)
     
-    # 评估每个玩家的手牌
+    # 一次性批量评估所有玩家的手牌，用整数牌力比较大小
+    showdown_players = [(pid, player) for pid, player in active_players if player.get('hole_cards')]
+    scores = evaluate_players([cards_to_ints(p['hole_cards']) for _, p in showdown_players],
+                              cards_to_ints(community_cards), variant)
     player_hands = {}
-    for pid, player in active_players:
-        hole_cards = player.get('hole_cards', [])
-        if hole_cards:
-            hand_strength = evaluate_hand(hole_cards, community_cards)
-            player_hands[pid] = {
-                'strength': hand_strength,
-                'hole_cards': hole_cards,
-                'player': player
-            }
+    for (pid, player), score in zip(showdown_players, scores):
+        player_hands[pid] = {
+            'score': score,
+            'strength': score_to_strength(score, variant),
+            'hole_cards': player['hole_cards'],
+            'player': player
+        }
     
     # 分配边池
     winners = []
@@ -1189,32 +2088,30 @@ def calculate_hand_results(game_data, active_players, total_invested):
             
             if eligible:
                 # 找出这个边池的赢家
-                best_hand = max(eligible, key=lambda x: x[1]['strength'])
-                pot_winners = [pid for pid, data in eligible 
-                             if compare_hands(data['strength'], best_hand[1]['strength']) == 0]
+                best_score = max(data['score'] for _, data in eligible)
+                pot_winners = [pid for pid, data in eligible if data['score'] == best_score]
                 
-                pot_per_winner = pot['amount'] // len(pot_winners)
+                shares = split_pot(game_data, pot['amount'], pot_winners)
                 for winner_id in pot_winners:
                     winners.append({
                         'player_id': winner_id,
-                        'pot_won': pot_per_winner,
-                        'net_gain': pot_per_winner - total_invested.get(winner_id, 0),
+                        'pot_won': shares[winner_id],
+                        'net_gain': shares[winner_id] - total_invested.get(winner_id, 0),
                         'hand_strength': player_hands[winner_id]['strength']
                     })
-                    total_distributed += pot_per_winner
+                    total_distributed += shares[winner_id]
     else:
         # 没有边池，直接比较所有玩家
         if player_hands:
-            best_hand = max(player_hands.values(), key=lambda x: x['strength'])
-            pot_winners = [pid for pid, data in player_hands.items() 
-                         if compare_hands(data['strength'], best_hand['strength']) == 0]
+            best_score = max(data['score'] for data in player_hands.values())
+            pot_winners = [pid for pid, data in player_hands.items() if data['score'] == best_score]
             
-            pot_per_winner = game_data['current_pot'] // len(pot_winners)
+            shares = split_pot(game_data, game_data['current_pot'], pot_winners)
             for winner_id in pot_winners:
-                net_gain = pot_per_winner - total_invested.get(winner_id, 0)
+                net_gain = shares[winner_id] - total_invested.get(winner_id, 0)
                 winners.append({
                     'player_id': winner_id,
-                    'pot_won': pot_per_winner,
+                    'pot_won': shares[winner_id],
                     'net_gain': net_gain,
                     'hand_strength': player_hands[winner_id]['strength']
                 })
@@ -1234,7 +2131,8 @@ def calculate_hand_results(game_data, active_players, total_invested):
         'winners': winners,
         'all_hands': {pid: data['strength'] for pid, data in player_hands.items()},
         'all_player_cards': all_player_cards,  # 新增：所有玩家的手牌信息
-        'community_cards': community_cards  # 新增：保存公共牌信息
+        'community_cards': community_cards,  # 新增：保存公共牌信息
+        'total_invested': total_invested
     }
 
 def distribute_winnings(game_data, results):
@@ -1242,7 +2140,7 @@ def distribute_winnings(game_data, results):
     # 获取参与本局游戏的所有玩家
     participating_players = set()
     for player_id, player in game_data['players'].items():
-        if player.get('position') is not None:
+        if player.get('position') is not None and player.get('hole_cards'):
             participating_players.add(player_id)
             # 初始化统计字段（如果不存在）
             if 'wins' not in player:
@@ -1264,12 +2162,16 @@ def distribute_winnings(game_data, results):
             game_data['players'][player_id]['wins'] += 1
         else:
             game_data['players'][player_id]['losses'] += 1
+    player_stats.end_hand(game_data.get('hand_id'), results)
+    save_player_stats()
+    record_hand_history(game_data, results)
     
     # 重置游戏状态
     game_data['current_pot'] = 0
     game_data['community_cards'] = []
     game_data['current_player'] = None
     game_data['betting_round'] = 'preflop'
+    game_data.pop('pre_actions', None)
     
     # 清理玩家状态
     for player in game_data['players'].values():
@@ -1291,9 +2193,13 @@ def distribute_winnings(game_data, results):
             game_data['dealer_position'] = positions[next_dealer_index]
         except ValueError:
             game_data['dealer_position'] = positions[0]
+    
+    # 同步锦标赛筹码和淘汰
+    sync_tournament_chips(game_data)
 
 @app.route('/api/update_config', methods=['POST'])
 @admin_required
+@idempotent
 def update_config():
     """更新游戏配置"""
     data = request.get_json()
@@ -1303,17 +2209,38 @@ def update_config():
     config['big_blind'] = int(data.get('big_blind', config['big_blind']))
     config['buy_in_amount'] = int(data.get('buy_in_amount', config['buy_in_amount']))
     config['action_timeout'] = int(data.get('action_timeout', config['action_timeout']))
+    config['time_bank_seconds'] = max(0, int(data.get('time_bank_seconds', config.get('time_bank_seconds', 60))))
+    config['time_bank_refill_seconds'] = max(0, int(data.get('time_bank_refill_seconds', config.get('time_bank_refill_seconds', 10))))
     config['ready_timeout'] = int(data.get('ready_timeout', config['ready_timeout']))
     config['default_add_chips'] = int(data.get('default_add_chips', config.get('default_add_chips', 1000)))
     
+    game_variant = data.get('game_variant', config.get('game_variant', DEFAULT_VARIANT))
+    if game_variant not in VARIANTS:
+        return jsonify({'success': False, 'message': '不支持的玩法'})
+    config['game_variant'] = game_variant
+    config['auto_deal'] = bool(data.get('auto_deal', config.get('auto_deal', False)))
+    config['result_display_seconds'] = max(1, int(data.get('result_display_seconds', config.get('result_display_seconds', 5))))
+    config['away_grace_seconds'] = max(1, int(data.get('away_grace_seconds', config.get('away_grace_seconds', 10))))
+    config['bot_fill_to'] = min(SEAT_COUNT, max(0, int(data.get('bot_fill_to', config.get('bot_fill_to', 0)))))
+    config['bot_think_seconds'] = max(0, float(data.get('bot_think_seconds', config.get('bot_think_seconds', 1))))
+    
     save_config(config)
     
+    # 机器人数量马上按新配置调整（牌局进行中时等这手结束）
+    with game_lock:
+        game_data = load_game_data()
+        if sync_bots(game_data, config):
+            save_game_data(game_data)
+    
     return jsonify({'success': True, 'message': '配置更新成功', 'config': config})
 
 @app.route('/api/player_ready', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def player_ready():
     """玩家准备"""
+    data = request.get_json(silent=True) or {}
     player_id = session.get('player_id')
     if not player_id:
         return jsonify({'success': False, 'message': '请先加入游戏'})
@@ -1321,6 +2248,11 @@ def player_ready():
     game_data = load_game_data()
     config = load_config()
     
+    # 准备是对看到的牌桌状态的确认，牌桌已经变化（例如有人离座）时让玩家重新确认
+    stale = check_table_version(game_data, data)
+    if stale:
+        return stale
+    
     if player_id not in game_data['players']:
         return jsonify({'success': False, 'message': '玩家不存在'})
     
@@ -1342,10 +2274,9 @@ def player_ready():
         game_data['game_state'] = 'ready_phase'
         game_data['ready_start_time'] = time.time()
     
-    # 检查是否所有玩家都准备好了
-    seated_players = [p for p in game_data['players'].values() 
-                     if p.get('position') is not None and p.get('chips', 0) > 0]
-    if len(game_data['ready_players']) >= len(seated_players) and len(seated_players) >= 2:
+    # 检查是否所有玩家都准备好了（机器人不用准备）
+    seated_players = [pid for pid, p in game_data['players'].items() if is_dealt_in(p)]
+    if set(seated_players) <= ready_player_ids(game_data) and len(seated_players) >= 2:
         # 所有人都准备好了，开始游戏
         start_game_internal(game_data, config)
     
@@ -1355,14 +2286,21 @@ def player_ready():
 
 @app.route('/api/player_unready', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def player_unready():
     """取消准备"""
+    data = request.get_json(silent=True) or {}
     player_id = session.get('player_id')
     if not player_id:
         return jsonify({'success': False, 'message': '请先加入游戏'})
     
     game_data = load_game_data()
     
+    stale = check_table_version(game_data, data)
+    if stale:
+        return stale
+    
     if game_data['game_state'] not in ['waiting', 'ready_phase', 'hand_ended']:
         return jsonify({'success': False, 'message': '当前无法取消准备'})
     
@@ -1384,6 +2322,8 @@ def player_unready():
 
 @app.route('/api/confirm_hand_result', methods=['POST'])
 @login_required
+@idempotent
+@with_game_lock
 def confirm_hand_result():
     """确认手牌结果"""
     player_id = session.get('player_id')
@@ -1402,24 +2342,102 @@ def confirm_hand_result():
     if player_id not in game_data['confirmed_players']:
         game_data['confirmed_players'].append(player_id)
     
-    # 检查是否所有玩家都确认了
+    # 检查是否所有玩家都确认了（机器人不用确认）
     active_players = [pid for pid, p in game_data['players'].items() 
-                     if p.get('position') is not None]
+                     if p.get('position') is not None and not p.get('sitting_out', False) and not p.get('away', False) and 
+                     not p.get('bot')]
     
     if len(game_data['confirmed_players']) >= len(active_players):
         # 所有人都确认了，回到等待状态
-        game_data['game_state'] = 'waiting'
-        game_data.pop('hand_results', None)
-        game_data.pop('confirmed_players', None)
-        game_data.pop('hand_end_time', None)
+        prepare_next_hand(game_data)
         
-        # 重置玩家状态，准备下一局
-        reset_players_for_next_hand(game_data)
+        # 自动发牌模式下不用等展示时间结束，直接发下一手
+        if try_auto_start(game_data, load_config()):
+            scheduler.cancel('auto_deal')
     
     save_game_data(game_data)
     
     return jsonify({'success': True, 'message': '确认成功'})
 
+@app.route('/api/sit_out', methods=['POST'])
+@login_required
+@idempotent
+@with_game_lock
+def sit_out():
+    """暂离：保留座位和筹码，从下一手开始不发牌"""
+    player_id = session.get('player_id')
+    if not player_id:
+        return jsonify({'success': False, 'message': '请先加入游戏'})
+    
+    game_data = load_game_data()
+    player = game_data['players'].get(player_id)
+    if not player or player.get('position') is None:
+        return jsonify({'success': False, 'message': '请先选择座位'})
+    
+    player['sitting_out'] = True
+    if player_id in game_data.get('ready_players', []):
+        game_data['ready_players'].remove(player_id)
+    
+    save_game_data(game_data)
+    
+    return jsonify({'success': True, 'message': '已暂离，下一手开始不再发牌'})
+
+@app.route('/api/sit_in', methods=['POST'])
+@login_required
+@idempotent
+@with_game_lock
+def sit_in():
+    """回到牌桌：从下一手开始重新发牌"""
+    player_id = session.get('player_id')
+    if not player_id:
+        return jsonify({'success': False, 'message': '请先加入游戏'})
+    
+    game_data = load_game_data()
+    player = game_data['players'].get(player_id)
+    if not player or player.get('position') is None:
+        return jsonify({'success': False, 'message': '请先选择座位'})
+    
+    player.pop('sitting_out', None)
+    
+    # 自动发牌模式下牌桌空闲时，人数够了直接开始
+    try_auto_start(game_data, load_config())
+    
+    save_game_data(game_data)
+    
+    return jsonify({'success': True, 'message': '已回到牌桌'})
+
+@app.route('/api/heartbeat', methods=['POST'])
+@login_required
+def heartbeat():
+    """心跳：status 为 'away' 表示页面切到后台或即将关闭，立即标记离线"""
+    player_id = session.get('player_id')
+    if not player_id:
+        return jsonify({'success': False, 'message': '请先加入游戏'})
+    
+    # navigator.sendBeacon 发送时不一定带 JSON 的 Content-Type
+    data = request.get_json(force=True, silent=True) or {}
+    config = load_config()
+    
+    if data.get('status') == 'away':
+        scheduler.cancel(f'presence:{player_id}')
+        with presence_lock:
+            player_last_seen.pop(player_id, None)
+        with game_lock:
+            mark_player_away(load_game_data(), player_id, config)
+        return jsonify({'success': True, 'status': 'away'})
+    
+    touch_presence(player_id, config)
+    with presence_lock:
+        was_away = player_id in away_players
+    if was_away:
+        with game_lock:
+            game_data = load_game_data()
+            if mark_player_back(game_data, player_id):
+                try_auto_start(game_data, config)
+                save_game_data(game_data)
+    
+    return jsonify({'success': True, 'status': 'online', 'server_time': time.time()})
+
 def reset_players_for_next_hand(game_data):
     """重置玩家状态，准备下一局"""
     # 重置底池和公共牌
@@ -1431,8 +2449,11 @@ def reset_players_for_next_hand(game_data):
     
     # 清除时间相关的状态
     game_data.pop('action_start_time', None)
+    game_data.pop('action_deadline', None)
+    game_data.pop('time_bank_deadline', None)
     game_data.pop('showdown_start_time', None)
     game_data.pop('first_to_act', None)
+    game_data.pop('pre_actions', None)
     
     # 重置准备状态
     game_data['ready_players'] = []
@@ -1474,9 +2495,8 @@ def reset_players_for_next_hand(game_data):
 
 def start_game_internal(game_data, config):
     """内部开始游戏函数"""
-    # 检查有位置的玩家数量
-    active_players = [p for p in game_data['players'].values() 
-                     if p.get('position') is not None and p.get('chips', 0) > 0]
+    # 检查本手可以发牌的玩家数量（有座位、有筹码、没有暂离）
+    active_players = [p for p in game_data['players'].values() if is_dealt_in(p)]
     
     if len(active_players) < 2:
         return False
@@ -1490,13 +2510,21 @@ def start_game_internal(game_data, config):
     game_data['ready_players'] = []
     game_data['ready_start_time'] = None
     game_data['first_to_act'] = None  # 清除first_to_act标记
+    game_data['pre_actions'] = {}
+    # 上一手如果在下注轮中途结束，行动记录还留着，不能带到新的一手
+    game_data.pop('players_acted_this_round', None)
+    game_data.pop('players_acted_after_raise', None)
+    game_data.pop('last_raiser_position', None)
+    game_data.pop('last_raise_size', None)
     
     # 生成唯一的手牌ID
     import uuid
     game_data['hand_id'] = str(uuid.uuid4())
     
-    # 创建新牌组
-    game_data['deck'] = create_deck()
+    # 按配置的玩法创建新牌组
+    variant = config.get('game_variant', DEFAULT_VARIANT)
+    game_data['variant'] = variant if variant in VARIANTS else DEFAULT_VARIANT
+    game_data['deck'], game_data['shuffle'] = create_deck(game_data['variant'])
     
     # 设置庄家位置（如果没有设置的话）
     if 'dealer_position' not in game_data or game_data['dealer_position'] == 0:
@@ -1506,24 +2534,33 @@ def start_game_internal(game_data, config):
     # 发底牌
     deal_hole_cards(game_data)
     
-    # 下盲注
-    post_blinds(game_data, config)
+    # 下盲注（锦标赛时使用当前级别的盲注和前注）
+    effective_config = get_effective_config(config)
+    post_blinds(game_data, effective_config)
+    player_stats.start_hand(game_data['hand_id'],
+                            [pid for pid, p in game_data['players'].items() if p.get('hole_cards') and not p.get('folded')],
+                            effective_config['big_blind'])
     
-    # 设置行动开始时间
-    game_data['action_start_time'] = time.time()
+    # 补充时间银行并开始第一个玩家的行动计时
+    refill_time_banks(game_data, config)
+    start_action_clock(game_data)
+    
+    # 盲注和前注让所有人（或只剩一人）都无法再下注时，直接发完公共牌
+    check_betting_round_end(game_data)
     
     return True
 
 @app.route('/api/start_game', methods=['POST'])
 @admin_required
+@idempotent
+@with_game_lock
 def start_game():
     """手动开始游戏（管理员功能）"""
     game_data = load_game_data()
     config = load_config()
     
-    # 检查有位置的玩家数量
-    active_players = [p for p in game_data['players'].values() 
-                     if p.get('position') is not None and p.get('chips', 0) > 0]
+    # 检查本手可以发牌的玩家数量
+    active_players = [p for p in game_data['players'].values() if is_dealt_in(p)]
     
     if len(active_players) < 2:
         return jsonify({'success': False, 'message': f'需要至少2名有座位的玩家才能开始游戏 (当前: {len(active_players)})'})
@@ -1540,13 +2577,19 @@ def start_game():
 
 @app.route('/api/reset_game', methods=['POST'])
 @admin_required
+@idempotent
+@with_game_lock
 def reset_game():
     """重置游戏"""
     save_game_data(DEFAULT_GAME_DATA.copy())
+    # 重置游戏即开始新的统计场次
+    player_stats.new_session()
+    save_player_stats()
     return jsonify({'success': True, 'message': '游戏已重置'})
 
 @app.route('/api/get_hand_results', methods=['GET'])
 @login_required
+@with_game_lock
 def get_hand_results():
     """获取手牌结果信息（用于结束时展示）"""
     game_data = load_game_data()
@@ -1562,15 +2605,8 @@ def get_hand_results():
     if len(active_players) < 2:
         return jsonify({'success': False, 'message': '在场玩家少于2人，无需展示手牌'})
     
-    # 如果还没有计算手牌结果，先计算
-    if 'hand_results' not in game_data:
-        total_invested = {}
-        for pid, player in game_data['players'].items():
-            if player.get('position') is not None:
-                total_invested[pid] = player.get('total_invested_this_hand', 0)
-        
-        results = calculate_hand_results(game_data, active_players, total_invested)
-        game_data['hand_results'] = results
+    # 如果还没有计算手牌结果，先计算（与摊牌展示共用同一份结算结果）
+    if settle_hand_results(game_data):
         save_game_data(game_data)
     
     # 构建返回数据
@@ -1587,7 +2623,8 @@ def get_hand_results():
             if player.get('position') is not None and player.get('hole_cards'):
                 # 计算手牌强度
                 community_cards = game_data.get('community_cards', [])
-                hand_strength = evaluate_hand(player['hole_cards'], community_cards)
+                hand_strength = evaluate_hand(player['hole_cards'], community_cards,
+                                              game_data.get('variant', DEFAULT_VARIANT))
                 
                 all_player_cards[player_id] = {
                     'hole_cards': player['hole_cards'],
@@ -1614,6 +2651,409 @@ def get_hand_results():
         'pot_amount': game_data.get('current_pot', 0)
     })
 
+@app.route('/api/evaluate_hands', methods=['POST'])
+@login_required
+def evaluate_hands():
+    """批量评估手牌（用于胜率计算、范围分析和历史牌局重算）"""
+    data = request.get_json() or {}
+    hands = data.get('hands') or []
+    
+    if not hands:
+        return jsonify({'success': False, 'message': '请提供要评估的手牌'}), 400
+    
+    if len(hands) > MAX_BATCH_HANDS:
+        return jsonify({'success': False, 'message': f'单次最多评估 {MAX_BATCH_HANDS} 手牌'}), 400
+    
+    # 每手牌可以是整数编码的牌，也可以是 {'suit', 'rank'} 格式的牌
+    # 编码转换和评估都在进程池里做，不占用处理玩家操作的请求线程
+    try:
+        ranks = run_cpu_job(evaluate_card_hands, hands)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'message': '手牌格式错误，每手牌需要5~7张不重复的有效牌'}), 400
+    
+    response_data = {'success': True, 'ranks': ranks}
+    if data.get('describe'):
+        response_data['hand_strengths'] = [get_hand_strength_description(score_to_strength(r)) for r in ranks]
+    
+    return jsonify(response_data)
+
+@app.route('/api/draw_analysis', methods=['GET'])
+@login_required
+def draw_analysis():
+    """听牌分析：听牌类型和下一张牌的改进概率（管理员还能看到所有人的 outs 和领先情况）"""
+    game_data = load_game_data()
+    
+    if game_data.get('game_state') != 'playing':
+        return jsonify({'success': False, 'message': '游戏未开始'})
+    
+    variant = game_data.get('variant', DEFAULT_VARIANT)
+    if VARIANTS[variant]['omaha']:
+        return jsonify({'success': False, 'message': '奥马哈暂不支持听牌分析'})
+    
+    if len(game_data.get('community_cards', [])) not in ANALYSIS_STREETS:
+        return jsonify({'success': False, 'message': '只有翻牌和转牌阶段可以进行听牌分析'})
+    
+    # 管理员看所有人基于真实底牌的分析；普通玩家只看自己视角的分析，
+    # 分析只拿到自己的底牌和公共牌，结果不会透露对手的底牌或谁领先。
+    # 一次分析不到 1 毫秒，直接在请求里计算，不走进程池
+    if session.get('role') == 'admin':
+        analysis = analyze_draws(game_data, variant)
+        return jsonify({'success': True, 'analysis': analysis})
+    
+    player_id = session.get('player_id')
+    player = game_data['players'].get(player_id)
+    if not player or player.get('folded') or not player.get('hole_cards'):
+        return jsonify({'success': False, 'message': '你不在这手牌中'})
+    
+    opponents = sum(1 for pid, p in game_data['players'].items()
+                    if pid != player_id and p.get('hole_cards') and not p.get('folded'))
+    analysis = analyze_own_draws(player['hole_cards'], game_data['community_cards'], opponents, variant)
+    analysis['players'][0].update({'player_id': player_id, 'position': player.get('position')})
+    
+    return jsonify({'success': True, 'analysis': analysis})
+
+@app.route('/api/tournament/create', methods=['POST'])
+@admin_required
+@idempotent
+def create_tournament():
+    """创建锦标赛（默认牌桌上已入座的玩家参赛）
+
+    锦标赛在这张牌桌上进行，选手不超过 SEAT_COUNT 人
+    """
+    global current_tournament
+    data = request.get_json() or {}
+    
+    entrants = data.get('entrants')
+    if not entrants:
+        entrants = [pid for pid, p in load_game_data()['players'].items()
+                    if p.get('position') is not None and not p.get('bot')]
+    
+    if len(entrants) > SEAT_COUNT:
+        return jsonify({'success': False, 'message': f'锦标赛在这张牌桌上进行，最多 {SEAT_COUNT} 名选手'})
+    
+    users = load_users()
+    unknown = [pid for pid in entrants if pid not in users]
+    if unknown:
+        return jsonify({'success': False, 'message': f'用户不存在: {", ".join(map(str, unknown))}'})
+    
+    levels = data.get('levels')
+    if not levels and data.get('level_minutes'):
+        # 只修改每级时长时沿用默认盲注结构
+        levels = [dict(level, duration=int(data['level_minutes']) * 60) for level in DEFAULT_BLIND_LEVELS]
+    
+    with tournament_lock:
+        if current_tournament is not None and current_tournament.status == 'running':
+            return jsonify({'success': False, 'message': '已有锦标赛正在进行'})
+        try:
+            tournament = Tournament(entrants,
+                                    starting_chips=int(data.get('starting_chips', 1000)),
+                                    levels=levels,
+                                    table_size=SEAT_COUNT,
+                                    name=data.get('name') or '锦标赛')
+        except (TournamentError, ValueError, TypeError, KeyError) as e:
+            return jsonify({'success': False, 'message': f'创建锦标赛失败: {e}'})
+        current_tournament = tournament
+        save_tournament(tournament)
+    
+    return jsonify({'success': True, 'message': f'锦标赛创建成功，共 {len(entrants)} 名选手', 'tournament': tournament.status_summary()})
+
+@app.route('/api/tournament/start', methods=['POST'])
+@admin_required
+@idempotent
+@with_game_lock
+def start_tournament():
+    """开始锦标赛：选手换成锦标赛筹码、坐到分配的座位，并启动盲注计时"""
+    game_data = load_game_data()
+    if game_data['game_state'] in ('playing', 'showdown'):
+        return jsonify({'success': False, 'message': '牌局进行中，请在本手结束后开始锦标赛'})
+    
+    with tournament_lock:
+        if current_tournament is None:
+            return jsonify({'success': False, 'message': '请先创建锦标赛'})
+        if current_tournament.status != 'registering':
+            return jsonify({'success': False, 'message': '锦标赛已经开始'})
+        
+        if game_data['game_state'] == 'hand_ended':
+            prepare_next_hand(game_data)
+        # 上一场中途结束、还没恢复的现金局先恢复，再保存
+        restore_cash_table(game_data)
+        current_tournament.start()
+        seat_tournament(game_data, current_tournament)
+        # 先保存牌桌：锦标赛没保存上时，下一手结束会自动恢复现金局
+        save_game_data(game_data)
+        save_tournament(current_tournament)
+        schedule_tournament_level(current_tournament)
+        summary = current_tournament.status_summary()
+    
+    if try_auto_start(game_data, load_config()):
+        save_game_data(game_data)
+    
+    return jsonify({'success': True, 'message': '锦标赛开始', 'tournament': summary})
+
+@app.route('/api/tournament/stop', methods=['POST'])
+@admin_required
+@idempotent
+@with_game_lock
+def stop_tournament():
+    """结束锦标赛，恢复普通盲注和现金局的筹码、座位（牌局进行中时在本手结束后恢复）"""
+    global current_tournament
+    with tournament_lock:
+        current_tournament = None
+        scheduler.cancel('tournament_level')
+        if os.path.exists(TOURNAMENT_FILE):
+            os.remove(TOURNAMENT_FILE)
+    
+    game_data = load_game_data()
+    if not is_tournament_table(game_data):
+        return jsonify({'success': True, 'message': '锦标赛已结束'})
+    if game_data['game_state'] in ('playing', 'showdown'):
+        return jsonify({'success': True, 'message': '锦标赛已结束，本手结束后恢复现金局'})
+    
+    restore_cash_table(game_data)
+    save_game_data(game_data)
+    return jsonify({'success': True, 'message': '锦标赛已结束，已恢复现金局'})
+
+@app.route('/api/tournament/eliminate', methods=['POST'])
+@admin_required
+@idempotent
+@with_game_lock
+def eliminate_tournament_player():
+    """直接淘汰（取消资格）一名选手；正常比赛的筹码和淘汰在每手牌结束后自动同步"""
+    data = request.get_json() or {}
+    player_id = data.get('player_id')
+    
+    game_data = load_game_data()
+    if game_data['game_state'] in ('playing', 'showdown'):
+        return jsonify({'success': False, 'message': '牌局进行中，请在本手结束后操作'})
+    
+    with tournament_lock:
+        if current_tournament is None or current_tournament.status != 'running':
+            return jsonify({'success': False, 'message': '当前没有进行中的锦标赛'})
+        try:
+            current_tournament.eliminate(player_id)
+        except TournamentError as e:
+            return jsonify({'success': False, 'message': str(e)})
+        save_tournament(current_tournament)
+        if current_tournament.status != 'running':
+            scheduler.cancel('tournament_level')
+        place = current_tournament.players[player_id]['place']
+    
+    player = game_data['players'].get(player_id)
+    if player is not None:
+        player['position'] = None
+        player['chips'] = 0
+    # 只剩一名选手时锦标赛结束，恢复现金局
+    sync_tournament_chips(game_data)
+    save_game_data(game_data)
+    
+    return jsonify({'success': True, 'message': f'{player_id} 已被淘汰，名次 {place}'})
+
+@app.route('/api/tournament/status', methods=['GET'])
+@login_required
+def tournament_status():
+    """锦标赛状态：盲注级别、升级时间、座位和排名"""
+    with tournament_lock:
+        if current_tournament is None:
+            return jsonify({'success': True, 'tournament': None})
+        summary = current_tournament.status_summary()
+    
+    summary['server_time'] = time.time()
+    response = jsonify({'success': True, 'tournament': summary})
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/api/player_stats', methods=['GET'])
+@admin_required
+def get_player_stats():
+    """玩家统计：scope=session（当前场次，默认）或 lifetime（总计），可用 player_id 只查一个玩家"""
+    scope = request.args.get('scope', 'session')
+    if scope not in ('session', 'lifetime'):
+        return jsonify({'success': False, 'message': 'scope 必须是 session 或 lifetime'})
+    
+    player_id = request.args.get('player_id')
+    if player_id:
+        stats = {player_id: player_stats.player_summary(player_id, scope)}
+    else:
+        stats = player_stats.summary(scope)
+    
+    return jsonify({
+        'success': True,
+        'scope': scope,
+        'session_started_at': player_stats.session_started_at,
+        'stats': stats
+    })
+
+@app.route('/api/player_stats/new_session', methods=['POST'])
+@admin_required
+@idempotent
+@with_game_lock
+def new_player_stats_session():
+    """开始新的统计场次（总计不受影响）"""
+    player_stats.new_session()
+    save_player_stats()
+    return jsonify({'success': True, 'message': '已开始新的统计场次'})
+
+def parse_history_filters(args):
+    """解析手牌历史的查询条件：时间可以是 Unix 秒数或 ISO 格式，底池是整数"""
+    filters = {'player_id': args.get('player_id') or None}
+    for key in ('since', 'until'):
+        value = args.get(key)
+        if not value:
+            filters[key] = None
+            continue
+        try:
+            filters[key] = float(value)
+        except ValueError:
+            filters[key] = datetime.fromisoformat(value).timestamp()
+    for key in ('min_pot', 'max_pot'):
+        value = args.get(key)
+        filters[key] = int(value) if value else None
+    return filters
+
+@app.route('/api/bots', methods=['GET'])
+@admin_required
+def get_bots():
+    """牌桌上的机器人和决策耗时统计"""
+    game_data = load_game_data()
+    bot_players = {pid: {'position': p.get('position'), 'chips': p.get('chips', 0)}
+                   for pid, p in game_data['players'].items() if p.get('bot')}
+    return jsonify({'success': True, 'bots': bot_players, 'stats': bots.stats.to_dict()})
+
+@app.route('/api/hand_history', methods=['GET'])
+@admin_required
+def get_hand_history():
+    """手牌历史查询（最新的在前）
+
+    条件：player_id、since/until（时间）、min_pot/max_pot（底池）。
+    分页：limit（最多 MAX_PAGE_SIZE）和上一页返回的 next_cursor；
+    stream=1 时以 NDJSON 流式返回全部匹配的手牌。
+    """
+    try:
+        filters = parse_history_filters(request.args)
+        cursor = request.args.get('cursor')
+        cursor = int(cursor) if cursor else None
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'success': False, 'message': '查询参数格式错误'})
+    
+    # 等已经结束的手牌写完再查
+    io_pool.wait_idle(TABLE_JOB_KEY)
+    history = open_hand_history()
+    if request.args.get('stream') == '1':
+        def generate():
+            for record in history.iter_query(**filters):
+                yield json.dumps(record, ensure_ascii=False) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    hands, next_cursor = history.query(cursor=cursor, limit=limit, **filters)
+    return jsonify({
+        'success': True,
+        'hands': hands,
+        'next_cursor': next_cursor,
+        'total_hands': len(history),
+        'max_page_size': MAX_PAGE_SIZE
+    })
+
+@app.route('/api/hand_history/<hand_id>', methods=['GET'])
+@admin_required
+def get_hand_history_detail(hand_id):
+    """按 hand_id 查询一手牌"""
+    io_pool.wait_idle(TABLE_JOB_KEY)
+    record = open_hand_history().get(hand_id)
+    if record is None:
+        return jsonify({'success': False, 'message': '手牌不存在'})
+    return jsonify({'success': True, 'hand': record})
+
+@app.route('/api/shuffle/verify/<hand_id>', methods=['GET'])
+@login_required
+def verify_shuffle(hand_id):
+    """核对一手牌的洗牌：种子是否与开局公布的承诺一致，用种子重放发牌是否与实际发出的牌一致"""
+    io_pool.wait_idle(TABLE_JOB_KEY)
+    record = open_hand_history().get(hand_id)
+    if record is None:
+        return jsonify({'success': False, 'message': '手牌不存在'})
+    if not record.get('deck_seed'):
+        return jsonify({'success': False, 'message': '这手牌没有洗牌记录'})
+    
+    variant = record.get('variant') or DEFAULT_VARIANT
+    dealt_players = record.get('dealt_players', [])
+    community_cards = record.get('community_cards', [])
+    hands, board = replay_deal(record['deck_seed'], base_deck(variant), len(dealt_players),
+                               VARIANTS[variant]['hole_cards'], len(community_cards))
+    replay = dict(zip(dealt_players, hands))
+    commitment_ok = commitment(record['deck_seed']) == record.get('deck_commitment')
+    # 只有摊牌的玩家底牌有记录，逐个核对；公共牌全部核对
+    cards_ok = board == community_cards and all(
+        replay.get(pid) == cards for pid, cards in record.get('player_cards', {}).items())
+    return jsonify({
+        'success': True,
+        'hand_id': hand_id,
+        'verified': commitment_ok and cards_ok,
+        'commitment_ok': commitment_ok,
+        'cards_ok': cards_ok,
+        'deck_commitment': record.get('deck_commitment'),
+        'deck_seed': record['deck_seed'],
+        'replay': {'hole_cards': replay, 'community_cards': board},
+    })
+
+def current_settlement():
+    """按当前牌桌计算结算，返回 (结算, 不能结算的原因)
+
+    牌局进行中（筹码还在底池里）和锦标赛进行中（牌桌上是锦标赛筹码）不能结算。
+    只在 game_lock 里取筹码快照，化简转账在进程池里计算
+    """
+    with game_lock:
+        game_data = load_game_data()
+        if game_data.get('game_state') in ('playing', 'showdown'):
+            return None, '牌局进行中，请在本手结束后结算'
+        if is_tournament_table(game_data):
+            return None, '锦标赛进行中，请在锦标赛结束后结算'
+        # 机器人的筹码不是真钱，不参与结算（和它们的输赢差额记在银行账户上）
+        players = {pid: {'chips': p.get('chips', 0), 'borrow_count': p.get('borrow_count', 1)}
+                   for pid, p in game_data['players'].items() if not p.get('bot')}
+        buy_in_amount = load_config()['buy_in_amount']
+    return run_cpu_job(build_settlement, [players], buy_in_amount), None
+
+@app.route('/api/settlement', methods=['GET'])
+@admin_required
+def preview_settlement():
+    """预览结算：每人输赢（筹码 - 借码次数 × 买入金额）和最少的转账方案"""
+    settlement, message = current_settlement()
+    if settlement is None:
+        return jsonify({'success': False, 'message': message})
+    return jsonify({'success': True, 'settlement': settlement})
+
+@app.route('/api/settlement', methods=['POST'])
+@admin_required
+@idempotent
+def create_settlement():
+    """结算并保存快照到账本"""
+    settlement, message = current_settlement()
+    if settlement is None:
+        return jsonify({'success': False, 'message': message})
+    
+    # 账本的读改写按顺序在 I/O 线程池里执行，并发的结算不会互相覆盖
+    io_pool.submit(append_settlement_ledger, settlement, key=SETTLEMENT_LEDGER_FILE).result()
+    print(f"结算已保存: {settlement['settlement_id']}，{len(settlement['transfers'])} 笔转账")
+    return jsonify({'success': True, 'message': '结算已保存', 'settlement': settlement})
+
+@app.route('/api/settlement/ledger', methods=['GET'])
+@admin_required
+def get_settlement_ledger():
+    """账本里保存过的结算快照（最新的在前）"""
+    return jsonify({'success': True, 'ledger': list(reversed(load_settlement_ledger()))})
+
+@app.route('/api/settlement/ledger/<settlement_id>.csv', methods=['GET'])
+@admin_required
+def export_settlement(settlement_id):
+    """导出一次结算快照为 CSV"""
+    for settlement in load_settlement_ledger():
+        if settlement['settlement_id'] == settlement_id:
+            response = Response(ledger_csv(settlement), mimetype='text/csv')
+            response.headers['Content-Disposition'] = f'attachment; filename=settlement-{settlement_id}.csv'
+            return response
+    return jsonify({'success': False, 'message': '结算记录不存在'})
+
 @app.route('/api/get_users', methods=['GET'])
 @admin_required
 def get_users():
@@ -1630,6 +3070,7 @@ def get_users():
 
 @app.route('/api/add_user', methods=['POST'])
 @admin_required
+@idempotent
 def add_user():
     """添加用户"""
     data = request.get_json()
@@ -1659,6 +3100,8 @@ def add_user():
 
 @app.route('/api/delete_user', methods=['POST'])
 @admin_required
+@idempotent
+@with_game_lock
 def delete_user():
     """删除用户"""
     data = request.get_json()
@@ -1688,6 +3131,7 @@ def delete_user():
 
 @app.route('/api/change_password', methods=['POST'])
 @admin_required
+@idempotent
 def change_password():
     """修改用户密码"""
     data = request.get_json()
@@ -1707,5 +3151,58 @@ def change_password():
     
     return jsonify({'success': True, 'message': '密码修改成功'})
 
+def restore_game_data():
+    """校验牌局数据（损坏时从备份恢复）"""
+    load_game_data()
+
+def restore_player_stats():
+    """加载玩家统计"""
+    global player_stats
+    player_stats = load_player_stats()
+
+def restore_hand_history():
+    """加载手牌历史索引（索引快照 + 快照之后追加的日志尾部）"""
+    open_hand_history()
+
+def prewarm_evaluator():
+    """预先构建各玩法的牌力查表，加载翻牌前胜率表，预热机器人的胜率估算"""
+    for variant in VARIANTS:
+        get_tables(variant)
+    load_table()
+    bots.warm_up()
+
+def prefill_shuffle_pool():
+    """预先洗好各种牌数的牌"""
+    shuffle_service.prefill(sorted({len(base_deck(variant)) for variant in VARIANTS}))
+
+def prewarm_templates():
+    """预先编译页面模板"""
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+# 启动时并行恢复数据（牌局、锦标赛和盲注计时、统计、手牌历史），预热查表、洗牌池和模板，
+# 计算静态资源指纹（预压缩文件由构建步骤生成，见下面和 assets.py）
+STARTUP_TASKS = {
+    'game_data': restore_game_data,
+    'tournament': restore_tournament,
+    'player_stats': restore_player_stats,
+    'hand_history': restore_hand_history,
+    'evaluator': prewarm_evaluator,
+    'shuffle': prefill_shuffle_pool,
+    'templates': prewarm_templates,
+    'assets': assets.load_manifest,
+}
+
+def start_app():
+    """开始执行启动任务（只执行一次）
+
+    导入 app 没有副作用（进程池的工作进程会以 __mp_main__ 的名字重新导入主模块）；
+    直接运行时在下面调用，由 WSGI 服务器加载时在第一个请求里调用
+    """
+    return startup.start(STARTUP_TASKS)
+
 if __name__ == '__main__':
+    start_app()
+    # 直接运行时顺便生成静态资源的预压缩版本；导入 app 不会写 static/ 目录
+    assets.build_assets()
     app.run(debug=True, host='0.0.0.0', port=80)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""静态资源：指纹、预压缩与 HTTP 压缩
+
+页面里的 CSS/JS 放在 static/ 目录下，启动时为每个文件计算内容指纹
+（URL 上带 ?v=<hash>）。带指纹的请求可以长期缓存，内容变了指纹就变，不会用到旧文件。
+gzip（装了 brotli 模块时还有 br）预压缩版本由构建步骤生成（python assets.py，
+直接运行 app.py 时也会生成），导入模块不会往 static/ 里写文件；比源文件旧的
+压缩版本不会被使用。JSON 接口的响应在这里加 ETag 并按需 gzip 压缩。
+"""
+import argparse
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，没有时只提供 gzip
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# 需要预压缩的文件类型
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.html', '.svg', '.json')
+
+# 带指纹的资源缓存一年
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 小于这个字节数的响应压缩不划算
+MIN_COMPRESS_SIZE = 1024
+
+# 指纹清单：相对路径 -> 内容哈希
+manifest = {}
+
+
+def file_fingerprint(path):
+    """文件内容的 SHA-256 前 12 位"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _is_fresh(target, source):
+    """压缩版本存在且不比源文件旧"""
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def _write_compressed(path, suffix, compress):
+    """生成压缩版本（已是最新时跳过）"""
+    target = path + suffix
+    if _is_fresh(target, path):
+        return
+    with open(path, 'rb') as f:
+        data = compress(f.read())
+    tmp = target + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+
+
+def _static_files(static_dir):
+    """static 目录下的源文件：(绝对路径, 相对路径)"""
+    if not os.path.isdir(static_dir):
+        return
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if name.endswith(('.gz', '.br', '.tmp')):
+                continue
+            path = os.path.join(root, name)
+            yield path, os.path.relpath(path, static_dir).replace(os.sep, '/')
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """计算所有静态文件的指纹（只读，启动时调用）"""
+    fingerprints = {rel: file_fingerprint(path) for path, rel in _static_files(static_dir)}
+    manifest.clear()
+    manifest.update(fingerprints)
+    print(f"静态资源指纹已生成: {len(manifest)} 个文件")
+    return manifest
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """生成所有可压缩静态文件的预压缩版本（构建步骤），返回处理的文件数"""
+    count = 0
+    for path, _ in _static_files(static_dir):
+        if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        _write_compressed(path, '.gz', lambda data: gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            _write_compressed(path, '.br', lambda data: brotli.compress(data, quality=11))
+        count += 1
+    print(f"静态资源预压缩完成: {count} 个文件")
+    return count
+
+
+def asset_version(filename):
+    """资源的指纹，不在清单里时返回 None"""
+    return manifest.get(filename)
+
+
+def choose_encoding(filename, accept_encoding, static_dir=STATIC_DIR):
+    """按客户端支持的编码挑选预压缩文件，返回 (文件名, 编码)；没有合适的返回 (filename, None)"""
+    accept_encoding = accept_encoding or ''
+    candidates = []
+    if brotli is not None:
+        candidates.append(('br', '.br'))
+    candidates.append(('gzip', '.gz'))
+    for encoding, suffix in candidates:
+        source = os.path.join(static_dir, filename)
+        if encoding in accept_encoding and _is_fresh(source + suffix, source):
+            return filename + suffix, encoding
+    return filename, None
+
+
+def compress_json_response(response, accept_encoding):
+    """给 JSON 响应 gzip 压缩（客户端支持且响应够大时）"""
+    if ('gzip' not in (accept_encoding or '') or response.direct_passthrough or
+            'Content-Encoding' in response.headers or response.status_code < 200 or
+            response.status_code in (204, 304)):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+    response.set_data(gzip.compress(data, 5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成静态资源的预压缩版本')
+    parser.add_argument('--static-dir', default=STATIC_DIR, help='静态资源目录')
+    args = parser.parse_args()
+    build_assets(args.static_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""牌桌机器人的决策
+
+人数不够开局时机器人坐到空座位上补足人数（座位管理在 app.py），轮到它时由
+调度器线程调用 decide，再和玩家一样通过引擎的 apply_player_action 行动，
+不占请求线程。
+
+决策只用机器人自己能看到的信息（底牌、公共牌、底池、合法行动、还在牌局里的对手数）：
+
+- 德州翻牌前直接查翻牌前胜率表
+- 其他情况做蒙特卡洛：随机发对手底牌和剩余公共牌，所有模拟一次性向量化评估；
+  模拟次数按评估手数的预算（EVAL_BUDGET，约 1 微秒一手）计算，单次决策在 10 毫秒以内
+- 胜率与底池赔率比较决定跟注还是弃牌，胜率明显高于平均水平时加注，带少量随机性
+"""
+import random
+import threading
+import time
+from itertools import combinations
+
+import numpy as np
+
+from hand_evaluator import VARIANTS, cards_to_ints, create_variant_deck, evaluate_batch, int_to_card
+from preflop_equity import get_preflop_equity
+
+# 单次决策最多评估多少手牌
+EVAL_BUDGET = 4000
+MIN_SAMPLES = 8
+MAX_SAMPLES = 400
+
+# 决策耗时目标（毫秒），超过的次数记在统计里
+DECISION_BUDGET_MS = 10
+
+# 胜率达到平均水平（1 / 人数）的多少倍时加注
+RAISE_STRENGTH = 1.5
+# 没人下注时偶尔诈唬下注的概率
+BLUFF_RATE = 0.08
+
+BOT_ID_PREFIX = 'bot'
+
+_rng = random.Random()
+
+_omaha_combos = {}
+
+
+def _omaha_index(hole_count):
+    """奥马哈“两张底牌 + 三张公共牌”的所有组合在 底牌+5张公共牌 中的下标"""
+    if hole_count not in _omaha_combos:
+        _omaha_combos[hole_count] = np.array([
+            list(hole) + [hole_count + b for b in board]
+            for hole in combinations(range(hole_count), 2)
+            for board in combinations(range(5), 3)
+        ], dtype=np.int64)
+    return _omaha_combos[hole_count]
+
+
+def estimate_equity(hole_cards, community_cards, variant, opponents, seed=None):
+    """估算对 opponents 个随机对手的胜率（平分按份数计），返回 0~1"""
+    opponents = max(1, opponents)
+    if variant == 'holdem' and not community_cards:
+        equity = get_preflop_equity(hole_cards, opponents + 1)
+        if equity is not None:
+            return equity
+
+    hole = cards_to_ints(hole_cards)
+    board = cards_to_ints(community_cards)
+    known = set(hole) | set(board)
+    deck = np.array([card for card in create_variant_deck(variant) if card not in known], dtype=np.int64)
+    hole_count = len(hole)
+    need_board = 5 - len(board)
+    omaha = VARIANTS[variant]['omaha']
+    index = _omaha_index(hole_count) if omaha else None
+    per_player = len(index) if omaha else 1
+    samples = max(MIN_SAMPLES, min(MAX_SAMPLES, EVAL_BUDGET // ((opponents + 1) * per_player)))
+
+    # 每次模拟从剩余的牌里不放回地抽出对手底牌和没发的公共牌
+    rng = np.random.default_rng(seed)
+    picks = deck[rng.random((samples, len(deck))).argsort(axis=1)[:, :opponents * hole_count + need_board]]
+    boards = np.concatenate([np.tile(np.array(board, dtype=np.int64), (samples, 1)), picks[:, :need_board]], axis=1)
+    holes = np.concatenate([np.tile(np.array(hole, dtype=np.int64), (samples, 1, 1)),
+                            picks[:, need_board:].reshape(samples, opponents, hole_count)], axis=1)
+    players = opponents + 1
+    full = np.concatenate([holes, np.repeat(boards[:, None, :], players, axis=1)], axis=2)
+    if omaha:
+        scores = evaluate_batch(full[:, :, index].reshape(-1, 5), variant=variant)
+        scores = scores.reshape(samples, players, per_player).max(axis=2)
+    else:
+        scores = evaluate_batch(full.reshape(samples * players, -1), variant=variant).reshape(samples, players)
+
+    best = scores.max(axis=1)
+    ties = (scores == best[:, None]).sum(axis=1)
+    return float(np.where(scores[:, 0] == best, 1.0 / ties, 0.0).mean())
+
+
+def warm_up():
+    """每种玩法先估算一次胜率，第一次决策不用承担 NumPy 的初始化开销"""
+    for variant, rules in VARIANTS.items():
+        deck = [int_to_card(card) for card in create_variant_deck(variant)]
+        estimate_equity(deck[:rules['hole_cards']], deck[-3:], variant, 1, 0)
+
+
+def _decide(hole_cards, community_cards, variant, opponents, pot, legal, big_blind, rng):
+    equity = estimate_equity(hole_cards, community_cards, variant, opponents, rng.getrandbits(32))
+    strength = equity * (max(1, opponents) + 1)
+    to_call = legal['call_amount']
+
+    bluff = to_call <= 0 and rng.random() < BLUFF_RATE
+    if legal['can_raise'] and (strength >= RAISE_STRENGTH and rng.random() < 0.8 or bluff):
+        # 加注半个到一个底池
+        target = legal['max_bet'] + max(big_blind, int(pot * (0.5 + 0.5 * rng.random())))
+        return 'raise', min(legal['max_raise'], max(legal['min_raise'], target))
+    if to_call <= 0:
+        return 'check', 0
+    # 胜率够底池赔率就跟注；牌不差时跟一个大盲以内的小注
+    if equity * (pot + to_call) >= to_call or (strength >= 1 and to_call <= big_blind):
+        return 'call', 0
+    return 'fold', 0
+
+
+def decide(hole_cards, community_cards, variant, opponents, pot, legal, big_blind, rng=None):
+    """机器人决策，返回 (行动, 金额)；金额是加注到的总下注额，只对加注有意义
+
+    legal 是引擎计算的合法行动（compute_legal_actions），opponents 是还没弃牌的对手数。
+    """
+    begin = time.perf_counter()
+    try:
+        return _decide(hole_cards, community_cards, variant, opponents, pot, legal, big_blind, rng or _rng)
+    finally:
+        stats.record((time.perf_counter() - begin) * 1000)
+
+
+def new_bot_id(taken):
+    """不与已有玩家和用户重名的机器人ID"""
+    n = 1
+    while f'{BOT_ID_PREFIX}{n}' in taken:
+        n += 1
+    return f'{BOT_ID_PREFIX}{n}'
+
+
+class DecisionStats:
+    """决策次数和耗时统计（机器人同时也是持续运行的压测）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_budget = 0
+
+    def record(self, ms):
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            if ms > DECISION_BUDGET_MS:
+                self.over_budget += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'decisions': self.count,
+                'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+                'max_ms': round(self.max_ms, 3),
+                'over_budget': self.over_budget,
+                'budget_ms': DECISION_BUDGET_MS,
+            }
+
+
+stats = DecisionStats()
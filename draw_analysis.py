@@ -0,0 +1,235 @@
+"""听牌与补牌（outs）分析
+
+analyze_draws 是上帝视角（管理员用）：根据当前公共牌和牌堆中剩余的未见牌，
+列出每个在场玩家的 outs、是否领先、听牌类型和下一张牌的改进概率。
+
+analyze_own_draws 是玩家自己的视角：只用自己的底牌和公共牌，未见牌是整副牌
+去掉这些牌，只给出听牌类型和改进概率；当前牌力对未见牌中所有可能的两张对手
+底牌逐一枚举比较，不会透露对手的真实底牌。
+
+每手牌先算出 5 张（翻牌）或 6 张（转牌）的部分结果（点数计数和花色掩码），
+再对每张候选牌只做一次增量叠加，所有玩家 × 候选牌在一次向量化评估里完成。
+对手底牌组合的牌力只和公共牌有关，按公共牌缓存，同桌玩家共用。
+8 人桌一次分析在 1 毫秒以内，请求里直接计算，不用进程池。
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from hand_evaluator import (DEFAULT_VARIANT, cards_to_ints, create_variant_deck, get_tables, hand_components,
+                            int_to_card, score_category, score_components)
+
+CATEGORY_NAMES = ['高牌', '一对', '两对', '三条', '顺子', '同花', '葫芦', '四条', '同花顺', '皇家同花顺']
+
+# 翻牌和转牌时才需要分析，对应公共牌张数
+ANALYSIS_STREETS = {3: 'flop', 4: 'turn'}
+
+_RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+
+
+def _detect_draws(counts, suit_masks, tables):
+    """根据部分结果判断每个玩家的同花听牌和顺子听牌"""
+    flush_draw = (tables['popcount'][suit_masks] == 4).any(axis=1)
+
+    rank_mask = (counts > 0).astype(np.int64) @ _RANK_BITS
+    has_straight = tables['straight'][rank_mask] > 0
+    # 补上一个还没有的点数就能成顺子的点数个数
+    completing = ((tables['straight'][rank_mask[:, None] | _RANK_BITS] > 0) &
+                  ((rank_mask[:, None] & _RANK_BITS) == 0)).sum(axis=1)
+    completing = np.where(has_straight, 0, completing)
+
+    draws = []
+    for flush, count in zip(flush_draw.tolist(), completing.tolist()):
+        player_draws = ['flush_draw'] if flush else []
+        if count >= 2:
+            player_draws.append('open_ended_straight_draw')
+        elif count == 1:
+            player_draws.append('gutshot_straight_draw')
+        draws.append(player_draws)
+    return draws
+
+
+def _hit_probability(outs, unseen, cards_to_come):
+    """剩余 cards_to_come 张牌中至少中一张 outs 的概率"""
+    if unseen <= 0 or outs <= 0:
+        return 0.0
+    if cards_to_come == 1:
+        return outs / unseen
+    misses = unseen - outs
+    return 1 - (misses * (misses - 1)) / (unseen * (unseen - 1))
+
+
+def _card_components(cards, dtype):
+    """每张牌单独的点数计数（one-hot）和花色掩码，用于增量叠加"""
+    card_ranks = cards >> 2
+    rank_onehot = np.eye(13, dtype=dtype)[card_ranks]
+    suit_bits = np.zeros((len(cards), 4), dtype=np.int64)
+    suit_bits[np.arange(len(cards)), cards & 3] = np.left_shift(1, card_ranks)
+    return rank_onehot, suit_bits
+
+
+@lru_cache(maxsize=None)
+def _pair_indices(count):
+    """count 张牌中所有两张组合的下标"""
+    return np.triu_indices(count, 1)
+
+
+@lru_cache(maxsize=64)
+def _board_pair_scores(board, variant):
+    """公共牌加上其余任意两张牌的牌力，按公共牌缓存（同一张牌桌所有玩家共用）
+
+    翻牌时其余 49 张牌有 1176 种两张组合，在公共牌的部分结果上增量叠加后一次评估
+    返回 (其余的牌, 组合下标 first, second, 牌力)，数组只读
+    """
+    cards = np.array([card for card in create_variant_deck(variant) if card not in board], dtype=np.int64)
+    board_counts, board_masks = hand_components(np.array([board], dtype=np.int64))
+    rank_onehot, suit_bits = _card_components(cards, board_counts.dtype)
+    first, second = _pair_indices(len(cards))
+    scores = score_components(board_counts + rank_onehot[first] + rank_onehot[second],
+                              board_masks | suit_bits[first] | suit_bits[second], variant)
+    for array in (cards, scores):
+        array.flags.writeable = False
+    return cards, first, second, scores
+
+
+def _opponent_scores(hole, board, variant):
+    """对手所有可能的两张底牌（不含自己的底牌）对应的牌力"""
+    cards, first, second, scores = _board_pair_scores(tuple(board), variant)
+    mine = np.isin(cards, hole)
+    return scores[~(mine[first] | mine[second])]
+
+
+def _next_card_scores(partial, unseen, variant):
+    """部分结果的当前牌力，以及分别加上每张候选牌后的牌力
+
+    partial: (玩家数, 5或6) 的整数牌数组，unseen: 候选牌
+    返回 (counts, suit_masks, 当前牌力 (玩家数,), 新牌力 (玩家数, 候选牌数))
+    """
+    counts, suit_masks = hand_components(partial)
+
+    # 增量叠加每张候选牌：(玩家数, 候选牌数, ...)，和当前牌力放在同一次评估里
+    players, candidates = len(partial), len(unseen)
+    rank_onehot, suit_bits = _card_components(unseen, counts.dtype)
+    new_counts = (counts[:, None, :] + rank_onehot[None, :, :]).reshape(-1, 13)
+    new_suits = (suit_masks[:, None, :] | suit_bits[None, :, :]).reshape(-1, 4)
+    scores = score_components(np.concatenate([counts, new_counts]), np.concatenate([suit_masks, new_suits]), variant)
+    return counts, suit_masks, scores[:players], scores[players:].reshape(players, candidates)
+
+
+def _improvements(current_scores, new_scores, variant):
+    """每个玩家下一张牌提升牌型的候选牌（布尔数组），以及按提升后牌型统计的张数"""
+    # 牌力高位是牌型的大小顺序（短牌中同花和葫芦对调），显示时再换回牌型名称
+    current_categories = current_scores >> 20
+    new_categories = new_scores >> 20
+    improved = new_categories > current_categories[:, None]
+    improvement_counts = ((new_categories[:, :, None] == np.arange(len(CATEGORY_NAMES))) &
+                          improved[:, :, None]).sum(axis=1)
+    improvements = [{CATEGORY_NAMES[score_category(order << 20, variant)]: count
+                     for order, count in enumerate(row) if count}
+                    for row in improvement_counts.tolist()]
+    return improved, improvements
+
+
+def analyze_draws(game_data, variant=DEFAULT_VARIANT):
+    """分析当前牌局所有在场玩家的 outs 和听牌概率（德州/短牌）
+
+    用到所有人的真实底牌和牌堆，结果只能给管理员看。
+    返回 None 表示当前街不需要分析（翻牌前或河牌）
+    """
+    community = game_data.get('community_cards', [])
+    if len(community) not in ANALYSIS_STREETS:
+        return None
+
+    live = [(pid, p) for pid, p in game_data['players'].items()
+            if p.get('position') is not None and not p.get('folded', False) and p.get('hole_cards')]
+    unseen = np.array(cards_to_ints(game_data.get('deck', [])), dtype=np.int64)
+    if not live or len(unseen) == 0:
+        return {'street': ANALYSIS_STREETS[len(community)], 'unseen_count': int(len(unseen)), 'players': []}
+
+    tables = get_tables(variant)
+    board = cards_to_ints(community)
+    partial = np.array([cards_to_ints(p['hole_cards']) + board for _, p in live], dtype=np.int64)
+    counts, suit_masks, current_scores, new_scores = _next_card_scores(partial, unseen, variant)
+    candidates = len(unseen)
+
+    best = new_scores.max(axis=0)
+    best_count = (new_scores == best).sum(axis=0)
+    wins = (new_scores == best) & (best_count == 1)
+    ties = (new_scores == best) & (best_count > 1)
+    leading = current_scores == current_scores.max()
+    # 落后的玩家，能让自己单独领先的牌才算 outs
+    outs = wins & ~leading[:, None]
+
+    improved, improvements = _improvements(current_scores, new_scores, variant)
+    draws = _detect_draws(counts, suit_masks, tables)
+    cards_to_come = 5 - len(community)
+    win_rates = (wins.sum(axis=1) / candidates).tolist()
+    tie_rates = (ties.sum(axis=1) / candidates).tolist()
+    improve_rates = (improved.sum(axis=1) / candidates).tolist()
+    unseen_list = unseen.tolist()
+
+    results = []
+    for i, (pid, player) in enumerate(live):
+        out_cards = [int_to_card(unseen_list[j]) for j in np.flatnonzero(outs[i]).tolist()]
+        results.append({
+            'player_id': pid,
+            'position': player.get('position'),
+            'current_hand': CATEGORY_NAMES[score_category(current_scores[i], variant)],
+            'current_rank': int(current_scores[i]),
+            'is_leading': bool(leading[i]),
+            'draws': draws[i],
+            'outs': out_cards,
+            'out_count': len(out_cards),
+            'win_probability': win_rates[i],
+            'tie_probability': tie_rates[i],
+            'improve_probability': improve_rates[i],
+            'improvements': improvements[i],
+            'hit_by_river': _hit_probability(len(out_cards), candidates, cards_to_come),
+        })
+
+    return {
+        'street': ANALYSIS_STREETS[len(community)],
+        'unseen_count': int(candidates),
+        'players': results,
+    }
+
+
+def analyze_own_draws(hole_cards, community_cards, opponents, variant=DEFAULT_VARIANT):
+    """从玩家自己的视角分析听牌（德州/短牌）：只用自己的底牌和公共牌
+
+    opponents 是还没弃牌的对手数。hand_strength 是当前牌力领先一手随机对手底牌的比例，
+    ahead_probability 按对手之间相互独立近似为领先所有对手的概率（不考虑后面的发牌）。
+    返回 None 表示当前街不需要分析（翻牌前或河牌）
+    """
+    if len(community_cards) not in ANALYSIS_STREETS:
+        return None
+
+    hole = cards_to_ints(hole_cards)
+    board = cards_to_ints(community_cards)
+    known = set(hole) | set(board)
+    unseen = np.array([card for card in create_variant_deck(variant) if card not in known], dtype=np.int64)
+    partial = np.array([hole + board], dtype=np.int64)
+    counts, suit_masks, current_scores, new_scores = _next_card_scores(partial, unseen, variant)
+    opponent_scores = _opponent_scores(hole, board, variant)
+    candidates = len(unseen)
+    # 平局算一半
+    strength = float(((opponent_scores < current_scores[0]).sum() +
+                      (opponent_scores == current_scores[0]).sum() / 2) / len(opponent_scores))
+
+    improved, improvements = _improvements(current_scores, new_scores, variant)
+    improve_count = int(improved[0].sum())
+    return {
+        'street': ANALYSIS_STREETS[len(community_cards)],
+        'unseen_count': candidates,
+        'players': [{
+            'current_hand': CATEGORY_NAMES[score_category(current_scores[0], variant)],
+            'current_rank': int(current_scores[0]),
+            'draws': _detect_draws(counts, suit_masks, get_tables(variant))[0],
+            'improve_probability': improve_count / candidates,
+            'improvements': improvements[0],
+            'improve_by_river': _hit_probability(improve_count, candidates, 5 - len(community_cards)),
+            'opponents': opponents,
+            'hand_strength': strength,
+            'ahead_probability': strength ** opponents,
+        }],
+    }
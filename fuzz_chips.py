@@ -0,0 +1,423 @@
+"""筹码守恒模糊测试
+
+随机生成座位布局、筹码量、盲注/前注、玩法和行动序列，直接调用牌局
+引擎（start_game_internal、apply_player_action、handle_action_timeout、
+process_pre_actions、finish_showdown）打完整手牌，每一步之后检查不变量：
+
+- 总筹码守恒（玩家筹码 + 底池 = 开始时的总筹码），没有负筹码
+- 底池等于所有玩家本手投入之和，边池之和等于底池
+- 牌局进行中恰好有一个能行动的玩家轮到行动
+- 被拒绝的行动不改变任何筹码
+- 结算分出去的筹码等于底池
+
+用例由随机种子完全确定，失败的用例会自动缩减（去掉多余的行动、玩家、
+前注，缩小筹码），输出最小的可复现用例。多个进程并行运行，每个进程在
+自己的临时目录里运行，引擎内部的存盘换成内存版本，互不干扰。
+
+    python fuzz_chips.py --workers 8 --duration 600
+    python fuzz_chips.py --replay failure.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from shuffle_service import ShuffleService
+
+# 每个工作进程在 _init_worker 里切换到临时目录后再导入 app
+app = None
+
+# 当前用例的配置（引擎里的 load_config 直接返回它）
+_current_config = {}
+
+# 行动编码：低 3 位是行动种类，高位决定加注金额或预选行动的目标
+ACTION_KINDS = ('fold', 'check', 'call', 'raise', 'allin', 'timeout', 'pre_action', 'wrong_player')
+PRE_ACTION_KINDS = ('fold', 'check', 'check_fold', 'call', 'call_any')
+
+# 行动序列用完后最多再自动行动多少步（超时过牌/弃牌），超过就认为牌局卡死
+MAX_EXTRA_STEPS = 200
+
+# 每个任务包含的用例数
+BATCH_SIZE = 200
+
+
+class InvariantError(Exception):
+    """不变量被破坏（第一个参数是不变量名称，用于缩减时判断是不是同一个问题）"""
+
+    def __init__(self, name, detail):
+        super().__init__(f'{name}: {detail}')
+        self.name = name
+
+
+def _init_worker(base_dir):
+    """工作进程初始化：独立的临时目录，关闭引擎的输出"""
+    global app
+    workdir = os.path.join(base_dir, str(os.getpid()))
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+        app_module.start_app()
+        app_module.startup.wait()
+    app = app_module
+    # 只测牌局规则：引擎内部的存盘（牌局只增加版本号，统计和手牌历史不落盘），配置直接从内存读取，
+    # 省掉每一步的 JSON 读写（占了绝大部分时间）
+    app.save_game_data = _save_game_data_in_memory
+    app.save_player_stats = lambda: None
+    app.record_hand_history = lambda game_data, results: None
+    app.load_config = lambda: dict(_current_config)
+    # 洗牌种子改由 random 生成（不预先洗牌），用例的种子决定每手的牌，失败用例可以复现
+    app.shuffle_service = ShuffleService(pool_size=0, seed_source=_case_seed_bytes)
+
+
+def _case_seed_bytes(size):
+    return random.getrandbits(size * 8).to_bytes(size, 'big')
+
+
+def _save_game_data_in_memory(data):
+    data['version'] = data.get('version', 0) + 1
+
+
+def generate_case(seed):
+    """由种子生成一个随机用例"""
+    rng = random.Random(seed)
+    small_blind = rng.choice([1, 5, 10, 25])
+    big_blind = small_blind * rng.choice([2, 2, 2, 3])
+    ante = rng.choice([0, 0, 0, small_blind // 2 or 1, small_blind])
+    seats = sorted(rng.sample(range(1, 9), rng.randint(2, 8)))
+    players = []
+    for position in seats:
+        # 混合各种筹码深度：空筹码、不够盲注、短码、深码
+        style = rng.random()
+        if style < 0.05:
+            chips = 0
+        elif style < 0.2:
+            chips = rng.randint(1, big_blind + ante)
+        elif style < 0.5:
+            chips = rng.randint(big_blind, 20 * big_blind)
+        else:
+            chips = rng.randint(20 * big_blind, 300 * big_blind)
+        players.append([position, chips, rng.random() < 0.05])
+    return {
+        'seed': seed,
+        'variant': rng.choice(['holdem', 'holdem', 'shortdeck', 'plo4', 'plo5']),
+        'small_blind': small_blind,
+        'big_blind': big_blind,
+        'ante': ante,
+        'dealer': rng.choice(seats),
+        'hands': rng.randint(1, 3),
+        'players': players,
+        'actions': [rng.getrandbits(16) for _ in range(rng.randint(0, 60))],
+    }
+
+
+def _case_config(case):
+    config = dict(app.DEFAULT_CONFIG)
+    config.update({
+        'small_blind': case['small_blind'],
+        'big_blind': case['big_blind'],
+        'ante': case['ante'],
+        'game_variant': case['variant'],
+        'auto_deal': False,
+        # 计时器不能在测试过程中触发，超时只由行动序列显式模拟
+        'action_timeout': 10 ** 6,
+        'time_bank_seconds': 0,
+    })
+    return config
+
+
+def _chip_snapshot(game_data):
+    return ({pid: p.get('chips', 0) for pid, p in game_data['players'].items()},
+            game_data.get('current_pot', 0))
+
+
+def check_invariants(game_data, total_chips, context):
+    """检查牌局进行中的不变量"""
+    players = game_data['players']
+    if any(p.get('chips', 0) < 0 for p in players.values()):
+        raise InvariantError('negative_chips', f'{context}: {_chip_snapshot(game_data)[0]}')
+
+    pot = game_data.get('current_pot', 0)
+    on_table = sum(p.get('chips', 0) for p in players.values()) + pot
+    if on_table != total_chips:
+        raise InvariantError('chips_not_conserved', f'{context}: 总筹码 {on_table}，应为 {total_chips}')
+
+    if game_data['game_state'] not in ('playing', 'showdown'):
+        return
+
+    contributions = sum(p.get('total_invested_this_hand', 0) for p in players.values())
+    if contributions != pot:
+        raise InvariantError('pot_mismatch', f'{context}: 底池 {pot}，投入合计 {contributions}')
+
+    side_pots = app.calculate_side_pots(game_data)
+    if side_pots and sum(side_pot['amount'] for side_pot in side_pots) != pot:
+        raise InvariantError('side_pots_mismatch', f'{context}: 边池 {side_pots}，底池 {pot}')
+
+    if game_data['game_state'] == 'playing':
+        actors = [p for p in players.values()
+                  if p.get('position') == game_data.get('current_player')]
+        if len(actors) != 1:
+            raise InvariantError('no_single_actor', f'{context}: 当前行动座位 {game_data.get("current_player")}')
+        actor = actors[0]
+        if actor.get('folded') or actor.get('all_in') or actor.get('chips', 0) <= 0 or not actor.get('hole_cards'):
+            raise InvariantError('actor_cannot_act', f'{context}: 座位 {actor["position"]} 不能行动')
+
+
+def _apply_step(game_data, config, code):
+    """把一个行动编码作用到当前牌局，返回描述"""
+    kind = ACTION_KINDS[code & 7]
+    arg = code >> 3
+    player_id, player = app.get_player_at_position(game_data, game_data.get('current_player'))
+
+    if kind == 'timeout':
+        app.handle_action_timeout(game_data, config)
+        return 'timeout'
+
+    if kind == 'pre_action':
+        live = sorted(pid for pid, p in game_data['players'].items()
+                      if p.get('hole_cards') and not p.get('folded') and not p.get('all_in'))
+        if live:
+            target = live[arg % len(live)]
+            max_bet = max(p.get('current_bet', 0) for p in game_data['players'].values())
+            game_data.setdefault('pre_actions', {})[target] = {
+                'action': PRE_ACTION_KINDS[(arg // len(live)) % len(PRE_ACTION_KINDS)],
+                'betting_round': game_data.get('betting_round'),
+                'max_bet': max_bet,
+            }
+            return f'pre_action {target}'
+        return 'pre_action -'
+
+    if kind == 'wrong_player':
+        others = sorted(pid for pid in game_data['players'] if pid != player_id)
+        if not others:
+            return 'wrong_player -'
+        other = others[arg % len(others)]
+        before = _chip_snapshot(game_data)
+        success, message = app.apply_player_action(game_data, config, other, 'call')
+        if success or _chip_snapshot(game_data) != before:
+            raise InvariantError('wrong_player_accepted', f'{other} 不该行动却执行了: {message}')
+        return f'wrong_player {other}'
+
+    amount = 0
+    if kind == 'raise':
+        legal = app.get_legal_actions(game_data, player, config)
+        span = max(0, legal['max_raise'] - legal['min_raise'])
+        amount = legal['min_raise'] + arg % (span + 1)
+    before = _chip_snapshot(game_data)
+    success, message = app.apply_player_action(game_data, config, player_id, kind, amount)
+    if not success:
+        if _chip_snapshot(game_data) != before:
+            raise InvariantError('rejected_action_changed_chips', f'{player_id} {kind} {amount}: {message}')
+        return f'{player_id} {kind} {amount} 被拒绝'
+    app.process_pre_actions(game_data, config)
+    return message
+
+
+def _build_game_data(case):
+    game_data = json.loads(json.dumps(app.DEFAULT_GAME_DATA))
+    for position, chips, sitting_out in case['players']:
+        game_data['players'][f'p{position}'] = {
+            'id': f'p{position}', 'chips': chips, 'borrow_count': 1, 'position': position,
+            'sitting_out': sitting_out,
+        }
+    game_data['dealer_position'] = case['dealer']
+    return game_data
+
+
+def run_case(case):
+    """运行一个用例，返回打完的手数；不变量被破坏时抛出 InvariantError"""
+    config = _case_config(case)
+    _current_config.clear()
+    _current_config.update(config)
+    game_data = _build_game_data(case)
+    total_chips = sum(chips for _, chips, _ in case['players'])
+    random.seed(case['seed'])
+    actions = list(case['actions'])
+    hands = 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for hand in range(case['hands']):
+            if hand:
+                app.prepare_next_hand(game_data)
+            if not app.start_game_internal(game_data, config):
+                break
+            hands += 1
+            check_invariants(game_data, total_chips, f'第{hand + 1}手开始')
+
+            steps = 0
+            while game_data['game_state'] in ('playing', 'showdown'):
+                if game_data['game_state'] == 'showdown':
+                    app.finish_showdown(game_data)
+                    break
+                if steps >= len(case['actions']) + MAX_EXTRA_STEPS:
+                    raise InvariantError('hand_not_terminating', f'第{hand + 1}手 {steps} 步后仍未结束')
+                code = actions.pop(0) if actions else 5  # 行动用完后按超时自动过牌/弃牌
+                description = _apply_step(game_data, config, code)
+                steps += 1
+                check_invariants(game_data, total_chips, f'第{hand + 1}手第{steps}步 {description}')
+
+            results = game_data.get('hand_results')
+            pot_won = sum(w['pot_won'] for w in results['winners']) if results else 0
+            invested = sum(results['total_invested'].values()) if results else 0
+            if results and pot_won != invested:
+                raise InvariantError('payout_mismatch', f'第{hand + 1}手 分出 {pot_won}，投入 {invested}')
+            check_invariants(game_data, total_chips, f'第{hand + 1}手结束')
+    return hands
+
+
+def run_batch(start_seed, count):
+    """工作进程任务：运行一批用例，返回 (手数, 用例数, 失败列表)"""
+    hands = 0
+    failures = []
+    for seed in range(start_seed, start_seed + count):
+        case = generate_case(seed)
+        try:
+            hands += run_case(case)
+        except InvariantError as e:
+            failures.append((case, e.name, str(e)))
+        except Exception as e:  # 引擎本身抛异常也算失败
+            failures.append((case, type(e).__name__, f'{type(e).__name__}: {e}'))
+    return hands, count, failures
+
+
+def _failure_name(case):
+    try:
+        run_case(case)
+    except InvariantError as e:
+        return e.name
+    except Exception as e:
+        return type(e).__name__
+    return None
+
+
+def _candidates(case):
+    """缩减候选：每个都比原用例更简单"""
+    actions = case['actions']
+    chunk = len(actions) // 2
+    while chunk >= 1:
+        for start in range(0, len(actions), chunk):
+            yield dict(case, actions=actions[:start] + actions[start + chunk:])
+        chunk //= 2
+    if case['hands'] > 1:
+        yield dict(case, hands=case['hands'] - 1)
+    if len(case['players']) > 2:
+        for i in range(len(case['players'])):
+            players = case['players'][:i] + case['players'][i + 1:]
+            dealer = case['dealer'] if any(p[0] == case['dealer'] for p in players) else players[0][0]
+            yield dict(case, players=players, dealer=dealer)
+    if case['ante']:
+        yield dict(case, ante=0)
+    for i, (position, chips, sitting_out) in enumerate(case['players']):
+        if sitting_out:
+            yield dict(case, players=case['players'][:i] + [[position, chips, False]] + case['players'][i + 1:])
+        if chips > 1:
+            yield dict(case, players=case['players'][:i] + [[position, chips // 2, sitting_out]] + case['players'][i + 1:])
+    for i, code in enumerate(actions):
+        if code > 7:
+            yield dict(case, actions=actions[:i] + [code & 7] + actions[i + 1:])
+
+
+def shrink_case(case, name):
+    """贪心缩减失败用例，直到任何一步简化都不再触发同一个问题"""
+    improved = True
+    while improved:
+        improved = False
+        for candidate in _candidates(case):
+            if _failure_name(candidate) == name:
+                case = candidate
+                improved = True
+                break
+    try:
+        run_case(case)
+        message = ''
+    except Exception as e:
+        message = str(e)
+    return case, message
+
+
+def main():
+    parser = argparse.ArgumentParser(description='筹码守恒模糊测试')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--duration', type=float, default=60, help='运行时长（秒）')
+    parser.add_argument('--cases', type=int, default=0, help='最多运行的用例数（0 表示按时长）')
+    parser.add_argument('--seed', type=int, default=None, help='起始种子（默认随机）')
+    parser.add_argument('--max-failures', type=int, default=5, help='缩减并输出的失败用例数')
+    parser.add_argument('--output', default=None, help='把缩减后的失败用例保存到这个目录')
+    parser.add_argument('--replay', default=None, help='重新运行保存的用例文件')
+    args = parser.parse_args()
+
+    base_dir = tempfile.mkdtemp(prefix='fuzz_chips_')
+    pool = multiprocessing.Pool(args.workers if not args.replay else 1, initializer=_init_worker, initargs=(base_dir,))
+    try:
+        if args.replay:
+            with open(args.replay, 'r', encoding='utf-8') as f:
+                case = json.load(f)
+            print(pool.apply(_replay, (case,)))
+            return
+
+        seed = args.seed if args.seed is not None else random.randrange(1 << 40)
+        print(f'起始种子: {seed}，进程数: {args.workers}')
+        start = time.time()
+        deadline = start + args.duration
+        hands = cases = 0
+        failures = []
+
+        # 同时在跑的批次有上限，按完成情况继续提交（imap 会一次性把生成器读空）
+        next_seed = seed
+        pending = []
+        last_report = start
+        while True:
+            while (len(pending) < args.workers * 2 and time.time() < deadline
+                   and len(failures) < args.max_failures
+                   and (not args.cases or next_seed - seed < args.cases)):
+                count = BATCH_SIZE if not args.cases else min(BATCH_SIZE, seed + args.cases - next_seed)
+                pending.append(pool.apply_async(run_batch, (next_seed, count)))
+                next_seed += count
+            if not pending:
+                break
+            batch_hands, batch_cases, batch_failures = pending.pop(0).get()
+            hands += batch_hands
+            cases += batch_cases
+            failures.extend(batch_failures)
+            if time.time() - last_report >= 10:
+                last_report = time.time()
+                rate = hands / (last_report - start) * 3600
+                print(f'已运行 {cases} 个用例 / {hands} 手，约 {rate:,.0f} 手/小时，失败 {len(failures)}', flush=True)
+
+        elapsed = time.time() - start
+        print(f'完成: {cases} 个用例 / {hands} 手，用时 {elapsed:.1f} 秒，'
+              f'约 {hands / elapsed * 3600:,.0f} 手/小时，失败 {len(failures)}')
+
+        for case, name, message in failures[:args.max_failures]:
+            print(f'\n失败（种子 {case["seed"]}）: {message}')
+            small, small_message = pool.apply(shrink_case, (case, name))
+            print(f'缩减后: {small_message}')
+            print(json.dumps(small, ensure_ascii=False))
+            if args.output:
+                os.makedirs(args.output, exist_ok=True)
+                path = os.path.join(args.output, f'{name}_{case["seed"]}.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(small, f, ensure_ascii=False, indent=2)
+        if failures:
+            raise SystemExit(1)
+    finally:
+        pool.terminate()
+        pool.join()
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def _replay(case):
+    try:
+        return f'通过，打完 {run_case(case)} 手'
+    except Exception as e:
+        return f'失败: {e}'
+
+
+if __name__ == '__main__':
+    main()
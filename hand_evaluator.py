@@ -0,0 +1,353 @@
+"""快速手牌评估模块
+
+牌用整数编码：card = 点数索引 * 4 + 花色索引，点数索引 0..12 对应 2..A，
+花色索引对应 SUITS 的顺序。评估结果是一个整数牌力，数值越大牌越大：
+
+    score = 牌型 << 20 | v0 << 16 | v1 << 12 | v2 << 8 | v3 << 4 | v4
+
+牌型编号与 evaluate_hand 保持一致（0 高牌 ... 8 同花顺，9 皇家同花顺），
+v0..v4 是比较用的点数（2..14），可以用 score_to_strength 转回
+(牌型, 点数列表) 的格式，直接交给 get_hand_strength_description 显示。
+
+支持的玩法见 VARIANTS：短牌（6+）去掉 2~5，A-6-7-8-9 是最小的顺子，
+同花大于葫芦（牌力中的牌型位按短牌的大小顺序编码）；奥马哈必须用
+两张底牌加三张公共牌，所有组合一次性批量评估后取最大值。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+SUITS = ['♠', '♥', '♦', '♣']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+# 玩法定义：底牌张数、最小点数索引、是否奥马哈规则、是否底池限注
+VARIANTS = {
+    'holdem': {'name': '德州扑克', 'hole_cards': 2, 'min_rank': 0, 'omaha': False, 'pot_limit': False},
+    'shortdeck': {'name': '短牌德州（6+）', 'hole_cards': 2, 'min_rank': 4, 'omaha': False, 'pot_limit': False},
+    'plo4': {'name': '四张底池限注奥马哈', 'hole_cards': 4, 'min_rank': 0, 'omaha': True, 'pot_limit': True},
+    'plo5': {'name': '五张底池限注奥马哈', 'hole_cards': 5, 'min_rank': 0, 'omaha': True, 'pot_limit': True},
+}
+DEFAULT_VARIANT = 'holdem'
+
+# 短牌中同花大于葫芦：牌型编号 -> 牌力中的大小顺序
+_SHORT_DECK_ORDER = {5: 6, 6: 5}
+
+# 每个牌型的比较点数个数，用于把整数牌力还原成列表
+CATEGORY_VALUE_COUNT = {9: 1, 8: 1, 7: 2, 6: 2, 5: 5, 4: 1, 3: 3, 2: 3, 1: 4, 0: 5}
+
+# 批量评估时每块的大小，控制中间数组的内存占用
+DEFAULT_CHUNK_SIZE = 65536
+
+_MASK_COUNT = 1 << 13
+_process_pool = None
+_process_pool_workers = 0
+
+
+def card_to_int(card):
+    """把 {'suit', 'rank'} 格式的牌转换成整数编码"""
+    return RANK_INDEX[card['rank']] * 4 + SUIT_INDEX[card['suit']]
+
+
+def int_to_card(value):
+    """把整数编码的牌转换回 {'suit', 'rank'} 格式"""
+    return {'suit': SUITS[value & 3], 'rank': RANKS[value >> 2]}
+
+
+def cards_to_ints(cards):
+    """批量转换牌，已经是整数的牌原样保留"""
+    return [card if isinstance(card, int) else card_to_int(card) for card in cards]
+
+
+# 最小的顺子：A-2-3-4-5（短牌为 A-6-7-8-9），以及它的最高点数
+_WHEELS = {
+    False: (0b1000000001111, 5),
+    True: (0b1000011110000, 9),
+}
+
+
+def _straight_high(mask, short_deck=False):
+    """返回点数掩码中最大顺子的最高点数，没有顺子返回0"""
+    for high in range(14, 5, -1):
+        run = 0b11111 << (high - 6)
+        if mask & run == run:
+            return high
+    wheel, wheel_high = _WHEELS[short_deck]
+    if mask & wheel == wheel:
+        return wheel_high
+    return 0
+
+
+def _top_values(mask, n):
+    """按从大到小返回点数掩码中最多n个点数（2..14）"""
+    values = []
+    for idx in range(12, -1, -1):
+        if mask & (1 << idx):
+            values.append(idx + 2)
+            if len(values) == n:
+                break
+    return values
+
+
+def _pack(values, n):
+    """把点数列表按4位一组打包，左对齐到n个位置"""
+    packed = 0
+    for i in range(n):
+        packed = (packed << 4) | (values[i] if i < len(values) else 0)
+    return packed
+
+
+def _build_tables(short_deck=False):
+    """预计算13位点数掩码的查表数据"""
+    popcount = np.zeros(_MASK_COUNT, dtype=np.int64)
+    highest = np.zeros(_MASK_COUNT, dtype=np.int64)
+    straight = np.zeros(_MASK_COUNT, dtype=np.int64)
+    top_pack = {n: np.zeros(_MASK_COUNT, dtype=np.int64) for n in (2, 3, 5)}
+    for mask in range(_MASK_COUNT):
+        values = _top_values(mask, 5)
+        popcount[mask] = bin(mask).count('1')
+        highest[mask] = values[0] if values else 0
+        straight[mask] = _straight_high(mask, short_deck)
+        for n, table in top_pack.items():
+            table[mask] = _pack(values, n)
+    # 点数值 -> 掩码位，0 表示“没有”
+    value_bit = np.zeros(16, dtype=np.int64)
+    for value in range(2, 15):
+        value_bit[value] = 1 << (value - 2)
+    return {
+        'popcount': popcount,
+        'highest': highest,
+        'straight': straight,
+        'top2': top_pack[2],
+        'top3': top_pack[3],
+        'top5': top_pack[5],
+        'value_bit': value_bit,
+        'short_deck': short_deck,
+    }
+
+
+_tables = {}
+
+
+def get_tables(variant=DEFAULT_VARIANT):
+    """获取某个玩法的查表数据（首次调用时构建）"""
+    short_deck = VARIANTS[variant]['min_rank'] > 0
+    if short_deck not in _tables:
+        _tables[short_deck] = _build_tables(short_deck)
+    return _tables[short_deck]
+
+
+_RANK_WEIGHTS = 1 << np.arange(13, dtype=np.int64)
+
+
+def score_components(counts, suit_masks, variant=DEFAULT_VARIANT):
+    """根据点数计数和各花色点数掩码计算牌力
+
+    counts: (N, 13) 每个点数的张数
+    suit_masks: (N, 4) 每个花色出现的点数掩码
+    返回 (N,) 的 int64 牌力数组
+    """
+    t = get_tables(variant)
+    counts = np.asarray(counts)
+    suit_masks = np.asarray(suit_masks, dtype=np.int64)
+
+    rank_mask = (counts > 0).astype(np.int64) @ _RANK_WEIGHTS
+    quads_mask = (counts == 4).astype(np.int64) @ _RANK_WEIGHTS
+    trips_mask = (counts == 3).astype(np.int64) @ _RANK_WEIGHTS
+    pairs_mask = (counts == 2).astype(np.int64) @ _RANK_WEIGHTS
+
+    # 同花：最多只有一个花色能达到5张
+    flush_mask = np.where(t['popcount'][suit_masks] >= 5, suit_masks, 0).max(axis=1)
+    sf_high = t['straight'][flush_mask]
+    straight_high = t['straight'][rank_mask]
+
+    quad = t['highest'][quads_mask]
+    quad_kicker = t['highest'][rank_mask & ~t['value_bit'][quad]]
+
+    trip = t['highest'][trips_mask]
+    rest_after_trip = rank_mask & ~t['value_bit'][trip]
+    # 葫芦的对子部分可以来自第二个三条
+    full_pair = t['highest'][(trips_mask & ~t['value_bit'][trip]) | pairs_mask]
+
+    pair_hi = t['highest'][pairs_mask]
+    pair_lo = t['highest'][pairs_mask & ~t['value_bit'][pair_hi]]
+    two_pair_kicker = t['highest'][rank_mask & ~(t['value_bit'][pair_hi] | t['value_bit'][pair_lo])]
+    rest_after_pair = rank_mask & ~t['value_bit'][pair_hi]
+
+    conditions = [
+        sf_high == 14,
+        sf_high > 0,
+        quads_mask > 0,
+        (trips_mask > 0) & (full_pair > 0),
+        flush_mask > 0,
+        straight_high > 0,
+        trips_mask > 0,
+        pair_lo > 0,
+        pairs_mask > 0,
+    ]
+    full_house_order, flush_order = (5, 6) if t['short_deck'] else (6, 5)
+    choices = [
+        (9 << 20) | (14 << 16),
+        (8 << 20) | (sf_high << 16),
+        (7 << 20) | (quad << 16) | (quad_kicker << 12),
+        (full_house_order << 20) | (trip << 16) | (full_pair << 12),
+        (flush_order << 20) | t['top5'][flush_mask],
+        (4 << 20) | (straight_high << 16),
+        (3 << 20) | (trip << 16) | (t['top2'][rest_after_trip] << 8),
+        (2 << 20) | (pair_hi << 16) | (pair_lo << 12) | (two_pair_kicker << 8),
+        (1 << 20) | (pair_hi << 16) | (t['top3'][rest_after_pair] << 4),
+    ]
+    if t['short_deck']:
+        # 短牌中同花大于葫芦，两者的判断顺序也要对调
+        conditions[3], conditions[4] = conditions[4], conditions[3]
+        choices[3], choices[4] = choices[4], choices[3]
+    return np.select(conditions, choices, default=t['top5'][rank_mask])
+
+
+def hand_components(hands):
+    """把 (N, k) 的整数牌数组转换成点数计数和花色掩码"""
+    hands = np.asarray(hands, dtype=np.int64)
+    ranks = hands >> 2
+    suits = hands & 3
+    counts = (ranks[:, :, None] == np.arange(13)).sum(axis=1)
+    rank_bits = np.left_shift(1, ranks)
+    suit_masks = np.stack(
+        [np.bitwise_or.reduce(np.where(suits == s, rank_bits, 0), axis=1) for s in range(4)],
+        axis=1,
+    )
+    return counts, suit_masks
+
+
+def _evaluate_chunk(hands, variant=DEFAULT_VARIANT):
+    """评估一块手牌（进程池的工作函数）"""
+    counts, suit_masks = hand_components(hands)
+    return score_components(counts, suit_masks, variant)
+
+
+def _get_process_pool(workers):
+    """获取（必要时创建）评估用的进程池"""
+    global _process_pool, _process_pool_workers
+    if _process_pool is None or _process_pool_workers != workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        _process_pool_workers = workers
+    return _process_pool
+
+
+def evaluate_batch(hands, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, variant=DEFAULT_VARIANT):
+    """批量评估手牌
+
+    hands: (N, k) 的整数牌数组，k 为 5~7，每行是一手牌（底牌+公共牌），同一行的牌不能重复
+    workers: 大于1时把各块分发到进程池并行计算
+    返回 (N,) 的 int64 牌力数组，数值越大牌越大
+    """
+    hands = np.asarray(hands, dtype=np.int64)
+    if hands.ndim != 2 or not 5 <= hands.shape[1] <= 7:
+        raise ValueError('hands 必须是 (N, 5~7) 的二维数组')
+    if hands.size and (hands.min() < 0 or hands.max() > 51):
+        raise ValueError('牌的编码必须在 0~51 之间')
+    if hands.size and (np.diff(np.sort(hands, axis=1), axis=1) == 0).any():
+        raise ValueError('同一手牌里不能有重复的牌')
+    if len(hands) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    chunks = [hands[i:i + chunk_size] for i in range(0, len(hands), chunk_size)]
+    if workers and workers > 1 and len(chunks) > 1:
+        pool = _get_process_pool(workers)
+        return np.concatenate(list(pool.map(_evaluate_chunk, chunks, [variant] * len(chunks))))
+    return np.concatenate([_evaluate_chunk(chunk, variant) for chunk in chunks])
+
+
+def evaluate_card_hands(hands, variant=DEFAULT_VARIANT):
+    """转换牌的编码并批量评估，返回牌力列表（给后台进程池调用，转换和评估都不占请求线程）"""
+    return evaluate_batch([cards_to_ints(hand) for hand in hands], variant=variant).tolist()
+
+
+def evaluate_ints(cards, variant=DEFAULT_VARIANT):
+    """评估单手整数编码的牌（任意张数），返回整数牌力"""
+    counts, suit_masks = hand_components([cards])
+    return int(score_components(counts, suit_masks, variant)[0])
+
+
+_omaha_combos = {}
+
+
+def _omaha_index(hole_count, board_count):
+    """奥马哈“两张底牌 + 三张公共牌”所有组合在 底牌+公共牌 数组中的下标"""
+    key = (hole_count, board_count)
+    if key not in _omaha_combos:
+        _omaha_combos[key] = np.array([
+            list(hole) + [hole_count + b for b in board]
+            for hole in combinations(range(hole_count), 2)
+            for board in combinations(range(board_count), 3)
+        ], dtype=np.int64)
+    return _omaha_combos[key]
+
+
+def evaluate_omaha_batch(hole_cards, board, variant='plo4'):
+    """批量评估奥马哈手牌：每名玩家取所有 2+3 组合中最大的牌力
+
+    hole_cards: (P, H) 的整数牌数组，board: 3~5 张整数牌
+    一次性评估 P × C(H,2) × C(len(board),3) 个五张组合
+    """
+    hole_cards = np.asarray(hole_cards, dtype=np.int64)
+    board = np.asarray(board, dtype=np.int64)
+    if len(board) < 3:
+        raise ValueError('奥马哈至少需要3张公共牌')
+    players, hole_count = hole_cards.shape
+    index = _omaha_index(hole_count, len(board))
+    full = np.concatenate([hole_cards, np.tile(board, (players, 1))], axis=1)
+    hands = full[:, index].reshape(-1, 5)
+    return evaluate_batch(hands, variant=variant).reshape(players, len(index)).max(axis=1)
+
+
+def evaluate_player_hand(hole_cards, board, variant=DEFAULT_VARIANT):
+    """按玩法规则评估一名玩家的牌（整数编码），返回整数牌力"""
+    if VARIANTS[variant]['omaha'] and len(board) >= 3:
+        return int(evaluate_omaha_batch([hole_cards], board, variant)[0])
+    return evaluate_ints(list(hole_cards) + list(board), variant)
+
+
+def evaluate_players(hole_cards_list, board, variant=DEFAULT_VARIANT):
+    """按玩法规则批量评估多名玩家的牌，返回整数牌力列表"""
+    if not hole_cards_list:
+        return []
+    if VARIANTS[variant]['omaha'] and len(board) >= 3:
+        return evaluate_omaha_batch(hole_cards_list, board, variant).tolist()
+    hands = [list(hole) + list(board) for hole in hole_cards_list]
+    counts, suit_masks = hand_components(hands)
+    return score_components(counts, suit_masks, variant).tolist()
+
+
+def create_variant_deck(variant=DEFAULT_VARIANT):
+    """某个玩法使用的整副牌（整数编码，未洗牌）"""
+    return list(range(VARIANTS[variant]['min_rank'] * 4, 52))
+
+
+def default_workers():
+    """默认的并行进程数"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def score_category(score, variant=DEFAULT_VARIANT):
+    """整数牌力中的牌型编号"""
+    category = int(score) >> 20
+    if VARIANTS[variant]['min_rank'] > 0:
+        category = _SHORT_DECK_ORDER.get(category, category)
+    return category
+
+
+def score_to_strength(score, variant=DEFAULT_VARIANT):
+    """把整数牌力转换成 evaluate_hand 的 (牌型, 点数列表) 格式"""
+    score = int(score)
+    category = score >> 20
+    if VARIANTS[variant]['min_rank'] > 0:
+        category = _SHORT_DECK_ORDER.get(category, category)
+    values = [(score >> shift) & 0xF for shift in (16, 12, 8, 4, 0)]
+    values = [v for v in values[:CATEGORY_VALUE_COUNT[category]] if v]
+    return (category, values)
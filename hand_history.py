@@ -0,0 +1,295 @@
+"""手牌历史
+
+每手牌结算时追加一行 JSON 到 hand_history.jsonl（只追加，不改写）。
+内存里只保存索引，不保存记录本身：
+
+- hand_id -> 行号
+- 按时间：行号就是时间顺序，结束时间单调递增，二分查找时间范围
+- 按玩家：玩家 -> 参与过的行号列表（有序），二分查找时间范围
+- 按底池：(底池, 行号) 有序列表，二分查找底池范围
+
+查询时先用各个条件的索引估算候选数量，从最少的那个索引取候选，其余
+条件用按行号存放的数组 O(1) 过滤；记录按需从文件里按偏移量读出来。
+分页用行号做游标，新写入的手牌不会打乱已经翻过的页。
+
+索引每追加 INDEX_SNAPSHOT_EVERY 手保存一次快照（hand_history.jsonl.idx，
+记录快照覆盖到的文件位置）。启动时加载快照，只扫描快照之后追加的部分
+（日志尾部），不用每次重新解析整个文件。
+"""
+import bisect
+import gc
+import json
+import os
+import pickle
+import threading
+import time
+
+from persistence import atomic_write_bytes
+
+# 单页最多返回的手数
+MAX_PAGE_SIZE = 200
+
+# 每追加这么多手保存一次索引快照
+INDEX_SNAPSHOT_EVERY = 1000
+
+# 索引快照格式版本（索引结构变化时加一，旧快照会被忽略）
+INDEX_VERSION = 1
+
+
+class HandHistory:
+    """只追加的手牌历史存储和二级索引"""
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx'
+        self._lock = threading.Lock()
+        self._size = 0  # 已建索引的文件长度
+        self._unsaved = 0  # 上次保存快照之后追加的手数
+        self._offsets = []  # 行号 -> 文件偏移
+        self._times = []  # 行号 -> 结束时间（单调递增）
+        self._pots = []  # 行号 -> 底池
+        self._by_hand = {}  # hand_id -> 行号
+        self._by_player = {}  # 玩家 -> [行号]
+        self._by_pot = []  # [(底池, 行号)]
+        self._load()
+
+    def _load(self):
+        """启动时加载索引快照，再扫描快照之后追加的部分"""
+        if not os.path.exists(self.path):
+            return
+        # 一次创建几十万个对象，期间暂停循环垃圾回收（索引里没有循环引用），加载快三分之一
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if not self._load_snapshot():
+                self._reset_index()
+            self._scan_tail()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if self._unsaved >= INDEX_SNAPSHOT_EVERY:
+            self.save_index()
+
+    def _reset_index(self):
+        self._size = 0
+        self._offsets, self._times, self._pots = [], [], []
+        self._by_hand, self._by_player, self._by_pot = {}, {}, []
+
+    def _load_snapshot(self):
+        """加载索引快照；快照缺失、损坏或与文件对不上时返回 False"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"手牌历史索引快照无法读取（{e}），重新建立索引")
+            return False
+        if snapshot.get('version') != INDEX_VERSION or snapshot['size'] > os.path.getsize(self.path):
+            return False
+        # 快照最后一手要和文件里同一位置的记录一致（防止文件被替换过）
+        if snapshot['offsets']:
+            with open(self.path, 'rb') as f:
+                f.seek(snapshot['offsets'][-1])
+                try:
+                    last = json.loads(f.readline())
+                except ValueError:
+                    return False
+            if snapshot['by_hand'].get(last.get('hand_id')) != len(snapshot['offsets']) - 1:
+                return False
+        self._size = snapshot['size']
+        self._offsets = snapshot['offsets']
+        self._times = snapshot['times']
+        self._pots = snapshot['pots']
+        self._by_hand = snapshot['by_hand']
+        self._by_player = snapshot['by_player']
+        self._by_pot = snapshot['by_pot']
+        return True
+
+    def _scan_tail(self):
+        """给快照之后追加的记录建索引；进程崩溃留下的半行截掉，后面的追加不会接在它后面"""
+        appended = False
+        with open(self.path, 'rb+') as f:
+            f.seek(self._size)
+            offset = self._size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    f.truncate(offset)
+                    print(f"手牌历史末尾有写了一半的记录，已截掉 {len(line)} 字节")
+                    break
+                try:
+                    self._index(json.loads(line), offset)
+                    self._unsaved += 1
+                    appended = True
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+            self._size = offset
+        if appended:
+            self._by_pot.sort()
+
+    def save_index(self):
+        """保存索引快照"""
+        with self._lock:
+            data = pickle.dumps({
+                'version': INDEX_VERSION,
+                'size': self._size,
+                'offsets': self._offsets,
+                'times': self._times,
+                'pots': self._pots,
+                'by_hand': self._by_hand,
+                'by_player': self._by_player,
+                'by_pot': self._by_pot,
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+            self._unsaved = 0
+        atomic_write_bytes(self.index_path, data)
+
+    def _index(self, record, offset, keep_sorted=False):
+        seq = len(self._offsets)
+        ended_at = max(record['ended_at'], self._times[-1]) if self._times else record['ended_at']
+        self._offsets.append(offset)
+        self._times.append(ended_at)
+        self._pots.append(record['pot'])
+        self._by_hand[record['hand_id']] = seq
+        for player_id in record['players']:
+            self._by_player.setdefault(player_id, []).append(seq)
+        if keep_sorted:
+            bisect.insort(self._by_pot, (record['pot'], seq))
+        else:
+            self._by_pot.append((record['pot'], seq))
+        return seq
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, record):
+        """追加一手牌（record 至少包含 hand_id、ended_at、pot、players）"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if record['hand_id'] in self._by_hand:
+                return self._by_hand[record['hand_id']]
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            self._size = offset + len(line)
+            self._unsaved += 1
+            seq = self._index(record, offset, keep_sorted=True)
+        if self._unsaved >= INDEX_SNAPSHOT_EVERY:
+            self.save_index()
+        return seq
+
+    def _read(self, seqs):
+        records = []
+        with open(self.path, 'rb') as f:
+            for seq in seqs:
+                f.seek(self._offsets[seq])
+                record = json.loads(f.readline())
+                record['seq'] = seq
+                records.append(record)
+        return records
+
+    def get(self, hand_id):
+        """按 hand_id 查一手牌"""
+        with self._lock:
+            seq = self._by_hand.get(hand_id)
+            if seq is None:
+                return None
+            return self._read([seq])[0]
+
+    def _time_range(self, since, until):
+        """时间范围对应的行号区间 [lo, hi)"""
+        lo = bisect.bisect_left(self._times, since) if since is not None else 0
+        hi = bisect.bisect_right(self._times, until) if until is not None else len(self._times)
+        return lo, hi
+
+    def _candidates(self, player_id, since, until, min_pot, max_pot, before):
+        """挑选候选最少的索引，返回按行号升序的候选行号"""
+        lo, hi = self._time_range(since, until)
+        if before is not None:
+            hi = min(hi, before)
+        hi = max(lo, hi)
+        options = [(hi - lo, 'time')]
+
+        if player_id is not None:
+            seqs = self._by_player.get(player_id, [])
+            p_lo, p_hi = bisect.bisect_left(seqs, lo), bisect.bisect_left(seqs, hi)
+            options.append((p_hi - p_lo, 'player'))
+
+        if min_pot is not None or max_pot is not None:
+            pot_lo = bisect.bisect_left(self._by_pot, (min_pot, -1)) if min_pot is not None else 0
+            pot_hi = (bisect.bisect_right(self._by_pot, (max_pot, len(self._offsets)))
+                      if max_pot is not None else len(self._by_pot))
+            options.append((max(0, pot_hi - pot_lo), 'pot'))
+
+        _, best = min(options)
+        if best == 'player':
+            return seqs[p_lo:p_hi]
+        if best == 'pot':
+            return sorted(seq for _, seq in self._by_pot[pot_lo:pot_hi] if lo <= seq < hi)
+        return range(lo, hi)
+
+    def _matches(self, seq, player_id, min_pot, max_pot):
+        pot = self._pots[seq]
+        if min_pot is not None and pot < min_pot:
+            return False
+        if max_pot is not None and pot > max_pot:
+            return False
+        if player_id is not None:
+            seqs = self._by_player.get(player_id, [])
+            i = bisect.bisect_left(seqs, seq)
+            if i >= len(seqs) or seqs[i] != seq:
+                return False
+        return True
+
+    def query(self, player_id=None, since=None, until=None, min_pot=None, max_pot=None,
+              cursor=None, limit=50):
+        """按条件查询，最新的在前；返回 (记录列表, 下一页游标或 None)
+
+        cursor 是上一页返回的游标（只返回行号更小的手牌）。
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self._lock:
+            candidates = self._candidates(player_id, since, until, min_pot, max_pot, cursor)
+            selected = []
+            for seq in reversed(candidates):
+                if self._matches(seq, player_id, min_pot, max_pot):
+                    if len(selected) == limit:
+                        return self._read(selected), selected[-1]
+                    selected.append(seq)
+            return self._read(selected), None
+
+    def iter_query(self, **filters):
+        """逐页取出所有匹配的手牌（用于流式输出）"""
+        cursor = None
+        while True:
+            records, cursor = self.query(cursor=cursor, limit=MAX_PAGE_SIZE, **filters)
+            yield from records
+            if cursor is None:
+                return
+
+
+def build_record(game_data, results, ended_at=None):
+    """由牌局数据和结算结果生成一条历史记录（在清理牌桌之前调用）"""
+    total_invested = results.get('total_invested') or {}
+    shuffle = game_data.get('shuffle') or {}
+    payouts = {}
+    for winner in results.get('winners', []):
+        payouts[winner['player_id']] = payouts.get(winner['player_id'], 0) + winner['pot_won']
+    return {
+        'hand_id': game_data.get('hand_id'),
+        'ended_at': ended_at if ended_at is not None else time.time(),
+        'variant': game_data.get('variant'),
+        'dealer_position': game_data.get('dealer_position'),
+        'pot': sum(total_invested.values()),
+        'players': sorted(total_invested),
+        'winners': sorted(payouts),
+        'type': results.get('type'),
+        'community_cards': results.get('community_cards', game_data.get('community_cards', [])),
+        'player_cards': {pid: data['hole_cards'] for pid, data in (results.get('all_player_cards') or {}).items()},
+        'total_invested': total_invested,
+        'payouts': payouts,
+        # 洗牌承诺和种子，以及发到牌的玩家（按发牌顺序），用于核对和重放发牌
+        'deck_commitment': shuffle.get('commitment'),
+        'deck_seed': shuffle.get('seed'),
+        'dealt_players': [pid for pid, player in game_data['players'].items() if player.get('hole_cards')],
+    }
@@ -0,0 +1,296 @@
+"""压测工具：模拟多台手机客户端通过 HTTP 接口打牌
+
+每个模拟玩家一个线程、一个独立的 cookie 会话：先 /api/login 登录
+（账号不存在时用管理员账号通过 /api/add_user 创建），再 join_game、
+change_position 入座，然后按真实的轮询频率请求 get_game_state，轮到
+自己时通过 player_ready、player_action、confirm_hand_result 打完整手牌。
+座位坐满后多出来的玩家只轮询（旁观）。
+
+结束时输出吞吐量、各接口延迟分位数、错误率，以及丢失更新率：写操作
+返回成功，但之后的轮询里看不到它的效果（或牌桌版本号倒退）即记为一次
+丢失更新。
+
+    python loadgen.py --url http://127.0.0.1:80 --players 8 --spectators 20 --duration 60
+"""
+import argparse
+import gzip
+import http.cookiejar
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+# 牌桌座位数（与 index.html 的座位一致）
+SEAT_COUNT = 8
+
+
+def percentile(sorted_values, fraction):
+    """已排序列表的分位数（最近秩）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Stats:
+    """所有客户端共享的统计数据"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}  # 接口 -> [毫秒]
+        self.errors = {}  # 接口 -> 网络/HTTP 错误次数
+        self.rejected = {}  # 接口 -> success=false 次数
+        self.stale = 0
+        self.bytes_received = 0
+        self.mutations = 0
+        self.verified = 0
+        self.lost_updates = 0
+        self.lost_samples = []
+        self.hands = set()
+
+    def record(self, endpoint, elapsed_ms, size=0, error=False, rejected=False):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+            self.bytes_received += size
+            if error:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            if rejected:
+                self.rejected[endpoint] = self.rejected.get(endpoint, 0) + 1
+
+    def record_lost(self, description):
+        with self.lock:
+            self.lost_updates += 1
+            if len(self.lost_samples) < 10:
+                self.lost_samples.append(description)
+
+    def report(self, elapsed):
+        """打印压测报告"""
+        with self.lock:
+            total = sum(len(v) for v in self.latencies.values())
+            errors = sum(self.errors.values())
+            print(f'\n运行时间: {elapsed:.1f} 秒，完成手数: {len(self.hands)}')
+            print(f'总请求: {total}，吞吐量: {total / elapsed:.1f} 请求/秒，'
+                  f'接收: {self.bytes_received / 1024:.0f} KB')
+            print(f'错误率: {errors / total if total else 0:.2%}（{errors} 次），'
+                  f'过期行动被拒: {self.stale} 次')
+            print(f'写操作: {self.mutations}，已校验: {self.verified}，丢失更新: {self.lost_updates}'
+                  f'（{self.lost_updates / self.verified if self.verified else 0:.2%}）')
+            for sample in self.lost_samples:
+                print(f'  丢失更新: {sample}')
+            print(f'\n{"接口":<28}{"次数":>8}{"错误":>6}{"拒绝":>6}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}  (毫秒)')
+            for endpoint in sorted(self.latencies):
+                values = sorted(self.latencies[endpoint])
+                print(f'{endpoint:<28}{len(values):>8}{self.errors.get(endpoint, 0):>6}'
+                      f'{self.rejected.get(endpoint, 0):>6}{percentile(values, 0.5):>9.1f}'
+                      f'{percentile(values, 0.9):>9.1f}{percentile(values, 0.99):>9.1f}{values[-1]:>9.1f}')
+
+
+class LoadClient:
+    """一个模拟客户端（一台手机）"""
+
+    def __init__(self, base_url, username, password, stats, args, seat=None):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.args = args
+        self.seat = seat
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.rng = random.Random(username)
+        self.max_version = -1
+        self.pending_checks = []  # 等下一次轮询验证的写操作效果
+        self.confirmed_hands = set()
+
+    def request(self, path, payload=None, headers=None, retries=1):
+        """发送一次请求，返回解析后的 JSON（失败返回 None）"""
+        headers = dict(headers or {})
+        headers['Accept-Encoding'] = 'gzip'
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+            # 写操作带请求ID，超时重试不会重复执行
+            headers.setdefault('X-Request-Id', uuid.uuid4().hex)
+        for attempt in range(retries + 1):
+            req = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+            start = time.perf_counter()
+            try:
+                with self.opener.open(req, timeout=self.args.timeout) as response:
+                    body = response.read()
+                    size = len(body)
+                    if response.headers.get('Content-Encoding') == 'gzip':
+                        body = gzip.decompress(body)
+                result = json.loads(body)
+            except (urllib.error.URLError, OSError, ValueError):
+                self.stats.record(path, (time.perf_counter() - start) * 1000, error=True)
+                if attempt < retries:
+                    continue
+                return None
+            rejected = isinstance(result, dict) and result.get('success') is False
+            self.stats.record(path, (time.perf_counter() - start) * 1000, size, rejected=rejected)
+            return result
+        return None
+
+    def mutate(self, path, payload, check=None):
+        """执行写操作；成功时登记一个在下次轮询时验证的效果"""
+        result = self.request(path, payload, retries=2)
+        if result and result.get('success'):
+            with self.stats.lock:
+                self.stats.mutations += 1
+            if check is not None:
+                self.pending_checks.append((path, check, result))
+        elif result and result.get('stale'):
+            with self.stats.lock:
+                self.stats.stale += 1
+        return result
+
+    def setup(self):
+        """登录、加入游戏并入座"""
+        result = self.request('/api/login', {'username': self.username, 'password': self.password})
+        if not result or not result.get('success'):
+            return False
+        if not self.request('/api/join_game', {}):
+            return False
+        if self.seat is not None:
+            result = self.request('/api/change_position', {'position': self.seat})
+            if not result or not result.get('success'):
+                print(f'{self.username} 入座 {self.seat} 失败: {result and result.get("message")}')
+                self.seat = None
+        return True
+
+    def verify(self, state):
+        """用最新轮询结果验证之前写操作的效果"""
+        version = state.get('version', 0)
+        if version < self.max_version:
+            self.stats.record_lost(f'{self.username} 看到牌桌版本从 {self.max_version} 倒退到 {version}')
+        self.max_version = max(self.max_version, version)
+
+        for path, check, result in self.pending_checks:
+            with self.stats.lock:
+                self.stats.verified += 1
+            if not check(state, result):
+                self.stats.record_lost(f'{self.username} {path} 返回成功但状态中看不到效果')
+        self.pending_checks = []
+
+    def choose_action(self, legal):
+        """简单的随机策略：多数时候过牌/跟注，偶尔加注或弃牌"""
+        roll = self.rng.random()
+        if legal.get('can_raise') and roll < self.args.raise_rate:
+            amount = legal['min_raise']
+            if legal['max_raise'] > legal['min_raise'] and self.rng.random() < 0.3:
+                amount = self.rng.randint(legal['min_raise'], legal['max_raise'])
+            return 'raise', amount
+        if legal.get('can_check'):
+            return 'check', 0
+        if roll < self.args.raise_rate + self.args.fold_rate:
+            return 'fold', 0
+        if legal.get('call_amount', 0) > 0 and legal.get('call_amount') < legal.get('chips', 0):
+            return 'call', 0
+        return 'allin', 0
+
+    def step(self, state):
+        """根据当前状态决定要不要行动"""
+        me = state['players'].get(self.username)
+        if me is None or me.get('position') is None:
+            return
+        game_state = state['game_state']
+        hand_id = state.get('hand_id')
+
+        if game_state in ('waiting', 'ready_phase'):
+            if me.get('chips', 0) <= 0:
+                chips = me.get('chips', 0)
+                self.mutate('/api/add_chips', {},
+                            lambda s, r: s['game_state'] == 'playing' or s['players'][self.username]['chips'] > chips)
+            elif self.username not in state.get('ready_players', []) and not state.get('my_sitting_out'):
+                self.mutate('/api/player_ready', {},
+                            lambda s, r: self.username in s.get('ready_players', []) or s.get('hand_id') != hand_id
+                            or s['game_state'] not in ('waiting', 'ready_phase'))
+
+        elif game_state == 'hand_ended' and state.get('hand_results') and hand_id not in self.confirmed_hands:
+            self.stats.hands.add(hand_id)
+            self.confirmed_hands.add(hand_id)
+            self.mutate('/api/confirm_hand_result', {})
+
+        elif game_state == 'playing' and state.get('current_player') == me['position'] and state.get('my_legal_actions'):
+            time.sleep(self.rng.uniform(0, self.args.think_time))
+            action, amount = self.choose_action(state['my_legal_actions'])
+            payload = {'action': action, 'amount': amount, 'table_version': state.get('version')}
+            self.mutate('/api/player_action', payload,
+                        lambda s, r: s.get('version', 0) >= r.get('version', 0))
+
+    def run(self, stop_at):
+        """轮询直到结束时间"""
+        next_poll = time.time()
+        while time.time() < stop_at:
+            state = self.request('/api/get_game_state')
+            if state and 'players' in state:
+                self.verify(state)
+                if self.seat is not None:
+                    self.step(state)
+            # 轮询间隔加一点抖动，避免所有客户端步调完全一致
+            next_poll += self.args.poll_interval * self.rng.uniform(0.8, 1.2)
+            time.sleep(max(0, next_poll - time.time()))
+            next_poll = max(next_poll, time.time())
+
+
+def ensure_users(base_url, usernames, password, admin_user, admin_password, stats, args):
+    """用管理员账号创建还不存在的压测账号"""
+    admin = LoadClient(base_url, admin_user, admin_password, stats, args)
+    result = admin.request('/api/login', {'username': admin_user, 'password': admin_password})
+    if not result or not result.get('success'):
+        print('管理员登录失败，假定压测账号已经存在')
+        return
+    for username in usernames:
+        admin.request('/api/add_user', {'username': username, 'password': password, 'role': 'player'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟多台手机客户端压测牌桌接口')
+    parser.add_argument('--url', default='http://127.0.0.1:80', help='服务器地址')
+    parser.add_argument('--players', type=int, default=6, help='入座打牌的玩家数（最多8）')
+    parser.add_argument('--spectators', type=int, default=0, help='只轮询的旁观客户端数')
+    parser.add_argument('--duration', type=float, default=60, help='压测时长（秒）')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='每个客户端的轮询间隔（秒）')
+    parser.add_argument('--think-time', type=float, default=0.5, help='轮到行动时的最长思考时间（秒）')
+    parser.add_argument('--raise-rate', type=float, default=0.15, help='加注概率')
+    parser.add_argument('--fold-rate', type=float, default=0.2, help='需要跟注时的弃牌概率')
+    parser.add_argument('--timeout', type=float, default=10, help='单个请求超时（秒）')
+    parser.add_argument('--user-prefix', default='load', help='压测账号前缀')
+    parser.add_argument('--password', default='123456', help='压测账号密码')
+    parser.add_argument('--admin-user', default='admin', help='用于创建账号的管理员')
+    parser.add_argument('--admin-password', default='admin123', help='管理员密码')
+    args = parser.parse_args()
+
+    players = max(0, min(args.players, SEAT_COUNT))
+    stats = Stats()
+    seats = itertools.chain(range(1, players + 1), itertools.repeat(None))
+    usernames = [f'{args.user_prefix}{i}' for i in range(1, players + args.spectators + 1)]
+    ensure_users(args.url, usernames, args.password, args.admin_user, args.admin_password, stats, args)
+
+    clients = []
+    for username, seat in zip(usernames, seats):
+        client = LoadClient(args.url, username, args.password, stats, args, seat)
+        if client.setup():
+            clients.append(client)
+        else:
+            print(f'{username} 登录或加入失败')
+    print(f'已就绪: {len(clients)} 个客户端（入座 {sum(c.seat is not None for c in clients)} 人）')
+
+    start = time.time()
+    stop_at = start + args.duration
+    threads = [threading.Thread(target=client.run, args=(stop_at,), daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.report(time.time() - start)
+
+
+if __name__ == '__main__':
+    main()
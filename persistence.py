@@ -0,0 +1,96 @@
+"""数据文件的原子写入与损坏恢复
+
+直接覆盖写 JSON 文件时，进程在写到一半时崩溃会留下半个文件，之后所有
+读它的接口都会出错。这里先写临时文件再原子替换，替换前把上一份完好的
+文件保留为 .bak；读取时发现文件损坏，就把它改名放到一边，用 .bak 恢复。
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+BACKUP_SUFFIX = '.bak'
+
+
+def _temp_path(path):
+    """同目录下的临时文件名（每个线程不同，并发写同一个文件不会互相干扰）"""
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _keep_backup(path):
+    """把当前文件保留为 .bak（硬链接，不支持时复制）
+
+    两个线程同时把同一份文件链接成 .bak 时，后一个 rename 的两端已经是同一个文件，
+    rename 什么也不做，临时的链接会留下来；下次再往它里面复制会沿着硬链接改写
+    别人正在读的文件，所以复制前后都把它删掉
+    """
+    staging = _temp_path(path + BACKUP_SUFFIX)
+    _remove(staging)
+    try:
+        os.link(path, staging)
+    except FileNotFoundError:
+        return
+    except OSError:
+        shutil.copyfile(path, staging)
+    os.replace(staging, path + BACKUP_SUFFIX)
+    _remove(staging)
+
+
+def atomic_write_bytes(path, data, backup=False):
+    """原子写入：读者只会看到旧文件或新文件，不会看到写了一半的文件"""
+    tmp = _temp_path(path)
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    if backup:
+        _keep_backup(path)
+    os.replace(tmp, path)
+
+
+def atomic_write_json(path, data, indent=2):
+    """原子写入 JSON 文件，并把上一份保留为 .bak"""
+    text = json.dumps(data, ensure_ascii=False, indent=indent)
+    atomic_write_bytes(path, text.encode('utf-8'), backup=True)
+
+
+def quarantine(path):
+    """把损坏的文件改名放到一边（保留现场），返回新文件名"""
+    target = f'{path}.corrupt-{int(time.time())}'
+    try:
+        os.replace(path, target)
+    except OSError:
+        return None
+    return target
+
+
+def load_json(path, default_factory=None):
+    """读取 JSON 文件，损坏时用 .bak 恢复
+
+    文件不存在，或损坏且没有可用的备份时返回 default_factory()（没有给则返回 None）。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default_factory() if default_factory else None
+    except ValueError as e:
+        moved = quarantine(path)
+        print(f"数据文件 {path} 已损坏（{e}），已移到 {moved}")
+
+    backup = path + BACKUP_SUFFIX
+    try:
+        with open(backup, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        print(f"数据文件 {path} 没有可用的备份，使用默认数据")
+        return default_factory() if default_factory else None
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+    print(f"数据文件 {path} 已从备份恢复")
+    return data
@@ -0,0 +1,143 @@
+"""玩家统计
+
+牌局引擎在发牌、每次行动、结算时把事件交给 PlayerStats，这里只对
+计数器做增量累加（每个玩家一份总计，一份当前场次），查询时由计数器
+直接算出 VPIP、PFR、激进度、摊牌胜率、净输赢和 bb/100，不需要回扫
+历史手牌。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# 正在进行中的手牌最多跟踪这么多（异常中断的手牌不会一直占着内存）
+MAX_OPEN_HANDS = 16
+
+COUNTER_FIELDS = ('hands', 'vpip', 'pfr', 'aggressive', 'calls', 'showdowns', 'showdown_wins', 'net', 'net_bb')
+
+
+def new_counters():
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def summarize(counters):
+    """把计数器换算成统计指标"""
+    hands = counters['hands']
+    calls = counters['calls']
+    showdowns = counters['showdowns']
+    return {
+        'hands': hands,
+        'vpip': counters['vpip'] / hands if hands else 0.0,
+        'pfr': counters['pfr'] / hands if hands else 0.0,
+        # 激进度 = (下注 + 加注) / 跟注；从没跟注过时为 None
+        'aggression_factor': counters['aggressive'] / calls if calls else None,
+        'showdowns': showdowns,
+        'showdown_win_rate': counters['showdown_wins'] / showdowns if showdowns else 0.0,
+        'net': counters['net'],
+        'bb_per_100': counters['net_bb'] / hands * 100 if hands else 0.0,
+    }
+
+
+class PlayerStats:
+    """按玩家增量维护的统计（总计和当前场次）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lifetime = {}
+        self.session = {}
+        self.session_started_at = time.time()
+        self._hands = OrderedDict()  # hand_id -> 这一手里每个玩家是否已经计过 VPIP/PFR
+
+    def _bump(self, player_id, field, amount=1):
+        for bucket in (self.lifetime, self.session):
+            counters = bucket.get(player_id)
+            if counters is None:
+                counters = bucket[player_id] = new_counters()
+            counters[field] += amount
+
+    # ---- 引擎事件 ----
+
+    def start_hand(self, hand_id, player_ids, big_blind):
+        """发牌：本手发到牌的玩家各记一手"""
+        with self._lock:
+            self._hands[hand_id] = {
+                'big_blind': big_blind,
+                'players': {pid: {'vpip': False, 'pfr': False} for pid in player_ids},
+            }
+            while len(self._hands) > MAX_OPEN_HANDS:
+                self._hands.popitem(last=False)
+            for pid in player_ids:
+                self._bump(pid, 'hands')
+
+    def record_action(self, hand_id, player_id, action, betting_round):
+        """一次行动：action 为 fold / check / call / raise（全押按实际效果归为跟注或加注）"""
+        with self._lock:
+            hand = self._hands.get(hand_id)
+            flags = hand['players'].get(player_id) if hand else None
+            if action == 'call':
+                self._bump(player_id, 'calls')
+            elif action == 'raise':
+                self._bump(player_id, 'aggressive')
+            if flags is None or betting_round != 'preflop':
+                return
+            # 翻牌前主动入池（跟注或加注，盲注不算）和翻牌前加注，每手最多各计一次
+            if action in ('call', 'raise') and not flags['vpip']:
+                flags['vpip'] = True
+                self._bump(player_id, 'vpip')
+            if action == 'raise' and not flags['pfr']:
+                flags['pfr'] = True
+                self._bump(player_id, 'pfr')
+
+    def end_hand(self, hand_id, results, big_blind=None):
+        """结算：累计净输赢、摊牌次数和摊牌胜利"""
+        with self._lock:
+            hand = self._hands.pop(hand_id, None)
+            big_blind = (hand or {}).get('big_blind') or big_blind or 1
+            won = {}
+            for winner in results.get('winners', []):
+                won[winner['player_id']] = won.get(winner['player_id'], 0) + winner['pot_won']
+            for pid, invested in (results.get('total_invested') or {}).items():
+                net = won.get(pid, 0) - invested
+                self._bump(pid, 'net', net)
+                self._bump(pid, 'net_bb', net / big_blind)
+            if results.get('type') == 'showdown':
+                for pid in results.get('all_hands') or {}:
+                    self._bump(pid, 'showdowns')
+                    if won.get(pid, 0) > 0:
+                        self._bump(pid, 'showdown_wins')
+
+    def new_session(self):
+        """开始新的场次（总计保留）"""
+        with self._lock:
+            self.session = {}
+            self.session_started_at = time.time()
+
+    # ---- 查询与持久化 ----
+
+    def player_summary(self, player_id, scope='session'):
+        """单个玩家的统计，O(1)"""
+        with self._lock:
+            bucket = self.session if scope == 'session' else self.lifetime
+            return summarize(bucket.get(player_id) or new_counters())
+
+    def summary(self, scope='session'):
+        """所有玩家的统计"""
+        with self._lock:
+            bucket = self.session if scope == 'session' else self.lifetime
+            return {pid: summarize(counters) for pid, counters in bucket.items()}
+
+    def to_dict(self):
+        # 返回副本：存盘可能在后台线程里序列化，不能和引擎的累加同时读写同一个字典
+        with self._lock:
+            return {
+                'lifetime': {pid: dict(counters) for pid, counters in self.lifetime.items()},
+                'session': {pid: dict(counters) for pid, counters in self.session.items()},
+                'session_started_at': self.session_started_at,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.lifetime = {pid: dict(new_counters(), **counters) for pid, counters in data.get('lifetime', {}).items()}
+        stats.session = {pid: dict(new_counters(), **counters) for pid, counters in data.get('session', {}).items()}
+        stats.session_started_at = data.get('session_started_at', stats.session_started_at)
+        return stats
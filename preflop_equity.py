@@ -0,0 +1,174 @@
+"""翻牌前胜率表
+
+169 种标准起手牌 × 同桌人数（2~8人，对应8个座位）的胜率表。
+胜率表由本模块的模拟器离线生成，保存为二进制文件，运行时通过 mmap
+懒加载，查询只是一次数组索引，不影响启动速度。
+
+生成胜率表：
+
+    python preflop_equity.py --samples 20000 --workers 4
+"""
+import argparse
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hand_evaluator import RANKS, RANK_INDEX, evaluate_batch
+
+EQUITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 8
+
+# 文件头：魔数、版本、起手牌数、最少人数、最多人数、每格模拟次数
+_HEADER = struct.Struct('<4sIIIII')
+_MAGIC = b'PFEQ'
+_VERSION = 1
+
+# 点数从大到小，矩阵第 i 行第 j 列：i == j 对子，i < j 同花，i > j 杂色
+_RANKS_DESC = RANKS[::-1]
+HAND_COUNT = 169
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def hand_label(index):
+    """起手牌编号对应的名称，例如 'AA'、'AKs'、'T9o'"""
+    row, col = divmod(index, 13)
+    high = _RANKS_DESC[min(row, col)].replace('10', 'T')
+    low = _RANKS_DESC[max(row, col)].replace('10', 'T')
+    if row == col:
+        return high + low
+    return high + low + ('s' if row < col else 'o')
+
+
+def canonical_index(hole_cards):
+    """把两张底牌转换成 0~168 的标准起手牌编号"""
+    first, second = hole_cards[:2]
+    # 点数越大，在矩阵中的下标越小
+    a = 12 - RANK_INDEX[first['rank']]
+    b = 12 - RANK_INDEX[second['rank']]
+    high, low = min(a, b), max(a, b)
+    if first['suit'] == second['suit']:
+        return high * 13 + low
+    return low * 13 + high
+
+
+def _representative_cards(index):
+    """给某个起手牌编号挑一组具体的整数编码底牌"""
+    row, col = divmod(index, 13)
+    high_rank = 12 - min(row, col)
+    low_rank = 12 - max(row, col)
+    if row < col:
+        return [high_rank * 4, low_rank * 4]
+    return [high_rank * 4, low_rank * 4 + 1]
+
+
+def _simulate_hand(args):
+    """模拟一个起手牌对 1~7 个随机对手的胜率"""
+    index, samples, seed = args
+    rng = np.random.default_rng(seed)
+    hero = _representative_cards(index)
+    remaining = np.array([c for c in range(52) if c not in hero], dtype=np.int64)
+
+    opponents = MAX_PLAYERS - 1
+    needed = 5 + 2 * opponents
+    picks = remaining[rng.random((samples, len(remaining))).argsort(axis=1)[:, :needed]]
+    board = picks[:, :5]
+
+    hero_hands = np.concatenate([np.tile(hero, (samples, 1)), board], axis=1)
+    hero_scores = evaluate_batch(hero_hands)
+    opp_scores = np.empty((samples, opponents), dtype=np.int64)
+    for k in range(opponents):
+        hole = picks[:, 5 + 2 * k:7 + 2 * k]
+        opp_scores[:, k] = evaluate_batch(np.concatenate([hole, board], axis=1))
+
+    equities = []
+    for players in range(MIN_PLAYERS, MAX_PLAYERS + 1):
+        field = opp_scores[:, :players - 1]
+        best_opp = field.max(axis=1)
+        ties = (field == hero_scores[:, None]).sum(axis=1)
+        # 平分底池时按人数分摊
+        share = np.where(hero_scores > best_opp, 1.0,
+                         np.where(hero_scores == best_opp, 1.0 / (ties + 1), 0.0))
+        equities.append(share.mean())
+    return index, equities
+
+
+def generate_table(samples=20000, workers=None, seed=20250719):
+    """模拟生成 (169, 7) 的胜率表"""
+    table = np.zeros((HAND_COUNT, MAX_PLAYERS - MIN_PLAYERS + 1), dtype=np.float32)
+    jobs = [(index, samples, seed + index) for index in range(HAND_COUNT)]
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_hand, jobs))
+    else:
+        results = [_simulate_hand(job) for job in jobs]
+    for index, equities in results:
+        table[index] = equities
+    return table
+
+
+def write_table(table, samples, path=EQUITY_FILE):
+    """把胜率表写入二进制文件（先写临时文件再替换）"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, HAND_COUNT, MIN_PLAYERS, MAX_PLAYERS, samples))
+        f.write(np.ascontiguousarray(table, dtype='<f4').tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_table(path=EQUITY_FILE):
+    """懒加载胜率表（mmap），文件不存在或格式不对时返回 None"""
+    global _table
+    if _table is not None:
+        return _table
+    with _table_lock:
+        if _table is None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+            if len(header) == _HEADER.size:
+                magic, version, hands, min_players, max_players, _ = _HEADER.unpack(header)
+                if (magic, version, hands, min_players, max_players) == (
+                        _MAGIC, _VERSION, HAND_COUNT, MIN_PLAYERS, MAX_PLAYERS):
+                    _table = np.memmap(path, dtype='<f4', mode='r', offset=_HEADER.size,
+                                       shape=(HAND_COUNT, MAX_PLAYERS - MIN_PLAYERS + 1))
+    return _table
+
+
+def get_preflop_equity(hole_cards, num_players):
+    """查询两张底牌在 num_players 人桌上的翻牌前胜率（0~1），查不到返回 None"""
+    if not hole_cards or len(hole_cards) != 2:
+        return None
+    if not MIN_PLAYERS <= num_players <= MAX_PLAYERS:
+        return None
+    table = load_table()
+    if table is None:
+        return None
+    return float(table[canonical_index(hole_cards), num_players - MIN_PLAYERS])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成翻牌前胜率表')
+    parser.add_argument('--samples', type=int, default=20000, help='每个起手牌的模拟次数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--seed', type=int, default=20250719, help='随机种子')
+    parser.add_argument('--output', default=EQUITY_FILE, help='输出文件路径')
+    args = parser.parse_args()
+
+    start = time.time()
+    table = generate_table(args.samples, args.workers, args.seed)
+    write_table(table, args.samples, args.output)
+    print(f'胜率表已生成: {args.output}，用时 {time.time() - start:.1f} 秒')
+    for label in ('AA', 'AKs', 'AKo', '72o'):
+        index = next(i for i in range(HAND_COUNT) if hand_label(i) == label)
+        print(label, ' '.join(f'{v:.3f}' for v in table[index]))
+
+
+if __name__ == '__main__':
+    main()
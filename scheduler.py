@@ -0,0 +1,118 @@
+"""定时任务调度器
+
+所有定时任务（盲注升级等）放在一个最小堆里，由一个后台线程按到期
+时间依次执行，不需要在每个请求里轮询检查。任务可以带 key，同一个
+key 再次调度时会取消旧任务，方便"每张桌子只有一个截止时间"这类场景。
+"""
+import heapq
+import itertools
+import threading
+import time
+
+
+class ScheduledJob:
+    """一个已调度的任务"""
+
+    __slots__ = ('run_at', 'func', 'args', 'key', 'cancelled')
+
+    def __init__(self, run_at, func, args, key):
+        self.run_at = run_at
+        self.func = func
+        self.args = args
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """基于最小堆的定时任务调度器（单个后台线程）"""
+
+    def __init__(self, name='scheduler'):
+        self.name = name
+        self._heap = []
+        self._keys = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """启动后台线程（重复调用无副作用）"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程，未执行的任务会被丢弃"""
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._keys.clear()
+            self._cond.notify()
+
+    def schedule_at(self, run_at, func, *args, key=None):
+        """在绝对时间 run_at（time.time()）执行 func(*args)"""
+        job = ScheduledJob(run_at, func, args, key)
+        with self._cond:
+            if key is not None:
+                old = self._keys.get(key)
+                if old is not None:
+                    old.cancel()
+                self._keys[key] = job
+            heapq.heappush(self._heap, (run_at, next(self._seq), job))
+            # 新任务成为最早的任务时唤醒后台线程重新计算等待时间
+            if self._heap[0][2] is job:
+                self._cond.notify()
+        self.start()
+        return job
+
+    def schedule_in(self, delay, func, *args, key=None):
+        """在 delay 秒后执行 func(*args)"""
+        return self.schedule_at(time.time() + delay, func, *args, key=key)
+
+    def cancel(self, key):
+        """取消指定 key 的任务"""
+        with self._cond:
+            job = self._keys.pop(key, None)
+            if job is not None:
+                job.cancel()
+
+    def get(self, key):
+        """获取指定 key 当前的任务，没有返回 None"""
+        with self._cond:
+            return self._keys.get(key)
+
+    def pending_count(self):
+        """未执行（且未取消）的任务数"""
+        with self._cond:
+            return sum(1 for _, _, job in self._heap if not job.cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    # 丢弃已取消的任务
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                if job.key is not None and self._keys.get(job.key) is job:
+                    del self._keys[job.key]
+
+            try:
+                job.func(*job.args)
+            except Exception as e:
+                print(f"定时任务执行失败: {e}")
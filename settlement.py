@@ -0,0 +1,165 @@
+"""散场结算
+
+每个玩家的输赢 = 当前筹码 - 借码次数 × 买入金额。结算把所有人的输赢
+化简成最少的 付款人 → 收款人 转账：
+
+- 先把金额正好相反的一对（一个输 x、一个赢 x）直接配对，一笔转账了结
+- 剩下的人数不多时（EXACT_LIMIT 以内）做精确求解：最少转账数 = 人数 -
+  最多能划分出的"合计为零"的小组数，按子集动态规划求出这种划分，每组内部
+  再用 组内人数-1 笔转账结清
+- 人数太多时退化为贪心：每次让欠得最多的人付给被欠得最多的人（不超过 人数-1 笔）
+
+多张牌桌的同一玩家按玩家ID合并后一起结算。
+"""
+import csv
+import io
+import time
+import uuid
+
+# 精确求解的人数上限（子集 DP 是 O(2^n · n)）
+EXACT_LIMIT = 14
+
+# 筹码总数和买入总数不一致时，差额记在这个虚拟账户上
+BANK_ID = '__bank__'
+
+
+def player_nets(tables, buy_in_amount):
+    """由各牌桌的玩家记录计算每人的输赢，返回 [{player_id, chips, borrow_count, bought_in, net}]"""
+    merged = {}
+    for players in tables:
+        for player_id, player in players.items():
+            entry = merged.setdefault(player_id, {'player_id': player_id, 'chips': 0, 'borrow_count': 0})
+            entry['chips'] += player.get('chips', 0)
+            entry['borrow_count'] += player.get('borrow_count', 1)
+    for entry in merged.values():
+        entry['bought_in'] = entry['borrow_count'] * buy_in_amount
+        entry['net'] = entry['chips'] - entry['bought_in']
+    return sorted(merged.values(), key=lambda entry: (-entry['net'], entry['player_id']))
+
+
+def _settle_group(balances):
+    """贪心结清一组（合计为零），返回转账列表；对合计为零的组最多 len-1 笔"""
+    debtors = sorted(((-amount, pid) for pid, amount in balances if amount < 0), reverse=True)
+    creditors = sorted(((amount, pid) for pid, amount in balances if amount > 0), reverse=True)
+    transfers = []
+    i = j = 0
+    while i < len(debtors) and j < len(creditors):
+        owe, payer = debtors[i]
+        due, payee = creditors[j]
+        amount = min(owe, due)
+        transfers.append({'from': payer, 'to': payee, 'amount': amount})
+        debtors[i] = (owe - amount, payer)
+        creditors[j] = (due - amount, payee)
+        if debtors[i][0] == 0:
+            i += 1
+        if creditors[j][0] == 0:
+            j += 1
+    return transfers
+
+
+def _zero_sum_groups(balances):
+    """子集 DP：把合计为零的余额划分成尽量多的合计为零的小组"""
+    n = len(balances)
+    full = (1 << n) - 1
+    sums = [0] * (full + 1)
+    best = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + balances[low.bit_length() - 1][1]
+        bonus = 1 if sums[mask] == 0 else 0
+        value = 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if best[mask ^ bit] > value:
+                value = best[mask ^ bit]
+            rest ^= bit
+        best[mask] = value + bonus
+    # 倒推：按加入顺序，每次前缀合计为零就切出一组
+    order = []
+    mask = full
+    while mask:
+        bonus = 1 if sums[mask] == 0 else 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if best[mask ^ bit] + bonus == best[mask]:
+                break
+            rest ^= bit
+        order.append(bit.bit_length() - 1)
+        mask ^= bit
+    groups = []
+    current = []
+    total = 0
+    for index in reversed(order):
+        current.append(balances[index])
+        total += balances[index][1]
+        if total == 0:
+            groups.append(current)
+            current = []
+    return groups
+
+
+def minimize_transfers(nets):
+    """把 {玩家: 输赢}（合计为零）化简成最少的转账"""
+    balances = sorted((pid, amount) for pid, amount in nets.items() if amount != 0)
+    transfers = []
+
+    # 金额正好相反的一对直接配对
+    waiting = {}
+    remaining = []
+    for pid, amount in balances:
+        partners = waiting.get(-amount)
+        if partners:
+            other = partners.pop()
+            payer, payee = (pid, other) if amount < 0 else (other, pid)
+            transfers.append({'from': payer, 'to': payee, 'amount': abs(amount)})
+        else:
+            waiting.setdefault(amount, []).append(pid)
+    for amount, pids in waiting.items():
+        remaining.extend((pid, amount) for pid in pids)
+    remaining.sort()
+
+    if len(remaining) <= EXACT_LIMIT:
+        for group in _zero_sum_groups(remaining):
+            transfers.extend(_settle_group(group))
+    else:
+        transfers.extend(_settle_group(remaining))
+    transfers.sort(key=lambda t: (t['from'], -t['amount'], t['to']))
+    return transfers
+
+
+def build_settlement(tables, buy_in_amount, created_at=None):
+    """生成结算快照：每人输赢、最少转账，以及筹码与买入总数的差额"""
+    players = player_nets(tables, buy_in_amount)
+    nets = {entry['player_id']: entry['net'] for entry in players}
+    imbalance = sum(nets.values())
+    if imbalance:
+        # 例如中途改过买入金额或加码金额：差额由虚拟账户补齐，保证转账能结清
+        nets[BANK_ID] = -imbalance
+    transfers = minimize_transfers(nets)
+    return {
+        'settlement_id': uuid.uuid4().hex,
+        'created_at': created_at if created_at is not None else time.time(),
+        'buy_in_amount': buy_in_amount,
+        'players': players,
+        'transfers': transfers,
+        'imbalance': imbalance,
+    }
+
+
+def ledger_csv(settlement):
+    """结算快照导出为 CSV 文本（玩家输赢 + 转账明细）
+
+    玩家ID里可能有逗号、引号或换行，交给 csv 模块转义
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(['player_id', 'chips', 'borrow_count', 'bought_in', 'net'])
+    for entry in settlement['players']:
+        writer.writerow([entry['player_id'], entry['chips'], entry['borrow_count'], entry['bought_in'], entry['net']])
+    writer.writerow([])
+    writer.writerow(['from', 'to', 'amount'])
+    for transfer in settlement['transfers']:
+        writer.writerow([transfer['from'], transfer['to'], transfer['amount']])
+    return output.getvalue()
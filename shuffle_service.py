@@ -0,0 +1,141 @@
+"""可验证的公平洗牌（承诺-揭示）
+
+每副牌由一个 32 字节的随机种子决定（secrets 模块，操作系统的 CSPRNG）：
+
+- 随机字节流：HMAC-SHA256(key=种子, msg=计数器的 8 字节大端序)，计数器从 0 开始，
+  每块 32 字节依次切成 4 字节大端序无符号整数
+- 取 [0, n) 的随机数时拒绝 >= 2^32 - 2^32 % n 的值（保证无偏），再对 n 取余
+- Fisher-Yates：i 从 n-1 到 1，与 [0, i] 中的随机位置交换，作用在按固定顺序
+  排列的一副牌上（花色 ♠♥♦♣ 依次，每种花色点数从小到大）
+- 发牌从牌堆末尾依次取：先按入座顺序每人发满底牌，再发公共牌
+
+开新一手时公布承诺 SHA-256(种子)，这手牌结束后公布种子。任何人都可以用种子
+重新洗出同一副牌，核对承诺和实际发出的牌，也可以完整重放这一手的发牌。
+
+洗牌放在后台线程里预先生成（每种牌数保留 DECK_POOL_SIZE 副），开新一手只需要
+从池里取一副；池空了才当场生成。
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+from collections import deque
+
+SEED_BYTES = 32
+
+# 每种牌数预先洗好的副数
+DECK_POOL_SIZE = 32
+
+
+def new_seed(size=SEED_BYTES):
+    return secrets.token_bytes(size)
+
+
+def commitment(seed):
+    """种子（十六进制）的承诺 SHA-256"""
+    return hashlib.sha256(bytes.fromhex(seed)).hexdigest()
+
+
+def _random_words(key):
+    counter = 0
+    while True:
+        block = hmac.new(key, counter.to_bytes(8, 'big'), hashlib.sha256).digest()
+        for i in range(0, len(block), 4):
+            yield int.from_bytes(block[i:i + 4], 'big')
+        counter += 1
+
+
+def shuffled_order(seed, size):
+    """种子（十六进制）决定的洗牌结果：0..size-1 的一个排列"""
+    words = _random_words(bytes.fromhex(seed))
+    order = list(range(size))
+    for i in range(size - 1, 0, -1):
+        bound = i + 1
+        limit = (1 << 32) - (1 << 32) % bound
+        word = next(words)
+        while word >= limit:
+            word = next(words)
+        j = word % bound
+        order[i], order[j] = order[j], order[i]
+    return order
+
+
+def replay_deal(seed, cards, players, hole_cards, board):
+    """用种子重放发牌：返回 (每个玩家的底牌列表，按入座顺序; 公共牌)
+
+    cards 是按固定顺序排列的一副牌，players 是发到牌的人数。
+    """
+    deck = [cards[i] for i in shuffled_order(seed, len(cards))]
+    dealt = deck[::-1]
+    hands = [dealt[k * hole_cards:(k + 1) * hole_cards] for k in range(players)]
+    start = players * hole_cards
+    return hands, dealt[start:start + board]
+
+
+class ShuffleService:
+    """在后台预先生成洗好的牌，取牌时只需要从池里弹出一副"""
+
+    def __init__(self, pool_size=DECK_POOL_SIZE, seed_source=new_seed):
+        self.pool_size = pool_size
+        self._seed_source = seed_source
+        self._pools = {}  # 牌数 -> deque[洗牌记录]
+        self._cond = threading.Condition()
+        self._thread = None
+        self.misses = 0  # 池空时当场生成的次数
+
+    def _make(self, size):
+        seed = self._seed_source(SEED_BYTES).hex()
+        return {'seed': seed, 'commitment': commitment(seed), 'order': shuffled_order(seed, size)}
+
+    def take(self, size):
+        """取一副 size 张牌的洗牌记录：{'seed', 'commitment', 'order'}"""
+        with self._cond:
+            pool = self._pools.setdefault(size, deque())
+            shuffle = pool.popleft() if pool else None
+            self._cond.notify()
+        if shuffle is None:
+            self.misses += 1
+            shuffle = self._make(size)
+        self._ensure_thread()
+        return shuffle
+
+    def prefill(self, sizes):
+        """把各种牌数的池填满（启动时调用），之后由后台线程补充"""
+        for size in sizes:
+            with self._cond:
+                pool = self._pools.setdefault(size, deque())
+                missing = self.pool_size - len(pool)
+            fresh = [self._make(size) for _ in range(max(0, missing))]
+            with self._cond:
+                pool.extend(fresh)
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self.pool_size <= 0 or self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refill_loop, name='shuffle', daemon=True)
+                self._thread.start()
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                size = self._next_short_pool()
+                while size is None:
+                    self._cond.wait()
+                    size = self._next_short_pool()
+            shuffle = self._make(size)
+            with self._cond:
+                self._pools[size].append(shuffle)
+
+    def _next_short_pool(self):
+        for size, pool in self._pools.items():
+            if len(pool) < self.pool_size:
+                return size
+        return None
+
+    def status(self):
+        with self._cond:
+            pools = {size: len(pool) for size, pool in self._pools.items()}
+        return {'pool_size': self.pool_size, 'pools': pools, 'misses': self.misses}
@@ -0,0 +1,69 @@
+"""并发请求合并（single-flight）
+
+换街、发牌等时刻所有客户端几乎同时轮询同一份牌桌状态。同一个 key
+的并发调用只让第一个请求真正执行，其余请求等待并共享它的结果；结果
+再缓存很短的时间，同一波突发请求只消耗一次计算。
+"""
+import threading
+import time
+
+
+class _Call:
+    """一次正在执行的调用"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """按 key 合并并发调用，并把结果缓存 ttl 秒"""
+
+    def __init__(self, ttl=0.5):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._cache = {}
+
+    def do(self, key, func):
+        """返回 func() 的结果；同一 key 同时只执行一次，ttl 秒内直接复用"""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                now = time.monotonic()
+                if call.error is None:
+                    self._cache[key] = (now + self.ttl, call.value)
+                # 顺便清掉过期的缓存（key 一般带版本号，旧版本不会再被访问）
+                for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                    del self._cache[stale]
+            call.done.set()
+        return call.value
+
+    def invalidate(self):
+        """清空缓存（正在执行的调用不受影响）"""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,68 @@
+"""启动恢复、预热与就绪状态
+
+启动时要做的恢复和预热（校验牌局数据、恢复锦标赛和统计、加载手牌历史索引、
+构建牌力查表、编译模板、生成静态资源指纹）互相独立，在后台线程里并行执行，
+服务器不用等它们就可以开始监听。全部完成之前就绪检查返回未就绪。
+导入模块不会开始执行，由服务器入口（或第一个请求）调用 start。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Startup:
+    """并行执行启动任务并记录就绪状态"""
+
+    def __init__(self):
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started_at = None
+        self.finished_at = None
+        self.durations = {}  # 任务名 -> 用时（秒）
+        self.errors = {}  # 任务名 -> 错误信息
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """等待启动完成，返回是否已就绪"""
+        return self._ready.wait(timeout)
+
+    def start(self, tasks):
+        """在后台线程里执行启动任务（tasks: 任务名 -> 无参函数）；已经开始过的不再重复执行"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, args=(tasks,), name='startup', daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def run(self, tasks):
+        """并行执行全部启动任务，完成后标记就绪（失败的任务记录在 errors 里）"""
+        self.started_at = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, len(tasks)), thread_name_prefix='startup') as pool:
+            for name, task in tasks.items():
+                pool.submit(self._run_task, name, task)
+        self.finished_at = time.time()
+        self._ready.set()
+        print(f"启动完成，用时 {self.finished_at - self.started_at:.2f} 秒")
+
+    def _run_task(self, name, task):
+        begin = time.perf_counter()
+        try:
+            task()
+        except Exception as e:
+            self.errors[name] = str(e)
+            print(f"启动任务 {name} 失败: {e}")
+        finally:
+            self.durations[name] = round(time.perf_counter() - begin, 4)
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'startup_seconds': (round(self.finished_at - self.started_at, 4)
+                                if self.finished_at is not None else None),
+            'tasks': dict(self.durations),
+            'errors': dict(self.errors),
+        }
@@ -0,0 +1,483 @@
+// 更新配置
+document.getElementById('configForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const formData = new FormData(e.target);
+    const config = {
+        small_blind: parseInt(formData.get('small_blind')),
+        big_blind: parseInt(formData.get('big_blind')),
+        buy_in_amount: parseInt(formData.get('buy_in_amount')),
+        game_variant: formData.get('game_variant'),
+        auto_deal: formData.get('auto_deal') === '1',
+        result_display_seconds: parseInt(formData.get('result_display_seconds')),
+        away_grace_seconds: parseInt(formData.get('away_grace_seconds')),
+        bot_fill_to: parseInt(formData.get('bot_fill_to')),
+        bot_think_seconds: parseFloat(formData.get('bot_think_seconds')),
+        action_timeout: parseInt(formData.get('action_timeout')),
+        time_bank_seconds: parseInt(formData.get('time_bank_seconds')),
+        time_bank_refill_seconds: parseInt(formData.get('time_bank_refill_seconds'))
+    };
+
+    try {
+        const response = await fetch('/api/update_config', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(config)
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('配置更新成功！', 'success');
+            updateCurrentConfig(result.config);
+        } else {
+            showAlert('配置更新失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+});
+
+// 开始游戏
+async function startGame() {
+    try {
+        const response = await fetch('/api/start_game', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('游戏开始成功！', 'success');
+            refreshData();
+        } else {
+            showAlert('开始游戏失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 重置游戏
+async function resetGame() {
+    if (!confirm('确定要重置游戏吗？这将清除所有玩家数据！')) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/reset_game', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('游戏重置成功！', 'success');
+            refreshData();
+        } else {
+            showAlert('游戏重置失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 刷新数据
+async function refreshData() {
+    try {
+        const response = await fetch('/api/get_game_state');
+        const result = await response.json();
+
+        updatePlayersTable(result.players);
+        updateCurrentConfig(result.config);
+        updateStartGameButton(result.players, result.game_state);
+        showAlert('数据刷新成功！', 'success');
+    } catch (error) {
+        showAlert('刷新数据失败', 'error');
+        console.error(error);
+    }
+}
+
+// 更新开始游戏按钮状态
+function updateStartGameButton(players, gameState) {
+    const startBtn = document.getElementById('startGameBtn');
+    const playerCount = Object.keys(players).length;
+
+    if (gameState === 'playing') {
+        startBtn.disabled = true;
+        startBtn.textContent = '游戏进行中';
+        startBtn.className = 'btn btn-info';
+    } else {
+        if (playerCount >= 2) {
+            startBtn.disabled = false;
+            startBtn.textContent = '开始游戏';
+            startBtn.className = 'btn';
+        } else {
+            startBtn.disabled = true;
+            startBtn.textContent = `等待玩家 (${playerCount}/2)`;
+            startBtn.className = 'btn btn-info';
+        }
+    }
+}
+
+// 更新当前配置显示
+function updateCurrentConfig(config) {
+    document.getElementById('currentSmallBlind').textContent = config.small_blind;
+    document.getElementById('currentBigBlind').textContent = config.big_blind;
+    document.getElementById('currentBuyIn').textContent = config.buy_in_amount;
+    document.getElementById('currentDefaultAddChips').textContent = config.default_add_chips || 1000;
+}
+
+// 更新玩家表格
+function updatePlayersTable(players) {
+    const tbody = document.getElementById('playersTableBody');
+    tbody.innerHTML = '';
+
+    if (Object.keys(players).length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" style="text-align: center; color: #bdc3c7;">暂无在线玩家</td></tr>';
+        return;
+    }
+
+    Object.values(players).forEach(player => {
+        const row = document.createElement('tr');
+        const joinTime = new Date(player.joined_at).toLocaleString('zh-CN');
+
+        row.innerHTML = `
+            <td><span class="status-indicator status-online"></span>在线</td>
+            <td>${player.id}</td>
+            <td>${player.position || '未选择'}</td>
+            <td>${player.chips}</td>
+            <td>${player.borrow_count || 1}</td>
+            <td>${joinTime}</td>
+        `;
+
+        tbody.appendChild(row);
+    });
+}
+
+// 创建锦标赛
+document.getElementById('tournamentForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const formData = new FormData(e.target);
+    const settings = {
+        starting_chips: parseInt(formData.get('starting_chips')),
+        level_minutes: parseInt(formData.get('level_minutes'))
+    };
+
+    try {
+        const response = await fetch('/api/tournament/create', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(settings)
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert(result.message, 'success');
+            refreshTournament();
+        } else {
+            showAlert(result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+});
+
+// 开始锦标赛
+async function startTournament() {
+    await postTournamentAction('/api/tournament/start');
+}
+
+// 结束锦标赛
+async function stopTournament() {
+    if (!confirm('确定要结束锦标赛吗？')) {
+        return;
+    }
+    await postTournamentAction('/api/tournament/stop');
+}
+
+async function postTournamentAction(endpoint) {
+    try {
+        const response = await fetch(endpoint, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        showAlert(result.message, result.success ? 'success' : 'error');
+        refreshTournament();
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 刷新锦标赛状态
+async function refreshTournament() {
+    try {
+        const response = await fetch('/api/tournament/status');
+        const result = await response.json();
+        const tournament = result.tournament;
+        const stateNames = {'registering': '报名中', 'running': '进行中', 'finished': '已结束'};
+
+        if (!tournament) {
+            document.getElementById('tournamentState').textContent = '未创建';
+            document.getElementById('tournamentBlinds').textContent = '-';
+            document.getElementById('tournamentNextLevel').textContent = '-';
+            document.getElementById('tournamentPlayersLeft').textContent = '-';
+            document.getElementById('tournamentStandings').innerHTML = '';
+            return;
+        }
+
+        const level = tournament.current_level;
+        document.getElementById('tournamentState').textContent = `${stateNames[tournament.status]}（第 ${tournament.level} 级）`;
+        document.getElementById('tournamentBlinds').textContent = `${level.small_blind}/${level.big_blind} 前注 ${level.ante || 0}`;
+        document.getElementById('tournamentNextLevel').textContent = tournament.next_level_at
+            ? `${Math.max(0, Math.round(tournament.next_level_at - tournament.server_time))} 秒后`
+            : '-';
+        document.getElementById('tournamentPlayersLeft').textContent = `${tournament.players_left}/${tournament.entrants}`;
+        document.getElementById('tournamentStandings').innerHTML = tournament.standings.map((player, index) =>
+            player.place
+                ? `<div>第 ${player.place} 名: ${player.id}</div>`
+                : `<div>${index + 1}. ${player.id}（${player.seat}号位）${player.chips} 筹码</div>`
+        ).join('');
+    } catch (error) {
+        console.error('刷新锦标赛状态失败:', error);
+    }
+}
+
+// 显示结算转账方案
+function renderSettlement(settlement) {
+    const tbody = document.getElementById('settlementTableBody');
+    const playerName = id => id === '__bank__' ? '差额（筹码与买入不一致）' : id;
+
+    if (settlement.transfers.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="3" style="text-align: center; color: #bdc3c7;">无需转账</td></tr>';
+    } else {
+        tbody.innerHTML = settlement.transfers.map(transfer => `
+            <tr>
+                <td>${playerName(transfer.from)}</td>
+                <td>${playerName(transfer.to)}</td>
+                <td>${transfer.amount}</td>
+            </tr>
+        `).join('');
+    }
+}
+
+// 计算结算（不保存）
+async function previewSettlement() {
+    try {
+        const response = await fetch('/api/settlement');
+        const result = await response.json();
+        if (result.success) {
+            renderSettlement(result.settlement);
+            document.getElementById('settlementExport').innerHTML = '';
+        } else {
+            showAlert(result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 结算并保存快照
+async function saveSettlement() {
+    try {
+        const response = await fetch('/api/settlement', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        showAlert(result.message, result.success ? 'success' : 'error');
+        if (result.success) {
+            renderSettlement(result.settlement);
+            document.getElementById('settlementExport').innerHTML =
+                `<a href="/api/settlement/ledger/${result.settlement.settlement_id}.csv">导出 CSV</a>`;
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 显示提示信息
+function showAlert(message, type) {
+    const alertContainer = document.getElementById('alertContainer');
+    const alert = document.createElement('div');
+    alert.className = `alert alert-${type}`;
+    alert.textContent = message;
+    alert.style.display = 'block';
+
+    alertContainer.innerHTML = '';
+    alertContainer.appendChild(alert);
+
+    // 3秒后自动隐藏
+    setTimeout(() => {
+        alert.style.display = 'none';
+    }, 3000);
+}
+
+// 添加用户
+document.getElementById('addUserForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const formData = new FormData(e.target);
+    const userData = {
+        username: formData.get('username'),
+        password: formData.get('password'),
+        role: formData.get('role')
+    };
+
+    try {
+        const response = await fetch('/api/add_user', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(userData)
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('用户添加成功！', 'success');
+            e.target.reset();
+            loadUsers();
+        } else {
+            showAlert('添加用户失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+});
+
+// 修改密码
+document.getElementById('changePasswordForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const formData = new FormData(e.target);
+    const passwordData = {
+        username: formData.get('username'),
+        password: formData.get('password')
+    };
+
+    try {
+        const response = await fetch('/api/change_password', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(passwordData)
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('密码修改成功！', 'success');
+            e.target.reset();
+        } else {
+            showAlert('修改密码失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+});
+
+// 删除用户
+async function deleteUser(username) {
+    if (!confirm(`确定要删除用户 "${username}" 吗？`)) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/delete_user', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ username: username })
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            showAlert('用户删除成功！', 'success');
+            loadUsers();
+        } else {
+            showAlert('删除用户失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('网络错误，请稍后重试', 'error');
+        console.error(error);
+    }
+}
+
+// 加载用户列表
+async function loadUsers() {
+    try {
+        const response = await fetch('/api/get_users');
+        const result = await response.json();
+
+        if (result.success) {
+            updateUsersTable(result.users);
+        } else {
+            showAlert('加载用户列表失败：' + result.message, 'error');
+        }
+    } catch (error) {
+        showAlert('加载用户列表失败', 'error');
+        console.error(error);
+    }
+}
+
+// 更新用户表格
+function updateUsersTable(users) {
+    const tbody = document.getElementById('usersTableBody');
+    tbody.innerHTML = '';
+
+    if (users.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="3" style="text-align: center; color: #bdc3c7;">暂无用户</td></tr>';
+        return;
+    }
+
+    users.forEach(user => {
+        const row = document.createElement('tr');
+
+        row.innerHTML = `
+            <td>${user.username}</td>
+            <td>${user.role === 'admin' ? '管理员' : '玩家'}</td>
+            <td>
+                ${user.username !== 'admin' ? `<button class="btn btn-danger" onclick="deleteUser('${user.username}')">删除</button>` : '<span style="color: #bdc3c7;">不可删除</span>'}
+            </td>
+        `;
+
+        tbody.appendChild(row);
+    });
+}
+
+// 页面加载时刷新数据
+document.addEventListener('DOMContentLoaded', function() {
+    refreshData();
+    loadUsers();
+});
+
+// 定期刷新玩家数据
+setInterval(refreshData, 5000);
+refreshTournament();
+setInterval(refreshTournament, 5000);
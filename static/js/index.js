@@ -0,0 +1,1170 @@
+let currentPlayer = null;
+let gameConfig = null;
+let tableVersion = null;  // 最近一次看到的牌桌版本号
+let lastLegalActions = null;  // 轮到自己时服务器给的合法行动
+
+// 各区域上次渲染时所用数据的签名，数据没变就不碰 DOM
+const renderedSignatures = {};
+
+function renderIfChanged(key, value, render) {
+    const signature = JSON.stringify(value);
+    if (renderedSignatures[key] === signature) return;
+    renderedSignatures[key] = signature;
+    render();
+}
+
+function setText(element, text) {
+    text = String(text);
+    if (element.textContent !== text) element.textContent = text;
+}
+
+function setDisplay(element, display) {
+    if (element.style.display !== display) element.style.display = display;
+}
+
+// 每次操作生成一个请求ID，网络失败时用同一个ID重试，服务器保证只执行一次
+function newRequestId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+async function postAction(url, data = {}, retries = 2) {
+    const requestId = newRequestId();
+    for (let attempt = 0; ; attempt++) {
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Request-Id': requestId
+                },
+                body: JSON.stringify(data)
+            });
+            return await response.json();
+        } catch (error) {
+            if (attempt >= retries) throw error;
+            await new Promise(resolve => setTimeout(resolve, 300 * (attempt + 1)));
+        }
+    }
+}
+
+// 页面加载时自动加入游戏
+async function autoJoinGame() {
+    try {
+        const response = await fetch('/api/join_game', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({})
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            currentPlayer = result.player;
+            gameConfig = result.config;
+            updatePlayerInfo();
+            updateGameConfig();
+            loadGameState();
+
+            // 显示当前用户名
+            document.getElementById('current-username').textContent = currentPlayer.id;
+        } else {
+            if (result.redirect) {
+                window.location.href = result.redirect;
+            } else {
+                alert(result.message);
+            }
+        }
+    } catch (error) {
+        console.error('自动加入游戏失败:', error);
+        window.location.href = '/login';
+    }
+}
+
+// 退出登录
+async function logout() {
+    try {
+        const response = await fetch('/api/logout', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            window.location.href = '/login';
+        } else {
+            alert('退出登录失败');
+        }
+    } catch (error) {
+        console.error('退出登录失败:', error);
+        window.location.href = '/login';
+    }
+}
+
+// 更新玩家信息
+function updatePlayerInfo() {
+    if (!currentPlayer) return;
+
+    document.getElementById('winLoss').textContent = currentPlayer.borrow_count;
+    document.getElementById('currentChips').textContent = currentPlayer.chips;
+
+    const winLossElement = document.getElementById('winLoss');
+    winLossElement.className = 'stat-value win-loss ' + (currentPlayer.borrow_count >= 0 ? 'positive' : 'negative');
+}
+
+// 更新游戏配置显示
+function updateGameConfig() {
+    if (!gameConfig) return;
+
+    document.getElementById('smallBlind').textContent = gameConfig.small_blind;
+    document.getElementById('bigBlind').textContent = gameConfig.big_blind;
+    document.getElementById('buyInAmount').textContent = gameConfig.buy_in_amount;
+}
+
+// 切换座位
+async function changeSeat(position) {
+    if (!currentPlayer) return;
+
+    try {
+        const result = await postAction('/api/change_position', { position: position });
+        if (result.success) {
+            currentPlayer.position = position;
+            loadGameState();
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('切换座位失败');
+        console.error(error);
+    }
+}
+
+// 二进制帧（见 wire.js）解码状态；连续解码失败几次就退回 JSON
+let wireFrame = null;
+let wireFailures = 0;
+const WIRE_MAX_FAILURES = 3;
+
+async function fetchGameState() {
+    if (!TableWire.supported || wireFailures >= WIRE_MAX_FAILURES) {
+        return fetch('/api/get_game_state').then(r => r.json());
+    }
+    const since = wireFrame ? `&since=${wireFrame.version}.${wireFrame.crc}` : '';
+    const response = await fetch('/api/get_game_state?format=bin' + since);
+    if (!(response.headers.get('Content-Type') || '').startsWith('application/octet-stream')) {
+        return response.json();
+    }
+    try {
+        wireFrame = TableWire.decode(await response.arrayBuffer(), wireFrame);
+        wireFailures = 0;
+    } catch (error) {
+        // 下次请求完整帧
+        wireFrame = null;
+        wireFailures++;
+        throw error;
+    }
+    // 二进制帧里别人的底牌只有张数，自己的底牌在 my_cards 里
+    const result = wireFrame.result;
+    const me = result.players[getCurrentPlayerId()];
+    if (me && result.my_cards) {
+        result.players[me.id] = Object.assign({}, me, { hole_cards: result.my_cards });
+    }
+    return result;
+}
+
+// 加载游戏状态
+async function loadGameState() {
+    try {
+        const result = await fetchGameState();
+        if (result.server_time) {
+            clockOffset = result.server_time - Date.now() / 1000;
+        }
+        tableVersion = result.version;
+
+        // 更新当前玩家信息
+        const currentPlayerId = getCurrentPlayerId();
+        if (currentPlayerId && result.players[currentPlayerId]) {
+            currentPlayer = result.players[currentPlayerId];
+            currentPlayer.id = currentPlayerId;
+            renderIfChanged('playerInfo', [currentPlayer.borrow_count, currentPlayer.chips], updatePlayerInfo);
+        }
+
+        // 只更新和上次相比有变化的区域
+        updateSeats(result.players, result.current_player, result.dealer_position, result.ready_players);
+        gameConfig = result.config;
+        renderIfChanged('config', gameConfig, updateGameConfig);
+        renderIfChanged('variant', [result.variant, result.variants], () => {
+            if (result.variants && result.variant) {
+                document.getElementById('gameVariant').textContent = result.variants[result.variant];
+            }
+        });
+        const me = result.players[currentPlayerId] || null;
+        renderIfChanged('startButton', [Object.keys(result.players).length, me && me.position, result.game_state],
+            () => updateStartButton(result.players, result.game_state));
+        updateGameInfo(result);
+        renderIfChanged('myCards', [result.my_cards, result.my_preflop_equity, result.my_hand_label],
+            () => updateMyCards(result.my_cards, result.my_preflop_equity, result.my_hand_label));
+        renderIfChanged('actions', [result.game_state, result.current_player, me, result.my_legal_actions,
+            result.my_pre_action, Object.values(result.players).map(p => p.current_bet || 0)],
+            () => updateActionButtons(result));
+        renderIfChanged('ready', [result.game_state, result.ready_players, result.my_sitting_out, result.auto_deal,
+            Object.values(result.players).map(p => p.position)],
+            () => updateReadyStatus(result));
+
+        // 倒计时在本地按截止时间走，这里只更新截止时间
+        countdownState = result;
+        renderCountdown();
+    } catch (error) {
+        console.error('加载游戏状态失败:', error);
+    }
+}
+
+// 更新开始按钮状态
+function updateStartButton(players, gameState) {
+    const startBtn = document.getElementById('startGameBtn');
+    const statusDiv = document.getElementById('gameStatus');
+    const gameInfo = document.getElementById('game-info');
+    const readySection = document.getElementById('ready-section');
+    const playerCount = Object.keys(players).length;
+
+    if (gameState === 'playing') {
+        startBtn.style.display = 'none';
+        readySection.style.display = 'none';
+        gameInfo.style.display = 'block';
+        statusDiv.textContent = '游戏进行中...';
+    } else if (gameState === 'ready_phase') {
+        startBtn.style.display = 'none';
+        readySection.style.display = 'block';
+        gameInfo.style.display = 'none';
+    } else {
+        gameInfo.style.display = 'none';
+
+        // 检查当前玩家是否已选择座位
+        const currentPlayerId = getCurrentPlayerId();
+        const hasPosition = currentPlayerId && players[currentPlayerId] && players[currentPlayerId].position !== null;
+
+        if (hasPosition) {
+            startBtn.style.display = 'none';
+            readySection.style.display = 'block';
+        } else {
+            startBtn.style.display = 'block';
+            readySection.style.display = 'none';
+            if (playerCount >= 2) {
+                startBtn.disabled = false;
+                startBtn.textContent = '开始游戏';
+                statusDiv.textContent = `${playerCount} 名玩家已准备`;
+            } else {
+                startBtn.disabled = true;
+                startBtn.textContent = '等待玩家';
+                statusDiv.textContent = `需要至少2名玩家 (当前: ${playerCount})`;
+            }
+        }
+    }
+}
+
+// 更新游戏信息
+function updateGameInfo(data) {
+    setText(document.getElementById('current-pot'), data.current_pot || 0);
+
+    // 更新牌桌上方的底池显示
+    const potDisplay = document.getElementById('pot-display');
+    const potAmount = document.getElementById('pot-amount');
+    if (data.game_state === 'playing' && data.current_pot > 0) {
+        setDisplay(potDisplay, 'block');
+        setText(potAmount, data.current_pot);
+    } else {
+        setDisplay(potDisplay, 'none');
+    }
+
+    const roundNames = {
+        'preflop': '翻牌前',
+        'flop': '翻牌',
+        'turn': '转牌',
+        'river': '河牌'
+    };
+    setText(document.getElementById('betting-round'), roundNames[data.betting_round] || '翻牌前');
+
+    // 开局公布的洗牌承诺（SHA-256），这手牌结束后可以用公布的种子核对
+    const commitment = document.getElementById('deck-commitment');
+    setText(commitment, data.deck_commitment ? data.deck_commitment.slice(0, 16) + '…' : '-');
+    commitment.title = data.deck_commitment || '';
+
+    // 公共牌和摊牌/结算弹窗只在变化时重新渲染
+    renderIfChanged('communityCards', data.community_cards || [], () => renderCommunityCards(data.community_cards));
+    renderIfChanged('phase', [data.game_state, data.hand_id, data.hand_results, hasConfirmedHandResult], () => updatePhaseModals(data));
+}
+
+// 显示公共牌
+function renderCommunityCards(communityCards) {
+    const communityContainer = document.getElementById('community-cards-container');
+    communityContainer.innerHTML = '';
+
+    if (communityCards && communityCards.length > 0) {
+        communityCards.forEach(card => {
+            const cardElement = document.createElement('div');
+            cardElement.className = 'card';
+            if (card.suit === '♥' || card.suit === '♦') {
+                cardElement.classList.add('red');
+            }
+            cardElement.textContent = card.rank + card.suit;
+            communityContainer.appendChild(cardElement);
+        });
+    }
+}
+
+// 处理showdown和hand_ended状态的弹窗
+function updatePhaseModals(data) {
+    if (data.game_state === 'showdown') {
+        showShowdownModal(data);
+        // 确保手牌结果模态框关闭
+        const handResultModal = document.getElementById('handResultModal');
+        if (handResultModal) {
+            handResultModal.style.display = 'none';
+        }
+    } else if (data.game_state === 'hand_ended') {
+        hideShowdownModal();
+        if (data.hand_results && !hasConfirmedHandResult) {
+            showHandResultModal(data.hand_results);
+        }
+        // 显示最终手牌展示弹窗（只显示一次）
+        if (!hasFinalHandModalShown) {
+            hasFinalHandModalShown = true;
+            showFinalHandModal();
+        }
+    } else {
+        // 当游戏状态不是hand_ended时，确保手牌结果模态框关闭
+        hideShowdownModal();
+        const handResultModal = document.getElementById('handResultModal');
+        if (handResultModal) {
+            handResultModal.style.display = 'none';
+        }
+        const finalHandModal = document.getElementById('finalHandModal');
+        if (finalHandModal) {
+            finalHandModal.style.display = 'none';
+        }
+        // 隐藏牌桌上的手牌展示
+        hidePlayerCardsOnTable();
+        // 重置确认标志，为下一局做准备
+        hasConfirmedHandResult = false;
+        hasFinalHandModalShown = false;
+    }
+}
+
+// 更新我的手牌
+function updateMyCards(myCards, preflopEquity = null, handLabel = null) {
+    const myCardsDiv = document.getElementById('my-cards');
+    const cardsContainer = document.getElementById('my-cards-container');
+    const equityDiv = document.getElementById('my-hand-equity');
+
+    // 翻牌前显示起手牌胜率
+    if (preflopEquity !== null && preflopEquity !== undefined) {
+        equityDiv.style.display = 'block';
+        equityDiv.textContent = `${handLabel} 翻牌前胜率: ${(preflopEquity * 100).toFixed(1)}%`;
+    } else {
+        equityDiv.style.display = 'none';
+    }
+
+    if (myCards && myCards.length > 0) {
+        myCardsDiv.style.display = 'block';
+        cardsContainer.innerHTML = '';
+
+        myCards.forEach(card => {
+            const cardElement = document.createElement('div');
+            cardElement.className = 'card';
+            if (card.suit === '♥' || card.suit === '♦') {
+                cardElement.classList.add('red');
+            }
+            cardElement.textContent = card.rank + card.suit;
+            cardsContainer.appendChild(cardElement);
+        });
+    } else {
+        myCardsDiv.style.display = 'none';
+    }
+}
+
+// 更新操作按钮
+function updateActionButtons(data) {
+    const actionButtons = document.getElementById('action-buttons');
+    const checkBtn = document.getElementById('check-btn');
+    const callBtn = document.getElementById('call-btn');
+
+    // 检查是否轮到当前玩家
+    const currentPlayerId = getCurrentPlayerId();
+    const player = data.players[currentPlayerId];
+
+    // 只有当游戏进行中、轮到当前玩家、玩家未弃牌且未全押时才显示操作按钮
+    if (data.game_state === 'playing' && player && 
+        data.current_player === player.position && 
+        !player.folded && !player.all_in) {
+
+        actionButtons.style.display = 'flex';
+
+        // 服务器在轮到自己时算好的合法行动
+        const legal = data.my_legal_actions;
+        lastLegalActions = legal;
+        const callAmount = legal ? legal.call_amount : 0;
+
+        // 更新按钮文本和状态
+        if (!legal || legal.can_check) {
+            checkBtn.style.display = 'inline-block';
+            callBtn.style.display = 'none';
+        } else {
+            checkBtn.style.display = 'none';
+            callBtn.style.display = 'inline-block';
+            callBtn.textContent = `跟注 ¥${callAmount}`;
+        }
+
+        // 设置加注金额范围（加注到的总金额）
+        const raiseInput = document.getElementById('raise-amount');
+        const raiseBtn = document.getElementById('raise-btn');
+        if (legal && legal.can_raise) {
+            raiseInput.min = legal.min_raise;
+            raiseInput.max = legal.max_raise;
+            raiseInput.placeholder = `¥${legal.min_raise} ~ ¥${legal.max_raise}`;
+            raiseInput.disabled = false;
+            raiseBtn.disabled = false;
+        } else {
+            raiseInput.placeholder = '不能加注';
+            raiseInput.disabled = true;
+            raiseBtn.disabled = true;
+        }
+        document.getElementById('allin-btn').disabled = !!legal && !legal.can_all_in;
+
+    } else {
+        actionButtons.style.display = 'none';
+        lastLegalActions = null;
+    }
+
+    updatePreActionButtons(data, player);
+}
+
+// 还没轮到自己时显示预选行动按钮，高亮当前选择
+function updatePreActionButtons(data, player) {
+    const preActionButtons = document.getElementById('pre-action-buttons');
+
+    if (data.game_state === 'playing' && player && player.hole_cards && player.hole_cards.length > 0 &&
+        data.current_player !== player.position && 
+        !player.folded && !player.all_in) {
+
+        preActionButtons.style.display = 'flex';
+
+        const maxBet = Math.max(...Object.values(data.players)
+            .filter(p => p.position !== null)
+            .map(p => p.current_bet || 0));
+        const callAmount = maxBet - (player.current_bet || 0);
+
+        document.getElementById('pre-check-btn').style.display = callAmount === 0 ? 'inline-block' : 'none';
+        const preCallBtn = document.getElementById('pre-call-btn');
+        preCallBtn.style.display = callAmount === 0 ? 'none' : 'inline-block';
+        preCallBtn.textContent = `跟注 ¥${callAmount}`;
+
+        const selected = data.my_pre_action ? data.my_pre_action.action : null;
+        preActionButtons.querySelectorAll('button').forEach(btn => {
+            btn.classList.toggle('active', btn.dataset.preAction === selected);
+        });
+    } else {
+        preActionButtons.style.display = 'none';
+    }
+}
+
+// 选择/取消预选行动
+async function togglePreAction(action) {
+    const btn = document.querySelector(`#pre-action-buttons [data-pre-action="${action}"]`);
+    const data = { action: btn.classList.contains('active') ? null : action };
+
+    try {
+        const result = await postAction('/api/pre_action', data);
+        if (result.success) {
+            loadGameState();
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('操作失败');
+        console.error(error);
+    }
+}
+
+// 获取当前玩家ID
+function getCurrentPlayerId() {
+    return currentPlayer ? currentPlayer.id : null;
+}
+
+// 更新准备状态
+function updateReadyStatus(data) {
+    const readySection = document.getElementById('ready-section');
+    const readyBtn = document.getElementById('ready-btn');
+    const readyStatus = document.getElementById('ready-status');
+    const countdownTimer = document.getElementById('countdown-timer');
+
+    if (!readyBtn) return;
+
+    const currentPlayerId = getCurrentPlayerId();
+    const isReady = data.ready_players && data.ready_players.includes(currentPlayerId);
+
+    // 暂离按钮：有座位时显示
+    const sitOutBtn = document.getElementById('sit-out-btn');
+    const me = data.players[currentPlayerId];
+    sitOutBtn.style.display = me && me.position !== null ? 'block' : 'none';
+    sitOutBtn.textContent = data.my_sitting_out ? '回到牌桌' : '暂离';
+    sitOutBtn.classList.toggle('ready', !!data.my_sitting_out);
+
+    // 根据游戏状态显示相应的UI元素
+    if (data.game_state === 'playing' || (data.auto_deal && data.game_state === 'hand_ended')) {
+        // 自动发牌模式下结算后不需要准备
+        readySection.style.display = 'block';
+        readyBtn.style.display = 'none';
+        readyStatus.style.display = 'none';
+    } else {
+        // 在非游戏状态下（包括hand_ended），显示准备按钮
+        readyBtn.style.display = 'block';
+        readyStatus.style.display = 'block';
+    }
+
+    // 更新准备按钮
+    if (isReady) {
+        readyBtn.textContent = '取消准备';
+        readyBtn.classList.add('ready');
+    } else {
+        readyBtn.textContent = '准备';
+        readyBtn.classList.remove('ready');
+    }
+
+    // 更新状态文本
+    const readyCount = data.ready_players ? data.ready_players.length : 0;
+    const totalPlayers = Object.keys(data.players).filter(id => data.players[id].position !== null).length;
+    readyStatus.textContent = `已准备: ${readyCount}/${totalPlayers}`;
+
+}
+
+// 服务器时间与本地时间的差（秒），用来把服务器给的绝对截止时间换算成本地倒计时
+let clockOffset = 0;
+let countdownState = null;
+
+function secondsUntil(deadline) {
+    return deadline - (Date.now() / 1000 + clockOffset);
+}
+
+// 按截止时间本地倒计时，不需要每秒请求服务器
+function renderCountdown() {
+    const countdownTimer = document.getElementById('countdown-timer');
+    const data = countdownState;
+    if (!countdownTimer || !data || !data.deadline) {
+        if (countdownTimer) setDisplay(countdownTimer, 'none');
+        return;
+    }
+
+    const seconds = Math.ceil(secondsUntil(data.deadline));
+    if (seconds <= 0) {
+        setDisplay(countdownTimer, 'none');
+        return;
+    }
+
+    setDisplay(countdownTimer, 'block');
+    if (data.game_state === 'ready_phase') {
+        setText(countdownTimer, `准备倒计时: ${seconds}秒`);
+    } else if (data.game_state === 'hand_ended') {
+        setText(countdownTimer, `下一手: ${seconds}秒后自动发牌`);
+    } else if (data.game_state === 'showdown') {
+        const timerElement = document.getElementById('timerSeconds');
+        if (timerElement) setText(timerElement, seconds);
+        setDisplay(countdownTimer, 'none');
+    } else if (data.game_state === 'playing') {
+        // 显示当前行动玩家信息
+        let currentPlayerName = '未知玩家';
+        for (const [playerId, player] of Object.entries(data.players)) {
+            if (player.position === data.current_player) {
+                currentPlayerName = playerId;
+                break;
+            }
+        }
+        const baseSeconds = Math.ceil(secondsUntil(data.action_deadline || data.deadline));
+        if (baseSeconds > 0) {
+            setText(countdownTimer, `${currentPlayerName} 行动中: ${baseSeconds}秒`);
+        } else {
+            setText(countdownTimer, `${currentPlayerName} 使用时间银行: ${seconds}秒`);
+        }
+    }
+}
+
+// 对齐到整秒刷新，倒计时跳动更均匀
+function scheduleCountdownTick() {
+    const now = Date.now() / 1000 + clockOffset;
+    setTimeout(() => {
+        renderCountdown();
+        scheduleCountdownTick();
+    }, Math.max(50, (1 - (now % 1)) * 1000));
+}
+
+scheduleCountdownTick();
+
+// 切换准备状态
+async function toggleReady() {
+    const currentPlayerId = getCurrentPlayerId();
+    if (!currentPlayerId) {
+        alert('请先加入游戏');
+        return;
+    }
+
+    try {
+        const gameState = await fetch('/api/get_game_state').then(r => r.json());
+        const isReady = gameState.ready_players && gameState.ready_players.includes(currentPlayerId);
+
+        const endpoint = isReady ? '/api/player_unready' : '/api/player_ready';
+        const result = await postAction(endpoint, {table_version: gameState.version});
+        if (result.success) {
+            loadGameState();
+        } else {
+            if (result.stale) loadGameState();
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('操作失败');
+        console.error(error);
+    }
+}
+
+// 切换暂离状态
+async function toggleSitOut() {
+    const sitOutBtn = document.getElementById('sit-out-btn');
+    const endpoint = sitOutBtn.classList.contains('ready') ? '/api/sit_in' : '/api/sit_out';
+
+    try {
+        const result = await postAction(endpoint);
+        if (result.success) {
+            loadGameState();
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('操作失败');
+        console.error(error);
+    }
+}
+
+// 玩家行动
+async function playerAction(action) {
+    const raiseAmount = document.getElementById('raise-amount').value;
+
+    const data = {
+        action: action,
+        table_version: tableVersion
+    };
+
+    if (action === 'raise' && raiseAmount) {
+        data.amount = parseInt(raiseAmount);
+    }
+
+    // 按服务器给的合法范围先检查，省一次无效请求
+    const legal = lastLegalActions;
+    if (action === 'raise' && legal) {
+        if (!data.amount || data.amount < legal.min_raise || data.amount > legal.max_raise) {
+            alert(`加注金额必须在 ${legal.min_raise} ~ ${legal.max_raise} 之间`);
+            return;
+        }
+    }
+
+    try {
+        const result = await postAction('/api/player_action', data);
+        if (result.success) {
+            // 清空加注输入框
+            document.getElementById('raise-amount').value = '';
+            // 立即更新游戏状态
+            loadGameState();
+        } else {
+            if (result.stale) loadGameState();
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('操作失败');
+        console.error(error);
+    }
+}
+
+// 开始游戏
+async function startGame() {
+    try {
+        const response = await fetch('/api/start_game', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            loadGameState();
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('开始游戏失败');
+        console.error(error);
+    }
+}
+
+// 更新座位显示
+function updateSeats(players, currentPlayerPosition, dealerPosition, readyPlayers = []) {
+    const playersByPosition = {};
+    Object.values(players).forEach(player => {
+        if (player.position) playersByPosition[player.position] = player;
+    });
+
+    // 每个座位单独比较，只重画有变化的座位
+    document.querySelectorAll('.player-seat').forEach(seat => {
+        const position = parseInt(seat.dataset.position);
+        const player = playersByPosition[position] || null;
+        const isCurrent = currentPlayerPosition === position;
+        const isDealer = dealerPosition === position;
+        const isReady = !!player && !!readyPlayers && readyPlayers.includes(player.id);
+        renderIfChanged(`seat-${position}`, [player, isCurrent, isDealer, isReady],
+            () => renderSeat(seat, player, isCurrent, isDealer, isReady));
+    });
+}
+
+function renderSeat(seat, player, isCurrent, isDealer, isReady) {
+    seat.classList.remove('occupied', 'current-player');
+    seat.innerHTML = `
+        <div class="seat-info">座位 ${seat.dataset.position}</div>
+        <div class="player-cards"></div>
+        <div class="player-bet"></div>
+    `;
+    seat.classList.toggle('player-ready', isReady);
+    if (!player) return;
+
+    seat.classList.add('occupied');
+
+    // 高亮当前玩家
+    if (isCurrent) {
+        seat.classList.add('current-player');
+    }
+
+    // 更新玩家信息
+    let statusText = '';
+    if (player.away) statusText = '离线';
+    else if (player.sitting_out) statusText = '暂离';
+    else if (player.folded) statusText = '已弃牌';
+    else if (player.all_in) statusText = '全押';
+
+    const seatInfo = seat.querySelector('.seat-info');
+    seatInfo.innerHTML = `
+        <div style="font-weight: bold; margin-bottom: 2px;">${player.bot ? '🤖 ' : ''}${player.id}</div>
+        <div style="font-size: 10px; color: #ffd700;">借码: ${player.borrow_count || 1}</div>
+        <div style="font-size: 10px; color: #ffd700;">余额: ${player.chips}</div>
+        <div style="font-size: 10px; color: #ccc;">${statusText}</div>
+    `;
+
+    // 显示手牌（背面）
+    const playerCards = seat.querySelector('.player-cards');
+    if (player.hole_cards && player.hole_cards.length > 0) {
+        playerCards.innerHTML = '<div class="card">🂠</div>'.repeat(player.hole_cards.length);
+    }
+
+    // 显示下注金额
+    const playerBet = seat.querySelector('.player-bet');
+    if (player.current_bet && player.current_bet > 0) {
+        playerBet.innerHTML = `¥${player.current_bet}`;
+        playerBet.style.display = 'block';
+    } else {
+        playerBet.style.display = 'none';
+    }
+
+    // 显示庄家按钮
+    if (isDealer) {
+        const dealerBtn = document.createElement('div');
+        dealerBtn.className = 'dealer-button';
+        dealerBtn.textContent = 'D';
+        seat.appendChild(dealerBtn);
+    }
+}
+
+// 显示添加筹码模态框
+function showAddChipsModal() {
+    console.log('当前玩家:', currentPlayer);
+    console.log('当前筹码:', currentPlayer ? currentPlayer.chips : 'undefined');
+
+    if (!currentPlayer) {
+        alert('请先加入游戏');
+        return;
+    }
+
+    if (currentPlayer.chips > 0) {
+        alert('当前还有筹码，无需添加');
+        return;
+    }
+
+    document.getElementById('addChipsModal').style.display = 'block';
+}
+
+// 关闭添加筹码模态框
+function closeAddChipsModal() {
+    document.getElementById('addChipsModal').style.display = 'none';
+}
+
+// 添加筹码
+async function addChips() {
+    try {
+        const result = await postAction('/api/add_chips', {table_version: tableVersion});
+        if (result.success) {
+            currentPlayer = result.player;
+            updatePlayerInfo();
+            loadGameState();
+            closeAddChipsModal();
+            alert(result.message);
+        } else {
+            if (result.stale) loadGameState();
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('添加筹码失败');
+        console.error(error);
+    }
+}
+
+// 离开游戏
+function leaveGame() {
+    if (confirm('确定要离开牌桌吗？')) {
+        window.location.href = '/login';
+    }
+}
+
+function showShowdownModal(gameState) {
+    const modal = document.getElementById('showdownModal');
+    const timerElement = document.getElementById('timerSeconds');
+    const cardsElement = document.getElementById('allCommunityCards');
+    const playerCardsArea = document.getElementById('showdownPlayerCards');
+    const playerCardsContent = document.getElementById('showdownPlayerCardsContent');
+
+    // 显示所有公共牌
+    if (gameState.community_cards && gameState.community_cards.length > 0) {
+        cardsElement.innerHTML = '';
+        gameState.community_cards.forEach(card => {
+            const cardElement = document.createElement('div');
+            cardElement.className = 'card';
+            if (card.suit === '♥' || card.suit === '♦') {
+                cardElement.classList.add('red');
+            }
+            cardElement.textContent = card.rank + card.suit;
+            cardsElement.appendChild(cardElement);
+        });
+    }
+
+    // 显示所有玩家手牌（如果有hand_results数据）
+    if (gameState.hand_results && gameState.hand_results.all_player_cards) {
+        let html = '';
+        Object.entries(gameState.hand_results.all_player_cards).forEach(([playerId, playerData]) => {
+            const holeCards = playerData.hole_cards || [];
+            const handStrength = playerData.hand_strength;
+
+            html += `<div style="margin: 5px 0; padding: 8px; background: rgba(255,255,255,0.1); border-radius: 5px; border-left: 3px solid #3498db;">`;
+            html += `<strong style="color: #ecf0f1;">${playerId}:</strong> `;
+
+            // 显示手牌
+            holeCards.forEach(card => {
+                const cardColor = (card.suit === '♥' || card.suit === '♦') ? 'color: red;' : 'color: black;';
+                html += `<span style="${cardColor} background: white; padding: 2px 6px; margin: 0 2px; border-radius: 3px; font-weight: bold; font-size: 12px;">${card.rank}${card.suit}</span>`;
+            });
+
+            html += ` - <span style="color: #e74c3c; font-weight: bold;">${getHandStrengthText(handStrength)}</span></div>`;
+        });
+
+        playerCardsContent.innerHTML = html;
+        playerCardsArea.style.display = 'block';
+    } else {
+        playerCardsArea.style.display = 'none';
+    }
+
+    timerElement.textContent = gameState.deadline ? Math.max(0, Math.ceil(secondsUntil(gameState.deadline))) : 5;
+    modal.style.display = 'block';
+}
+
+function hideShowdownModal() {
+    const modal = document.getElementById('showdownModal');
+    modal.style.display = 'none';
+}
+
+function showHandResultModal(handResults) {
+    if (!handResults || handResults.length === 0) return;
+
+    const modal = document.getElementById('handResultModal');
+    const content = document.getElementById('handResultContent');
+
+    let html = '';
+
+    // 如果有all_player_cards数据，在弹窗中显示所有玩家手牌
+    if (handResults.all_player_cards) {
+        html += '<div style="margin-bottom: 15px; padding: 10px; background: rgba(52, 152, 219, 0.1); border-radius: 5px;"><h4 style="margin: 0 0 10px 0; color: #3498db;">所有玩家手牌</h4>';
+
+        Object.entries(handResults.all_player_cards).forEach(([playerId, playerData]) => {
+            const holeCards = playerData.hole_cards || [];
+            const handStrength = playerData.hand_strength;
+
+            html += `<div style="margin: 5px 0; padding: 5px; background: rgba(255,255,255,0.1); border-radius: 3px;">`;
+            html += `<strong>${playerId}:</strong> `;
+
+            // 显示手牌
+            holeCards.forEach(card => {
+                const cardColor = (card.suit === '♥' || card.suit === '♦') ? 'color: red;' : 'color: black;';
+                html += `<span style="${cardColor} background: white; padding: 2px 4px; margin: 0 2px; border-radius: 2px; font-weight: bold;">${card.rank}${card.suit}</span>`;
+            });
+
+            html += ` - ${getHandStrengthText(handStrength)}</div>`;
+        });
+
+        html += '</div>';
+    }
+
+    handResults.forEach(result => {
+        const gainClass = result.net_gain > 0 ? 'net-gain-positive' : 
+                         result.net_gain < 0 ? 'net-gain-negative' : '';
+        const gainText = result.net_gain > 0 ? `+${result.net_gain}` : result.net_gain.toString();
+
+        // 获取输赢统计信息
+        const wins = result.wins || 0;
+        const losses = result.losses || 0;
+        const winRate = wins + losses > 0 ? ((wins / (wins + losses)) * 100).toFixed(1) : '0.0';
+        const statsText = `胜: ${wins} 负: ${losses} (胜率: ${winRate}%)`;
+
+        if (result.is_winner) {
+            html += `
+                <div class="winner-info">
+                    🏆 ${result.player_name} 获胜！
+                    <div class="hand-strength">${result.hand_strength}</div>
+                    <div>奖金: ${result.winnings}</div>
+                    <div class="${gainClass}">净收益: ${gainText}</div>
+                    <div style="font-size: 12px; margin-top: 5px; opacity: 0.9;">${statsText}</div>
+                </div>
+            `;
+        } else {
+            html += `
+                <div class="player-hand-info">
+                    <div><strong>${result.player_name}</strong></div>
+                    <div class="hand-strength">${result.hand_strength}</div>
+                    <div class="${gainClass}">净收益: ${gainText}</div>
+                    <div style="font-size: 12px; margin-top: 5px; opacity: 0.8;">${statsText}</div>
+                </div>
+            `;
+        }
+    });
+
+    content.innerHTML = html;
+    modal.style.display = 'block';
+}
+
+// 在牌桌上显示所有玩家手牌
+function showPlayerCardsOnTable(allPlayerCards) {
+    const showdownArea = document.getElementById('showdown-cards');
+    const content = document.getElementById('showdown-cards-content');
+
+    let html = '';
+
+    Object.entries(allPlayerCards).forEach(([playerId, playerData]) => {
+        const holeCards = playerData.hole_cards || [];
+        const handStrength = playerData.hand_strength;
+
+        html += `
+            <div style="margin: 8px 0; padding: 8px; background: rgba(44, 62, 80, 0.6); border-radius: 5px; border-left: 3px solid #3498db;">
+                <div style="font-weight: bold; color: #ecf0f1; margin-bottom: 5px; font-size: 12px;">${playerId}</div>
+                <div style="display: flex; gap: 3px; margin-bottom: 5px; justify-content: center;">
+        `;
+
+        // 显示手牌
+        holeCards.forEach(card => {
+            const cardColor = (card.suit === '♥' || card.suit === '♦') ? 'color: red;' : 'color: black;';
+            html += `<div class="card" style="${cardColor} background: white; width: 25px; height: 35px; border-radius: 3px; display: flex; align-items: center; justify-content: center; font-size: 9px; font-weight: bold;">${card.rank}${card.suit}</div>`;
+        });
+
+        html += `
+                </div>
+                <div style="color: #e74c3c; font-size: 10px; font-weight: bold; text-align: center;">${getHandStrengthText(handStrength)}</div>
+            </div>
+        `;
+    });
+
+    content.innerHTML = html;
+    showdownArea.style.display = 'block';
+}
+
+// 隐藏牌桌上的手牌展示
+function hidePlayerCardsOnTable() {
+    const showdownArea = document.getElementById('showdown-cards');
+    showdownArea.style.display = 'none';
+}
+
+// 辅助函数：将手牌强度转换为可读文本
+function getHandStrengthText(handStrength) {
+    if (!handStrength || !handStrength[0]) return '高牌';
+
+    const rank = handStrength[0];
+    const handTypes = {
+        1: '高牌',
+        2: '一对',
+        3: '两对',
+        4: '三条',
+        5: '顺子',
+        6: '同花',
+        7: '葫芦',
+        8: '四条',
+        9: '同花顺',
+        10: '皇家同花顺'
+    };
+
+    return handTypes[rank] || '高牌';
+}
+
+// 用于跟踪当前玩家是否已确认手牌结果
+let hasConfirmedHandResult = false;
+// 用于跟踪是否已显示最终手牌弹窗
+let hasFinalHandModalShown = false;
+
+function confirmHandResult() {
+    // 标记当前玩家已确认
+    hasConfirmedHandResult = true;
+
+    // 直接关闭模态框
+    const modal = document.getElementById('handResultModal');
+    modal.style.display = 'none';
+
+    // 调用后端API以维护服务器状态
+    postAction('/api/confirm_hand_result')
+    .then(data => {
+        loadGameState();
+    });
+}
+
+// 显示最终手牌展示弹窗
+async function showFinalHandModal() {
+    try {
+        const response = await fetch('/api/get_hand_results');
+        const data = await response.json();
+
+        console.log('获取到的手牌结果数据:', data);
+
+        if (data.success) {
+            const modal = document.getElementById('finalHandModal');
+            const content = document.getElementById('finalHandContent');
+
+            let html = '';
+
+            // 显示公共牌
+            html += '<div style="margin-bottom: 15px; text-align: center;">';
+            html += '<h4 style="margin: 0 0 10px 0; color: #ffd700;">🃏 公共牌</h4>';
+            html += '<div style="display: flex; justify-content: center; gap: 5px; flex-wrap: wrap; min-height: 40px; align-items: center;">';
+
+            if (data.community_cards && data.community_cards.length > 0) {
+                data.community_cards.forEach(card => {
+                    const cardColor = (card.suit === '♥' || card.suit === '♦') ? 'color: red;' : 'color: black;';
+                    html += `<div style="${cardColor} background: white; padding: 8px 6px; border-radius: 5px; font-weight: bold; font-size: 14px; min-width: 30px; text-align: center;">${card.rank}${card.suit}</div>`;
+                });
+            } else {
+                html += '<div style="color: #95a5a6; font-style: italic;">无公共牌</div>';
+            }
+
+            html += '</div></div>';
+
+            // 显示所有玩家手牌
+            if (data.all_player_cards && Object.keys(data.all_player_cards).length > 0) {
+                html += '<div style="margin-bottom: 15px;">';
+                html += '<h4 style="margin: 0 0 10px 0; color: #3498db;">👥 所有玩家手牌</h4>';
+
+                Object.entries(data.all_player_cards).forEach(([playerId, playerData]) => {
+                    if (!playerData.folded) {
+                        html += `<div style="margin: 8px 0; padding: 10px; background: rgba(52, 73, 94, 0.8); border-radius: 5px; border-left: 4px solid #3498db;">`;
+                        html += `<div style="font-weight: bold; color: #ecf0f1; margin-bottom: 5px;">${playerId}</div>`;
+                        html += '<div style="display: flex; gap: 5px; margin-bottom: 5px; justify-content: center;">';
+
+                        // 显示手牌
+                        playerData.hole_cards.forEach(card => {
+                            const cardColor = (card.suit === '♥' || card.suit === '♦') ? 'color: red;' : 'color: black;';
+                            html += `<div style="${cardColor} background: white; padding: 6px 4px; border-radius: 3px; font-weight: bold; font-size: 12px; min-width: 25px; text-align: center;">${card.rank}${card.suit}</div>`;
+                        });
+
+                        html += '</div>';
+                        html += `<div style="color: #e74c3c; font-weight: bold; text-align: center; font-size: 12px;">${getHandStrengthText(playerData.hand_strength)}</div>`;
+                        html += '</div>';
+                    }
+                });
+
+                html += '</div>';
+            }
+
+            // 显示获胜者信息
+            if (data.winners && data.winners.length > 0) {
+                html += '<div style="margin-top: 15px; padding: 10px; background: linear-gradient(135deg, #ffd700, #ffed4e); color: #2c3e50; border-radius: 8px; text-align: center;">';
+                html += '<h4 style="margin: 0 0 5px 0;">🏆 获胜者</h4>';
+                html += `<div style="font-weight: bold;">${data.winners.join(', ')}</div>`;
+                if (data.pot_amount) {
+                    html += `<div style="margin-top: 5px;">奖金: ¥${data.pot_amount}</div>`;
+                }
+                html += '</div>';
+            }
+
+            content.innerHTML = html;
+            modal.style.display = 'block';
+        } else {
+            console.log('无法获取手牌信息:', data.message);
+        }
+    } catch (error) {
+        console.error('获取手牌信息失败:', error);
+    }
+}
+
+// 关闭最终手牌展示弹窗
+function closeFinalHandModal() {
+    const modal = document.getElementById('finalHandModal');
+    modal.style.display = 'none';
+    // 不在这里重置标志，避免立即重新弹出
+    // hasFinalHandModalShown标志只在游戏状态改变时重置
+}
+
+// 页面加载完成后自动加入游戏
+document.addEventListener('DOMContentLoaded', function() {
+    autoJoinGame();
+});
+
+// 定期更新游戏状态（轮询同时作为心跳）
+setInterval(() => {
+    if (currentPlayer) {
+        loadGameState();
+    }
+}, 3000);
+
+// 切到后台/锁屏/关闭页面时立即通知服务器离线，回到前台时马上恢复
+function sendPresence(status) {
+    const body = new Blob([JSON.stringify({ status: status })], { type: 'application/json' });
+    if (status === 'away' && navigator.sendBeacon) {
+        navigator.sendBeacon('/api/heartbeat', body);
+    } else {
+        fetch('/api/heartbeat', { method: 'POST', body: body, keepalive: true }).catch(() => {});
+    }
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (!currentPlayer) return;
+    if (document.visibilityState === 'hidden') {
+        sendPresence('away');
+    } else {
+        sendPresence('online');
+        loadGameState();
+    }
+});
+
+window.addEventListener('pagehide', () => {
+    if (currentPlayer) sendPresence('away');
+});
+
+// 点击模态框外部关闭
+window.onclick = function(event) {
+    const addChipsModal = document.getElementById('addChipsModal');
+    const finalHandModal = document.getElementById('finalHandModal');
+
+    if (event.target === addChipsModal) {
+        closeAddChipsModal();
+    } else if (event.target === finalHandModal) {
+        closeFinalHandModal();
+    }
+}
+
+// 移除了无效的playerIdInput事件监听器
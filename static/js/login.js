@@ -0,0 +1,78 @@
+document.getElementById('login-form').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const username = document.getElementById('username').value.trim();
+    const password = document.getElementById('password').value.trim();
+    const loginBtn = document.getElementById('login-btn');
+    const loading = document.getElementById('loading');
+    const errorMessage = document.getElementById('error-message');
+    const successMessage = document.getElementById('success-message');
+
+    if (!username || !password) {
+        showError('请输入用户名和密码');
+        return;
+    }
+
+    // 显示加载状态
+    loginBtn.disabled = true;
+    loading.style.display = 'block';
+    hideMessages();
+
+    try {
+        const response = await fetch('/api/login', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ username, password })
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            showSuccess('登录成功，正在跳转...');
+            setTimeout(() => {
+                if (result.role === 'admin') {
+                    window.location.href = '/admin';
+                } else {
+                    window.location.href = '/';
+                }
+            }, 1000);
+        } else {
+            showError(result.message || '登录失败');
+        }
+    } catch (error) {
+        console.error('登录错误:', error);
+        showError('网络错误，请重试');
+    } finally {
+        loginBtn.disabled = false;
+        loading.style.display = 'none';
+    }
+});
+
+function showError(message) {
+    const errorMessage = document.getElementById('error-message');
+    errorMessage.textContent = message;
+    errorMessage.style.display = 'block';
+}
+
+function showSuccess(message) {
+    const successMessage = document.getElementById('success-message');
+    successMessage.textContent = message;
+    successMessage.style.display = 'block';
+}
+
+function hideMessages() {
+    document.getElementById('error-message').style.display = 'none';
+    document.getElementById('success-message').style.display = 'none';
+}
+
+// 演示账户快速填充
+document.querySelectorAll('.demo-account').forEach(account => {
+    account.addEventListener('click', function() {
+        const text = this.querySelector('span').textContent;
+        const [username, password] = text.split(' / ');
+        document.getElementById('username').value = username;
+        document.getElementById('password').value = password;
+    });
+});
@@ -0,0 +1,189 @@
+// 牌桌状态二进制协议的解码（帧格式见 wire.py），解出和 JSON 接口结构相同的对象
+const TableWire = (function () {
+    const FRAME_DELTA = 1;
+    const GAME_STATES = ['waiting', 'ready_phase', 'playing', 'showdown', 'hand_ended'];
+    const BETTING_ROUNDS = ['preflop', 'flop', 'turn', 'river'];
+    const PLAYER_FLAGS = ['folded', 'all_in', 'away', 'sitting_out', 'bot'];
+    const SUITS = ['♠', '♥', '♦', '♣'];
+    const RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A'];
+    // 别人的底牌只知道张数
+    const HIDDEN_CARD = { rank: '', suit: '' };
+
+    const supported = typeof TextDecoder !== 'undefined' && typeof Uint8Array !== 'undefined';
+    const textDecoder = supported ? new TextDecoder() : null;
+
+    class Reader {
+        constructor(buffer) {
+            this.bytes = new Uint8Array(buffer);
+            this.pos = 0;
+        }
+
+        byte() {
+            if (this.pos >= this.bytes.length) {
+                throw new Error('帧不完整');
+            }
+            return this.bytes[this.pos++];
+        }
+
+        // varint 可能超过 32 位（毫秒时间戳），用乘法累加
+        uint() {
+            let result = 0;
+            let scale = 1;
+            let byte;
+            do {
+                byte = this.byte();
+                result += (byte & 0x7f) * scale;
+                scale *= 128;
+            } while (byte & 0x80);
+            return result;
+        }
+
+        optionalUint() {
+            const value = this.uint();
+            return value === 0 ? null : value - 1;
+        }
+
+        time() {
+            const value = this.uint();
+            return value === 0 ? null : (value - 1) / 1000;
+        }
+
+        str() {
+            const length = this.uint();
+            if (this.pos + length > this.bytes.length) {
+                throw new Error('帧不完整');
+            }
+            const text = textDecoder.decode(this.bytes.subarray(this.pos, this.pos + length));
+            this.pos += length;
+            return text;
+        }
+
+        hex() {
+            const length = this.uint();
+            if (this.pos + length > this.bytes.length) {
+                throw new Error('帧不完整');
+            }
+            let text = '';
+            for (let i = 0; i < length; i++) {
+                text += this.bytes[this.pos++].toString(16).padStart(2, '0');
+            }
+            return text || null;
+        }
+
+        json() {
+            return JSON.parse(this.str());
+        }
+
+        enumValue(values) {
+            const index = this.uint();
+            return index < values.length ? values[index] : this.str();
+        }
+
+        cards() {
+            const count = this.uint();
+            const cards = [];
+            for (let i = 0; i < count; i++) {
+                const card = this.byte();
+                cards.push({ rank: RANKS[card >> 2], suit: SUITS[card & 3] });
+            }
+            return cards;
+        }
+
+        player() {
+            const player = {
+                id: this.str(),
+                position: this.optionalUint(),
+                chips: this.uint(),
+                current_bet: this.uint(),
+                borrow_count: this.uint()
+            };
+            const flags = this.uint();
+            PLAYER_FLAGS.forEach((name, bit) => {
+                player[name] = Boolean(flags & (1 << bit));
+            });
+            player.hole_cards = new Array(this.uint()).fill(HIDDEN_CARD);
+            return player;
+        }
+    }
+
+    // 公共字段，顺序与 wire.py 的 PUBLIC_FIELDS 一致（最后一位是玩家）
+    const PUBLIC_FIELDS = [
+        ['game_state', r => r.enumValue(GAME_STATES)],
+        ['current_pot', r => r.uint()],
+        ['community_cards', r => r.cards()],
+        ['current_player', r => r.optionalUint()],
+        ['betting_round', r => r.enumValue(BETTING_ROUNDS)],
+        ['min_bet', r => r.uint()],
+        ['dealer_position', r => r.optionalUint()],
+        ['auto_deal', r => r.uint() === 1],
+        ['ready_players', r => Array.from({ length: r.uint() }, () => r.str())],
+        ['deadline', r => r.time()],
+        ['action_deadline', r => r.time()],
+        ['hand_id', r => r.str() || null],
+        ['variant', r => r.str()],
+        ['config', r => r.json()],
+        ['variants', r => r.json()],
+        ['hand_results', r => r.json()],
+        ['deck_commitment', r => r.hex()],
+        ['deck_seed', r => r.hex()]
+    ];
+    const PLAYERS_BIT = PUBLIC_FIELDS.length;
+
+    const PRIVATE_FIELDS = [
+        ['my_cards', r => r.cards()],
+        ['my_preflop_equity', r => r.uint() / 10000],
+        ['my_hand_label', r => r.str()],
+        ['my_pre_action', r => r.json()],
+        ['my_legal_actions', r => r.json()],
+        ['my_sitting_out', () => true],
+        ['server_time', r => r.time()]
+    ];
+
+    // 解码一帧；previous 是上一次 decode 的返回值（增量帧在它的基础上更新）
+    function decode(buffer, previous) {
+        const reader = new Reader(buffer);
+        const type = reader.byte();
+        const version = reader.uint();
+        const crc = reader.uint();
+
+        let state;
+        if (type === FRAME_DELTA) {
+            const baseVersion = reader.uint();
+            const baseCrc = reader.uint();
+            if (!previous || previous.version !== baseVersion || previous.crc !== baseCrc) {
+                throw new Error('增量帧的基准状态不一致');
+            }
+            state = Object.assign({}, previous.state, { players: Object.assign({}, previous.state.players) });
+        } else {
+            state = { players: {} };
+        }
+
+        let mask = reader.uint();
+        PUBLIC_FIELDS.forEach(([name, read], bit) => {
+            if (mask & (1 << bit)) {
+                state[name] = read(reader);
+            }
+        });
+        if (mask & (1 << PLAYERS_BIT)) {
+            const changed = reader.uint();
+            for (let i = 0; i < changed; i++) {
+                const player = reader.player();
+                state.players[player.id] = player;
+            }
+            const removed = reader.uint();
+            for (let i = 0; i < removed; i++) {
+                delete state.players[reader.str()];
+            }
+        }
+
+        const result = Object.assign({ success: true, version: version }, state, { players: Object.assign({}, state.players) });
+        mask = reader.uint();
+        PRIVATE_FIELDS.forEach(([name, read], bit) => {
+            result[name] = (mask & (1 << bit)) ? read(reader) : (name === 'my_sitting_out' ? false : null);
+        });
+
+        return { version: version, crc: crc, state: state, result: result };
+    }
+
+    return { supported: supported, decode: decode };
+})();
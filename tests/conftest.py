@@ -0,0 +1,102 @@
+"""测试的公共设置
+
+app 的数据文件（users.json、game_data.json 等）是相对当前目录的路径，
+导入 app 之前先切换到临时目录，测试不会改动仓库里的数据文件。
+"""
+import copy
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """在临时目录里导入 app，执行启动任务并等待完成"""
+    os.chdir(tmp_path_factory.mktemp('table'))
+    import app
+    app.start_app()
+    assert app.startup.wait(30)
+    return app
+
+
+@pytest.fixture
+def engine_config(app_module):
+    """引擎测试用的配置：计时器不会在测试过程中触发"""
+    config = dict(app_module.DEFAULT_CONFIG)
+    config.update({
+        'small_blind': 10,
+        'big_blind': 20,
+        'ante': 0,
+        'game_variant': 'holdem',
+        'auto_deal': False,
+        'bot_fill_to': 0,
+        'action_timeout': 10 ** 6,
+        'time_bank_seconds': 0,
+    })
+    return config
+
+
+@pytest.fixture
+def config_file(app_module, engine_config):
+    """把引擎配置（加上改动）写进配置文件，定时任务和行动计时读的是文件；测试结束后恢复"""
+    saved = app_module.load_config()
+
+    def write(**changes):
+        config = dict(engine_config, **changes)
+        app_module.save_config(config)
+        return config
+    yield write
+    app_module.save_config(saved)
+
+@pytest.fixture
+def new_table(app_module):
+    """按筹码列表生成一张牌桌：玩家 p1、p2… 依次坐在 1、2… 号位"""
+    def build(stacks, dealer=0):
+        game_data = copy.deepcopy(app_module.DEFAULT_GAME_DATA)
+        for seat, chips in enumerate(stacks, 1):
+            game_data['players'][f'p{seat}'] = {'id': f'p{seat}', 'chips': chips, 'borrow_count': 1, 'position': seat}
+        game_data['dealer_position'] = dealer
+        return game_data
+    return build
+
+
+@pytest.fixture
+def seated_players(app_module):
+    """清空牌桌并让 player1..playerN 登录、入座到 1..N 号位，返回 (玩家客户端列表, 管理员客户端)"""
+    def login(username, password='123456'):
+        client = app_module.app.test_client()
+        assert client.post('/api/login', json={'username': username, 'password': password}).get_json()['success']
+        return client
+
+    def build(count):
+        users = app_module.load_users()
+        for n in range(1, count + 1):
+            users.setdefault(f'player{n}', {'password': '123456', 'role': 'player', 'created_at': ''})
+        app_module.save_users(users)
+        app_module.save_game_data(copy.deepcopy(app_module.DEFAULT_GAME_DATA))
+
+        clients = []
+        for n in range(1, count + 1):
+            client = login(f'player{n}')
+            client.post('/api/join_game', json={})
+            assert client.post('/api/change_position', json={'position': n}).get_json()['success']
+            clients.append(client)
+        return clients, login('admin', 'admin123')
+    return build
+
+
+@pytest.fixture
+def act(app_module, engine_config):
+    """让当前轮到的玩家行动（必须成功），再执行后面的预选行动；返回行动的玩家ID"""
+    def run(game_data, action, amount=0):
+        player_id, _ = app_module.get_player_at_position(game_data, game_data.get('current_player'))
+        assert player_id is not None, '没有轮到行动的玩家'
+        success, message = app_module.apply_player_action(game_data, engine_config, player_id, action, amount)
+        assert success, f'{player_id} {action}: {message}'
+        app_module.process_pre_actions(game_data, engine_config)
+        return player_id
+    return run
@@ -0,0 +1,86 @@
+"""暂离的玩家不发牌、行动时被跳过；自动发牌由调度器在展示结束后触发，人数够才开始"""
+import time
+
+import pytest
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def auto_deal_config(app_module, config_file):
+    """打开自动发牌、结果展示 0 秒的配置文件"""
+    yield config_file(auto_deal=True, result_display_seconds=0)
+    app_module.scheduler.cancel('auto_deal')
+
+
+def test_sitting_out_player_is_skipped(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000, 1000], dealer=1)
+    game_data['players']['p2']['sitting_out'] = True
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert not game_data['players']['p2'].get('hole_cards')
+    assert game_data['current_pot'] == 30
+
+    while game_data['game_state'] == 'playing':
+        player_id, player = app_module.get_player_at_position(game_data, game_data['current_player'])
+        assert player_id != 'p2'
+        legal = app_module.get_legal_actions(game_data, player, engine_config)
+        act(game_data, 'check' if legal['can_check'] else 'call')
+    assert game_data['players']['p2']['chips'] == 1000
+    assert 'p2' not in game_data['hand_results']['total_invested']
+
+    # 只剩一人能发牌时不开始
+    table = new_table([1000, 1000, 1000])
+    for player_id in ('p1', 'p2'):
+        table['players'][player_id]['sitting_out'] = True
+    assert not app_module.start_game_internal(table, engine_config)
+    assert table['game_state'] == 'waiting'
+
+
+def play_to_the_end(app_module, new_table, act, config, **flags):
+    """三人桌枪口位和小盲弃牌，结束时 end_hand 按配置文件安排自动发牌
+
+    flags 是在这手牌里设置的玩家状态（暂离、离线），从下一手开始生效
+    """
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, config)
+    for player_id, flag in flags.items():
+        game_data['players'][player_id][flag] = True
+    act(game_data, 'fold')
+    if game_data['game_state'] == 'playing':
+        act(game_data, 'fold')
+    assert game_data['game_state'] == 'hand_ended'
+    assert wait_for(lambda: app_module.load_game_data()['game_state'] != 'hand_ended')
+    return game_data['hand_id'], app_module.load_game_data()
+
+
+def test_scheduler_deals_the_next_hand(app_module, new_table, act, auto_deal_config):
+    hand_id, game_data = play_to_the_end(app_module, new_table, act, auto_deal_config)
+    assert game_data['game_state'] == 'playing'
+    assert game_data['hand_id'] != hand_id
+    assert all(p.get('hole_cards') for p in game_data['players'].values())
+
+
+def test_scheduler_waits_when_too_few_players_are_active(app_module, new_table, act, auto_deal_config):
+    # 离线的小盲轮到时自动弃牌
+    hand_id, game_data = play_to_the_end(app_module, new_table, act, auto_deal_config,
+                                         p1='sitting_out', p2='away')
+    assert game_data['game_state'] == 'waiting'
+    assert game_data['hand_id'] == hand_id
+    assert not any(p.get('hole_cards') for p in game_data['players'].values())
+
+    # 暂离的玩家回来后，人数够了直接开始
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session.update({'username': 'p1', 'player_id': 'p1', 'role': 'player'})
+    assert client.post('/api/sit_in').get_json()['success']
+    game_data = app_module.load_game_data()
+    assert game_data['game_state'] == 'playing'
+    assert game_data['players']['p1'].get('hole_cards')
+    assert not game_data['players']['p2'].get('hole_cards')
@@ -0,0 +1,71 @@
+"""下注轮结束判断的回归用例（之前几轮全押的玩家不再行动，不能让下注轮卡住）"""
+
+
+def table_chips(game_data):
+    return sum(p.get('chips', 0) for p in game_data['players'].values()) + game_data.get('current_pot', 0)
+
+
+def settle(app_module, game_data, total_chips):
+    """这手牌已经打完（摊牌展示中的先结算），检查筹码守恒，返回结算结果"""
+    assert game_data['game_state'] in ('showdown', 'hand_ended')
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+    assert game_data['game_state'] == 'hand_ended'
+    assert table_chips(game_data) == total_chips
+    return game_data['hand_results']
+
+
+def all_in_preflop(app_module, engine_config, new_table, act):
+    """p1 短码翻牌前全押，p2、p3 跟注进入翻牌圈"""
+    game_data = new_table([100, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert act(game_data, 'allin') == 'p1'
+    assert act(game_data, 'call') == 'p2'
+    assert act(game_data, 'call') == 'p3'
+    assert game_data['betting_round'] == 'flop'
+    return game_data
+
+
+def test_earlier_all_in_does_not_block_later_rounds(app_module, engine_config, new_table, act):
+    game_data = all_in_preflop(app_module, engine_config, new_table, act)
+    for street in ('turn', 'river'):
+        assert act(game_data, 'check') == 'p2'
+        assert act(game_data, 'check') == 'p3'
+        assert game_data['betting_round'] == street
+    act(game_data, 'check')
+    act(game_data, 'check')
+    results = settle(app_module, game_data, 2100)
+    assert results['type'] == 'showdown'
+    assert set(results['all_hands']) == {'p1', 'p2', 'p3'}
+
+
+def test_lone_actor_against_all_in_runs_out_the_board(app_module, engine_config, new_table, act):
+    game_data = all_in_preflop(app_module, engine_config, new_table, act)
+    act(game_data, 'raise', 100)
+    assert act(game_data, 'fold') == 'p3'
+    # 只剩 p2 能下注，对手已经全押，直接发完公共牌
+    results = settle(app_module, game_data, 2100)
+    assert len(results['community_cards']) == 5
+    assert set(results['all_hands']) == {'p1', 'p2'}
+
+
+def test_away_player_against_all_in_terminates(app_module, engine_config, new_table, act):
+    game_data = all_in_preflop(app_module, engine_config, new_table, act)
+    game_data['players']['p3']['away'] = True
+    # p2 下注后轮到离线的 p3，预选行动自动弃牌，p2 单独面对全押的 p1
+    act(game_data, 'raise', 100)
+    results = settle(app_module, game_data, 2100)
+    assert len(results['community_cards']) == 5
+    assert set(results['all_hands']) == {'p1', 'p2'}
+
+
+def test_lone_away_player_against_all_in_does_not_loop(app_module, engine_config, new_table, act):
+    game_data = new_table([100, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    act(game_data, 'allin')
+    act(game_data, 'call')
+    game_data['players']['p2']['away'] = True
+    # p3 弃牌后只剩离线的 p2 面对全押：以前每一轮都会给 p2 自动过牌，死循环
+    assert act(game_data, 'fold') == 'p3'
+    results = settle(app_module, game_data, 2100)
+    assert len(results['community_cards']) == 5
@@ -0,0 +1,76 @@
+"""机器人：胜率估算合理，决策总是引擎接受的合法行动"""
+import random
+
+import pytest
+
+import bots
+from hand_evaluator import VARIANTS, create_variant_deck, int_to_card
+
+
+def cards(*labels):
+    return [{'rank': label[:-1], 'suit': label[-1]} for label in labels]
+
+
+def test_preflop_equity_comes_from_the_table():
+    aces = bots.estimate_equity(cards('A♠', 'A♥'), [], 'holdem', 1)
+    assert 0.82 < aces < 0.87
+    assert bots.estimate_equity(cards('7♦', '2♣'), [], 'holdem', 1) < 0.4
+
+
+def test_postflop_equity_follows_hand_strength():
+    board = cards('A♦', 'A♣', 'K♠', '7♥', '2♣')
+    quads = bots.estimate_equity(cards('A♠', 'A♥'), board, 'holdem', 3, seed=1)
+    assert quads > 0.99
+    nothing = bots.estimate_equity(cards('3♠', '4♥'), cards('A♦', 'K♣', 'Q♠'), 'holdem', 3, seed=1)
+    assert nothing < 0.15
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_equity_estimate_for_every_variant(variant):
+    deck = [int_to_card(card) for card in create_variant_deck(variant)]
+    hole = deck[:VARIANTS[variant]['hole_cards']]
+    equity = bots.estimate_equity(hole, deck[-3:], variant, 2, seed=7)
+    assert 0 <= equity <= 1
+    assert equity == bots.estimate_equity(hole, deck[-3:], variant, 2, seed=7)
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_bots_only_make_legal_moves(app_module, engine_config, new_table, variant):
+    engine_config['game_variant'] = variant
+    rng = random.Random(variant)
+    for hand in range(8):
+        stacks = [rng.choice([30, 200, 1000, 5000]) for _ in range(rng.randint(2, 6))]
+        game_data = new_table(stacks, dealer=1)
+        assert app_module.start_game_internal(game_data, engine_config)
+        for _ in range(200):
+            if game_data['game_state'] != 'playing':
+                break
+            player_id, player = app_module.get_player_at_position(game_data, game_data['current_player'])
+            legal = app_module.get_legal_actions(game_data, player, engine_config)
+            opponents = sum(1 for pid, p in game_data['players'].items()
+                            if pid != player_id and p.get('hole_cards') and not p.get('folded'))
+            action, amount = bots.decide(player['hole_cards'], game_data['community_cards'], variant, opponents,
+                                         game_data['current_pot'], legal, engine_config['big_blind'], rng)
+            success, message = app_module.apply_player_action(game_data, engine_config, player_id, action, amount)
+            assert success, f'{variant} 第{hand + 1}手 {player_id} {action} {amount}: {message}'
+        assert game_data['game_state'] in ('showdown', 'hand_ended')
+        if game_data['game_state'] == 'showdown':
+            app_module.finish_showdown(game_data)
+        assert sum(p['chips'] for p in game_data['players'].values()) == sum(stacks)
+
+
+def test_decisions_are_timed():
+    before = bots.stats.to_dict()['decisions']
+    legal = {'call_amount': 20, 'can_raise': True, 'max_bet': 20, 'min_raise': 40, 'max_raise': 1000}
+    action, amount = bots.decide(cards('A♠', 'A♥'), [], 'holdem', 1, 30, legal, 20, random.Random(1))
+    assert action in ('call', 'raise')
+    if action == 'raise':
+        assert 40 <= amount <= 1000
+    stats = bots.stats.to_dict()
+    assert stats['decisions'] == before + 1
+    assert stats['max_ms'] >= 0
+
+
+def test_bot_ids_avoid_taken_names():
+    assert bots.new_bot_id(set()) == 'bot1'
+    assert bots.new_bot_id({'bot1', 'bot2', 'bot4'}) == 'bot3'
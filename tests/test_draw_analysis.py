@@ -0,0 +1,117 @@
+"""听牌分析：管理员视角的 outs、玩家视角不泄露对手底牌，8 人桌一次分析在 1 毫秒以内"""
+import copy
+import time
+
+import pytest
+
+from draw_analysis import analyze_draws, analyze_own_draws
+from hand_evaluator import create_variant_deck, int_to_card
+
+
+def cards(*labels):
+    return [{'rank': label[:-1], 'suit': label[-1]} for label in labels]
+
+
+def flop_table(app_module, hole_cards):
+    """翻牌圈的牌桌，牌堆是整副牌去掉已发的牌"""
+    game_data = copy.deepcopy(app_module.DEFAULT_GAME_DATA)
+    dealt = []
+    for seat, (pid, hole) in enumerate(hole_cards.items(), 1):
+        game_data['players'][pid] = {'id': pid, 'chips': 1000, 'position': seat, 'hole_cards': hole, 'folded': False}
+        dealt += hole
+    game_data['community_cards'] = cards('9♠', '8♠', '2♦')
+    dealt += game_data['community_cards']
+    game_data['deck'] = [card for card in map(int_to_card, create_variant_deck('holdem')) if card not in dealt]
+    game_data['game_state'] = 'playing'
+    game_data['betting_round'] = 'flop'
+    return game_data
+
+
+def test_admin_view_counts_outs_for_the_trailing_player(app_module):
+    game_data = flop_table(app_module, {'p1': cards('A♠', 'K♠'), 'p2': cards('9♥', '9♦')})
+    analysis = analyze_draws(game_data)
+    assert analysis['street'] == 'flop'
+    assert analysis['unseen_count'] == 45
+    drawing, leading = analysis['players']
+    assert leading['is_leading'] and not drawing['is_leading']
+    assert 'flush_draw' in drawing['draws']
+    # 同花听牌对三条：还有 9 张黑桃，其中 2♠ 会让对手成葫芦
+    assert all(card['suit'] == '♠' for card in drawing['outs'])
+    assert {'rank': '2', 'suit': '♠'} not in drawing['outs']
+    assert drawing['out_count'] == 8
+    assert leading['outs'] == []
+
+
+def test_river_and_preflop_are_not_analyzed(app_module):
+    game_data = flop_table(app_module, {'p1': cards('A♠', 'K♠'), 'p2': cards('9♥', '9♦')})
+    game_data['community_cards'] = []
+    assert analyze_draws(game_data) is None
+    assert analyze_own_draws(cards('A♠', 'K♠'), cards('9♠', '8♠', '2♦', '3♣', '4♣'), 1) is None
+
+
+def test_own_view_does_not_depend_on_opponent_cards():
+    hole, board = cards('A♠', 'K♠'), cards('9♠', '8♠', '2♦')
+    first = analyze_own_draws(hole, board, 1)['players'][0]
+    second = analyze_own_draws(hole, board, 1)['players'][0]
+    assert set(first) == {'current_hand', 'current_rank', 'draws', 'improve_probability', 'improvements',
+                          'improve_by_river', 'opponents', 'hand_strength', 'ahead_probability'}
+    assert first == second
+    assert first['draws'] == ['flush_draw']
+    # 只去掉自己的底牌和公共牌：47 张未见牌
+    assert first['improve_probability'] == pytest.approx(sum(first['improvements'].values()) / 47)
+
+
+def test_player_endpoint_only_shows_own_analysis(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session.update({'username': 'p1', 'player_id': 'p1', 'role': 'player'})
+
+    results = []
+    for opponent in (cards('9♥', '9♦'), cards('3♥', '4♦')):
+        app_module.save_game_data(flop_table(app_module, {'p1': cards('A♠', 'K♠'), 'p2': opponent}))
+        data = client.get('/api/draw_analysis').get_json()
+        assert data['success'], data
+        players = data['analysis']['players']
+        assert len(players) == 1 and players[0]['player_id'] == 'p1'
+        assert 'outs' not in players[0] and 'is_leading' not in players[0]
+        results.append(data['analysis'])
+    assert results[0] == results[1]
+
+    with client.session_transaction() as session:
+        session.update({'username': 'p9', 'player_id': 'p9'})
+    assert client.get('/api/draw_analysis').get_json()['success'] is False
+
+
+def test_hand_strength_is_enumerated_over_opponent_holdings():
+    # 四条 A：任何两张对手底牌都赢不了
+    quads = analyze_own_draws(cards('A♠', 'A♥'), cards('A♦', 'A♣', 'K♠'), 3)['players'][0]
+    assert quads['hand_strength'] == 1.0 and quads['ahead_probability'] == 1.0
+
+    # 高牌 7：只赢同样没有对子、比 7 更小的高牌
+    weak = analyze_own_draws(cards('7♦', '3♣'), cards('K♠', 'Q♥', '9♦'), 2)['players'][0]
+    assert 0 < weak['hand_strength'] < 0.2
+    assert weak['ahead_probability'] == pytest.approx(weak['hand_strength'] ** 2)
+
+    # 每次结果相同
+    assert weak == analyze_own_draws(cards('7♦', '3♣'), cards('K♠', 'Q♥', '9♦'), 2)['players'][0]
+
+
+def best_ms(fn, *args, runs=30):
+    """多次运行取最快的一次（和 timeit 一样），不受其他测试进程占用 CPU 的干扰"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def test_eight_player_analysis_fits_in_a_millisecond(app_module):
+    deck = [int_to_card(card) for card in create_variant_deck('holdem')]
+    hole_cards = {f'p{n}': deck[2 * n:2 * n + 2] for n in range(8)}
+    game_data = flop_table(app_module, hole_cards)
+    game_data['community_cards'] = deck[-3:]
+    game_data['deck'] = deck[16:-3]
+
+    assert best_ms(analyze_draws, game_data) < 1
+    assert best_ms(analyze_own_draws, hole_cards['p0'], game_data['community_cards'], 7) < 1
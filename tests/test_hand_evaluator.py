@@ -0,0 +1,183 @@
+"""批量牌力评估：和逐手判断牌型的参考实现比较大小顺序"""
+import random
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from hand_evaluator import evaluate_batch, evaluate_card_hands, evaluate_omaha_batch, int_to_card, score_category
+
+
+def reference_rank(cards):
+    """5 张牌的参考牌力 (牌型, 比较用的点数)，直接按规则判断"""
+    ranks = sorted((card >> 2 for card in cards), reverse=True)
+    counts = Counter(ranks)
+    # 先按张数再按点数排列，例如葫芦是 三条的点数, 对子的点数
+    ordered = [rank for rank, _ in sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True)]
+    shape = sorted(counts.values(), reverse=True)
+    flush = len({card & 3 for card in cards}) == 1
+    straight = None
+    if len(counts) == 5:
+        if ranks[0] - ranks[4] == 4:
+            straight = ranks[0]
+        elif ranks == [12, 3, 2, 1, 0]:
+            straight = 3  # A2345，A 当 1 用
+    if straight is not None and flush:
+        return 8, [straight]
+    if shape == [4, 1]:
+        return 7, ordered
+    if shape == [3, 2]:
+        return 6, ordered
+    if flush:
+        return 5, ranks
+    if straight is not None:
+        return 4, [straight]
+    if shape == [3, 1, 1]:
+        return 3, ordered
+    if shape == [2, 2, 1]:
+        return 2, ordered
+    if shape == [2, 1, 1, 1]:
+        return 1, ordered
+    return 0, ranks
+
+
+def best_reference_rank(cards):
+    return max(reference_rank(combo) for combo in combinations(cards, 5))
+
+
+def assert_same_order(hands, scores, reference):
+    """牌力的大小顺序（包括相等）和参考实现一致"""
+    keys = [reference(hand) for hand in hands]
+    order = sorted(range(len(hands)), key=lambda i: keys[i])
+    for a, b in zip(order, order[1:]):
+        if keys[a] == keys[b]:
+            assert scores[a] == scores[b], (hands[a], hands[b])
+        else:
+            assert scores[a] < scores[b], (hands[a], hands[b])
+
+
+def random_hands(rng, count, size):
+    return [rng.sample(range(52), size) for _ in range(count)]
+
+
+def test_five_card_order_matches_reference():
+    hands = random_hands(random.Random(1), 3000, 5)
+    scores = evaluate_batch(hands).tolist()
+    assert_same_order(hands, scores, reference_rank)
+
+
+def test_seven_card_order_matches_best_five():
+    hands = random_hands(random.Random(2), 600, 7)
+    scores = evaluate_batch(hands).tolist()
+    assert_same_order(hands, scores, best_reference_rank)
+
+
+def test_every_category_in_order():
+    def card(rank, suit):
+        return rank * 4 + suit
+
+    ladder = [
+        [card(12, 0), card(10, 1), card(8, 2), card(6, 3), card(0, 0)],  # 高牌
+        [card(0, 0), card(0, 1), card(12, 2), card(11, 3), card(10, 0)],  # 一对
+        [card(0, 0), card(0, 1), card(1, 2), card(1, 3), card(12, 0)],  # 两对
+        [card(0, 0), card(0, 1), card(0, 2), card(12, 3), card(11, 0)],  # 三条
+        [card(12, 0), card(0, 1), card(1, 2), card(2, 3), card(3, 0)],  # A2345
+        [card(0, 0), card(1, 1), card(2, 2), card(3, 3), card(4, 0)],  # 23456
+        [card(0, 1), card(2, 1), card(4, 1), card(6, 1), card(8, 1)],  # 同花
+        [card(0, 0), card(0, 1), card(0, 2), card(1, 3), card(1, 0)],  # 葫芦
+        [card(0, 0), card(0, 1), card(0, 2), card(0, 3), card(1, 0)],  # 四条
+        [card(12, 2), card(0, 2), card(1, 2), card(2, 2), card(3, 2)],  # 同花 A2345
+        [card(12, 3), card(11, 3), card(10, 3), card(9, 3), card(8, 3)],  # 皇家同花顺
+    ]
+    scores = evaluate_batch(ladder).tolist()
+    assert scores == sorted(scores)
+    assert len(set(scores)) == len(scores)
+
+
+def test_short_deck_flush_beats_full_house():
+    flush = [4 * 4 + 1, 6 * 4 + 1, 8 * 4 + 1, 10 * 4 + 1, 12 * 4 + 1]
+    full_house = [11 * 4, 11 * 4 + 1, 11 * 4 + 2, 12 * 4, 12 * 4 + 2]
+    holdem = evaluate_batch([flush, full_house]).tolist()
+    short = evaluate_batch([flush, full_house], variant='shortdeck').tolist()
+    assert holdem[0] < holdem[1]
+    assert short[0] > short[1]
+
+
+def test_chunked_and_parallel_results_match():
+    hands = np.array(random_hands(random.Random(3), 500, 7))
+    expected = evaluate_batch(hands)
+    assert (evaluate_batch(hands, chunk_size=64) == expected).all()
+
+
+@pytest.mark.parametrize('hands', [
+    [[48, 48, 48, 48, 44]],  # 四张同样的黑桃A
+    [[0, 4, 8, 12, 16, 20, 0]],
+    [[0, 4, 8, 12, 16], [1, 5, 9, 9, 17]],  # 只有第二手重复
+])
+def test_duplicate_cards_rejected(hands):
+    with pytest.raises(ValueError):
+        evaluate_batch(hands)
+
+
+@pytest.mark.parametrize('hands', [[[0, 4, 8, 12, 52]], [[0, 4, 8, 12]], [[-1, 4, 8, 12, 16]]])
+def test_invalid_hands_rejected(hands):
+    with pytest.raises(ValueError):
+        evaluate_batch(hands)
+
+
+def test_card_dicts_and_integers_give_same_rank():
+    hand = [51, 47, 43, 39, 35, 2, 6]
+    assert evaluate_card_hands([hand]) == evaluate_card_hands([[int_to_card(card) for card in hand]])
+
+
+def omaha_reference_rank(hand):
+    """奥马哈参考牌力：恰好两张底牌加三张公共牌"""
+    hole, board = hand
+    return max(reference_rank(two + three) for two in combinations(hole, 2) for three in combinations(board, 3))
+
+
+@pytest.mark.parametrize('variant, hole_count', [('plo4', 4), ('plo5', 5)])
+def test_omaha_order_matches_two_plus_three(variant, hole_count):
+    rng = random.Random(hole_count)
+    for _ in range(20):
+        cards = rng.sample(range(52), 5 + 6 * hole_count)
+        board = cards[:5]
+        holes = [cards[5 + n * hole_count:5 + (n + 1) * hole_count] for n in range(6)]
+        scores = evaluate_omaha_batch(holes, board, variant).tolist()
+        assert_same_order([(hole, board) for hole in holes], scores, omaha_reference_rank)
+
+
+def test_omaha_uses_exactly_two_hole_cards():
+    def card(rank, suit):
+        return rank * 4 + suit
+
+    def categories(holes, board):
+        return [score_category(score, 'plo4') for score in evaluate_omaha_batch(holes, board).tolist()]
+
+    # 公共牌四张红桃：只有一张红桃底牌时不成同花（德州会成同花），两张才成
+    board = [card(0, 2), card(3, 2), card(6, 2), card(9, 2), card(11, 0)]
+    one_heart = [card(12, 2), card(1, 0), card(2, 1), card(7, 3)]
+    two_hearts = [card(1, 2), card(2, 2), card(4, 0), card(5, 1)]
+    assert categories([one_heart, two_hearts], board) == [0, 5]
+    assert score_category(evaluate_batch([one_heart[:2] + board]).tolist()[0]) == 5
+
+    # 公共牌四条 A：最多用三张公共牌，只成三条
+    quads_board = [card(12, 0), card(12, 1), card(12, 2), card(12, 3), card(11, 0)]
+    low = [card(0, 0), card(1, 1), card(2, 2), card(3, 3)]
+    assert categories([low], quads_board) == [3]
+
+    with pytest.raises(ValueError):
+        evaluate_omaha_batch([low], quads_board[:2])
+
+
+def test_evaluate_hands_api_rejects_duplicates(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = session['player_id'] = 'admin'
+    response = client.post('/api/evaluate_hands', json={'hands': [[48, 48, 48, 48, 44]]})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+    response = client.post('/api/evaluate_hands', json={'hands': [[48, 49, 50, 51, 44]]})
+    assert response.get_json()['success'] is True
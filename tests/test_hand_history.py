@@ -0,0 +1,165 @@
+"""手牌历史：只追加的 JSONL 日志、按条件查询，以及索引快照缺失或过期时重建索引"""
+import json
+import os
+
+import pytest
+
+import hand_history
+from hand_history import HandHistory
+
+
+def record(n, players, pot):
+    return {'hand_id': f'h{n}', 'ended_at': 1000.0 + n, 'pot': pot, 'players': players}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'hand_history.jsonl')
+
+
+@pytest.fixture
+def history(path):
+    """10 手牌：p1 每手都在，p2 打偶数手，p3 打奇数手；底池 100、200 … 1000"""
+    history = HandHistory(path)
+    for n in range(10):
+        history.append(record(n, ['p1', 'p2' if n % 2 == 0 else 'p3'], 100 * (n + 1)))
+    return history
+
+
+def hand_ids(records):
+    return [r['hand_id'] for r in records]
+
+
+def test_append_writes_one_line_per_hand(path, history):
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+    assert len(lines) == len(history) == 10
+    assert [json.loads(line)['hand_id'] for line in lines] == [f'h{n}' for n in range(10)]
+
+    # 同一手只记一次
+    assert history.append(record(3, ['p1'], 1)) == 3
+    assert os.path.getsize(path) == sum(len(line.encode('utf-8')) for line in lines)
+    assert history.get('h3')['pot'] == 400 and history.get('h3')['seq'] == 3
+    assert history.get('missing') is None
+
+
+def test_query_filters(history):
+    records, cursor = history.query()
+    assert hand_ids(records) == [f'h{n}' for n in range(9, -1, -1)] and cursor is None
+
+    assert hand_ids(history.query(player_id='p3')[0]) == ['h9', 'h7', 'h5', 'h3', 'h1']
+    assert hand_ids(history.query(since=1003, until=1005)[0]) == ['h5', 'h4', 'h3']
+    assert hand_ids(history.query(min_pot=300, max_pot=500)[0]) == ['h4', 'h3', 'h2']
+    assert hand_ids(history.query(player_id='p2', min_pot=500, since=1000, until=1007)[0]) == ['h6', 'h4']
+    assert history.query(player_id='nobody')[0] == []
+
+    # 分页：游标之后只返回更早的手牌
+    page, cursor = history.query(player_id='p1', limit=4)
+    assert hand_ids(page) == ['h9', 'h8', 'h7', 'h6']
+    page, cursor = history.query(player_id='p1', limit=4, cursor=cursor)
+    assert hand_ids(page) == ['h5', 'h4', 'h3', 'h2']
+    page, cursor = history.query(player_id='p1', limit=4, cursor=cursor)
+    assert hand_ids(page) == ['h1', 'h0'] and cursor is None
+    assert len(list(history.iter_query(player_id='p2'))) == 5
+
+
+def same_answers(first, second):
+    for filters in ({}, {'player_id': 'p2'}, {'min_pot': 350}, {'since': 1004, 'until': 1012}):
+        assert first.query(**filters) == second.query(**filters)
+
+
+def test_missing_snapshot_rebuilds_from_the_log(path, history):
+    assert not os.path.exists(history.index_path)
+    reloaded = HandHistory(path)
+    assert len(reloaded) == 10
+    same_answers(history, reloaded)
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """记下加载时从日志里解析并建索引的手牌"""
+    hand_ids = []
+    index = HandHistory._index
+
+    def spy(self, rec, offset, keep_sorted=False):
+        hand_ids.append(rec['hand_id'])
+        return index(self, rec, offset, keep_sorted)
+    monkeypatch.setattr(HandHistory, '_index', spy)
+    return hand_ids
+
+
+def test_stale_snapshot_scans_only_the_tail(path, history, parsed):
+    history.save_index()
+    for n in range(10, 13):
+        history.append(record(n, ['p2'], 50))
+    parsed.clear()
+
+    # 快照之前的记录不再解析
+    reloaded = HandHistory(path)
+    assert parsed == ['h10', 'h11', 'h12']
+    assert len(reloaded) == 13
+    same_answers(history, reloaded)
+    assert hand_ids(reloaded.query(max_pot=50)[0]) == ['h12', 'h11', 'h10']
+
+
+def test_unusable_snapshot_is_ignored(path, history, parsed, monkeypatch):
+    # 损坏的快照：重新解析整个日志
+    with open(history.index_path, 'wb') as f:
+        f.write(b'not a pickle')
+    parsed.clear()
+    same_answers(history, HandHistory(path))
+    assert len(parsed) == 10
+
+    # 旧版本的快照
+    history.save_index()
+    monkeypatch.setattr(hand_history, 'INDEX_VERSION', hand_history.INDEX_VERSION + 1)
+    parsed.clear()
+    same_answers(history, HandHistory(path))
+    assert len(parsed) == 10
+
+    # 日志被换成另一份（快照最后一手对不上）
+    history.save_index()
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(10):
+            f.write(json.dumps(record(n + 100, ['p9'], 5)) + '\n')
+    reloaded = HandHistory(path)
+    assert hand_ids(reloaded.query()[0]) == [f'h{n}' for n in range(109, 99, -1)]
+    assert reloaded.query(player_id='p1')[0] == []
+
+
+def test_half_written_line_is_truncated(path, history):
+    size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(b'{"hand_id": "h10", "ended')
+    reloaded = HandHistory(path)
+    assert len(reloaded) == 10 and os.path.getsize(path) == size
+
+    # 之后的追加从完整的行后面开始
+    reloaded.append(record(10, ['p1'], 5))
+    assert HandHistory(path).get('h10')['pot'] == 5
+
+
+def test_snapshot_is_saved_every_n_hands(path, monkeypatch):
+    monkeypatch.setattr(hand_history, 'INDEX_SNAPSHOT_EVERY', 4)
+    history = HandHistory(path)
+    for n in range(3):
+        history.append(record(n, ['p1'], 1))
+    assert not os.path.exists(history.index_path)
+    history.append(record(3, ['p1'], 1))
+    assert os.path.exists(history.index_path)
+
+
+def test_hand_recorded_before_startup_loads_the_history(app_module, monkeypatch, path):
+    # 启动任务还没加载手牌历史时就有一手牌结束（例如定时任务触发的超时）
+    monkeypatch.setattr(app_module, 'HAND_HISTORY_FILE', path)
+    monkeypatch.setattr(app_module, 'hand_history', None)
+    game_data = {'hand_id': 'early', 'players': {}}
+    app_module.record_hand_history(game_data, {'total_invested': {'p1': 20, 'p2': 20}, 'winners': []})
+    app_module.io_pool.wait_idle(app_module.TABLE_JOB_KEY)
+
+    # 之后执行的启动任务沿用同一份存储，不会把刚写入的那手丢掉
+    history = app_module.hand_history
+    app_module.restore_hand_history()
+    assert app_module.hand_history is history
+    assert history.get('early')['pot'] == 40
+    assert HandHistory(path).get('early')['players'] == ['p1', 'p2']
@@ -0,0 +1,102 @@
+"""结算结果缓存：同一手牌只计算一次，新的一手重新计算，最多保留最近 64 手"""
+import copy
+from collections import OrderedDict
+
+import pytest
+
+
+def cards(*labels):
+    return [{'rank': label[:-1], 'suit': label[-1]} for label in labels]
+
+
+@pytest.fixture
+def calculations(app_module, monkeypatch):
+    """清空缓存，并记录真正计算结算结果的次数"""
+    monkeypatch.setattr(app_module, 'hand_results_cache', OrderedDict())
+    calls = []
+    calculate = app_module.calculate_hand_results
+
+    def counting(game_data, active_players, total_invested):
+        calls.append(game_data.get('hand_id'))
+        return calculate(game_data, active_players, total_invested)
+
+    monkeypatch.setattr(app_module, 'calculate_hand_results', counting)
+    return calls
+
+
+@pytest.fixture
+def showdown(new_table):
+    """两人各投入 100 后摊牌的牌桌"""
+    def build(hand_id, first=cards('A♠', 'A♥'), second=cards('K♠', 'K♥'), board=cards('2♦', '7♣', '9♥', 'J♠', '3♦')):
+        game_data = new_table([900, 900])
+        for player, hole in zip(game_data['players'].values(), (first, second)):
+            player.update({'hole_cards': hole, 'total_invested_this_hand': 100})
+        game_data.update({'hand_id': hand_id, 'game_state': 'showdown', 'current_pot': 200,
+                          'community_cards': board, 'betting_round': 'river'})
+        return game_data
+    return build
+
+
+def winners(game_data):
+    return [(w['player_id'], w['pot_won']) for w in game_data['hand_results']['winners']]
+
+
+def test_repeated_settlement_hits_the_cache(app_module, calculations, showdown):
+    game_data = showdown('hand-1')
+    polled = copy.deepcopy(game_data)
+    assert app_module.settle_hand_results(game_data)
+    assert winners(game_data) == [('p1', 200)]
+    # 已经有结果时不需要再保存
+    assert not app_module.settle_hand_results(game_data)
+
+    # 摊牌期间轮询读到的是还没写入结果的旧数据，也直接用缓存
+    assert app_module.settle_hand_results(polled)
+    assert polled['hand_results'] is game_data['hand_results']
+    assert calculations == ['hand-1']
+
+    app_module.save_game_data(polled)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session.update({'username': 'p1', 'player_id': 'p1', 'role': 'player'})
+    assert client.get('/api/get_hand_results').get_json()['success']
+    assert calculations == ['hand-1']
+
+
+def test_new_hand_with_other_cards_is_recomputed(app_module, calculations, showdown):
+    first = showdown('hand-1')
+    app_module.settle_hand_results(first)
+
+    second = showdown('hand-2', board=cards('K♦', '7♣', '9♥', 'J♠', '3♦'))
+    app_module.settle_hand_results(second)
+    assert winners(second) == [('p2', 200)]
+
+    third = showdown('hand-3', first=cards('Q♠', 'Q♥'))
+    app_module.settle_hand_results(third)
+    assert winners(third) == [('p2', 200)]
+    assert calculations == ['hand-1', 'hand-2', 'hand-3']
+    assert winners(first) == [('p1', 200)]
+
+    # 没有 hand_id 的牌局不进缓存
+    app_module.settle_hand_results(showdown(None))
+    app_module.settle_hand_results(showdown(None))
+    assert calculations[3:] == [None, None]
+    assert list(app_module.hand_results_cache) == ['hand-1', 'hand-2', 'hand-3']
+
+
+def test_least_recently_used_hand_is_evicted_after_64(app_module, calculations, showdown):
+    assert app_module.HAND_RESULTS_CACHE_SIZE == 64
+    for n in range(64):
+        app_module.settle_hand_results(showdown(f'hand-{n}'))
+    assert len(app_module.hand_results_cache) == 64
+
+    # 再读一次 hand-0，最久没用的变成 hand-1
+    app_module.settle_hand_results(showdown('hand-0'))
+    app_module.settle_hand_results(showdown('hand-64'))
+    assert len(app_module.hand_results_cache) == 64
+    assert 'hand-0' in app_module.hand_results_cache
+    assert 'hand-1' not in app_module.hand_results_cache
+    assert len(calculations) == 65
+
+    app_module.settle_hand_results(showdown('hand-1'))
+    assert calculations[-1] == 'hand-1'
+    assert 'hand-2' not in app_module.hand_results_cache
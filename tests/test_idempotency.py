@@ -0,0 +1,82 @@
+"""幂等请求和牌桌版本：重试不会重复执行，基于旧状态的操作被拒绝"""
+
+
+def chips_and_borrows(app_module, player_id):
+    player = app_module.load_game_data()['players'][player_id]
+    return player['chips'], player['borrow_count']
+
+
+def test_replayed_add_chips_runs_once(app_module, seated_players):
+    clients, _ = seated_players(2)
+    chips, borrows = chips_and_borrows(app_module, 'player1')
+
+    first = clients[0].post('/api/add_chips', headers={'X-Request-Id': 'add-1'})
+    again = clients[0].post('/api/add_chips', headers={'X-Request-Id': 'add-1'})
+    assert first.get_json()['success']
+    assert again.headers.get('X-Idempotent-Replay') == '1'
+    assert again.get_json() == first.get_json()
+    assert chips_and_borrows(app_module, 'player1') == (chips + 1000, borrows + 1)
+
+    # 请求ID也可以放在 JSON 里；新的ID会再执行一次
+    for _ in range(2):
+        clients[0].post('/api/add_chips', json={'client_request_id': 'add-2'})
+    assert chips_and_borrows(app_module, 'player1') == (chips + 2000, borrows + 2)
+
+    # 每个会话各自去重，别人用同样的ID不受影响
+    other = chips_and_borrows(app_module, 'player2')
+    clients[1].post('/api/add_chips', headers={'X-Request-Id': 'add-1'})
+    assert chips_and_borrows(app_module, 'player2') == (other[0] + 1000, other[1] + 1)
+
+
+def test_stale_table_version_is_rejected(app_module, seated_players):
+    clients, _ = seated_players(2)
+    version = clients[0].get('/api/get_game_state').get_json()['version']
+    chips = chips_and_borrows(app_module, 'player1')
+
+    # 别人的操作改变了牌桌，旧版本上的补码和准备都不执行
+    assert clients[1].post('/api/player_ready', json={'table_version': version}).get_json()['success']
+    for endpoint in ('/api/add_chips', '/api/player_ready', '/api/player_unready'):
+        data = clients[0].post(endpoint, json={'table_version': version}).get_json()
+        assert data['success'] is False and data['stale'] is True, endpoint
+        assert data['version'] == version + 1
+    assert chips_and_borrows(app_module, 'player1') == chips
+    assert app_module.load_game_data()['ready_players'] == ['player2']
+
+    # 版本号也可以放在请求头里；用最新版本就能执行
+    data = clients[0].post('/api/add_chips', headers={'X-Table-Version': str(version)}).get_json()
+    assert data['stale'] is True
+    assert clients[0].post('/api/add_chips', json={'table_version': version + 1}).get_json()['success']
+    assert chips_and_borrows(app_module, 'player1')[0] == chips[0] + 1000
+
+
+def test_stale_player_action_is_rejected(app_module, seated_players):
+    clients, _ = seated_players(2)
+    for client in clients:
+        assert client.post('/api/player_ready').get_json()['success']
+    state = clients[0].get('/api/get_game_state').get_json()
+    assert state['game_state'] == 'playing'
+    actor = clients[0] if state['my_legal_actions'] else clients[1]
+
+    data = actor.post('/api/player_action', json={'action': 'call', 'table_version': state['version'] - 1}).get_json()
+    assert data['stale'] is True
+    data = actor.post('/api/player_action', json={'action': 'call', 'table_version': state['version']}).get_json()
+    assert data['success'], data
+
+
+def test_dedup_cache_stays_bounded(app_module, seated_players):
+    clients, _ = seated_players(1)
+    size = app_module.REQUEST_DEDUP_CACHE_SIZE
+    for n in range(size + 20):
+        assert clients[0].post('/api/player_unready', headers={'X-Request-Id': f'req-{n}'}).get_json()['success']
+    cache = app_module.request_dedup_cache['player1']
+    assert len(cache) == size
+    assert 'req-0' not in cache and f'req-{size + 19}' in cache
+
+    # 被挤出去的ID再提交会重新执行，还在缓存里的直接重放
+    def replayed(request_id):
+        response = clients[0].post('/api/player_unready', headers={'X-Request-Id': request_id})
+        return response.headers.get('X-Idempotent-Replay') == '1'
+
+    assert not replayed('req-0')
+    assert replayed(f'req-{size + 19}')
+    assert len(cache) == size
@@ -0,0 +1,19 @@
+"""JSON 接口的 ETag：内容不变返回 304；带 server_time 的轮询不缓存"""
+
+
+def test_stable_json_gets_an_etag(seated_players):
+    _, admin = seated_players(1)
+    first = admin.get('/api/get_users')
+    assert first.status_code == 200 and first.headers.get('ETag')
+    again = admin.get('/api/get_users', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_game_state_is_not_cached(seated_players):
+    clients, _ = seated_players(1)
+    for _ in range(2):
+        response = clients[0].get('/api/get_game_state', headers={'If-None-Match': '*'})
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+        assert response.cache_control.no_store
+        assert response.get_json()['server_time']
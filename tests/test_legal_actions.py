@@ -0,0 +1,107 @@
+"""客户端拿到的合法行动（my_legal_actions）和 /api/player_action 实际接受的一致"""
+import pytest
+
+
+@pytest.fixture
+def table(app_module, config_file, seated_players):
+    """三人入座、都准备好后开始一手牌，返回玩家客户端列表"""
+    config_file()
+    clients, _ = seated_players(3)
+    for client in clients:
+        assert client.post('/api/player_ready').get_json()['success']
+    assert app_module.load_game_data()['game_state'] == 'playing'
+    return clients
+
+
+def to_act(clients):
+    """返回轮到行动的客户端和它看到的合法行动"""
+    for client in clients:
+        legal = client.get('/api/get_game_state').get_json()['my_legal_actions']
+        if legal:
+            return client, legal
+    raise AssertionError('没有轮到行动的玩家')
+
+
+def post(client, action, amount=0):
+    return client.post('/api/player_action', json={'action': action, 'amount': amount}).get_json()
+
+
+def test_check_call_and_raise_bounds(table):
+    client, legal = to_act(table)
+    assert not legal['can_check'] and legal['call_amount'] == 20
+    assert legal['can_raise'] and legal['min_raise'] == 40
+    assert legal['max_raise'] == legal['chips']
+
+    # 超出范围的加注和不能过牌时的过牌都被拒绝，状态不变
+    assert not post(client, 'check')['success']
+    assert not post(client, 'raise', legal['min_raise'] - 1)['success']
+    assert not post(client, 'raise', legal['max_raise'] + 1)['success']
+    assert to_act(table) == (client, legal)
+    assert post(client, 'raise', legal['min_raise'])['success']
+
+    # 加注到 40 后小盲最少再加 20，跟注 30
+    client, legal = to_act(table)
+    assert legal['call_amount'] == 30 and legal['min_raise'] == 60
+    assert post(client, 'call')['success']
+
+    client, legal = to_act(table)
+    assert legal['call_amount'] == 20
+    assert post(client, 'raise', legal['max_raise'])['success']
+    client, legal = to_act(table)
+    assert not legal['can_raise'] and legal['call_amount'] == legal['chips']
+
+
+def test_min_raise_follows_the_last_raise(table):
+    client, legal = to_act(table)
+    assert post(client, 'raise', 60)['success']
+
+    # 加注了 40，再加注至少到 100
+    client, legal = to_act(table)
+    assert legal['min_raise'] == 100 and legal['call_amount'] == 50
+    assert not post(client, 'raise', 99)['success']
+    assert post(client, 'raise', 100)['success']
+
+    client, legal = to_act(table)
+    assert legal['min_raise'] == 140 and legal['call_amount'] == 80
+    assert post(client, 'call')['success']
+    client, legal = to_act(table)
+    assert post(client, 'call')['success']
+
+    # 新的一轮下注从大盲重新算
+    client, legal = to_act(table)
+    assert legal['can_check'] and legal['call_amount'] == 0
+    assert legal['min_raise'] == 20
+    assert not post(client, 'raise', 19)['success']
+    assert post(client, 'check')['success']
+
+
+def test_short_stack_all_in(app_module, table):
+    # 枪口位只剩 15，不够跟注 20：只能全押跟注，不能加注
+    client, legal = to_act(table)
+    game_data = app_module.load_game_data()
+    player_id = next(pid for pid, p in game_data['players'].items() if p['position'] == game_data['current_player'])
+    game_data['players'][player_id]['chips'] = 15
+    app_module.save_game_data(game_data)
+
+    client, legal = to_act(table)
+    assert legal['call_amount'] == 15 and legal['chips'] == 15
+    assert not legal['can_raise'] and legal['can_all_in']
+    assert not post(client, 'raise', 40)['success']
+    assert post(client, 'call')['success']
+    assert app_module.load_game_data()['players'][player_id]['all_in']
+
+    # 小盲加注到 60 后，不够一次完整加注的全押不改变最小加注幅度
+    client, legal = to_act(table)
+    assert post(client, 'raise', 60)['success']
+    client, legal = to_act(table)
+    assert legal['min_raise'] == 100
+    game_data = app_module.load_game_data()
+    player_id = next(pid for pid, p in game_data['players'].items() if p['position'] == game_data['current_player'])
+    game_data['players'][player_id]['chips'] = 60
+    app_module.save_game_data(game_data)
+
+    client, legal = to_act(table)
+    assert legal['max_raise'] == 80 and not legal['can_raise'] and legal['can_all_in']
+    assert post(client, 'allin')['success']
+    client, legal = to_act(table)
+    assert legal['call_amount'] == 20 and legal['min_raise'] == 120
@@ -0,0 +1,113 @@
+"""数据文件的原子写入、备份和损坏恢复；启动任务的并行执行"""
+import json
+import os
+import threading
+
+from persistence import BACKUP_SUFFIX, _keep_backup, _temp_path, atomic_write_json, load_json
+from startup import Startup
+
+
+def test_write_keeps_previous_version_as_backup(tmp_path):
+    path = str(tmp_path / 'data.json')
+    atomic_write_json(path, {'version': 1})
+    atomic_write_json(path, {'version': 2})
+    assert load_json(path) == {'version': 2}
+    with open(path + '.bak', encoding='utf-8') as f:
+        assert json.load(f) == {'version': 1}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_corrupt_file_restored_from_backup(tmp_path):
+    path = str(tmp_path / 'data.json')
+    atomic_write_json(path, {'version': 1})
+    atomic_write_json(path, {'version': 2})
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"version": ')  # 写到一半崩溃
+
+    assert load_json(path, dict) == {'version': 1}
+    # 恢复后文件本身是好的，损坏的文件留作现场
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'version': 1}
+    assert len([name for name in os.listdir(tmp_path) if '.corrupt-' in name]) == 1
+
+
+def test_missing_or_unrecoverable_file_uses_default(tmp_path):
+    path = str(tmp_path / 'data.json')
+    assert load_json(path, lambda: {'players': {}}) == {'players': {}}
+    assert load_json(path) is None
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('not json')
+    assert load_json(path, list) == []
+
+
+def test_concurrent_writers_never_leave_partial_files(tmp_path):
+    path = str(tmp_path / 'data.json')
+    atomic_write_json(path, {'writer': -1, 'payload': []})
+    errors = []
+
+    def write(writer):
+        for n in range(30):
+            atomic_write_json(path, {'writer': writer, 'payload': list(range(n * 50))})
+
+    def read():
+        for _ in range(200):
+            with open(path, encoding='utf-8') as f:
+                try:
+                    json.load(f)
+                except ValueError as e:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)] + [threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert load_json(path)['writer'] in range(4)
+
+
+def test_backup_never_writes_through_a_leftover_link(tmp_path):
+    path = str(tmp_path / 'data.json')
+    atomic_write_json(path, {'n': 0})
+    atomic_write_json(path, {'n': 1})
+    staging = _temp_path(path + BACKUP_SUFFIX)
+
+    # .bak 已经是当前文件的硬链接（另一个线程刚链接过）：rename 不生效，临时链接也要删掉
+    os.remove(path + BACKUP_SUFFIX)
+    os.link(path, path + BACKUP_SUFFIX)
+    _keep_backup(path)
+    assert not os.path.exists(staging)
+
+    # 上次留下的临时链接指向读者手里的旧文件，新的备份不能改写它
+    reader = str(tmp_path / 'reader.json')
+    os.link(path, reader)
+    os.link(path, staging)
+    atomic_write_json(path, {'n': 2})
+    atomic_write_json(path, {'n': 3})
+    assert load_json(reader) == {'n': 1}
+    assert load_json(path + BACKUP_SUFFIX) == {'n': 2}
+    assert not os.path.exists(staging)
+
+
+def test_startup_runs_tasks_and_records_failures():
+    startup = Startup()
+    ran = []
+
+    def broken():
+        raise RuntimeError('坏了')
+
+    startup.start({'first': lambda: ran.append('first'), 'second': lambda: ran.append('second'), 'broken': broken})
+    assert startup.wait(5)
+    assert sorted(ran) == ['first', 'second']
+    assert set(startup.durations) == {'first', 'second', 'broken'}
+    assert startup.errors == {'broken': '坏了'}
+
+
+def test_startup_runs_only_once():
+    startup = Startup()
+    ran = []
+    assert not startup.wait(0.01)
+    threads = {startup.start({'task': lambda: ran.append(1)}) for _ in range(3)}
+    assert len(threads) == 1
+    assert startup.wait(5) and ran == [1]
@@ -0,0 +1,74 @@
+"""玩家统计：按一手打出来的牌累加 VPIP、PFR、激进度，存盘后重新加载结果不变"""
+import pytest
+
+from player_stats import PlayerStats
+
+
+@pytest.fixture
+def stats(app_module, monkeypatch):
+    """换成一份空的统计，不受其他测试打过的牌影响"""
+    fresh = PlayerStats()
+    monkeypatch.setattr(app_module, 'player_stats', fresh)
+    return fresh
+
+
+def play_scripted_hand(app_module, engine_config, new_table, act):
+    """枪口位 p1 加注、小盲 p2 跟注、大盲 p3 弃牌；翻牌 p1 下注 p2 跟注，河牌 p2 下注 p1 跟注"""
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert act(game_data, 'raise', 60) == 'p1'
+    assert act(game_data, 'call') == 'p2'
+    assert act(game_data, 'fold') == 'p3'
+    assert game_data['betting_round'] == 'flop'
+    act(game_data, 'check')
+    act(game_data, 'raise', 100)
+    act(game_data, 'call')
+    act(game_data, 'check')
+    act(game_data, 'check')
+    assert game_data['betting_round'] == 'river'
+    assert act(game_data, 'raise', 200) == 'p2'
+    assert act(game_data, 'call') == 'p1'
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+    assert game_data['hand_results']['type'] == 'showdown'
+    return game_data
+
+
+def test_scripted_hand(app_module, engine_config, new_table, act, stats):
+    play_scripted_hand(app_module, engine_config, new_table, act)
+    p1, p2, p3 = (stats.player_summary(pid) for pid in ('p1', 'p2', 'p3'))
+
+    assert p1['hands'] == p2['hands'] == p3['hands'] == 1
+    # 翻牌前加注：VPIP 和 PFR；翻牌下注 + 翻牌前加注 2 次激进，河牌跟注 1 次
+    assert (p1['vpip'], p1['pfr'], p1['aggression_factor']) == (1.0, 1.0, 2.0)
+    # 翻牌前跟注只算 VPIP；翻牌后的下注不算 PFR
+    assert (p2['vpip'], p2['pfr'], p2['aggression_factor']) == (1.0, 0.0, 0.5)
+    # 大盲没有主动入池，也没跟注过
+    assert (p3['vpip'], p3['pfr'], p3['aggression_factor']) == (0.0, 0.0, None)
+
+    assert p3['net'] == -20 and p3['showdowns'] == 0
+    assert p1['net'] + p2['net'] + p3['net'] == 0
+    assert p1['showdowns'] == p2['showdowns'] == 1
+    assert p1['bb_per_100'] == p1['net'] / 20 * 100
+    # 总计和当前场次一样；新场次只清当前场次
+    assert stats.summary('lifetime') == stats.summary('session')
+    stats.new_session()
+    assert stats.player_summary('p1')['hands'] == 0
+    assert stats.player_summary('p1', 'lifetime') == p1
+
+
+def test_stats_survive_a_reload(app_module, engine_config, new_table, act, stats):
+    play_scripted_hand(app_module, engine_config, new_table, act)
+    play_scripted_hand(app_module, engine_config, new_table, act)
+    stats.new_session()
+    play_scripted_hand(app_module, engine_config, new_table, act)
+
+    # 结算时已经交给 I/O 线程存盘，等它写完再从文件重新加载
+    app_module.io_pool.wait_idle(app_module.TABLE_JOB_KEY)
+    app_module.restore_player_stats()
+    reloaded = app_module.player_stats
+    assert reloaded is not stats
+    assert reloaded.to_dict() == stats.to_dict()
+    assert reloaded.player_summary('p1', 'lifetime')['hands'] == 3
+    assert reloaded.player_summary('p1')['hands'] == 1
+    assert reloaded.summary('lifetime') == stats.summary('lifetime')
@@ -0,0 +1,57 @@
+"""底池限注（奥马哈）：最多加注到 当前最大下注 + 跟注后的底池"""
+
+
+def legal_for_current(app_module, game_data, engine_config):
+    player_id, player = app_module.get_player_at_position(game_data, game_data['current_player'])
+    return player_id, app_module.get_legal_actions(game_data, player, engine_config)
+
+
+def test_max_raise_is_the_pot_after_calling(app_module, engine_config, new_table, act):
+    engine_config['game_variant'] = 'plo4'
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+
+    # 枪口位：底池 30，跟注 20 后底池 50，最多加注到 20 + 50
+    player_id, legal = legal_for_current(app_module, game_data, engine_config)
+    assert player_id == 'p1' and legal['pot_limit']
+    assert legal['max_raise'] == 70
+    assert not legal['can_all_in']
+    success, message = app_module.apply_player_action(game_data, engine_config, 'p1', 'raise', 71)
+    assert not success and '底池限注' in message
+    assert not app_module.apply_player_action(game_data, engine_config, 'p1', 'allin', 0)[0]
+    act(game_data, 'raise', 70)
+
+    # 小盲：底池 100，跟注 60 → 70 + 160
+    player_id, legal = legal_for_current(app_module, game_data, engine_config)
+    assert player_id == 'p2' and legal['max_raise'] == 230
+    act(game_data, 'raise', 230)
+
+    # 大盲：底池 320，跟注 210 → 230 + 530
+    player_id, legal = legal_for_current(app_module, game_data, engine_config)
+    assert player_id == 'p3' and legal['max_raise'] == 760
+    act(game_data, 'call')
+    act(game_data, 'call')
+
+    # 翻牌圈没人下注时最多下注底池
+    assert game_data['betting_round'] == 'flop'
+    _, legal = legal_for_current(app_module, game_data, engine_config)
+    assert game_data['current_pot'] == 690
+    assert legal['max_raise'] == 690
+
+
+def test_short_stack_can_go_all_in_under_the_limit(app_module, engine_config, new_table, act):
+    engine_config['game_variant'] = 'plo4'
+    game_data = new_table([60, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    _, legal = legal_for_current(app_module, game_data, engine_config)
+    assert legal['can_all_in'] and legal['max_raise'] == 60
+    assert act(game_data, 'allin') == 'p1'
+    assert game_data['players']['p1']['all_in']
+
+
+def test_no_limit_is_capped_only_by_the_stack(app_module, engine_config, new_table):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    _, legal = legal_for_current(app_module, game_data, engine_config)
+    assert not legal['pot_limit']
+    assert legal['max_raise'] == 1000 and legal['can_all_in']
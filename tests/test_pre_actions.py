@@ -0,0 +1,82 @@
+"""预选行动：轮到时立即执行，有人加注或换街时失效"""
+
+
+def pre(game_data, player_id, action):
+    """和 /api/pre_action 一样记下预选行动（当时的最大下注和下注轮）"""
+    game_data.setdefault('pre_actions', {})[player_id] = {
+        'action': action,
+        'max_bet': max(p.get('current_bet', 0) for p in game_data['players'].values()),
+        'betting_round': game_data.get('betting_round'),
+    }
+
+
+def current(app_module, game_data):
+    return app_module.get_player_at_position(game_data, game_data['current_player'])[0]
+
+
+def test_check_fold_folds_facing_a_bet_and_checks_otherwise(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    pre(game_data, 'p2', 'check_fold')
+    assert act(game_data, 'raise', 60) == 'p1'
+    # 小盲面对加注，过牌/弃牌自动弃牌
+    assert game_data['players']['p2']['folded']
+    assert current(app_module, game_data) == 'p3'
+    act(game_data, 'call')
+
+    assert game_data['betting_round'] == 'flop'
+    pre(game_data, 'p1', 'check_fold')
+    assert act(game_data, 'check') == 'p3'
+    # 没人下注，自动过牌进入转牌圈
+    assert game_data['betting_round'] == 'turn'
+    assert not game_data['players']['p1']['folded']
+
+
+def test_raise_clears_pre_actions(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert current(app_module, game_data) == 'p4'
+    pre(game_data, 'p1', 'call')
+    pre(game_data, 'p2', 'call_any')
+    pre(game_data, 'p3', 'check')
+
+    act(game_data, 'raise', 60)
+    # 跟注 20 和过牌的预选被加注清掉，跟注任意保留
+    assert current(app_module, game_data) == 'p1'
+    assert set(game_data['pre_actions']) == {'p2'}
+
+    act(game_data, 'call')
+    # 小盲的跟注任意跟了 60 之后就用掉了
+    assert game_data['players']['p2']['current_bet'] == 60
+    assert 'p2' not in game_data['pre_actions']
+    assert current(app_module, game_data) == 'p3'
+
+    act(game_data, 'raise', 200)
+    act(game_data, 'call')
+    act(game_data, 'call')
+    # 再次加注后小盲要自己决定
+    assert current(app_module, game_data) == 'p2'
+    assert game_data['players']['p2']['current_bet'] == 60
+
+
+def test_street_change_drops_pre_actions(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    act(game_data, 'call')
+    act(game_data, 'call')
+    pre(game_data, 'p1', 'check_fold')
+    act(game_data, 'check')
+
+    # 翻牌前的预选不带到翻牌圈
+    assert game_data['betting_round'] == 'flop'
+    assert not game_data.get('pre_actions')
+    act(game_data, 'check')
+    act(game_data, 'check')
+    assert current(app_module, game_data) == 'p1'
+
+    # 留在状态里的旧一轮预选也不会执行
+    pre(game_data, 'p1', 'check_fold')
+    game_data['pre_actions']['p1']['betting_round'] = 'preflop'
+    assert app_module.process_pre_actions(game_data, engine_config) == []
+    assert current(app_module, game_data) == 'p1'
+    assert game_data['betting_round'] == 'flop'
@@ -0,0 +1,72 @@
+"""翻牌前胜率表：起手牌编号和查表结果"""
+import pytest
+
+from hand_evaluator import int_to_card
+from preflop_equity import (HAND_COUNT, MAX_PLAYERS, MIN_PLAYERS, _representative_cards, _simulate_hand,
+                            canonical_index, get_preflop_equity, hand_label, load_table)
+
+
+def cards(*labels):
+    """'A♠' 这样的写法转换成牌"""
+    return [{'rank': label[:-1], 'suit': label[-1]} for label in labels]
+
+
+def test_every_starting_hand_has_its_own_index():
+    labels = [hand_label(index) for index in range(HAND_COUNT)]
+    assert len(set(labels)) == HAND_COUNT
+    assert sum(label.endswith('s') for label in labels) == 78
+    assert sum(label.endswith('o') for label in labels) == 78
+
+    for index in range(HAND_COUNT):
+        hole = [int_to_card(card) for card in _representative_cards(index)]
+        assert canonical_index(hole) == index
+
+
+def test_index_ignores_card_order_and_exact_suits():
+    assert canonical_index(cards('A♠', 'K♠')) == canonical_index(cards('K♥', 'A♥'))
+    assert canonical_index(cards('A♠', 'K♦')) == canonical_index(cards('K♣', 'A♥'))
+    assert canonical_index(cards('A♠', 'K♠')) != canonical_index(cards('A♠', 'K♦'))
+    assert hand_label(canonical_index(cards('10♠', '9♠'))) == 'T9s'
+    assert hand_label(canonical_index(cards('7♦', '2♣'))) == '72o'
+
+
+def test_table_is_loaded():
+    table = load_table()
+    assert table is not None
+    assert table.shape == (HAND_COUNT, MAX_PLAYERS - MIN_PLAYERS + 1)
+    assert ((table > 0) & (table < 1)).all()
+
+
+def test_stronger_hands_have_higher_equity():
+    aces = get_preflop_equity(cards('A♠', 'A♥'), 2)
+    kings = get_preflop_equity(cards('K♠', 'K♥'), 2)
+    suited = get_preflop_equity(cards('A♠', 'K♠'), 2)
+    offsuit = get_preflop_equity(cards('A♠', 'K♥'), 2)
+    trash = get_preflop_equity(cards('7♦', '2♣'), 2)
+    assert aces > kings > suited > offsuit > trash
+    assert 0.82 < aces < 0.87
+
+
+def test_equity_falls_with_more_players():
+    hole = cards('A♠', 'A♥')
+    equities = [get_preflop_equity(hole, players) for players in range(MIN_PLAYERS, MAX_PLAYERS + 1)]
+    assert equities == sorted(equities, reverse=True)
+
+
+@pytest.mark.parametrize('hole, players', [
+    (cards('A♠', 'A♥'), 1),
+    (cards('A♠', 'A♥'), MAX_PLAYERS + 1),
+    (cards('A♠'), 2),
+    (cards('A♠', 'A♥', 'K♠', 'K♥'), 2),
+    ([], 2),
+])
+def test_out_of_range_lookups_return_none(hole, players):
+    assert get_preflop_equity(hole, players) is None
+
+
+def test_simulator_agrees_with_table():
+    index = canonical_index(cards('Q♠', 'J♠'))
+    _, equities = _simulate_hand((index, 4000, 1))
+    table = load_table()
+    for players, equity in enumerate(equities, MIN_PLAYERS):
+        assert abs(equity - table[index, players - MIN_PLAYERS]) < 0.03
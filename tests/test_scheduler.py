@@ -0,0 +1,52 @@
+"""定时任务调度器：按到期时间执行、同 key 替换、取消"""
+import threading
+import time
+
+import pytest
+
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler('test-scheduler')
+    yield scheduler
+    scheduler.stop()
+
+
+def test_jobs_run_in_due_order(scheduler):
+    ran = []
+    done = threading.Event()
+    scheduler.schedule_in(0.06, lambda: (ran.append('late'), done.set()))
+    scheduler.schedule_in(0.02, ran.append, 'early')
+    scheduler.schedule_in(0.04, ran.append, 'middle')
+    assert done.wait(2)
+    assert ran == ['early', 'middle', 'late']
+    assert scheduler.pending_count() == 0
+
+
+def test_same_key_replaces_older_job(scheduler):
+    ran = []
+    done = threading.Event()
+    scheduler.schedule_in(0.02, ran.append, 'old', key='table')
+    job = scheduler.schedule_in(0.05, lambda: (ran.append('new'), done.set()), key='table')
+    assert scheduler.get('table') is job
+    assert scheduler.pending_count() == 1
+    assert done.wait(2)
+    assert ran == ['new']
+    assert scheduler.get('table') is None
+
+
+def test_cancelled_job_does_not_run(scheduler):
+    ran = []
+    scheduler.schedule_in(0.02, ran.append, 'cancelled', key='level')
+    scheduler.cancel('level')
+    time.sleep(0.06)
+    assert ran == []
+
+
+def test_failing_job_does_not_stop_the_thread(scheduler):
+    done = threading.Event()
+    scheduler.schedule_in(0.01, lambda: 1 / 0)
+    scheduler.schedule_in(0.03, done.set)
+    assert done.wait(2)
@@ -0,0 +1,120 @@
+"""散场结算：转账结清所有人的输赢，且笔数最少"""
+import csv
+import io
+import random
+from itertools import combinations
+
+from settlement import BANK_ID, EXACT_LIMIT, build_settlement, ledger_csv, minimize_transfers, player_nets
+
+
+def apply_transfers(nets, transfers):
+    balances = dict(nets)
+    for transfer in transfers:
+        assert transfer['amount'] > 0
+        balances[transfer['from']] += transfer['amount']
+        balances[transfer['to']] -= transfer['amount']
+    return balances
+
+
+def max_zero_sum_groups(amounts):
+    """穷举：合计为零的余额最多能分成几个合计为零的小组"""
+    if not amounts:
+        return 0
+    first, rest = amounts[0], amounts[1:]
+    best = 0
+    for size in range(len(rest) + 1):
+        for picked in combinations(range(len(rest)), size):
+            if first + sum(rest[i] for i in picked) == 0:
+                others = [amount for i, amount in enumerate(rest) if i not in picked]
+                best = max(best, 1 + max_zero_sum_groups(others))
+    return best
+
+
+def random_nets(rng, count):
+    nets = {f'p{n}': rng.choice([-3, -2, -1, 1, 2, 3]) * 100 * rng.randint(1, 3) for n in range(1, count)}
+    nets[f'p{count}'] = -sum(nets.values())
+    return nets
+
+
+def test_transfers_settle_every_balance():
+    rng = random.Random(1)
+    for _ in range(200):
+        nets = random_nets(rng, rng.randint(2, 10))
+        balances = apply_transfers(nets, minimize_transfers(nets))
+        assert set(balances.values()) == {0}
+
+
+def test_transfer_count_is_minimal():
+    rng = random.Random(2)
+    for _ in range(150):
+        nets = random_nets(rng, rng.randint(2, 8))
+        amounts = [amount for amount in nets.values() if amount]
+        transfers = minimize_transfers(nets)
+        assert len(transfers) == len(amounts) - max_zero_sum_groups(amounts), nets
+
+
+def test_opposite_pairs_settle_with_one_transfer_each():
+    nets = {'a': -500, 'b': 500, 'c': -300, 'd': 300, 'e': -200, 'f': 200}
+    transfers = minimize_transfers(nets)
+    assert len(transfers) == 3
+    assert {(t['from'], t['to'], t['amount']) for t in transfers} == {('a', 'b', 500), ('c', 'd', 300), ('e', 'f', 200)}
+
+
+def test_zero_sum_subgroups_are_found():
+    # {a, b, c} 和 {d, e} 各自合计为零：5 个人只要 3 笔
+    nets = {'a': -300, 'b': 100, 'c': 200, 'd': -700, 'e': 700}
+    assert len(minimize_transfers(nets)) == 3
+    assert minimize_transfers({'a': 0, 'b': 0}) == []
+
+
+def test_large_tables_fall_back_to_at_most_n_minus_one():
+    rng = random.Random(3)
+    nets = random_nets(rng, EXACT_LIMIT + 10)
+    amounts = [amount for amount in nets.values() if amount]
+    transfers = minimize_transfers(nets)
+    assert len(transfers) <= len(amounts) - 1
+    assert set(apply_transfers(nets, transfers).values()) == {0}
+
+
+def test_players_merged_across_tables():
+    tables = [
+        {'alice': {'chips': 1500, 'borrow_count': 1}, 'bob': {'chips': 200, 'borrow_count': 1}},
+        {'alice': {'chips': 300, 'borrow_count': 1}, 'carol': {'chips': 2000, 'borrow_count': 2}},
+    ]
+    nets = {entry['player_id']: entry['net'] for entry in player_nets(tables, 1000)}
+    assert nets == {'alice': -200, 'bob': -800, 'carol': 0}
+
+
+def test_imbalance_is_absorbed_by_the_bank():
+    tables = [{'alice': {'chips': 1600, 'borrow_count': 1}, 'bob': {'chips': 500, 'borrow_count': 1}}]
+    settlement = build_settlement(tables, 1000, created_at=0)
+    assert settlement['imbalance'] == 100
+    nets = {entry['player_id']: entry['net'] for entry in settlement['players']}
+    nets[BANK_ID] = -settlement['imbalance']
+    assert set(apply_transfers(nets, settlement['transfers']).values()) == {0}
+    assert {'from': 'bob', 'to': 'alice', 'amount': 500} in settlement['transfers']
+
+
+def test_ledger_csv_lists_players_and_transfers():
+    settlement = build_settlement([{'alice': {'chips': 1500, 'borrow_count': 1},
+                                    'bob': {'chips': 500, 'borrow_count': 1}}], 1000, created_at=0)
+    assert ledger_csv(settlement).splitlines() == [
+        'player_id,chips,borrow_count,bought_in,net',
+        'alice,1500,1,1000,500',
+        'bob,500,1,1000,-500',
+        '',
+        'from,to,amount',
+        'bob,alice,500',
+    ]
+
+
+def test_ledger_csv_escapes_player_ids():
+    names = ['smith, john', 'say "hi"', 'two\nlines']
+    settlement = build_settlement([{names[0]: {'chips': 2000, 'borrow_count': 1},
+                                    names[1]: {'chips': 500, 'borrow_count': 1},
+                                    names[2]: {'chips': 500, 'borrow_count': 1}}], 1000, created_at=0)
+    rows = list(csv.reader(io.StringIO(ledger_csv(settlement))))
+    assert rows[0] == ['player_id', 'chips', 'borrow_count', 'bought_in', 'net']
+    assert {row[0]: row[4] for row in rows[1:4]} == {names[0]: '1000', names[1]: '-500', names[2]: '-500'}
+    assert rows[4] == [] and rows[5] == ['from', 'to', 'amount']
+    assert sorted(rows[6:]) == sorted([[names[1], names[0], '500'], [names[2], names[0], '500']])
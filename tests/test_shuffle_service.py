@@ -0,0 +1,101 @@
+"""可验证洗牌：承诺与揭示、按文档可复现的洗牌、重放实际发出的牌"""
+import hashlib
+import hmac
+from collections import Counter
+
+from shuffle_service import ShuffleService, commitment, new_seed, replay_deal, shuffled_order
+
+SEED = '00' * 31 + '01'
+
+
+def documented_order(seed, size):
+    """按模块文档描述的算法独立实现一遍（第三方核对时就是这样做的）"""
+    key = bytes.fromhex(seed)
+    words = []
+    counter = 0
+
+    def next_word():
+        nonlocal counter
+        if not words:
+            block = hmac.new(key, counter.to_bytes(8, 'big'), hashlib.sha256).digest()
+            words.extend(int.from_bytes(block[i:i + 4], 'big') for i in range(0, 32, 4))
+            counter += 1
+        return words.pop(0)
+
+    order = list(range(size))
+    for i in range(size - 1, 0, -1):
+        limit = 2 ** 32 - 2 ** 32 % (i + 1)
+        word = next_word()
+        while word >= limit:
+            word = next_word()
+        j = word % (i + 1)
+        order[i], order[j] = order[j], order[i]
+    return order
+
+
+def test_commitment_reveals_only_the_committed_seed():
+    seed = new_seed().hex()
+    assert len(seed) == 64
+    assert commitment(seed) == hashlib.sha256(bytes.fromhex(seed)).hexdigest()
+    assert commitment(new_seed().hex()) != commitment(seed)
+
+
+def test_order_is_a_reproducible_permutation():
+    for size in (36, 52):
+        order = shuffled_order(SEED, size)
+        assert sorted(order) == list(range(size))
+        assert order == shuffled_order(SEED, size) == documented_order(SEED, size)
+    assert shuffled_order(SEED, 52) != shuffled_order('00' * 31 + '02', 52)
+
+
+def test_small_deck_orders_are_roughly_uniform():
+    counts = Counter(tuple(shuffled_order(f'{n:064x}', 3)) for n in range(3000))
+    assert len(counts) == 6
+    assert all(400 < count < 600 for count in counts.values())
+
+
+def test_replay_matches_the_engine_deal(app_module, engine_config, new_table):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    shuffle = game_data['shuffle']
+    assert commitment(shuffle['seed']) == shuffle['commitment']
+
+    hands, board = replay_deal(shuffle['seed'], app_module.base_deck('holdem'), 3, 2, 5)
+    assert hands == [game_data['players'][pid]['hole_cards'] for pid in ('p1', 'p2', 'p3')]
+    # 公共牌从牌堆末尾接着发
+    assert board == game_data['deck'][::-1][:5]
+
+
+def test_verify_endpoint_confirms_a_finished_hand(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    hand_id = game_data['hand_id']
+    act(game_data, 'allin')
+    act(game_data, 'call')
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session.update({'username': 'p1', 'player_id': 'p1', 'role': 'player'})
+    data = client.get(f'/api/shuffle/verify/{hand_id}').get_json()
+    assert data['success'], data
+    assert data['verified'] and data['commitment_ok'] and data['cards_ok']
+    assert len(data['replay']['community_cards']) == 5
+    assert not client.get('/api/shuffle/verify/no-such-hand').get_json()['success']
+
+
+def test_pool_hands_out_prepared_shuffles():
+    seeds = iter(range(1, 100))
+    service = ShuffleService(pool_size=3, seed_source=lambda size: next(seeds).to_bytes(size, 'big'))
+    service.prefill([52])
+    shuffle = service.take(52)
+    assert shuffle['order'] == shuffled_order(shuffle['seed'], 52)
+    assert shuffle['commitment'] == commitment(shuffle['seed'])
+    assert service.misses == 0
+
+    # 池大小为 0 时每次当场生成
+    direct = ShuffleService(pool_size=0)
+    assert sorted(direct.take(36)['order']) == list(range(36))
+    assert direct.misses == 1
+    assert direct.status() == {'pool_size': 0, 'pools': {36: 0}, 'misses': 1}
@@ -0,0 +1,90 @@
+"""边池与筹码守恒的回归用例（弃牌玩家的投入、平分零头、盲注/前注全押）"""
+import pytest
+
+HOLE = [{'rank': '2', 'suit': '♠'}, {'rank': '3', 'suit': '♠'}]
+
+
+def invested(new_table, contributions, folded=()):
+    """按 {玩家: 本手投入} 构造一手正在进行的牌"""
+    game_data = new_table([1000] * len(contributions))
+    for pid, amount in contributions.items():
+        player = game_data['players'][pid]
+        player.update({'hole_cards': HOLE, 'total_invested_this_hand': amount, 'folded': pid in folded})
+        player['all_in'] = not player['folded'] and amount < max(contributions.values())
+    game_data['current_pot'] = sum(contributions.values())
+    return game_data
+
+
+def pots(app_module, game_data):
+    return [(pot['amount'], sorted(pot['eligible_players'])) for pot in app_module.calculate_side_pots(game_data)]
+
+
+def test_folded_contribution_counts_in_each_layer(app_module, new_table):
+    game_data = invested(new_table, {'p1': 50, 'p2': 100, 'p3': 300}, folded={'p1'})
+    assert pots(app_module, game_data) == [(250, ['p2', 'p3']), (200, ['p3'])]
+
+
+def test_folded_excess_goes_to_last_pot(app_module, new_table):
+    game_data = invested(new_table, {'p1': 400, 'p2': 100, 'p3': 200}, folded={'p1'})
+    assert pots(app_module, game_data) == [(300, ['p2', 'p3']), (400, ['p3'])]
+
+
+def test_side_pots_add_up_to_the_pot(app_module, new_table):
+    game_data = invested(new_table, {'p1': 35, 'p2': 70, 'p3': 500, 'p4': 500, 'p5': 120}, folded={'p1', 'p4'})
+    assert sum(amount for amount, _ in pots(app_module, game_data)) == game_data['current_pot']
+
+
+@pytest.mark.parametrize('amount, dealer, shares', [
+    (101, 3, {'p2': 50, 'p5': 51}),
+    (100, 4, {'p1': 33, 'p4': 33, 'p6': 34}),
+    (101, 4, {'p1': 34, 'p4': 33, 'p6': 34}),
+    (7, 6, {'p1': 4, 'p6': 3}),
+])
+def test_odd_chips_go_left_of_the_button(app_module, new_table, amount, dealer, shares):
+    game_data = new_table([1000] * 6, dealer=dealer)
+    assert app_module.split_pot(game_data, amount, sorted(shares)) == shares
+
+
+def test_folded_blind_is_paid_out(app_module, engine_config, new_table, act):
+    game_data = new_table([1000, 100, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    act(game_data, 'raise', 300)
+    act(game_data, 'allin')
+    assert act(game_data, 'fold') == 'p3'
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+    results = game_data['hand_results']
+    # 弃牌的大盲 20 留在底池里，分给赢家
+    assert sum(winner['pot_won'] for winner in results['winners']) == 420
+    assert sum(p['chips'] for p in game_data['players'].values()) == 2100
+
+
+def test_action_skips_player_all_in_from_ante(app_module, engine_config, new_table):
+    engine_config['ante'] = 5
+    # 1 号位是庄家，前注让他全押，大盲之后应该轮到 2 号位的小盲
+    game_data = new_table([5, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert game_data['players']['p1']['all_in']
+    _, actor = app_module.get_player_at_position(game_data, game_data['current_player'])
+    assert not actor.get('all_in') and actor['chips'] > 0
+    assert sum(p['chips'] for p in game_data['players'].values()) + game_data['current_pot'] == 2005
+
+
+def test_blinds_putting_everyone_all_in_run_out(app_module, engine_config, new_table):
+    game_data = new_table([10, 20], dealer=1)
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert game_data['game_state'] in ('showdown', 'hand_ended')
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+    assert len(game_data['hand_results']['community_cards']) == 5
+    assert sum(p['chips'] for p in game_data['players'].values()) == 30
+
+
+def test_new_hand_clears_round_tracking(app_module, engine_config, new_table):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    game_data['players_acted_this_round'] = [1, 2, 3]
+    game_data['last_raiser_position'] = 2
+    assert app_module.start_game_internal(game_data, engine_config)
+    assert game_data['game_state'] == 'playing'
+    assert game_data.get('players_acted_this_round', []) == []
+    assert 'last_raiser_position' not in game_data
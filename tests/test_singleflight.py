@@ -0,0 +1,66 @@
+"""并发请求合并：同一 key 只执行一次，结果短时缓存，错误传给所有等待者"""
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_together(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(n):
+        try:
+            results[n] = target()
+        except Exception as e:
+            errors[n] = e
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(ttl=0)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'version': 7}
+
+    results, errors = run_together(8, lambda: flight.do('state:7', slow))
+    assert len(calls) == 1
+    assert errors == [None] * 8
+    assert all(result is results[0] for result in results)
+
+
+def test_result_cached_for_ttl():
+    flight = SingleFlight(ttl=60)
+    calls = []
+    assert flight.do('state', lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do('state', lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do('other', lambda: calls.append(1) or len(calls)) == 2
+
+    flight.invalidate()
+    assert flight.do('state', lambda: calls.append(1) or len(calls)) == 3
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight(ttl=60)
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError('读取失败')
+
+    _, errors = run_together(4, lambda: flight.do('state', failing))
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert flight.do('state', lambda: 'ok') == 'ok'
+
+    with pytest.raises(ValueError):
+        SingleFlight().do('other', lambda: int('x'))
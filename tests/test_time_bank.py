@@ -0,0 +1,108 @@
+"""时间银行：基础时间用完后才消耗，一手牌之内不补充；都用完后自动过牌或弃牌"""
+import time
+
+import pytest
+
+
+@pytest.fixture
+def clock_config(config_file):
+    return config_file(action_timeout=30, time_bank_seconds=60, time_bank_refill_seconds=10)
+
+
+def current(app_module, game_data):
+    return app_module.get_player_at_position(game_data, game_data['current_player'])
+
+
+def act_after(act, game_data, seconds, action, amount=0):
+    """当前玩家在行动计时开始 seconds 秒后才行动"""
+    game_data['action_deadline'] -= seconds
+    return act(game_data, action, amount)
+
+
+def test_bank_is_used_only_after_the_base_clock(app_module, clock_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, clock_config)
+    assert all(p['time_bank'] == 60 for p in game_data['players'].values())
+    assert game_data['time_bank_deadline'] == pytest.approx(game_data['action_deadline'] + 60)
+    assert game_data['action_deadline'] == pytest.approx(time.time() + 30, abs=1)
+
+    # 基础时间内行动不扣时间银行，超出 15 秒扣 15 秒
+    assert act_after(act, game_data, 20, 'call') == 'p1'
+    assert game_data['players']['p1']['time_bank'] == 60
+    assert act_after(act, game_data, 45, 'call') == 'p2'
+    assert game_data['players']['p2']['time_bank'] == pytest.approx(45, abs=0.2)
+
+    # 下一个玩家的截止时间用他自己的时间银行
+    player_id, player = current(app_module, game_data)
+    assert player_id == 'p3'
+    assert game_data['time_bank_deadline'] == pytest.approx(game_data['action_deadline'] + 60)
+
+    # 用超过时间银行的时间也不会变成负数
+    act_after(act, game_data, 200, 'check')
+    assert game_data['players']['p3']['time_bank'] == 0
+
+
+def test_bank_is_not_refilled_within_a_hand(app_module, clock_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, clock_config)
+    act(game_data, 'call')
+    act_after(act, game_data, 80, 'call')
+    act(game_data, 'check')
+    assert game_data['betting_round'] == 'flop'
+    assert game_data['players']['p2']['time_bank'] == pytest.approx(10, abs=0.2)
+
+    # 换街后轮到 p2，截止时间只剩 10 秒的时间银行
+    assert current(app_module, game_data)[0] == 'p2'
+    assert game_data['time_bank_deadline'] == pytest.approx(game_data['action_deadline'] + 10, abs=0.2)
+    act(game_data, 'check')
+    act(game_data, 'check')
+    act(game_data, 'check')
+    assert game_data['betting_round'] == 'turn'
+    assert game_data['players']['p2']['time_bank'] == pytest.approx(10, abs=0.2)
+
+    # 下一手开始时补充 10 秒，其他人已经是上限
+    while game_data['game_state'] == 'playing':
+        act(game_data, 'check')
+    if game_data['game_state'] == 'showdown':
+        app_module.finish_showdown(game_data)
+    app_module.prepare_next_hand(game_data)
+    assert app_module.start_game_internal(game_data, clock_config)
+    assert game_data['players']['p2']['time_bank'] == pytest.approx(20, abs=0.2)
+    assert game_data['players']['p1']['time_bank'] == 60
+
+
+def test_timeout_checks_when_possible_and_folds_otherwise(app_module, clock_config, new_table, act):
+    game_data = new_table([1000, 1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, clock_config)
+
+    # 枪口位面对大盲超时：弃牌
+    app_module.handle_action_timeout(game_data, clock_config)
+    assert game_data['players']['p1']['folded']
+    act(game_data, 'call')
+
+    # 大盲可以过牌：超时自动过牌，进入翻牌圈
+    assert current(app_module, game_data)[0] == 'p3'
+    app_module.handle_action_timeout(game_data, clock_config)
+    assert not game_data['players']['p3']['folded']
+    assert game_data['betting_round'] == 'flop'
+
+
+def test_scheduler_acts_when_the_bank_runs_out(app_module, config_file, new_table):
+    config = config_file(action_timeout=0, time_bank_seconds=0.3)
+    game_data = new_table([1000, 1000], dealer=1)
+    assert app_module.start_game_internal(game_data, config)
+    first = current(app_module, game_data)[0]
+    app_module.save_game_data(game_data)
+
+    # 基础时间是 0，时间银行还没用完时不会自动行动
+    time.sleep(0.1)
+    assert app_module.load_game_data()['game_state'] == 'playing'
+
+    deadline = time.time() + 5
+    while app_module.load_game_data()['game_state'] == 'playing' and time.time() < deadline:
+        time.sleep(0.02)
+    game_data = app_module.load_game_data()
+    # 两人桌小盲先行动，面对大盲超时弃牌
+    assert game_data['game_state'] == 'hand_ended'
+    assert game_data['players'][first]['chips'] == 990
+    assert [w['player_id'] for w in game_data['hand_results']['winners']] == [({'p1', 'p2'} - {first}).pop()]
@@ -0,0 +1,105 @@
+"""锦标赛：盲注级别、淘汰名次、座位，以及在牌桌上用锦标赛筹码比赛"""
+import pytest
+
+from tournament import Tournament, TournamentError
+
+LEVELS = [
+    {'small_blind': 10, 'big_blind': 20, 'ante': 0, 'duration': 60},
+    {'small_blind': 20, 'big_blind': 40, 'ante': 5, 'duration': 60},
+    {'small_blind': 40, 'big_blind': 80, 'ante': 10, 'duration': 60},
+]
+
+
+def running(count, table_size=8):
+    tournament = Tournament([f'p{n}' for n in range(1, count + 1)], 1000, LEVELS, table_size)
+    tournament.start(now=0)
+    return tournament
+
+
+@pytest.mark.parametrize('entrants, table_size', [
+    (['p1'], 8), (['p1', 'p1'], 8), (['p1', 'p2'], 1), ([f'p{n}' for n in range(1, 10)], 8),
+])
+def test_invalid_tournaments_rejected(entrants, table_size):
+    with pytest.raises(TournamentError):
+        Tournament(entrants, table_size=table_size)
+
+
+def test_levels_advance_on_schedule():
+    tournament = running(3)
+    assert tournament.current_level()['big_blind'] == 20
+    assert tournament.next_level_at() == 60
+
+    # 停机 130 秒后补齐错过的两次升级，下一次仍按原计划时间
+    assert tournament.catch_up_levels(now=130)
+    assert tournament.current_level()['big_blind'] == 80
+    assert tournament.next_level_at() is None
+    assert not tournament.advance_level(now=200)
+
+
+def test_busted_players_get_places():
+    tournament = running(4)
+    eliminated = tournament.report_chips({'p1': 2500, 'p2': 1500, 'p3': 0, 'p4': 0})
+    assert sorted(eliminated) == ['p3', 'p4']
+    assert {tournament.players['p3']['place'], tournament.players['p4']['place']} == {3, 4}
+    assert tournament.status == 'running'
+
+    eliminated = tournament.report_chips({'p1': 4000, 'p2': 0})
+    assert eliminated == ['p2']
+    assert tournament.players['p2']['place'] == 2
+    assert tournament.players['p1']['place'] == 1
+    assert tournament.status == 'finished'
+    assert [p['id'] for p in tournament.standings()][:2] == ['p1', 'p2']
+
+
+def test_bigger_stack_places_higher_in_the_same_hand():
+    tournament = running(4)
+    tournament.report_chips({'p3': 300, 'p4': 800})
+    eliminated = tournament.report_chips({'p3': 0, 'p4': 0})
+    assert eliminated == ['p3', 'p4']
+    assert tournament.players['p3']['place'] == 4
+    assert tournament.players['p4']['place'] == 3
+
+
+def test_entrants_share_one_table():
+    tournament = running(8)
+    assert sorted(tournament.seats()) == list(range(1, 9))
+    assert all(tournament.players[pid]['seat'] == seat for seat, pid in tournament.seats().items())
+
+    tournament.report_chips({'p3': 0})
+    assert tournament.players['p3']['seat'] is None
+    assert 'p3' not in tournament.seats().values()
+    assert len(tournament.status_summary()['seats']) == 7
+
+
+def test_round_trip_through_dict():
+    tournament = running(5)
+    tournament.report_chips({'p1': 0})
+    restored = Tournament.from_dict(tournament.to_dict())
+    assert restored.status_summary() == tournament.status_summary()
+
+
+def test_tournament_plays_with_tournament_stacks(app_module, seated_players):
+    clients, admin = seated_players(2)
+    clients[0].post('/api/add_chips')
+    before = {pid: (p['chips'], p['borrow_count'], p['position'])
+              for pid, p in app_module.load_game_data()['players'].items()}
+
+    assert admin.post('/api/tournament/create', json={'starting_chips': 500}).get_json()['success']
+    assert admin.post('/api/tournament/start').get_json()['success']
+    game_data = app_module.load_game_data()
+    assert app_module.is_tournament_table(game_data)
+    assert {pid: p['chips'] for pid, p in game_data['players'].items()} == {'player1': 500, 'player2': 500}
+
+    # 比赛中不能补码、换座或结算
+    assert not clients[0].post('/api/add_chips').get_json()['success']
+    assert not clients[0].post('/api/change_position', json={'position': 5}).get_json()['success']
+    assert not admin.get('/api/settlement').get_json()['success']
+
+    data = admin.post('/api/tournament/eliminate', json={'player_id': 'player2'}).get_json()
+    assert data['success'], data
+    # 比赛结束后恢复现金局的筹码、借码次数和座位
+    game_data = app_module.load_game_data()
+    assert not app_module.is_tournament_table(game_data)
+    after = {pid: (p['chips'], p['borrow_count'], p['position']) for pid, p in game_data['players'].items()}
+    assert after == before
+    admin.post('/api/tournament/stop')
@@ -0,0 +1,318 @@
+"""牌桌状态二进制协议：完整帧和增量帧编码后能解回原来的状态"""
+import base64
+import copy
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from hand_evaluator import RANKS, SUITS
+from wire import (BETTING_ROUNDS, FRAME_DELTA, FRAME_FULL, GAME_STATES, PLAYER_FLAGS, PUBLIC_FIELDS,
+                  WireEncoder, _PublicFrame, parse_since)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Reader:
+    """和 static/js/wire.js 相同的解码逻辑"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def byte(self):
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def uint(self):
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return result
+
+    def optional_uint(self):
+        value = self.uint()
+        return None if value == 0 else value - 1
+
+    def time(self):
+        value = self.uint()
+        return None if value == 0 else (value - 1) / 1000
+
+    def str(self):
+        length = self.uint()
+        text = self.data[self.pos:self.pos + length].decode('utf-8')
+        self.pos += length
+        return text
+
+    def hex(self):
+        length = self.uint()
+        text = self.data[self.pos:self.pos + length].hex()
+        self.pos += length
+        return text or None
+
+    def json(self):
+        return json.loads(self.str())
+
+    def enum(self, values):
+        index = self.uint()
+        return values[index] if index < len(values) else self.str()
+
+    def cards(self):
+        return [{'rank': RANKS[card >> 2], 'suit': SUITS[card & 3]} for card in
+                (self.byte() for _ in range(self.uint()))]
+
+    def player(self):
+        player = {'id': self.str(), 'position': self.optional_uint(), 'chips': self.uint(),
+                  'current_bet': self.uint(), 'borrow_count': self.uint()}
+        flags = self.uint()
+        for bit, name in enumerate(PLAYER_FLAGS):
+            player[name] = bool(flags & (1 << bit))
+        player['hole_cards'] = self.uint()
+        return player
+
+
+READERS = {
+    'game_state': lambda r: r.enum(GAME_STATES),
+    'current_pot': Reader.uint,
+    'community_cards': Reader.cards,
+    'current_player': Reader.optional_uint,
+    'betting_round': lambda r: r.enum(BETTING_ROUNDS),
+    'min_bet': Reader.uint,
+    'dealer_position': Reader.optional_uint,
+    'auto_deal': lambda r: r.uint() == 1,
+    'ready_players': lambda r: [r.str() for _ in range(r.uint())],
+    'deadline': Reader.time,
+    'action_deadline': Reader.time,
+    'hand_id': lambda r: r.str() or None,
+    'variant': Reader.str,
+    'config': Reader.json,
+    'variants': Reader.json,
+    'hand_results': Reader.json,
+    'deck_commitment': Reader.hex,
+    'deck_seed': Reader.hex,
+}
+PRIVATE_READERS = [
+    ('my_cards', Reader.cards),
+    ('my_preflop_equity', lambda r: r.uint() / 10000),
+    ('my_hand_label', Reader.str),
+    ('my_pre_action', Reader.json),
+    ('my_legal_actions', Reader.json),
+    ('my_sitting_out', lambda r: True),
+    ('server_time', Reader.time),
+]
+
+
+def decode(data, previous=None):
+    """解码一帧，返回 (帧类型, (版本, 校验), 公共状态, 私有字段)"""
+    reader = Reader(data)
+    kind = reader.byte()
+    key = (reader.uint(), reader.uint())
+    if kind == FRAME_DELTA:
+        base = (reader.uint(), reader.uint())
+        assert previous is not None and previous[0] == base, '增量帧的基准状态不一致'
+        state = dict(previous[1], players=dict(previous[1]['players']))
+    else:
+        state = {'players': {}}
+
+    mask = reader.uint()
+    for bit, (name, _) in enumerate(PUBLIC_FIELDS):
+        if not mask & (1 << bit):
+            continue
+        if name == 'players':
+            for _ in range(reader.uint()):
+                player = reader.player()
+                state['players'][player['id']] = player
+            for _ in range(reader.uint()):
+                del state['players'][reader.str()]
+        else:
+            state[name] = READERS[name](reader)
+
+    mask = reader.uint()
+    private = {name: read(reader) if mask & (1 << bit) else (False if name == 'my_sitting_out' else None)
+               for bit, (name, read) in enumerate(PRIVATE_READERS)}
+    assert reader.pos == len(data)
+    return kind, key, state, private
+
+
+def card(label):
+    return {'rank': label[:-1], 'suit': label[-1]}
+
+
+def public_state(version=1):
+    return {
+        'version': version,
+        'players': {
+            'alice': {'id': 'alice', 'position': 1, 'chips': 980, 'current_bet': 20, 'borrow_count': 1,
+                      'hole_cards': [card('A♠'), card('K♠')]},
+            'bob': {'id': 'bob', 'position': 4, 'chips': 1990, 'current_bet': 10, 'borrow_count': 2,
+                    'hole_cards': [card('2♦'), card('7♣')], 'away': True},
+            '机器人1': {'id': '机器人1', 'position': 7, 'chips': 0, 'current_bet': 0, 'borrow_count': 1,
+                     'bot': True, 'sitting_out': True},
+        },
+        'config': {'small_blind': 10, 'big_blind': 20},
+        'game_state': 'playing',
+        'current_pot': 30,
+        'community_cards': [],
+        'current_player': 4,
+        'betting_round': 'preflop',
+        'min_bet': 20,
+        'dealer_position': 1,
+        'auto_deal': True,
+        'ready_players': [],
+        'deadline': 1760000000.123,
+        'action_deadline': None,
+        'hand_id': 'hand-1',
+        'variant': 'holdem',
+        'variants': {'holdem': '德州扑克'},
+        'hand_results': None,
+        'deck_commitment': 'ab' * 32,
+        'deck_seed': None,
+    }
+
+
+def expected_public(state):
+    """解码后应得到的公共状态：牌是字典，别人的底牌只有张数"""
+    expected = {name: state[name] for name, _ in PUBLIC_FIELDS if name != 'players'}
+    expected['players'] = {}
+    for pid, player in state['players'].items():
+        expected['players'][pid] = {
+            'id': pid, 'position': player.get('position'), 'chips': player.get('chips', 0),
+            'current_bet': player.get('current_bet', 0), 'borrow_count': player.get('borrow_count', 1),
+            **{name: bool(player.get(name)) for name in PLAYER_FLAGS},
+            'hole_cards': len(player.get('hole_cards') or []),
+        }
+    return expected
+
+
+def test_full_frame_round_trip():
+    state = public_state()
+    private = {'my_cards': [card('A♠'), card('10♥')], 'my_preflop_equity': 0.6523, 'my_hand_label': 'ATo',
+               'my_pre_action': {'action': 'check_fold'}, 'my_legal_actions': {'can_check': True},
+               'my_sitting_out': False, 'server_time': 1760000000.5}
+    kind, key, decoded, decoded_private = decode(WireEncoder().encode(state, private))
+    assert kind == FRAME_FULL
+    assert key == _PublicFrame(state).key
+    assert decoded == expected_public(state)
+    assert decoded_private == private
+
+
+def test_delta_frames_apply_on_top_of_previous_state():
+    encoder = WireEncoder()
+    first = public_state(1)
+    previous = decode(encoder.encode(first, {}))[1:3]
+
+    second = public_state(2)
+    second['players'] = copy.deepcopy(first['players'])
+    second['players']['bob'].update({'chips': 1970, 'current_bet': 30, 'away': False})
+    second['current_pot'] = 50
+    second['current_player'] = 1
+    second['min_bet'] = 30
+    data = encoder.encode(second, {}, since=previous[0])
+    kind, key, decoded, _ = decode(data, previous)
+    assert kind == FRAME_DELTA
+    assert decoded == expected_public(second)
+    # 只有变化的字段和一个玩家记录
+    assert len(data) < len(encoder.encode(second, {})) / 4
+
+    third = public_state(3)
+    third['players'] = copy.deepcopy(second['players'])
+    del third['players']['机器人1']
+    third['community_cards'] = [card('Q♠'), card('J♠'), card('10♦')]
+    third['betting_round'] = 'flop'
+    kind, _, decoded, _ = decode(encoder.encode(third, {}, since=key), (key, decoded))
+    assert kind == FRAME_DELTA
+    assert decoded == expected_public(third)
+    assert '机器人1' not in decoded['players']
+
+
+def test_unchanged_state_sends_empty_delta():
+    encoder = WireEncoder()
+    state = public_state()
+    key = decode(encoder.encode(state, {}))[1]
+    data = encoder.encode(copy.deepcopy(state), {}, since=key)
+    assert data[0] == FRAME_DELTA
+    assert len(data) < 20
+
+
+def test_unknown_base_gets_full_frame():
+    encoder = WireEncoder(history=2)
+    first_key = decode(encoder.encode(public_state(1), {}))[1]
+    for version in (2, 3):
+        encoder.encode(public_state(version), {})
+    assert encoder.encode(public_state(4), {}, since=first_key)[0] == FRAME_FULL
+    assert encoder.encode(public_state(4), {}, since=(99, 12345))[0] == FRAME_FULL
+
+
+def test_unknown_enum_values_survive():
+    state = public_state()
+    state['game_state'] = 'paused'
+    state['betting_round'] = 'draw'
+    decoded = decode(WireEncoder().encode(state, {}))[2]
+    assert decoded['game_state'] == 'paused'
+    assert decoded['betting_round'] == 'draw'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('12.345', (12, 345)), ('1.2.3', None), ('x.1', None), ('', None), (None, None),
+])
+def test_parse_since(value, expected):
+    assert parse_since(value) == expected
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='需要 node 运行页面的解码器')
+def test_browser_decoder_matches():
+    encoder = WireEncoder()
+    first = public_state(1)
+    second = public_state(2)
+    second['players'] = copy.deepcopy(first['players'])
+    del second['players']['bob']
+    second['current_pot'] = 90
+    full = encoder.encode(first, {'my_cards': [card('A♠'), card('K♠')], 'server_time': 1760000000.5})
+    delta = encoder.encode(second, {'my_sitting_out': True}, since=_PublicFrame(first).key)
+
+    script = '''
+        const fs = require('fs');
+        eval(fs.readFileSync(process.argv[1], 'utf8') + ';globalThis.TableWire = TableWire;');
+        const frames = process.argv.slice(2).map(b => Buffer.from(b, 'base64'));
+        const first = TableWire.decode(frames[0]);
+        const second = TableWire.decode(frames[1], first);
+        console.log(JSON.stringify([first.result, second.result]));
+    '''
+    output = subprocess.run(
+        ['node', '-e', script, os.path.join(ROOT, 'static', 'js', 'wire.js'),
+         base64.b64encode(full).decode(), base64.b64encode(delta).decode()],
+        capture_output=True, text=True, check=True).stdout
+    first_result, second_result = json.loads(output)
+
+    assert first_result['players']['alice']['hole_cards'] == [{'rank': '', 'suit': ''}] * 2
+    assert first_result['my_cards'] == [card('A♠'), card('K♠')]
+    assert first_result['server_time'] == 1760000000.5
+    assert first_result['deck_commitment'] == 'ab' * 32
+    assert second_result['current_pot'] == 90
+    assert sorted(second_result['players']) == ['alice', '机器人1']
+    assert second_result['my_sitting_out'] is True
+    assert second_result['my_cards'] is None
+
+
+def test_endpoint_frame_matches_json(app_module, seated_players):
+    clients, _ = seated_players(2)
+    state = clients[0].get('/api/get_game_state').get_json()
+    response = clients[0].get('/api/get_game_state?format=bin')
+    assert response.mimetype == 'application/octet-stream'
+    _, key, decoded, private = decode(response.data)
+
+    for name in ('game_state', 'current_pot', 'dealer_position', 'ready_players', 'config', 'variant'):
+        assert decoded[name] == state[name], name
+    assert sorted(decoded['players']) == sorted(state['players']) == ['player1', 'player2']
+    assert private['my_cards'] == state['my_cards']
+
+    # 带上自己的版本再轮询，牌桌没变时只有很短的增量帧
+    again = clients[0].get(f'/api/get_game_state?format=bin&since={key[0]}.{key[1]}').data
+    assert again[0] == FRAME_DELTA
+    assert decode(again, (key, decoded))[2] == decoded
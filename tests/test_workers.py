@@ -0,0 +1,115 @@
+"""后台任务池：同 key 按提交顺序串行，队列满时 WorkerBusy，CPU 任务超时"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from workers import WorkerBusy, WorkerPool
+
+
+def make_pool(max_pending=64, workers=4):
+    return WorkerPool('test', lambda: ThreadPoolExecutor(max_workers=workers), max_pending)
+
+
+@pytest.fixture
+def pool():
+    pool = make_pool()
+    yield pool
+    pool.shutdown()
+
+
+def test_same_key_runs_in_submission_order(pool):
+    ran = []
+    running = []
+    overlaps = []
+
+    def job(key, n):
+        running.append(key)
+        if running.count(key) > 1:
+            overlaps.append((key, n))
+        time.sleep(0.001 * (n % 3))
+        ran.append((key, n))
+        running.remove(key)
+
+    futures = [pool.submit(job, key, n, key=key) for n in range(30) for key in ('a', 'b')]
+    for future in futures:
+        future.result(5)
+    assert [n for key, n in ran if key == 'a'] == list(range(30))
+    assert [n for key, n in ran if key == 'b'] == list(range(30))
+    assert overlaps == []
+
+
+def test_keys_do_not_block_each_other(pool):
+    release = threading.Event()
+    blocked = pool.submit(release.wait, 5, key='a')
+    queued = pool.submit(lambda: 'a2', key='a')
+    assert pool.submit(lambda: 'b', key='b').result(2) == 'b'
+    assert not queued.done()
+    release.set()
+    assert blocked.result(2) and queued.result(2) == 'a2'
+
+
+def test_error_does_not_stop_the_key(pool):
+    failed = pool.submit(lambda: 1 / 0, key='a')
+    after = pool.submit(lambda: 'next', key='a')
+    with pytest.raises(ZeroDivisionError):
+        failed.result(2)
+    assert after.result(2) == 'next'
+
+
+def test_full_queue_raises_worker_busy():
+    pool = make_pool(max_pending=2)
+    release = threading.Event()
+    try:
+        # 执行中的和排队的都占容量
+        running = pool.submit(release.wait, 5, key='a')
+        queued = pool.submit(release.wait, 5, key='a')
+        with pytest.raises(WorkerBusy):
+            pool.submit(lambda: None, block=False)
+        started = time.monotonic()
+        with pytest.raises(WorkerBusy):
+            pool.submit(lambda: None, timeout=0.05)
+        assert time.monotonic() - started >= 0.05
+
+        # 任务完成后让出容量
+        release.set()
+        running.result(2)
+        queued.result(2)
+        assert pool.submit(lambda: 'ok', block=False).result(2) == 'ok'
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_blocked_submit_waits_for_a_slot():
+    pool = make_pool(max_pending=1)
+    try:
+        pool.submit(time.sleep, 0.05)
+        assert pool.submit(lambda: 'ok', timeout=2).result(2) == 'ok'
+    finally:
+        pool.shutdown()
+
+
+def test_shut_down_pool_runs_in_the_caller(pool):
+    pool.shutdown()
+    assert pool.submit(threading.current_thread).result(0) is threading.current_thread()
+
+
+def test_cpu_job_timeout(app_module, monkeypatch):
+    pool = make_pool(max_pending=2, workers=1)
+    monkeypatch.setattr(app_module, 'cpu_pool', pool)
+    monkeypatch.setattr(app_module, 'CPU_JOB_TIMEOUT', 0.05)
+    release = threading.Event()
+    try:
+        assert app_module.run_cpu_job(sum, [1, 2, 3]) == 6
+        with pytest.raises(WorkerBusy, match='超时'):
+            app_module.run_cpu_job(release.wait, 5)
+
+        # 超时的任务还占着容量，再提交一个后队列满，不等待直接 WorkerBusy
+        pool.submit(release.wait, 5)
+        with pytest.raises(WorkerBusy, match='已满'):
+            app_module.run_cpu_job(sum, [1])
+    finally:
+        release.set()
+        pool.shutdown()
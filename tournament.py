@@ -0,0 +1,210 @@
+"""锦标赛模式
+
+管理报名选手、定时盲注级别（含前注）和淘汰名次。盲注升级由调度器在到点时
+调用 advance_level，不在请求里轮询。
+
+牌桌程序（app.py）只有一张牌桌，锦标赛就在这张桌上进行：选手不超过每桌人数
+（SEAT_COUNT，8 人），开始时随机分配座位，之后不换桌。
+"""
+import random
+import time
+
+# 默认盲注结构：每级持续时间（秒）
+DEFAULT_BLIND_LEVELS = [
+    {'small_blind': 10, 'big_blind': 20, 'ante': 0, 'duration': 600},
+    {'small_blind': 15, 'big_blind': 30, 'ante': 0, 'duration': 600},
+    {'small_blind': 25, 'big_blind': 50, 'ante': 5, 'duration': 600},
+    {'small_blind': 50, 'big_blind': 100, 'ante': 10, 'duration': 600},
+    {'small_blind': 75, 'big_blind': 150, 'ante': 15, 'duration': 600},
+    {'small_blind': 100, 'big_blind': 200, 'ante': 25, 'duration': 600},
+    {'small_blind': 150, 'big_blind': 300, 'ante': 40, 'duration': 600},
+    {'small_blind': 200, 'big_blind': 400, 'ante': 50, 'duration': 600},
+    {'small_blind': 300, 'big_blind': 600, 'ante': 75, 'duration': 600},
+    {'small_blind': 500, 'big_blind': 1000, 'ante': 100, 'duration': 600},
+]
+
+
+class TournamentError(Exception):
+    """锦标赛操作错误（消息可以直接展示给用户）"""
+
+
+class Tournament:
+    """一场锦标赛的状态"""
+
+    def __init__(self, entrants, starting_chips=1000, levels=None, table_size=8, name='锦标赛'):
+        if len(entrants) < 2:
+            raise TournamentError('至少需要2名选手')
+        if len(set(entrants)) != len(entrants):
+            raise TournamentError('选手名单有重复')
+        if not 2 <= table_size <= 10:
+            raise TournamentError('每桌人数必须在2~10之间')
+        if len(entrants) > table_size:
+            raise TournamentError(f'锦标赛只有一张牌桌，最多 {table_size} 名选手')
+
+        self.name = name
+        self.table_size = table_size
+        self.starting_chips = starting_chips
+        self.levels = [dict(level) for level in (levels or DEFAULT_BLIND_LEVELS)]
+        self.status = 'registering'  # registering, running, finished
+        self.level_index = 0
+        self.level_started_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.players = {
+            pid: {'id': pid, 'chips': starting_chips, 'seat': None, 'place': None}
+            for pid in entrants
+        }
+        self.eliminations = []
+
+    # ---- 盲注级别 ----
+
+    def current_level(self):
+        """当前盲注级别"""
+        return self.levels[min(self.level_index, len(self.levels) - 1)]
+
+    def next_level_at(self):
+        """下一次升级的时间，已经是最后一级时返回 None"""
+        if self.status != 'running' or self.level_index >= len(self.levels) - 1:
+            return None
+        return self.level_started_at + self.current_level()['duration']
+
+    def advance_level(self, now=None):
+        """升到下一个盲注级别，返回是否有变化"""
+        if self.status != 'running' or self.level_index >= len(self.levels) - 1:
+            return False
+        now = time.time() if now is None else now
+        # 以计划时间为基准，避免调度延迟累积
+        self.level_started_at = self.next_level_at() or now
+        self.level_index += 1
+        return True
+
+    def catch_up_levels(self, now=None):
+        """补齐停机期间错过的升级"""
+        now = time.time() if now is None else now
+        changed = False
+        while self.next_level_at() is not None and self.next_level_at() <= now:
+            self.advance_level(now)
+            changed = True
+        return changed
+
+    # ---- 座位 ----
+
+    def start(self, now=None):
+        """随机分配座位并开始第一级盲注"""
+        if self.status != 'registering':
+            raise TournamentError('锦标赛已经开始')
+        now = time.time() if now is None else now
+        entrants = list(self.players)
+        random.shuffle(entrants)
+        for seat, pid in enumerate(entrants, 1):
+            self.players[pid]['seat'] = seat
+
+        self.status = 'running'
+        self.started_at = now
+        self.level_started_at = now
+        self.level_index = 0
+
+    def active_players(self):
+        """仍在比赛中的选手ID"""
+        return [pid for pid, p in self.players.items() if p['place'] is None]
+
+    def seats(self):
+        """在赛选手的座位：{座位号: 选手ID}"""
+        return {p['seat']: pid for pid, p in self.players.items() if p['place'] is None and p['seat'] is not None}
+
+    # ---- 筹码与淘汰 ----
+
+    def report_chips(self, chips_by_player, now=None):
+        """同步一手牌之后的筹码，筹码为0的选手被淘汰
+
+        同一手牌内被淘汰的多名选手，开局筹码多的名次靠前。
+        返回被淘汰的选手列表。
+        """
+        if self.status != 'running':
+            raise TournamentError('锦标赛未在进行中')
+        now = time.time() if now is None else now
+
+        busted = []
+        for pid, chips in chips_by_player.items():
+            player = self.players.get(pid)
+            if player is None or player['place'] is not None:
+                continue
+            if chips <= 0:
+                busted.append((player['chips'], pid))
+            player['chips'] = max(0, int(chips))
+
+        busted.sort()
+        eliminated = []
+        for _, pid in busted:
+            self.eliminate(pid, now)
+            eliminated.append(pid)
+        return eliminated
+
+    def eliminate(self, pid, now=None):
+        """淘汰一名选手并确定名次"""
+        player = self.players.get(pid)
+        if player is None:
+            raise TournamentError('选手不存在')
+        if player['place'] is not None:
+            raise TournamentError('该选手已经被淘汰')
+        now = time.time() if now is None else now
+
+        player['place'] = len(self.active_players())
+        player['chips'] = 0
+        player['eliminated_at'] = now
+        player['seat'] = None
+        self.eliminations.append(pid)
+
+        remaining = self.active_players()
+        if len(remaining) == 1:
+            self.players[remaining[0]]['place'] = 1
+            self.status = 'finished'
+            self.finished_at = now
+
+    # ---- 查询与持久化 ----
+
+    def standings(self):
+        """排名：在赛选手按筹码排序，淘汰选手按名次排序"""
+        active = sorted((p for p in self.players.values() if p['place'] is None), key=lambda p: -p['chips'])
+        finished = sorted((p for p in self.players.values() if p['place'] is not None), key=lambda p: p['place'])
+        return active + finished
+
+    def status_summary(self):
+        """供接口返回的状态摘要"""
+        return {
+            'name': self.name,
+            'status': self.status,
+            'level': self.level_index + 1,
+            'current_level': self.current_level(),
+            'next_level': self.levels[self.level_index + 1] if self.level_index + 1 < len(self.levels) else None,
+            'level_started_at': self.level_started_at,
+            'next_level_at': self.next_level_at(),
+            'players_left': len(self.active_players()),
+            'entrants': len(self.players),
+            'seats': {str(seat): pid for seat, pid in sorted(self.seats().items())},
+            'standings': self.standings(),
+        }
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'table_size': self.table_size,
+            'starting_chips': self.starting_chips,
+            'levels': self.levels,
+            'status': self.status,
+            'level_index': self.level_index,
+            'level_started_at': self.level_started_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'players': self.players,
+            'eliminations': self.eliminations,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tournament = cls(list(data['players']), data['starting_chips'], data['levels'],
+                         data['table_size'], data.get('name', '锦标赛'))
+        for field in ('status', 'level_index', 'level_started_at', 'started_at', 'finished_at',
+                      'players', 'eliminations'):
+            setattr(tournament, field, data[field])
+        return tournament
@@ -0,0 +1,245 @@
+"""牌桌状态的紧凑二进制协议
+
+轮询 get_game_state 时带 format=bin 返回二进制帧，代替带 unicode 花色、
+重复玩家字典的 JSON：
+
+- 整数用 varint（LEB128），可为空的整数和时间戳（毫秒）加 1 存放，0 表示空
+- 牌用 0~51 的整数（点数 × 4 + 花色，和 hand_evaluator 一致），一张一个字节
+- 玩家是定长字段的记录数组（带座位号），只含页面用到的字段；别人的底牌只传张数
+- 很少变化或结构不定的部分（配置、结算信息、合法行动）嵌入 JSON 文本
+
+帧格式：
+    类型(0 完整 / 1 增量) varint版本 varint校验
+    [增量帧: varint基准版本 varint基准校验]
+    varint公共字段掩码 公共字段... varint私有字段掩码 私有字段...
+
+公共状态用 (版本, 校验) 标识，服务器保留最近 WIRE_HISTORY 个。客户端带上
+自己手里的 since=<版本>.<校验> 时只返回变化的字段（玩家只返回变化的记录和
+离开的玩家），基准已经不在缓存里就返回完整帧。私有字段（自己的底牌、合法
+行动等）每帧都完整发送，掩码里没有的字段为空。
+"""
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+from hand_evaluator import card_to_int
+
+FRAME_FULL = 0
+FRAME_DELTA = 1
+
+# 服务器保留多少个历史公共状态用于计算增量
+WIRE_HISTORY = 64
+
+GAME_STATES = ('waiting', 'ready_phase', 'playing', 'showdown', 'hand_ended')
+BETTING_ROUNDS = ('preflop', 'flop', 'turn', 'river')
+
+# 玩家状态标志位
+PLAYER_FLAGS = ('folded', 'all_in', 'away', 'sitting_out', 'bot')
+
+
+def write_uint(out, value):
+    """无符号 varint"""
+    value = int(value)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def write_optional_uint(out, value):
+    write_uint(out, 0 if value is None else int(value) + 1)
+
+
+def write_time(out, seconds):
+    """时间戳按毫秒存放，空为 0"""
+    write_uint(out, 0 if seconds is None else int(round(seconds * 1000)) + 1)
+
+
+def write_str(out, text):
+    data = text.encode('utf-8')
+    write_uint(out, len(data))
+    out.extend(data)
+
+
+def write_hex(out, text):
+    """十六进制串（哈希、种子）按原始字节存放，空为长度 0"""
+    write_uint(out, len(text) // 2 if text else 0)
+    if text:
+        out.extend(bytes.fromhex(text))
+
+
+def write_json(out, value):
+    write_str(out, json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+
+
+def write_enum(out, value, values):
+    """枚举写下标；不在表里的值写 len(values) 再写字符串"""
+    if value in values:
+        write_uint(out, values.index(value))
+    else:
+        write_uint(out, len(values))
+        write_str(out, str(value))
+
+
+def write_cards(out, cards):
+    write_uint(out, len(cards))
+    for card in cards:
+        out.append(card if isinstance(card, int) else card_to_int(card))
+
+
+def write_player(out, player_id, player):
+    write_str(out, player_id)
+    write_optional_uint(out, player.get('position'))
+    write_uint(out, player.get('chips', 0))
+    write_uint(out, player.get('current_bet', 0))
+    write_uint(out, player.get('borrow_count', 1))
+    flags = 0
+    for bit, name in enumerate(PLAYER_FLAGS):
+        if player.get(name):
+            flags |= 1 << bit
+    write_uint(out, flags)
+    write_uint(out, len(player.get('hole_cards') or []))
+
+
+def _encoded(write, *args):
+    out = bytearray()
+    write(out, *args)
+    return bytes(out)
+
+
+# 公共字段（顺序即掩码的位）
+PUBLIC_FIELDS = (
+    ('game_state', lambda out, v: write_enum(out, v, GAME_STATES)),
+    ('current_pot', write_uint),
+    ('community_cards', write_cards),
+    ('current_player', write_optional_uint),
+    ('betting_round', lambda out, v: write_enum(out, v, BETTING_ROUNDS)),
+    ('min_bet', write_uint),
+    ('dealer_position', write_optional_uint),
+    ('auto_deal', lambda out, v: write_uint(out, 1 if v else 0)),
+    ('ready_players', lambda out, v: (write_uint(out, len(v)), [write_str(out, pid) for pid in v])),
+    ('deadline', write_time),
+    ('action_deadline', write_time),
+    ('hand_id', lambda out, v: write_str(out, v or '')),
+    ('variant', write_str),
+    ('config', write_json),
+    ('variants', write_json),
+    ('hand_results', write_json),
+    ('deck_commitment', write_hex),
+    ('deck_seed', write_hex),
+    ('players', None),  # 单独处理：变化的玩家记录 + 离开的玩家
+)
+PLAYERS_BIT = len(PUBLIC_FIELDS) - 1
+
+# 私有字段，值为空（None/False）时不在掩码里
+PRIVATE_FIELDS = (
+    ('my_cards', write_cards),
+    ('my_preflop_equity', lambda out, v: write_uint(out, round(v * 10000))),
+    ('my_hand_label', write_str),
+    ('my_pre_action', write_json),
+    ('my_legal_actions', write_json),
+    ('my_sitting_out', lambda out, v: None),
+    ('server_time', write_time),
+)
+
+
+class _PublicFrame:
+    """一个公共状态的各字段编码结果"""
+
+    def __init__(self, public_state):
+        self.version = public_state.get('version', 0)
+        self.fields = [_encoded(write, public_state.get(name)) if write else None
+                       for name, write in PUBLIC_FIELDS]
+        self.players = {pid: _encoded(write_player, pid, player)
+                        for pid, player in public_state['players'].items()}
+        crc = 0
+        for data in self.fields[:PLAYERS_BIT]:
+            crc = zlib.crc32(data, crc)
+        for pid in sorted(self.players):
+            crc = zlib.crc32(self.players[pid], crc)
+        self.crc = crc
+
+    @property
+    def key(self):
+        return self.version, self.crc
+
+
+class WireEncoder:
+    """编码二进制帧，保留最近的公共状态用于增量"""
+
+    def __init__(self, history=WIRE_HISTORY):
+        self._lock = threading.Lock()
+        self._history = OrderedDict()  # (版本, 校验) -> _PublicFrame
+        self._history_size = history
+        self._last_state = None
+        self._last_frame = None
+
+    def _public_frame(self, public_state):
+        """同一个公共状态对象（single-flight 合并的轮询共用）只编码一次"""
+        with self._lock:
+            if public_state is self._last_state:
+                return self._last_frame
+        frame = _PublicFrame(public_state)
+        with self._lock:
+            self._history[frame.key] = frame
+            self._history.move_to_end(frame.key)
+            while len(self._history) > self._history_size:
+                self._history.popitem(last=False)
+            self._last_state, self._last_frame = public_state, frame
+        return frame
+
+    def encode(self, public_state, private_state, since=None):
+        """编码一帧；since 为客户端已有的 (版本, 校验)，在缓存里时返回增量帧"""
+        frame = self._public_frame(public_state)
+        with self._lock:
+            base = self._history.get(since) if since is not None else None
+
+        out = bytearray()
+        out.append(FRAME_DELTA if base is not None else FRAME_FULL)
+        write_uint(out, frame.version)
+        write_uint(out, frame.crc)
+        if base is not None:
+            write_uint(out, base.version)
+            write_uint(out, base.crc)
+
+        mask = 0
+        body = bytearray()
+        for bit, data in enumerate(frame.fields[:PLAYERS_BIT]):
+            if base is None or base.fields[bit] != data:
+                mask |= 1 << bit
+                body.extend(data)
+        old_players = base.players if base is not None else {}
+        changed = [data for pid, data in frame.players.items() if old_players.get(pid) != data]
+        removed = [pid for pid in old_players if pid not in frame.players]
+        if base is None or changed or removed:
+            mask |= 1 << PLAYERS_BIT
+            write_uint(body, len(changed))
+            for data in changed:
+                body.extend(data)
+            write_uint(body, len(removed))
+            for pid in removed:
+                write_str(body, pid)
+        write_uint(out, mask)
+        out.extend(body)
+
+        mask = 0
+        body = bytearray()
+        for bit, (name, write) in enumerate(PRIVATE_FIELDS):
+            value = private_state.get(name)
+            if value is None or value is False:
+                continue
+            mask |= 1 << bit
+            write(body, value)
+        write_uint(out, mask)
+        out.extend(body)
+        return bytes(out)
+
+
+def parse_since(value):
+    """解析客户端的 since=<版本>.<校验>，格式不对返回 None"""
+    try:
+        version, crc = value.split('.')
+        return int(version), int(crc)
+    except (AttributeError, ValueError):
+        return None
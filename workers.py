@@ -0,0 +1,182 @@
+"""后台任务池
+
+请求线程里不做重计算和慢 I/O，交给这里的两个池：
+
+- cpu_pool：进程池，跑手牌批量评估、听牌分析、结算等 CPU 密集任务。
+  工作进程降低优先级运行，重计算时玩家操作的请求线程优先拿到 CPU。
+  工作进程用 forkserver（没有时用 spawn）启动，会以 __mp_main__ 的名字重新导入
+  主模块，主模块在这种情况下不能有启动服务的副作用
+- io_pool：线程池，跑存盘等 I/O 任务
+
+两个池都有容量上限（排队 + 执行中的任务数），满了以后提交方可以选择
+等待或立即得到 WorkerBusy。提交时带 key 的任务按 key 串行、按提交顺序
+执行（例如同一张牌桌的存盘不会乱序）；不同 key 之间互不影响。提交返回
+concurrent.futures.Future，调用方需要结果时用 result(timeout) 等待。
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# 进程池大小（留一个核给请求线程）
+CPU_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+IO_WORKERS = 4
+
+# 每个池最多同时排队 + 执行的任务数
+CPU_MAX_PENDING = 32
+IO_MAX_PENDING = 1024
+
+# CPU 任务进程的 nice 值增量
+CPU_NICE = 10
+
+
+class WorkerBusy(Exception):
+    """任务队列已满"""
+
+
+def _lower_priority():
+    """进程池工作进程的初始化：降低调度优先级"""
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(CPU_NICE)
+        except OSError:
+            pass
+
+
+def _process_context():
+    """进程池的启动方式
+
+    不用 Linux 默认的 fork：进程池在第一次提交任务时才创建，这时进程里已经有调度器、
+    存盘等线程在跑，fork 出的子进程可能继承一把正被别的线程持有的锁而死锁
+    （Python 3.12 起也会为此告警）。
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class WorkerPool:
+    """带容量上限和按 key 串行的任务池"""
+
+    def __init__(self, name, executor_factory, max_pending):
+        self.name = name
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._queues = {}  # key -> 等待前一个任务完成的任务
+        self._closed = False
+
+    def _get_executor(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f'{self.name} 任务池已关闭')
+            if self._executor is None:
+                self._executor = self._executor_factory()
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def submit(self, fn, *args, key=None, block=True, timeout=None, **kwargs):
+        """提交任务，返回 Future
+
+        key 相同的任务按提交顺序一个接一个执行。队列满时 block=True 等待空位
+        （最多 timeout 秒），block=False 或等待超时抛出 WorkerBusy。
+        """
+        acquired = self._slots.acquire(timeout=timeout) if block else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise WorkerBusy(f'{self.name} 任务队列已满')
+
+        job = (fn, args, kwargs, Future())
+        with self._lock:
+            if key is not None and key in self._queues:
+                self._queues[key].append(job)
+                return job[3]
+            if key is not None:
+                self._queues[key] = deque()
+        self._dispatch(job, key)
+        return job[3]
+
+    def _submit_to_executor(self, fn, args, kwargs):
+        """交给执行器，池已关闭（解释器退出中）时返回 None"""
+        try:
+            try:
+                return self._get_executor().submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # 工作进程异常退出后整个进程池不可用，换一个新的
+                self._reset_executor()
+                return self._get_executor().submit(fn, *args, **kwargs)
+        except RuntimeError:
+            return None
+
+    def _dispatch(self, job, key):
+        """开始执行任务；同步完成的（已取消、池已关闭）接着开始同一个 key 的下一个"""
+        while job is not None:
+            fn, args, kwargs, future = job
+            if future.set_running_or_notify_cancel():
+                inner = self._submit_to_executor(fn, args, kwargs)
+                if inner is not None:
+                    inner.add_done_callback(lambda inner, future=future: self._complete(inner, future, key))
+                    return
+                # 池已关闭：在当前线程里执行完，保证存盘不丢
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as exc:
+                    future.set_exception(exc)
+            job = self._release(key)
+
+    def _complete(self, inner, future, key):
+        exc = inner.exception()
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(inner.result())
+        self._dispatch(self._release(key), key)
+
+    def _release(self, key):
+        """释放容量，取出同一个 key 的下一个任务"""
+        self._slots.release()
+        if key is None:
+            return None
+        with self._lock:
+            queue = self._queues[key]
+            if not queue:
+                del self._queues[key]
+                return None
+            return queue.popleft()
+
+    def wait_idle(self, key, timeout=None):
+        """等待 key 之前提交的任务全部完成"""
+        self.submit(_noop, key=key, timeout=timeout).result(timeout)
+
+    def shutdown(self):
+        """关闭执行器（等待已开始的任务完成），之后提交的任务在提交线程里直接执行"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _noop():
+    return None
+
+
+cpu_pool = WorkerPool('CPU', lambda: ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=_process_context(),
+                                                         initializer=_lower_priority),
+                      CPU_MAX_PENDING)
+io_pool = WorkerPool('I/O', lambda: ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='io-worker'),
+                     IO_MAX_PENDING)
+
+
+@atexit.register
+def shutdown():
+    """退出时等待已提交的任务完成"""
+    io_pool.shutdown()
+    cpu_pool.shutdown()